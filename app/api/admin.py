@@ -6,19 +6,25 @@
 - 系统统计信息
 - 数据库状态
 - 配置信息查看（只读）
+- SQL 查询统计和慢查询
+- 性能剖析结果
 """
 
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.dependencies import get_db
 from app.config import settings
 from app.db.database import check_connection, get_engine
+from app.db.instrumentation import query_monitor
+from app.utils.exceptions import NotFoundError
+from app.utils.profiling import profile_store
 from app.utils.response import success_response
+from app.utils.cache import response_cache
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -310,3 +316,173 @@ async def get_stats_overview(
         data=stats,
         message="系统概览统计获取成功"
     )
+
+
+@router.get(
+    "/cache/stats",
+    response_model=dict,
+    summary="获取响应缓存统计",
+    description="获取响应缓存的命中率、后端类型等统计信息",
+)
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    获取响应缓存统计
+
+    Returns:
+        dict: 响应缓存统计信息
+    """
+    return success_response(
+        data=response_cache.stats(),
+        message="缓存统计信息获取成功"
+    )
+
+
+@router.delete(
+    "/cache",
+    response_model=dict,
+    summary="清空响应缓存",
+    description="清空所有响应缓存，可选只失效指定标签",
+)
+async def clear_cache(
+    tag: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    清空响应缓存
+
+    Args:
+        tag: 缓存标签（可选），提供时只失效该标签下的缓存
+
+    Returns:
+        dict: 操作结果
+    """
+    if tag:
+        count = await response_cache.ainvalidate_tags(tag)
+        return success_response(
+            data={"tag": tag, "invalidated": count},
+            message="缓存标签已失效"
+        )
+
+    await response_cache.aclear()
+    return success_response(message="响应缓存已清空")
+
+
+@router.get(
+    "/db/queries",
+    response_model=dict,
+    summary="获取 SQL 查询统计",
+    description="按语句指纹汇总查询次数和耗时，并返回最近的慢查询和 N+1 告警次数",
+)
+async def get_query_stats(
+    limit: int = Query(20, ge=1, le=200, description="返回的语句指纹数量"),
+    order_by: str = Query(
+        "total_time",
+        pattern="^(total_time|count|max_time|avg_time)$",
+        description="排序字段：total_time / count / max_time / avg_time",
+    ),
+) -> Dict[str, Any]:
+    """
+    获取 SQL 查询统计
+
+    Args:
+        limit: 返回的语句指纹数量
+        order_by: 排序字段
+
+    Returns:
+        dict: 查询统计汇总
+    """
+    return success_response(
+        data=query_monitor.summary(limit=limit, order_by=order_by),
+        message="查询统计获取成功"
+    )
+
+
+@router.delete(
+    "/db/queries",
+    response_model=dict,
+    summary="清空 SQL 查询统计",
+    description="清空按指纹汇总的查询统计和慢查询记录",
+)
+async def reset_query_stats() -> Dict[str, Any]:
+    """
+    清空 SQL 查询统计
+
+    Returns:
+        dict: 操作结果
+    """
+    query_monitor.reset()
+    return success_response(message="查询统计已清空")
+
+
+@router.get(
+    "/profiles",
+    response_model=dict,
+    summary="获取性能剖析结果列表",
+    description="列出最近的按请求性能剖析结果（最新的在前），包括数据库耗时和 Python 耗时拆分",
+)
+async def list_profiles() -> Dict[str, Any]:
+    """
+    获取性能剖析结果列表
+
+    Returns:
+        dict: 剖析结果元数据列表
+    """
+    return success_response(
+        data=profile_store.list(),
+        message="剖析结果列表获取成功"
+    )
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_model=dict,
+    summary="获取性能剖析报告",
+    description="获取单个剖析结果的元数据和 pstats 文本报告",
+)
+async def get_profile(
+    profile_id: str,
+    sort: str = Query(
+        "cumulative",
+        pattern="^(cumulative|tottime|ncalls|pcalls)$",
+        description="排序字段：cumulative / tottime / ncalls / pcalls",
+    ),
+    limit: int = Query(30, ge=1, le=500, description="输出的函数数量"),
+) -> Dict[str, Any]:
+    """
+    获取性能剖析报告
+
+    Args:
+        profile_id: 剖析结果 ID（响应头 X-Profile-Id）
+        sort: 排序字段
+        limit: 输出的函数数量
+
+    Returns:
+        dict: 剖析结果元数据和文本报告
+
+    Raises:
+        NotFoundError: 剖析结果不存在或已被淘汰
+    """
+    meta = profile_store.get(profile_id)
+    if meta is None:
+        raise NotFoundError(message=f"剖析结果 {profile_id} 不存在")
+
+    return success_response(
+        data={**meta, "report": profile_store.report(profile_id, sort=sort, limit=limit)},
+        message="剖析报告获取成功"
+    )
+
+
+@router.delete(
+    "/profiles",
+    response_model=dict,
+    summary="清空性能剖析结果",
+    description="清空内存中的剖析结果（已写入目录的 .prof 文件不会删除）",
+)
+async def clear_profiles() -> Dict[str, Any]:
+    """
+    清空性能剖析结果
+
+    Returns:
+        dict: 操作结果
+    """
+    profile_store.clear()
+    return success_response(message="剖析结果已清空")
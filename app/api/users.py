@@ -19,6 +19,7 @@ from app.schemas.user_schema import (
 from app.repositories.base import PaginationResult
 from app.models.user_model import User
 from app.utils.response import success_response
+from app.utils.cache import cache_response
 
 # 创建路由器
 router = APIRouter(prefix="/users", tags=["用户"])
@@ -70,11 +71,12 @@ async def create_user(
 
 
 @router.get(
-    "/{user_id}",
+    "/{user_id:int}",
     response_model=dict,
     summary="获取用户",
     description="根据 ID 获取用户信息",
 )
+@cache_response(tags=("users",))
 async def get_user(
     user_id: int,
     service: UserService = Depends(get_user_service),
@@ -97,7 +99,7 @@ async def get_user(
 
 
 @router.put(
-    "/{user_id}",
+    "/{user_id:int}",
     response_model=dict,
     summary="更新用户",
     description="更新用户信息",
@@ -126,7 +128,7 @@ async def update_user(
 
 
 @router.delete(
-    "/{user_id}",
+    "/{user_id:int}",
     response_model=dict,
     status_code=status.HTTP_200_OK,
     summary="删除用户",
@@ -156,6 +158,7 @@ async def delete_user(
     summary="获取用户列表",
     description="分页获取用户列表",
 )
+@cache_response(tags=("users",))
 async def get_users(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
@@ -203,6 +206,7 @@ async def get_users(
     summary="搜索用户",
     description="根据关键词搜索用户",
 )
+@cache_response(tags=("users",))
 async def search_users(
     keyword: str = Query(..., min_length=1, description="搜索关键词"),
     page: int = Query(1, ge=1, description="页码"),
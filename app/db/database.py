@@ -10,6 +10,7 @@ from sqlalchemy.pool import QueuePool
 from sqlalchemy.engine import Engine as EngineType
 
 from app.config import settings
+from app.db.instrumentation import instrument_engine, query_monitor
 
 
 # 全局数据库引擎实例
@@ -43,6 +44,21 @@ def get_engine() -> Engine:
             echo=settings.debug,  # 调试模式下打印 SQL 语句
         )
         
+        # 注册 SQL 查询监控（慢查询、N+1 检测）和查询指标，两者各自由配置开关控制
+        if settings.db_instrumentation_enabled:
+            query_monitor.configure(
+                slow_query_ms=settings.db_slow_query_ms,
+                explain_slow_queries=settings.db_explain_slow_queries,
+                n_plus_one_threshold=settings.db_n_plus_one_threshold,
+                slow_query_log_size=settings.db_slow_query_log_size,
+            )
+        if settings.db_instrumentation_enabled or settings.metrics_enabled:
+            instrument_engine(
+                _engine,
+                metrics=settings.metrics_enabled,
+                monitoring=settings.db_instrumentation_enabled,
+            )
+
         # 注册连接事件监听器（可选，用于日志记录）
         if settings.debug:
             @event.listens_for(_engine, "connect")
@@ -0,0 +1,381 @@
+"""
+SQL 查询监控模块
+
+基于 SQLAlchemy 引擎事件（before_cursor_execute / after_cursor_execute）的查询监控，包括：
+- 每条 SQL 的执行耗时
+- 语句指纹：去掉字面量和 IN 列表长度差异，把同一类查询聚合统计
+- 请求级查询计数：同一请求内同一指纹执行次数超过阈值时告警（N+1 查询）
+- 慢查询日志：超过阈值的查询记录到慢查询列表，可选捕获 EXPLAIN 执行计划
+- Prometheus 查询次数和耗时指标
+
+统计结果通过 query_monitor 获取，管理后台接口 /admin/db/queries 展示汇总信息。
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.context import add_timing, get_request_context
+from app.utils.logger import get_logger
+from app.utils.metrics import observe_db_query
+
+# 配置日志
+logger = get_logger(__name__)
+
+
+# ==================== 语句指纹 ====================
+
+_COMMENT_PATTERN = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING_PATTERN = re.compile(r"'(?:''|[^'])*'")
+_NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_PATTERN = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\?")
+_IN_LIST_PATTERN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """
+    计算 SQL 语句指纹
+
+    字面量和各种参数占位符统一替换为 ?，IN 列表折叠为 IN (...)，空白合并。
+    ORM 生成的语句文本高度重复，结果使用 LRU 缓存。
+
+    Args:
+        statement: SQL 语句
+
+    Returns:
+        str: 语句指纹
+
+    Example:
+        ```python
+        fingerprint("SELECT * FROM users WHERE id IN (1, 2, 3) AND name = 'a'")
+        # 'SELECT * FROM users WHERE id IN (...) AND name = ?'
+        ```
+    """
+    normalized = _COMMENT_PATTERN.sub(" ", statement)
+    normalized = _STRING_PATTERN.sub("?", normalized)
+    normalized = _PLACEHOLDER_PATTERN.sub("?", normalized)
+    normalized = _NUMBER_PATTERN.sub("?", normalized)
+    normalized = _IN_LIST_PATTERN.sub("IN (...)", normalized)
+    return _WHITESPACE_PATTERN.sub(" ", normalized).strip()
+
+
+def statement_operation(statement: str) -> str:
+    """
+    获取 SQL 语句的操作类型
+
+    Returns:
+        str: SELECT / INSERT / UPDATE / DELETE / OTHER
+    """
+    parts = statement.lstrip().split(None, 1)
+    keyword = parts[0].upper() if parts else ""
+    if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        return keyword
+    return "OTHER"
+
+
+# ==================== 查询统计 ====================
+
+class QueryMonitor:
+    """
+    查询统计器
+
+    按指纹聚合查询次数和耗时，并保存最近的慢查询。线程安全。
+    """
+
+    # 超出指纹数量上限后的聚合键
+    OTHER_FINGERPRINT = "<other>"
+
+    def __init__(
+        self,
+        slow_query_ms: float = 200.0,
+        explain_slow_queries: bool = False,
+        n_plus_one_threshold: int = 10,
+        slow_query_log_size: int = 100,
+        max_fingerprints: int = 1000,
+    ):
+        """
+        初始化查询统计器
+
+        Args:
+            slow_query_ms: 慢查询阈值（毫秒）
+            explain_slow_queries: 是否为慢查询捕获 EXPLAIN 执行计划（仅 SELECT）
+            n_plus_one_threshold: 同一请求内同一指纹执行次数达到该值时告警，0 表示关闭
+            slow_query_log_size: 保留的慢查询条数
+            max_fingerprints: 最多统计的指纹数量
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow_queries = explain_slow_queries
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._slow_queries: Deque[Dict[str, Any]] = deque(maxlen=slow_query_log_size)
+        self.total_queries = 0
+        self.n_plus_one_warnings = 0
+
+    def configure(
+        self,
+        slow_query_ms: Optional[float] = None,
+        explain_slow_queries: Optional[bool] = None,
+        n_plus_one_threshold: Optional[int] = None,
+        slow_query_log_size: Optional[int] = None,
+    ) -> None:
+        """
+        更新监控参数，未传入的参数保持不变
+
+        Args:
+            slow_query_ms: 慢查询阈值（毫秒）
+            explain_slow_queries: 是否为慢查询捕获 EXPLAIN 执行计划
+            n_plus_one_threshold: N+1 告警阈值
+            slow_query_log_size: 保留的慢查询条数
+        """
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        if explain_slow_queries is not None:
+            self.explain_slow_queries = explain_slow_queries
+        if n_plus_one_threshold is not None:
+            self.n_plus_one_threshold = n_plus_one_threshold
+        if slow_query_log_size is not None and slow_query_log_size != self._slow_queries.maxlen:
+            with self._lock:
+                self._slow_queries = deque(self._slow_queries, maxlen=slow_query_log_size)
+
+    def record(self, statement: str, duration: float) -> str:
+        """
+        记录一次查询
+
+        Args:
+            statement: SQL 语句
+            duration: 耗时（秒）
+
+        Returns:
+            str: 语句指纹
+        """
+        key = fingerprint(statement)
+        with self._lock:
+            self.total_queries += 1
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = self.OTHER_FINGERPRINT
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = {"count": 0, "total_time": 0.0, "max_time": 0.0}
+            stats["count"] += 1
+            stats["total_time"] += duration
+            if duration > stats["max_time"]:
+                stats["max_time"] = duration
+        return key
+
+    def record_slow_query(
+        self,
+        statement: str,
+        duration: float,
+        explain: Optional[List[Any]] = None,
+    ) -> None:
+        """
+        记录一条慢查询
+
+        只记录语句文本（参数以占位符形式出现），不记录参数值：
+        参数中可能有密码哈希、令牌等敏感数据，而慢查询会写入日志并通过管理后台接口返回。
+        """
+        context = get_request_context()
+        entry: Dict[str, Any] = {
+            "fingerprint": fingerprint(statement),
+            "statement": statement,
+            "duration_ms": round(duration * 1000, 3),
+            "request_id": context.request_id if context else None,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+        if explain is not None:
+            entry["explain"] = explain
+        with self._lock:
+            self._slow_queries.append(entry)
+        logger.warning(
+            "慢查询 %.1fms: %s",
+            duration * 1000,
+            entry["fingerprint"],
+            extra={"extra_fields": {"event": "slow_query", **entry}},
+        )
+
+    def summary(self, limit: int = 20, order_by: str = "total_time") -> Dict[str, Any]:
+        """
+        获取查询统计汇总
+
+        Args:
+            limit: 返回的指纹数量
+            order_by: 排序字段（total_time / count / max_time / avg_time）
+
+        Returns:
+            dict: 汇总信息，包括总查询数、按指纹统计的前 N 项和最近的慢查询
+        """
+        with self._lock:
+            rows: List[Dict[str, Any]] = [
+                {
+                    "fingerprint": key,
+                    "count": int(stats["count"]),
+                    "total_time_ms": round(stats["total_time"] * 1000, 3),
+                    "avg_time_ms": round(stats["total_time"] / stats["count"] * 1000, 3),
+                    "max_time_ms": round(stats["max_time"] * 1000, 3),
+                }
+                for key, stats in self._stats.items()
+            ]
+            slow_queries = list(self._slow_queries)
+            total_queries = self.total_queries
+            n_plus_one_warnings = self.n_plus_one_warnings
+
+        sort_key = {
+            "count": "count",
+            "max_time": "max_time_ms",
+            "avg_time": "avg_time_ms",
+        }.get(order_by, "total_time_ms")
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+        return {
+            "total_queries": total_queries,
+            "fingerprints": len(rows),
+            "n_plus_one_warnings": n_plus_one_warnings,
+            "slow_query_ms": self.slow_query_ms,
+            "top_queries": rows[:limit],
+            "slow_queries": list(reversed(slow_queries)),
+        }
+
+    def reset(self) -> None:
+        """清空所有统计"""
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+            self.total_queries = 0
+            self.n_plus_one_warnings = 0
+
+    def check_n_plus_one(self, key: str) -> None:
+        """
+        请求级查询计数与 N+1 检测
+
+        同一请求内同一指纹执行次数恰好达到阈值时告警一次。
+        """
+        context = get_request_context()
+        if context is None:
+            return
+        context.query_count += 1
+        count = context.query_fingerprints.get(key, 0) + 1
+        context.query_fingerprints[key] = count
+        if self.n_plus_one_threshold and count == self.n_plus_one_threshold:
+            with self._lock:
+                self.n_plus_one_warnings += 1
+            logger.warning(
+                "疑似 N+1 查询：同一请求内执行 %d 次: %s",
+                count,
+                key,
+                extra={"extra_fields": {"event": "n_plus_one", "fingerprint": key, "count": count}},
+            )
+
+
+# 全局查询统计器（instrument_engine 时按配置更新阈值）
+query_monitor = QueryMonitor()
+
+
+# ==================== 引擎事件 ====================
+
+# EXPLAIN 使用的保存点名称
+_EXPLAIN_SAVEPOINT = "query_monitor_explain"
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[List[Any]]:
+    """
+    为慢查询执行 EXPLAIN，失败时返回 None
+
+    直接使用底层 DBAPI 游标（不会再次触发引擎事件）。连接处于事务中时包在保存点里执行，
+    结束后回滚到保存点：EXPLAIN 出错（PostgreSQL 中任何出错的语句都会使整个事务失效）
+    不会影响调用方的事务。
+    """
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    savepoint = conn.in_transaction()
+    cursor = None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [list(row) for row in cursor.fetchall()]
+        finally:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+    except Exception as e:
+        logger.debug(f"EXPLAIN 执行失败: {e}")
+        return None
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+def instrument_engine(
+    engine: Engine,
+    monitor: Optional[QueryMonitor] = None,
+    metrics: bool = True,
+    monitoring: bool = True,
+) -> None:
+    """
+    为数据库引擎注册查询监控
+
+    重复调用是安全的，同一个引擎只会注册一次。
+
+    Args:
+        engine: SQLAlchemy 引擎
+        monitor: 查询统计器，默认使用全局 query_monitor
+        metrics: 是否记录 Prometheus 指标
+        monitoring: 是否启用查询统计（指纹聚合、N+1 检测、慢查询日志），
+            为 False 时只记录耗时和 Prometheus 指标
+    """
+    if getattr(engine, "_query_instrumented", False):
+        return
+    monitor = monitor or query_monitor
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_query_start")
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+
+        add_timing("db", duration)
+        if metrics:
+            observe_db_query(statement_operation(statement), duration)
+        if not monitoring:
+            return
+
+        key = monitor.record(statement, duration)
+        monitor.check_n_plus_one(key)
+        if duration * 1000 >= monitor.slow_query_ms:
+            explain = None
+            if (
+                monitor.explain_slow_queries
+                and not executemany
+                and statement_operation(statement) == "SELECT"
+            ):
+                explain = _explain(conn, statement, parameters)
+            monitor.record_slow_query(statement, duration, explain)
+
+    setattr(engine, "_query_instrumented", True)
+
+
+__all__ = [
+    "fingerprint",
+    "statement_operation",
+    "QueryMonitor",
+    "query_monitor",
+    "instrument_engine",
+]
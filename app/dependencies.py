@@ -3,17 +3,24 @@
 
 提供 FastAPI 依赖注入功能，包括：
 - 数据库依赖
-- 认证依赖框架（可扩展）
+- 认证依赖框架（可扩展，支持同步 / 异步认证函数和认证结果缓存）
 - 权限检查依赖框架（可扩展）
 
 此模块提供了基础框架，项目可以根据实际需求扩展认证和权限检查逻辑。
 """
 
+import functools
+import inspect
 from typing import Optional, Callable, Protocol, Any
+
+import anyio.from_thread
 from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
 
 from app.db.session import get_db as _get_db
+from app.utils.auth_cache import auth_cache, extract_user_id
 from app.utils.exceptions import UnauthorizedError, ForbiddenError
+from app.utils.context import set_user_id
 
 
 # ==================== 数据库依赖 ====================
@@ -41,7 +48,8 @@ _authentication_function: Optional[Callable[[Request], Optional[AuthenticatedUse
 
 
 def set_authentication_function(
-    func: Callable[[Request], Optional[AuthenticatedUser]]
+    func: Callable[[Request], Optional[AuthenticatedUser]],
+    deserialize: Optional[Callable[[Any], AuthenticatedUser]] = None,
 ) -> None:
     """
     设置认证函数
@@ -52,8 +60,18 @@ def set_authentication_function(
     - 返回认证用户对象（如果认证成功）
     - 返回 None（如果认证失败，依赖会自动抛出 UnauthorizedError）
     
+    认证函数可以是同步函数或 async 函数。token 校验需要网络 / 数据库 IO 时，
+    推荐使用 async 函数并在路由中依赖 get_current_user_async。
+    设置新的认证函数会清空认证结果缓存。
+
+    启用 auth_cache_enabled 时需要同时提供 deserialize：缓存保存的是用户对象序列化后的数据
+    （jsonable_encoder 的结果），命中时用 deserialize 还原为与认证函数返回值相同类型的新对象。
+    未提供时认证结果不缓存。
+
     Args:
         func: 认证函数，接收 Request，返回用户对象或 None
+        deserialize: 从缓存数据（dict）还原用户对象的函数（可选，启用认证缓存时需要），
+            未提供时认证缓存不生效
         
     Example:
         ```python
@@ -70,12 +88,15 @@ def set_authentication_function(
             user = verify_token(token)
             return user
         
-        # 设置认证函数
-        set_authentication_function(my_auth_function)
+        # 设置认证函数（启用认证缓存时同时提供还原函数）
+        set_authentication_function(my_auth_function, deserialize=CurrentUser.model_validate)
         ```
     """
     global _authentication_function
     _authentication_function = func
+    # 还原函数与认证函数配套，未提供时不沿用上一个认证函数的还原函数
+    auth_cache.deserialize = deserialize
+    auth_cache.clear()
 
 
 def get_authentication_function() -> Optional[Callable[[Request], Optional[AuthenticatedUser]]]:
@@ -98,6 +119,9 @@ def get_current_user(
     此依赖用于需要认证的路由中，会自动验证用户身份。
     如果认证失败，会抛出 UnauthorizedError（401）。
     
+    启用 auth_cache_enabled 时，全局认证函数的成功结果按 token 哈希缓存。
+    FastAPI 在线程池中执行此依赖；认证函数为 async 函数时推荐使用 get_current_user_async。
+
     Args:
         request: FastAPI Request 对象（自动注入）
         auth_func: 可选的认证函数，如果不提供则使用全局设置的认证函数
@@ -118,6 +142,93 @@ def get_current_user(
             return {"user_id": user.id, "username": user.username}
         ```
     """
+    auth_function, token = _prepare_authentication(request, auth_func)
+
+    user = auth_cache.get(token) if token else None
+    if user is None:
+        # 执行认证（async 认证函数通过 FastAPI 线程池所属的事件循环执行）
+        if inspect.iscoroutinefunction(auth_function):
+            user = anyio.from_thread.run(auth_function, request)
+        else:
+            user = auth_function(request)
+        if user is not None and token:
+            auth_cache.set(token, user)
+
+    return _finish_authentication(user)
+
+
+async def get_current_user_async(
+    request: Request,
+    auth_func: Optional[Callable[[Request], Optional[AuthenticatedUser]]] = None
+) -> AuthenticatedUser:
+    """
+    获取当前认证用户依赖（异步版本）
+
+    与 get_current_user 行为一致，但在事件循环中执行：
+    - async 认证函数直接 await，不占用线程池
+    - 同步认证函数放到线程池执行，避免阻塞事件循环
+    - 认证缓存命中时不切换线程（启用 Redis 共享层时，读取共享层在线程池中执行）
+
+    Args:
+        request: FastAPI Request 对象（自动注入）
+        auth_func: 可选的认证函数，如果不提供则使用全局设置的认证函数
+
+    Returns:
+        AuthenticatedUser: 认证用户对象
+
+    Raises:
+        UnauthorizedError: 当认证失败时抛出
+
+    Example:
+        ```python
+        from fastapi import Depends
+        from app.dependencies import get_current_user_async, set_authentication_function
+
+        async def verify(request: Request):
+            return await token_service.verify(request.headers.get("Authorization"))
+
+        set_authentication_function(verify)
+
+        @app.get("/profile")
+        async def get_profile(user = Depends(get_current_user_async)):
+            return {"user_id": user.id}
+        ```
+    """
+    auth_function, token = _prepare_authentication(request, auth_func)
+
+    user = None
+    if token:
+        if auth_cache.remote is None:
+            user = auth_cache.get(token)
+        else:
+            user = await run_in_threadpool(auth_cache.get, token)
+    if user is None:
+        if inspect.iscoroutinefunction(auth_function):
+            user = await auth_function(request)
+        else:
+            user = await run_in_threadpool(auth_function, request)
+        if user is not None and token:
+            if auth_cache.remote is None:
+                auth_cache.set(token, user)
+            else:
+                await run_in_threadpool(auth_cache.set, token, user)
+
+    return _finish_authentication(user)
+
+
+def _prepare_authentication(
+    request: Request,
+    auth_func: Optional[Callable[[Request], Optional[AuthenticatedUser]]],
+) -> tuple:
+    """
+    确定要使用的认证函数和缓存凭证
+
+    只有全局认证函数的结果会被缓存（设置新的认证函数时缓存会被清空），
+    显式传入的认证函数每次都会执行。
+
+    Returns:
+        tuple: (认证函数, 凭证)，凭证为 None 表示不使用缓存
+    """
     # 使用传入的认证函数或全局认证函数
     auth_function = auth_func or _authentication_function
     
@@ -127,12 +238,18 @@ def get_current_user(
             details="调用 set_authentication_function() 设置认证函数"
         )
     
-    # 执行认证
-    user = auth_function(request)
-    
+    token = auth_cache.get_token(request) if auth_func is None else None
+    return auth_function, token
+
+
+def _finish_authentication(user: Optional[AuthenticatedUser]) -> AuthenticatedUser:
+    """检查认证结果并记录到请求上下文"""
     if user is None:
         raise UnauthorizedError(message="认证失败，请提供有效的认证信息")
     
+    # 记录到请求上下文，后续日志自动带上 user_id
+    set_user_id(extract_user_id(user))
+
     return user
 
 
@@ -145,7 +262,9 @@ class PermissionChecker(Protocol):
     定义权限检查器应具备的方法。
     项目可以根据实际需求实现具体的权限检查逻辑。
     """
-    def check(self, user: AuthenticatedUser, resource: Optional[str] = None, action: Optional[str] = None) -> bool:
+    def check(
+        self, user: AuthenticatedUser, resource: Optional[str] = None, action: Optional[str] = None
+    ) -> bool:
         """
         检查用户是否有权限
         
@@ -161,7 +280,9 @@ class PermissionChecker(Protocol):
 
 
 # 全局权限检查函数（可扩展）
-_permission_check_function: Optional[Callable[[AuthenticatedUser, Optional[str], Optional[str]], bool]] = None
+_permission_check_function: Optional[
+    Callable[[AuthenticatedUser, Optional[str], Optional[str]], bool]
+] = None
 
 
 def set_permission_check_function(
@@ -200,7 +321,9 @@ def set_permission_check_function(
     _permission_check_function = func
 
 
-def get_permission_check_function() -> Optional[Callable[[AuthenticatedUser, Optional[str], Optional[str]], bool]]:
+def get_permission_check_function() -> (
+    Optional[Callable[[AuthenticatedUser, Optional[str], Optional[str]], bool]]
+):
     """
     获取当前设置的权限检查函数
     
@@ -276,6 +399,7 @@ def require_permission(
 
 # ==================== 便捷函数 ====================
 
+@functools.lru_cache(maxsize=None)
 def create_permission_dependency(
     resource: Optional[str] = None,
     action: Optional[str] = None
@@ -284,6 +408,9 @@ def create_permission_dependency(
     创建权限检查依赖的便捷函数
     
     用于创建特定资源/操作的权限检查依赖。
+    相同的 resource / action 返回同一个依赖函数：路由之间不重复创建闭包，
+    同一请求内多处依赖同一权限时 FastAPI 只执行一次检查。
+    权限检查函数在请求时读取，缓存的依赖函数始终使用当前设置的检查函数。
     
     Args:
         resource: 资源标识
@@ -322,6 +449,7 @@ __all__ = [
     "set_authentication_function",
     "get_authentication_function",
     "get_current_user",
+    "get_current_user_async",
     # 权限检查相关
     "PermissionChecker",
     "set_permission_check_function",
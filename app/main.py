@@ -3,8 +3,8 @@
 
 提供 FastAPI 应用的基础配置和入口文件，包括：
 - 应用初始化
-- 中间件配置（CORS、异常处理、请求日志）
-- 基础路由（健康检查、版本信息）
+- 中间件配置（CORS、响应压缩、访问日志、请求上下文、性能剖析、异常处理）
+- 基础路由（健康检查、版本信息、性能指标）
 - 生命周期事件（启动、关闭）
 - API 文档配置
 """
@@ -12,11 +12,12 @@
 import logging
 import time
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from itertools import islice
+from typing import Dict, Any, Optional
 
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -24,7 +25,18 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.config import settings
 from app.db.database import get_engine, close_engine, check_connection
 from app.utils.exceptions import BaseAppException
+from app.utils.logger import shutdown_logging
 from app.utils.response import success_response
+from app.middleware import (
+    AccessLogMiddleware,
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProcessTimeMiddleware,
+    ProfilingMiddleware,
+    RequestContextMiddleware,
+)
+from app.utils.metrics import CONTENT_TYPE_LATEST, create_registry, render_metrics
+from app.utils.profiling import profile_store
 
 
 # 配置日志
@@ -68,6 +80,14 @@ async def lifespan(app: FastAPI):
         if settings.is_production():
             raise
     
+    # 启动 WebSocket 跨进程通道（未配置时不做任何事）
+    await manager.start()
+
+    # 订阅 Celery 任务事件并推送给用户（未启用时不做任何事）
+    task_event_listener = create_task_event_listener(manager)
+    if task_event_listener is not None:
+        await task_event_listener.start()
+
     logger.info(f"应用启动完成 - {settings.app_name} v{settings.app_version}")
     
     yield
@@ -75,6 +95,16 @@ async def lifespan(app: FastAPI):
     # 关闭事件
     logger.info("应用关闭中...")
     
+    # 停止任务事件订阅
+    if task_event_listener is not None:
+        await task_event_listener.stop()
+
+    # 停止 WebSocket 跨进程通道
+    try:
+        await manager.stop()
+    except Exception as e:
+        logger.error(f"停止 WebSocket 跨进程通道时出错: {e}")
+
     # 关闭数据库连接
     try:
         close_engine()
@@ -84,6 +114,9 @@ async def lifespan(app: FastAPI):
     
     logger.info("应用已关闭")
 
+    # 写出异步日志队列中剩余的日志
+    shutdown_logging()
+
 
 # 创建 FastAPI 应用实例
 app = FastAPI(
@@ -108,40 +141,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩中间件
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        content_types=settings.compression_content_types,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
 
-# 请求日志中间件（可选）
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """
-    请求日志中间件
-    
-    记录每个请求的基本信息，包括请求路径、方法、处理时间等。
-    """
-    start_time = time.time()
-    
-    # 记录请求信息
-    logger.info(
-        f"请求: {request.method} {request.url.path} - "
-        f"客户端: {request.client.host if request.client else 'unknown'}"
+
+# 访问日志中间件（位于压缩中间件外层，耗时包含压缩开销）
+if settings.access_log_enabled:
+    app.add_middleware(
+        AccessLogMiddleware,
+        sample_rate=settings.access_log_sample_rate,
+        slow_threshold_ms=settings.access_log_slow_threshold_ms,
+        skip_paths=settings.access_log_skip_paths,
     )
-    
-    # 处理请求
-    response = await call_next(request)
-    
-    # 计算处理时间
-    process_time = time.time() - start_time
-    
-    # 记录响应信息
-    logger.info(
-        f"响应: {request.method} {request.url.path} - "
-        f"状态码: {response.status_code} - "
-        f"处理时间: {process_time:.3f}s"
+
+
+# 性能指标中间件
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, skip_paths=[settings.metrics_path])
+
+# 处理时间中间件（X-Process-Time 响应头）
+app.add_middleware(ProcessTimeMiddleware)
+
+# 性能剖析中间件（位于请求上下文内层，读取请求内累计的数据库耗时）
+if settings.profiling_enabled:
+    profile_store.max_profiles = settings.profiling_max_profiles
+    profile_store.storage_dir = settings.profiling_storage_dir
+    app.add_middleware(
+        ProfilingMiddleware,
+        header_name=settings.profiling_header,
+        query_param=settings.profiling_query_param,
+        sample_rate=settings.profiling_sample_rate,
     )
-    
-    # 添加处理时间到响应头
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    return response
+
+# 请求上下文中间件（最外层，其他中间件和日志都能获取请求 ID）
+app.add_middleware(
+    RequestContextMiddleware,
+    header_name=settings.request_id_header,
+    trust_header=settings.request_id_trust_header,
+)
 
 
 # ==================== 异常处理 ====================
@@ -324,26 +369,53 @@ async def get_version() -> Dict[str, Any]:
     return success_response(data=version_info, message="版本信息获取成功")
 
 
+# ==================== 性能指标 ====================
+
+if settings.metrics_enabled:
+    metrics_registry = create_registry(engine_getter=get_engine)
+
+    @app.get(settings.metrics_path, tags=["系统"], include_in_schema=False)
+    async def metrics() -> Response:
+        """
+        Prometheus 指标接口
+
+        返回 Prometheus 文本格式的指标，多进程部署时汇总所有 worker 的指标。
+        """
+        return Response(content=render_metrics(metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
+
 # ==================== WebSocket 路由 ====================
 
 from fastapi import WebSocket, WebSocketDisconnect
 from app.websocket import SimpleWebSocketHandler, manager
+from app.websocket.task_events import create_task_event_listener
 
 
 @app.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    user_id: str,
+    last_seq: Optional[int] = Query(None, ge=0, description="最后收到的个人消息序号（断线续传）"),
+):
     """
     WebSocket 连接端点
     
     提供 WebSocket 连接功能，支持实时消息推送。
     
+    推送给用户的个人消息带有递增的序号 seq。客户端重连时带上最后收到的序号
+    （/ws/{user_id}?last_seq=...），服务端只补发之后的消息，再回复
+    {"type": "resumed", "replayed": 补发数}；缺口已超出回放缓冲区时回复
+    {"type": "resume_failed"}，客户端需要重新全量同步。
+
     Args:
         websocket: WebSocket 连接对象
         user_id: 用户 ID（从路径参数获取）
+        last_seq: 最后收到的个人消息序号（可选，从查询参数获取）
         
     Example:
         ```javascript
-        // 客户端连接示例
+        // 客户端连接示例（重连时带上 ?last_seq=${lastSeq} 补发缺失的消息）
+        let lastSeq = null;
         const ws = new WebSocket('ws://localhost:8100/ws/test_user');
         
         ws.onopen = () => {
@@ -351,7 +423,10 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         };
         
         ws.onmessage = (event) => {
-            console.log('Received:', JSON.parse(event.data));
+            const message = JSON.parse(event.data);
+            // 记录最后收到的序号，重连时使用 ?last_seq=
+            if (message.seq !== undefined) lastSeq = message.seq;
+            console.log('Received:', message);
         };
         
         ws.onerror = (error) => {
@@ -366,24 +441,50 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         ```
     """
     # 创建处理器并处理连接
-    handler = SimpleWebSocketHandler(user_id)
+    handler = SimpleWebSocketHandler(user_id, last_seq=last_seq)
     await handler.handle_connection(websocket)
 
 
 @app.get("/ws/stats", tags=["WebSocket"])
-async def websocket_stats() -> Dict[str, Any]:
+async def websocket_stats(
+    page: int = Query(1, ge=1, description="已连接用户列表的页码"),
+    page_size: int = Query(100, ge=1, le=1000, description="已连接用户列表每页数量"),
+) -> Dict[str, Any]:
     """
     WebSocket 连接统计接口
     
-    返回当前 WebSocket 连接的统计信息。
+    返回当前 WebSocket 连接的统计信息。配置了跨进程通道时为所有 worker / 节点的汇总，
+    local_connections 为处理本次请求的进程上的连接数。
+    
+    连接数和用户数直接读取计数，不遍历连接；connected_users 只返回第 page 页的用户
+    （按用户首次连接的顺序），大量连接时不会一次返回所有用户。
+
+    Args:
+        page: 已连接用户列表的页码
+        page_size: 已连接用户列表每页数量
     
     Returns:
-        dict: 连接统计信息，包括总连接数、已连接用户数等
+        dict: 连接统计信息，包括总连接数、已连接用户数、当前页的已连接用户等
     """
+    offset = (page - 1) * page_size
+    if manager.backplane is None:
+        total_connections = manager.get_total_connections_count()
+        connected_users_count = manager.get_connected_users_count()
+        connected_users = manager.get_connected_users_page(offset, page_size)
+    else:
+        presence = await manager.get_cluster_presence()
+        total_connections = sum(presence.values())
+        connected_users_count = len(presence)
+        connected_users = list(islice(presence, offset, offset + page_size))
+
     stats = {
-        "total_connections": manager.get_total_connections_count(),
-        "connected_users_count": len(manager.get_connected_users()),
-        "connected_users": list(manager.get_connected_users()),
+        "total_connections": total_connections,
+        "connected_users_count": connected_users_count,
+        "connected_users": connected_users,
+        "local_connections": manager.get_total_connections_count(),
+        "page": page,
+        "page_size": page_size,
+        "total_pages": (connected_users_count + page_size - 1) // page_size,
     }
     
     return success_response(data=stats, message="WebSocket 统计信息获取成功")
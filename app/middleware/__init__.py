@@ -0,0 +1,27 @@
+"""
+中间件模块
+
+提供纯 ASGI 实现的通用中间件，包括：
+- 响应压缩（gzip / brotli / zstd）
+- 访问日志（采样、慢请求阈值、延迟格式化）
+- 处理时间响应头（X-Process-Time）
+- 请求上下文（请求 ID 生成与回传）
+- 性能指标（Prometheus）
+- 按请求性能剖析（cProfile）
+"""
+
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.access_log import AccessLogMiddleware
+from app.middleware.process_time import ProcessTimeMiddleware
+from app.middleware.request_context import RequestContextMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+
+__all__ = [
+    "CompressionMiddleware",
+    "AccessLogMiddleware",
+    "ProcessTimeMiddleware",
+    "RequestContextMiddleware",
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+]
@@ -0,0 +1,219 @@
+"""
+访问日志中间件模块
+
+提供纯 ASGI 实现的访问日志中间件，包括：
+- 每个请求只记录一条结构化日志（方法、路径、状态码、耗时、响应大小、客户端）
+- 使用 perf_counter_ns 计时
+- 按比例采样，慢请求和 5xx 响应始终记录
+- 跳过健康检查等高频路径
+- 查询字符串中敏感参数（token、password 等）的值脱敏后再记录
+- 延迟格式化：日志级别未启用或未被采样时不构造任何字符串
+"""
+
+import logging
+import random
+import time
+from typing import FrozenSet, Iterable, Optional
+from urllib.parse import unquote_plus
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.context import get_request_context
+
+# 默认脱敏的查询参数名（不区分大小写），例如 WebSocket 握手的 ?token=
+SENSITIVE_QUERY_PARAMS: FrozenSet[str] = frozenset({
+    "token",
+    "access_token",
+    "refresh_token",
+    "id_token",
+    "password",
+    "passwd",
+    "secret",
+    "client_secret",
+    "api_key",
+    "apikey",
+    "signature",
+    "code",
+})
+
+REDACTED = "***"
+
+
+def redact_query_string(query_string: bytes, sensitive_params: FrozenSet[str]) -> str:
+    """
+    将查询字符串中敏感参数的值替换为 ***
+
+    其他参数保持原样（不做解码 / 重新编码）。
+
+    Args:
+        query_string: ASGI scope 中的原始查询字符串
+        sensitive_params: 需要脱敏的参数名集合（小写）
+
+    Returns:
+        str: 脱敏后的查询字符串
+
+    Example:
+        ```python
+        redact_query_string(b"token=abc&page=1", SENSITIVE_QUERY_PARAMS)
+        # "token=***&page=1"
+        ```
+    """
+    query = query_string.decode("latin-1")
+    if not query or not sensitive_params:
+        return query
+    parts = query.split("&")
+    for index, part in enumerate(parts):
+        name, separator, _ = part.partition("=")
+        if separator and unquote_plus(name).lower() in sensitive_params:
+            parts[index] = f"{name}={REDACTED}"
+    return "&".join(parts)
+
+
+class AccessLogMiddleware:
+    """
+    访问日志中间件（纯 ASGI）
+
+    日志级别：
+    - 普通请求：INFO（按 sample_rate 采样）
+    - 慢请求（耗时 >= slow_threshold_ms）：WARNING（始终记录）
+    - 5xx 响应或未处理异常：ERROR（始终记录）
+
+    结构化字段通过 extra_fields 传递，JSONFormatter 会将其合并到日志中。
+    查询字符串中 sensitive_params 指定的参数只记录参数名，值替换为 ***。
+
+    Example:
+        ```python
+        from app.middleware import AccessLogMiddleware
+
+        app.add_middleware(
+            AccessLogMiddleware,
+            sample_rate=0.1,
+            slow_threshold_ms=500,
+            skip_paths=["/health"],
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        logger_name: str = "app.access",
+        sample_rate: float = 1.0,
+        slow_threshold_ms: float = 1000.0,
+        skip_paths: Iterable[str] = ("/health",),
+        sensitive_params: Iterable[str] = SENSITIVE_QUERY_PARAMS,
+    ):
+        """
+        初始化访问日志中间件
+
+        Args:
+            app: 下游 ASGI 应用
+            logger_name: 日志记录器名称
+            sample_rate: 普通请求的采样率（0-1），1 表示全部记录
+            slow_threshold_ms: 慢请求阈值（毫秒），超过该值的请求始终记录
+            skip_paths: 不记录日志的路径（精确匹配）
+            sensitive_params: 需要脱敏的查询参数名（不区分大小写）
+        """
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+        self.sample_rate = sample_rate
+        self.slow_threshold_ns = int(slow_threshold_ms * 1_000_000)
+        self.skip_paths = frozenset(skip_paths)
+        self.sensitive_params = frozenset(name.lower() for name in sensitive_params)
+
+    def should_log(self, level: int) -> bool:
+        """
+        判断当前请求是否需要记录
+
+        Args:
+            level: 日志级别
+
+        Returns:
+            bool: 是否记录
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        if level > logging.INFO or self.sample_rate >= 1.0:
+            return True
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            self._log(scope, status_code, response_size, time.perf_counter_ns() - start)
+
+    def _log(self, scope: Scope, status_code: int, response_size: int, duration_ns: int) -> None:
+        """
+        输出访问日志
+
+        只有在确定需要记录时才构造日志参数和结构化字段。
+        """
+        if status_code >= 500:
+            level = logging.ERROR
+        elif duration_ns >= self.slow_threshold_ns:
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+
+        if not self.should_log(level):
+            return
+
+        duration_ms = duration_ns / 1_000_000
+        client = scope.get("client")
+        client_host: Optional[str] = client[0] if client else None
+        fields = {
+            "event": "access",
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": redact_query_string(scope.get("query_string", b""), self.sensitive_params),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 3),
+            "response_size": response_size,
+            "client": client_host,
+            "slow": duration_ns >= self.slow_threshold_ns,
+        }
+        # 请求内各阶段耗时（例如数据库耗时），由请求上下文累计
+        context = get_request_context()
+        if context is not None:
+            if context.timings:
+                fields["timings_ms"] = {
+                    name: round(seconds * 1000, 3) for name, seconds in context.timings.items()
+                }
+            if context.query_count:
+                fields["db_queries"] = context.query_count
+        self.logger.log(
+            level,
+            "%s %s %d %.2fms",
+            scope["method"],
+            scope["path"],
+            status_code,
+            duration_ms,
+            extra={"extra_fields": fields},
+        )
+
+
+__all__ = [
+    "AccessLogMiddleware",
+    "SENSITIVE_QUERY_PARAMS",
+    "redact_query_string",
+]
@@ -0,0 +1,336 @@
+"""
+响应压缩中间件模块
+
+提供纯 ASGI 实现的响应压缩中间件，包括：
+- gzip / brotli / zstd 三种编码（brotli、zstd 需安装对应的可选依赖）
+- 根据 Accept-Encoding（含 q 值）协商编码
+- 最小压缩阈值：小于阈值的响应不压缩
+- Content-Type 白名单：只压缩文本类响应
+- 流式响应逐块压缩并及时 flush，不会缓冲整个响应体
+"""
+
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, cast
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+
+# 默认可压缩的 Content-Type（按前缀匹配）
+DEFAULT_COMPRESSIBLE_TYPES: Tuple[str, ...] = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+    "image/svg+xml",
+)
+
+
+# ==================== 压缩器 ====================
+
+class _Compressor:
+    """
+    流式压缩器统一接口
+
+    compress() 返回当前可输出的压缩数据（已 flush），finish() 返回结尾数据。
+    """
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+
+class _GzipCompressor(_Compressor):
+    def __init__(self, level: int):
+        # wbits=31 表示输出带 gzip 头的数据
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return cast(bytes, self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self) -> bytes:
+        return cast(bytes, self._obj.flush(zlib.Z_FINISH))
+
+
+class _BrotliCompressor(_Compressor):
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return cast(bytes, self._obj.process(data) + self._obj.flush())
+
+    def finish(self) -> bytes:
+        return cast(bytes, self._obj.finish())
+
+
+class _ZstdCompressor(_Compressor):
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return cast(
+            bytes, self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        )
+
+    def finish(self) -> bytes:
+        return cast(bytes, self._obj.flush())
+
+
+def available_encodings() -> List[str]:
+    """
+    获取当前环境可用的压缩编码（按服务端优先级排序）
+
+    Returns:
+        List[str]: 可用编码列表
+    """
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    解析 Accept-Encoding 请求头
+
+    Args:
+        header: Accept-Encoding 请求头的值，例如 "gzip;q=0.8, br"
+
+    Returns:
+        Dict[str, float]: {编码: q 值}
+    """
+    result: Dict[str, float] = {}
+    for part in header.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name.strip().lower()] = q
+    return result
+
+
+# ==================== 中间件 ====================
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件（纯 ASGI）
+
+    与 Starlette 的 GZipMiddleware 相比，额外支持 brotli / zstd、
+    Content-Type 白名单以及流式响应的阈值判断。
+
+    Example:
+        ```python
+        from app.middleware import CompressionMiddleware
+
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=1024,
+            gzip_level=6,
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        content_types: Iterable[str] = DEFAULT_COMPRESSIBLE_TYPES,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        encodings: Optional[Iterable[str]] = None,
+    ):
+        """
+        初始化压缩中间件
+
+        Args:
+            app: 下游 ASGI 应用
+            minimum_size: 最小压缩阈值（字节），小于该值的响应不压缩
+            content_types: 可压缩的 Content-Type 前缀列表
+            gzip_level: gzip 压缩级别（1-9）
+            brotli_quality: brotli 压缩质量（0-11）
+            zstd_level: zstd 压缩级别（1-22）
+            encodings: 启用的编码（按优先级），默认使用当前环境所有可用编码
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(t.strip().lower() for t in content_types if t.strip())
+        supported = available_encodings()
+        if encodings is None:
+            self.encodings = supported
+        else:
+            self.encodings = [e for e in encodings if e in supported]
+        self._factories: Dict[str, Callable[[], _Compressor]] = {
+            "gzip": lambda: _GzipCompressor(gzip_level),
+            "br": lambda: _BrotliCompressor(brotli_quality),
+            "zstd": lambda: _ZstdCompressor(zstd_level),
+        }
+
+    def select_encoding(self, accept_encoding: str) -> Optional[str]:
+        """
+        根据 Accept-Encoding 选择压缩编码
+
+        在客户端接受（q > 0）的编码中，选择 q 值最高者；q 值相同时按服务端优先级。
+
+        Args:
+            accept_encoding: Accept-Encoding 请求头的值
+
+        Returns:
+            Optional[str]: 选中的编码，不压缩时返回 None
+        """
+        if not accept_encoding:
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best: Optional[str] = None
+        best_q = 0.0
+        for encoding in self.encodings:
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def is_compressible(self, content_type: str) -> bool:
+        """
+        判断 Content-Type 是否在可压缩白名单中
+
+        Args:
+            content_type: 响应的 Content-Type
+
+        Returns:
+            bool: 是否可压缩
+        """
+        content_type = content_type.lower()
+        return any(content_type.startswith(prefix) for prefix in self.content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """
+    单个响应的压缩处理器
+
+    状态流转：
+    1. 收到 http.response.start 时暂存响应头，判断是否可压缩
+    2. 缓冲响应体直到达到最小阈值：
+       - 响应在阈值内结束：原样发送
+       - 超过阈值：发送压缩后的响应头，之后逐块压缩发送
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start_message: Optional[Message] = None
+        self._buffer: List[bytes] = []
+        self._buffered_size = 0
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self._start_message = message
+            headers = Headers(raw=message["headers"])
+            if (
+                "content-encoding" in headers
+                or not self.middleware.is_compressible(headers.get("content-type", ""))
+            ):
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if message_type != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        # 已进入压缩模式：逐块压缩
+        if self._compressor is not None:
+            data = self._compressor.compress(body) if body else b""
+            if not more_body:
+                data += self._compressor.finish()
+            if data or not more_body:
+                await self._send(
+                    {"type": "http.response.body", "body": data, "more_body": more_body}
+                )
+            return
+
+        # 响应体总是在 http.response.start 之后到达
+        start_message = self._start_message
+        assert start_message is not None, "http.response.body 之前未收到 http.response.start"
+
+        # 尚未达到阈值：继续缓冲
+        self._buffer.append(body)
+        self._buffered_size += len(body)
+
+        if self._buffered_size < self.middleware.minimum_size:
+            if more_body:
+                return
+            # 响应在阈值内结束，原样发送
+            await self._send(start_message)
+            await self._send({"type": "http.response.body", "body": b"".join(self._buffer)})
+            return
+
+        # 达到阈值：开始压缩
+        self._compressor = self.middleware._factories[self.encoding]()
+        pending = b"".join(self._buffer)
+        self._buffer.clear()
+        data = self._compressor.compress(pending)
+        if not more_body:
+            data += self._compressor.finish()
+
+        headers = MutableHeaders(raw=start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            # 流式响应的最终长度未知
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+
+        await self._send(start_message)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+__all__ = [
+    "CompressionMiddleware",
+    "available_encodings",
+    "parse_accept_encoding",
+]
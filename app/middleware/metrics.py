@@ -0,0 +1,66 @@
+"""
+性能指标中间件模块
+
+提供纯 ASGI 实现的 HTTP 指标中间件，按路由模板记录请求数、延迟直方图和进行中请求数。
+"""
+
+import time
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import HTTP_REQUESTS_IN_PROGRESS, observe_http_request, route_template
+
+
+class MetricsMiddleware:
+    """
+    HTTP 指标中间件（纯 ASGI）
+
+    Example:
+        ```python
+        from app.middleware import MetricsMiddleware
+
+        app.add_middleware(MetricsMiddleware, skip_paths=["/metrics"])
+        ```
+    """
+
+    def __init__(self, app: ASGIApp, skip_paths: Iterable[str] = ("/metrics",)):
+        """
+        初始化指标中间件
+
+        Args:
+            app: 下游 ASGI 应用
+            skip_paths: 不统计的路径（精确匹配），默认跳过指标接口本身
+        """
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            observe_http_request(
+                method, route_template(scope), status_code, time.perf_counter() - start
+            )
+
+
+__all__ = [
+    "MetricsMiddleware",
+]
@@ -0,0 +1,59 @@
+"""
+处理时间中间件模块
+
+提供纯 ASGI 实现的处理时间中间件，在响应头 X-Process-Time 中返回请求处理时间（秒）。
+
+与 @app.middleware("http")（BaseHTTPMiddleware）相比，不会为每个请求创建额外的
+任务和内存流，也不会缓冲流式响应。
+"""
+
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ProcessTimeMiddleware:
+    """
+    处理时间中间件（纯 ASGI）
+
+    处理时间从进入中间件开始，到下游发送响应头为止。
+
+    Example:
+        ```python
+        from app.middleware import ProcessTimeMiddleware
+
+        app.add_middleware(ProcessTimeMiddleware)
+        ```
+    """
+
+    def __init__(self, app: ASGIApp, header_name: str = "X-Process-Time"):
+        """
+        初始化处理时间中间件
+
+        Args:
+            app: 下游 ASGI 应用
+            header_name: 响应头名称
+        """
+        self.app = app
+        self.header_name = header_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(self.header_name, str(time.perf_counter() - start))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+__all__ = [
+    "ProcessTimeMiddleware",
+]
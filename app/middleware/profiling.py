@@ -0,0 +1,202 @@
+"""
+性能剖析中间件模块
+
+提供纯 ASGI 实现的按请求性能剖析中间件：
+- 通过请求头（X-Profile: 1）或查询参数（?profile=1）为单个请求开启剖析
+- 按需开启的剖析需要通过认证和权限检查（app.dependencies 中的认证 / 权限函数）
+- 可按比例随机采样请求进行剖析（服务端决定，不需要认证）
+- 使用 cProfile 采集，结果保存到 profile_store，可选写入 .prof 文件
+- 返回数据库耗时与 Python 耗时拆分（Server-Timing 响应头）
+"""
+
+import cProfile
+import inspect
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, Union
+
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.dependencies import get_current_user_async, require_permission
+from app.utils.context import get_request_context, get_request_id
+from app.utils.exceptions import BaseAppException
+from app.utils.profiling import ProfileStore, profile_store, time_breakdown
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 开启剖析的请求头 / 查询参数取值
+_TRUE_VALUES = frozenset(("1", "true", "yes", "on"))
+
+
+async def authorize_profiling(request: Request) -> bool:
+    """
+    默认的剖析授权检查
+
+    使用全局认证函数获取当前用户，并以 resource="profiling"、action="run" 做权限检查。
+    认证或权限功能未配置时一律拒绝。
+
+    Args:
+        request: 请求对象
+
+    Returns:
+        bool: 是否允许剖析
+    """
+    try:
+        user = await get_current_user_async(request)
+        require_permission(resource="profiling", action="run", user=user)
+    except BaseAppException:
+        return False
+    return True
+
+
+class ProfilingMiddleware:
+    """
+    性能剖析中间件（纯 ASGI）
+
+    应放在请求上下文中间件内层，才能读取请求内累计的数据库耗时。
+    被剖析的请求会带上以下响应头：
+    - X-Profile-Id：剖析结果 ID（按需开启时返回，采样的请求不返回）
+    - Server-Timing：db / app / total 耗时
+
+    注意：cProfile 只采集事件循环线程，剖析期间同一线程上并发执行的其他请求也会被计入；
+    同一时间只剖析一个请求，其余请求正常处理。
+
+    Example:
+        ```python
+        from app.middleware import ProfilingMiddleware
+
+        app.add_middleware(ProfilingMiddleware, sample_rate=0.001)
+
+        # curl -H "X-Profile: 1" -H "Authorization: ..." http://localhost:8000/api/v1/users
+        # 然后访问 /api/v1/admin/profiles/{X-Profile-Id} 查看报告
+        ```
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        header_name: str = "X-Profile",
+        query_param: str = "profile",
+        sample_rate: float = 0.0,
+        store: Optional[ProfileStore] = None,
+        authorize: Callable[[Request], Union[bool, Awaitable[bool]]] = authorize_profiling,
+    ):
+        """
+        初始化性能剖析中间件
+
+        Args:
+            app: 下游 ASGI 应用
+            header_name: 开启剖析的请求头名称
+            query_param: 开启剖析的查询参数名称
+            sample_rate: 随机采样率（0-1），0 表示只剖析按需开启的请求
+            store: 剖析结果存储，默认使用全局 profile_store
+            authorize: 按需开启剖析时的授权检查函数（同步或 async）
+        """
+        self.app = app
+        self.header_name = header_name.lower().encode("latin-1")
+        self.query_param = query_param
+        self.sample_rate = sample_rate
+        self.store = store or profile_store
+        self.authorize = authorize
+        self._active = False
+
+    def is_requested(self, scope: Scope) -> bool:
+        """
+        判断请求是否通过请求头或查询参数开启了剖析
+
+        Args:
+            scope: ASGI scope
+
+        Returns:
+            bool: 是否开启
+        """
+        for name, value in scope["headers"]:
+            if name == self.header_name:
+                return value.decode("latin-1").lower() in _TRUE_VALUES
+        query_string = scope.get("query_string", b"")
+        if query_string and self.query_param.encode("latin-1") in query_string:
+            value = QueryParams(query_string).get(self.query_param)
+            return value is not None and value.lower() in _TRUE_VALUES
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        requested = self.is_requested(scope)
+        if requested:
+            allowed = self.authorize(Request(scope))
+            if inspect.isawaitable(allowed):
+                allowed = await allowed
+            if not allowed:
+                logger.debug(f"未授权的剖析请求: {scope['path']}")
+                await self.app(scope, receive, send)
+                return
+        elif not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        await self._profile(scope, receive, send, expose=requested)
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, expose: bool) -> None:
+        """剖析单个请求"""
+        profile_id = None
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, profile_id
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # 响应头在请求处理完成前发出，此时记录的耗时即为处理耗时
+                breakdown = self._breakdown(start)
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={breakdown['db_ms']}, app;dur={breakdown['python_ms']}, "
+                    f"total;dur={breakdown['total_ms']}",
+                )
+                if expose:
+                    # 预先生成 ID，使响应头中的 ID 与保存的结果一致
+                    profile_id = self.store.new_id()
+                    headers["X-Profile-Id"] = profile_id
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self._active = True
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._active = False
+            breakdown = self._breakdown(start)
+            context = get_request_context()
+            self.store.add(
+                profiler,
+                profile_id=profile_id,
+                method=scope["method"],
+                path=scope["path"],
+                status=status_code,
+                request_id=get_request_id(),
+                sampled=not expose,
+                db_queries=context.query_count if context else 0,
+                **breakdown,
+            )
+
+    @staticmethod
+    def _breakdown(start: float) -> Dict[str, float]:
+        """计算从 start 到现在的耗时拆分"""
+        context = get_request_context()
+        return time_breakdown(time.perf_counter() - start, context.timings if context else {})
+
+
+__all__ = [
+    "ProfilingMiddleware",
+    "authorize_profiling",
+]
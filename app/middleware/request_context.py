@@ -0,0 +1,93 @@
+"""
+请求上下文中间件模块
+
+提供纯 ASGI 实现的请求上下文中间件：
+- 从请求头读取请求 ID（格式合法时），否则自动生成
+- 在整个请求（包括 WebSocket 连接）期间绑定请求上下文，日志自动带上 request_id
+- 在 HTTP 响应头中回传请求 ID
+"""
+
+import re
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.context import bind_request_context, generate_request_id, reset_request_context
+
+
+# 允许从客户端接收的请求 ID 格式，避免日志注入和超长值
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:\-]{1,128}$")
+
+
+class RequestContextMiddleware:
+    """
+    请求上下文中间件（纯 ASGI）
+
+    应放在中间件栈的最外层，使访问日志等其他中间件也能获取请求 ID。
+
+    Example:
+        ```python
+        from app.middleware import RequestContextMiddleware
+
+        app.add_middleware(RequestContextMiddleware, header_name="X-Request-ID")
+        ```
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        header_name: str = "X-Request-ID",
+        trust_header: bool = True,
+    ):
+        """
+        初始化请求上下文中间件
+
+        Args:
+            app: 下游 ASGI 应用
+            header_name: 请求 ID 的请求头 / 响应头名称
+            trust_header: 是否接受客户端（或网关）传入的请求 ID
+        """
+        self.app = app
+        self.header_name = header_name
+        self.trust_header = trust_header
+
+    def resolve_request_id(self, scope: Scope) -> str:
+        """
+        获取请求 ID：优先使用请求头中的合法值，否则生成新 ID
+
+        Args:
+            scope: ASGI scope
+
+        Returns:
+            str: 请求 ID
+        """
+        if self.trust_header:
+            incoming: Optional[str] = Headers(scope=scope).get(self.header_name)
+            if incoming and _REQUEST_ID_PATTERN.match(incoming):
+                return incoming
+        return generate_request_id()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self.resolve_request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = bind_request_context(request_id=request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.header_name] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_context(token)
+
+
+__all__ = [
+    "RequestContextMiddleware",
+]
@@ -11,6 +11,7 @@ from sqlalchemy import and_, or_, desc, asc
 from sqlalchemy.exc import IntegrityError
 
 from app.db.base import BaseModel
+from app.utils.cache import invalidate_cache_tags_nowait
 
 
 # 定义泛型类型变量
@@ -161,6 +162,16 @@ class BaseRepository(Generic[ModelType]):
         self.model = model
         self.db = db
     
+    def _invalidate_cache(self) -> None:
+        """
+        使该模型相关的响应缓存失效
+
+        写操作提交成功后调用，按表名失效缓存标签（例如 users 表对应标签 "users"）。
+        路由使用 cache_response(tags=("users",)) 缓存时，即可在数据变更后自动失效。
+        Redis 后端的失效在后台线程执行，不阻塞写操作（也不阻塞调用它的事件循环）。
+        """
+        invalidate_cache_tags_nowait(self.model.__tablename__)
+
     # ==================== Create 操作 ====================
     
     def create(self, data: Dict[str, Any]) -> ModelType:
@@ -185,6 +196,7 @@ class BaseRepository(Generic[ModelType]):
         self.db.add(instance)
         try:
             self.db.commit()
+            self._invalidate_cache()
             self.db.refresh(instance)
             return instance
         except IntegrityError as e:
@@ -216,6 +228,7 @@ class BaseRepository(Generic[ModelType]):
         self.db.add_all(instances)
         try:
             self.db.commit()
+            self._invalidate_cache()
             for instance in instances:
                 self.db.refresh(instance)
             return instances
@@ -336,6 +349,7 @@ class BaseRepository(Generic[ModelType]):
         
         try:
             self.db.commit()
+            self._invalidate_cache()
             self.db.refresh(instance)
             return instance
         except IntegrityError as e:
@@ -382,6 +396,7 @@ class BaseRepository(Generic[ModelType]):
                     setattr(instance, key, value)
             try:
                 self.db.commit()
+                self._invalidate_cache()
                 self.db.refresh(instance)
                 return instance
             except IntegrityError as e:
@@ -416,6 +431,7 @@ class BaseRepository(Generic[ModelType]):
         
         self.db.delete(instance)
         self.db.commit()
+        self._invalidate_cache()
         return True
     
     def delete_many(self, ids: List[int]) -> int:
@@ -436,6 +452,7 @@ class BaseRepository(Generic[ModelType]):
         """
         deleted_count = self.db.query(self.model).filter(self.model.id.in_(ids)).delete(synchronize_session=False)
         self.db.commit()
+        self._invalidate_cache()
         return deleted_count
     
     def delete_all(self) -> int:
@@ -455,6 +472,7 @@ class BaseRepository(Generic[ModelType]):
         """
         deleted_count = self.db.query(self.model).delete()
         self.db.commit()
+        self._invalidate_cache()
         return deleted_count
     
     # ==================== 分页查询 ====================
@@ -6,7 +6,7 @@
 
 from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, desc, or_
 
 from app.models.user_model import User
 from app.repositories.base import BaseRepository, PaginationParams, PaginationResult
@@ -51,7 +51,7 @@ class UserRepository(BaseRepository[User]):
         Returns:
             Optional[User]: 用户对象，如果不存在返回 None
         """
-        return self.filter_one(User.email == email)
+        return self.filter_one(email=email)
     
     def get_active_users(self) -> list[User]:
         """
@@ -79,18 +79,17 @@ class UserRepository(BaseRepository[User]):
         Returns:
             PaginationResult[User]: 分页结果
         """
-        params = PaginationParams(page=page, page_size=page_size)
+        query = self.db.query(User).filter(User.is_active.is_(True))
         
-        # 默认按创建时间倒序
+        # 默认按创建时间倒序，"-" 前缀表示降序
         if order_by is None:
             order_by = "-created_at"
+        field = order_by.lstrip("-")
+        if hasattr(User, field):
+            column = getattr(User, field)
+            query = query.order_by(desc(column) if order_by.startswith("-") else column)
         
-        return self.paginate(
-            filters={"is_active": True},
-            page=params.page,
-            page_size=params.page_size,
-            order_by=order_by
-        )
+        return self._paginate_query(query, page, page_size)
     
     def search_users(
         self,
@@ -109,12 +108,33 @@ class UserRepository(BaseRepository[User]):
         Returns:
             PaginationResult[User]: 分页结果
         """
-        params = PaginationParams(page=page, page_size=page_size)
-        
         # 在姓名和邮箱字段中搜索
-        return self.search(
-            keyword=keyword,
-            fields=["name", "email"],
+        pattern = f"%{keyword}%"
+        query = (
+            self.db.query(User)
+            .filter(or_(User.name.like(pattern), User.email.like(pattern)))
+            .order_by(User.id)
+        )
+        return self._paginate_query(query, page, page_size)
+
+    def _paginate_query(self, query, page: int, page_size: int) -> PaginationResult[User]:
+        """
+        对查询结果分页
+
+        Args:
+            query: 已设置过滤和排序的查询
+            page: 页码
+            page_size: 每页数量
+
+        Returns:
+            PaginationResult[User]: 分页结果
+        """
+        params = PaginationParams(page=page, page_size=page_size)
+        total = query.order_by(None).count()
+        items = query.offset(params.offset).limit(params.limit).all()
+        return PaginationResult(
+            items=items,
+            total=total,
             page=params.page,
             page_size=params.page_size
         )
@@ -11,6 +11,12 @@ from app.schemas.user_schema import (
     UserResponse,
     UserListResponse,
 )
+from app.schemas.websocket_schema import (
+    WebSocketMessage,
+    PingMessage,
+    EchoMessage,
+    SubscribeMessage,
+)
 
 __all__ = [
     "UserBase",
@@ -18,5 +24,9 @@ __all__ = [
     "UserUpdate",
     "UserResponse",
     "UserListResponse",
+    "WebSocketMessage",
+    "PingMessage",
+    "EchoMessage",
+    "SubscribeMessage",
 ]
 
@@ -0,0 +1,38 @@
+"""
+WebSocket 消息 Schema
+
+使用 Pydantic 定义客户端发送的 WebSocket 消息格式，由消息路由在分发前验证。
+"""
+
+from typing import Any, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# ==================== 基础 Schema ====================
+
+class WebSocketMessage(BaseModel):
+    """WebSocket 客户端消息基础 Schema（允许额外字段）"""
+
+    type: str = Field(..., description="消息类型")
+
+    model_config = ConfigDict(extra="allow")
+
+
+# ==================== 消息 Schema ====================
+
+class PingMessage(WebSocketMessage):
+    """客户端心跳消息 Schema"""
+
+    timestamp: Optional[Union[int, float, str]] = Field(None, description="客户端时间戳（原样回复）")
+
+
+class EchoMessage(WebSocketMessage):
+    """回显消息 Schema"""
+
+    content: Any = Field(default="", description="回显内容")
+
+
+class SubscribeMessage(WebSocketMessage):
+    """订阅 / 取消订阅消息 Schema"""
+
+    channel: str = Field(..., min_length=1, max_length=256, description="频道名或通配符模式")
@@ -74,10 +74,8 @@ class UserService:
         
         # 创建用户
         try:
-            user = self.repository.create(user_data.model_dump())
-            self.db.commit()
-            self.db.refresh(user)
-            return user
+            # Repository 已提交并刷新实例，无需再次 commit / refresh
+            return self.repository.create(user_data.model_dump())
         except IntegrityError as e:
             self.db.rollback()
             raise ValidationError(f"创建用户失败: {str(e)}")
@@ -141,12 +139,13 @@ class UserService:
         if update_data:
             try:
                 updated_user = self.repository.update(user_id, update_data)
-                self.db.commit()
-                self.db.refresh(updated_user)
-                return updated_user
             except IntegrityError as e:
                 self.db.rollback()
                 raise ValidationError(f"更新用户失败: {str(e)}")
+            # 读取之后用户可能已被并发删除
+            if updated_user is None:
+                raise NotFoundError(f"用户 ID {user_id} 不存在")
+            return updated_user
         
         return user
     
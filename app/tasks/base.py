@@ -9,6 +9,8 @@ from typing import Any, Callable, Optional, Dict
 from functools import wraps
 from celery import Task
 from app.tasks.celery_app import celery_app
+from app.tasks.events import get_request_header, report_progress
+from app.utils.context import get_log_context, request_context
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -22,8 +24,63 @@ class BaseTask(Task):
     - 自动日志记录
     - 错误处理
     - 任务状态跟踪
+    - 请求上下文传播：发布任务时把 request_id / user_id 写入消息头，
+      执行任务时恢复，任务中的日志可以与发起请求关联
+    - 任务事件：启用 task_events_enabled 时发布开始 / 进度 / 结果事件，
+      由 Web 进程通过 WebSocket 推送给发起任务的用户（publish_events = False 可关闭）
     """
     
+    # 是否发布任务事件（高频的内部任务可以关闭）
+    publish_events = True
+
+    # 传播到任务消息头中的上下文字段
+    context_headers = ("request_id", "user_id")
+
+    def apply_async(
+        self, args: Optional[tuple] = None, kwargs: Optional[dict] = None, **options: Any
+    ):
+        """
+        发布任务，并把当前请求上下文写入消息头
+
+        调用方显式传入的同名消息头优先。
+        """
+        log_context = get_log_context()
+        if log_context:
+            headers = dict(options.get("headers") or {})
+            for key in self.context_headers:
+                if key in log_context:
+                    headers.setdefault(key, log_context[key])
+            options["headers"] = headers
+        return super().apply_async(args, kwargs, **options)
+
+    def _get_context_header(self, key: str) -> Optional[str]:
+        """从任务请求中读取上下文消息头（兼容不同协议版本的存放位置）"""
+        return get_request_header(self.request, key)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """执行任务，在任务期间恢复发起方的请求上下文"""
+        with request_context(
+            request_id=self._get_context_header("request_id"),
+            user_id=self._get_context_header("user_id"),
+        ):
+            return super().__call__(*args, **kwargs)
+
+    def report_progress(
+        self, current: int, total: Optional[int] = None, message: Optional[str] = None
+    ) -> bool:
+        """
+        发布任务进度事件（需要 bind=True 才能在任务中访问 self）
+
+        Args:
+            current: 已完成的数量
+            total: 总数量（可选）
+            message: 进度说明（可选）
+
+        Returns:
+            bool: 是否发布成功
+        """
+        return report_progress(self, current, total, message)
+
     def on_success(self, retval: Any, task_id: str, args: tuple, kwargs: dict) -> None:
         """
         任务成功完成时的回调
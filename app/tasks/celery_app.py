@@ -10,6 +10,8 @@ from typing import Optional, Any, Dict
 from celery import Celery
 from celery.signals import task_prerun, task_postrun, task_failure
 from app.config import settings
+from app.tasks import events
+from app.utils import metrics
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -105,16 +107,21 @@ def make_celery_app() -> Celery:
     )
     
     # ==================== 信号处理 ====================
+    # 处理器是局部函数，必须使用强引用（weak=False），否则会被垃圾回收而失效；
+    # dispatch_uid 保证多次调用 make_celery_app() 时不会重复注册。
+    # 启用 task_events_enabled 时，任务开始 / 结束同时发布任务事件（见 app.tasks.events）
     # 任务执行前
-    @task_prerun.connect
+    @task_prerun.connect(weak=False, dispatch_uid="app.tasks.task_prerun")
     def task_prerun_handler(sender=None, task_id=None, task=None, args=None, kwargs=None, **kwds):
         """任务执行前的处理"""
         logger.info(
             f"任务开始执行: {task.name} (ID: {task_id})"
         )
+        metrics.task_started(task_id, task.name)
+        events.on_task_started(task, task_id)
     
     # 任务执行后
-    @task_postrun.connect
+    @task_postrun.connect(weak=False, dispatch_uid="app.tasks.task_postrun")
     def task_postrun_handler(
         sender=None, task_id=None, task=None, args=None, kwargs=None, retval=None, state=None, **kwds
     ):
@@ -122,9 +129,11 @@ def make_celery_app() -> Celery:
         logger.info(
             f"任务执行完成: {task.name} (ID: {task_id}, State: {state})"
         )
+        metrics.task_finished(task_id, task.name, state)
+        events.on_task_finished(task, task_id, state, retval)
     
     # 任务失败
-    @task_failure.connect
+    @task_failure.connect(weak=False, dispatch_uid="app.tasks.task_failure")
     def task_failure_handler(
         sender=None, task_id=None, exception=None, traceback=None, einfo=None, **kwds
     ):
@@ -132,6 +141,7 @@ def make_celery_app() -> Celery:
         logger.error(
             f"任务执行失败: {sender.name} (ID: {task_id}, Exception: {exception})"
         )
+        metrics.task_failed(sender.name, exception)
     
     logger.info(f"Celery 应用初始化完成 - Broker: {broker_url}")
     if result_backend:
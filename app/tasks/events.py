@@ -0,0 +1,203 @@
+"""
+Celery 任务事件模块
+
+任务执行过程中把进度和结果作为事件发布到 Redis pub/sub 频道，Web 进程订阅后通过 WebSocket
+推送给用户（见 app.websocket.task_events），客户端不需要轮询结果后端。包括：
+- 生命周期事件：task_started / task_succeeded / task_failed / task_retry（由 celery_app 中的任务信号发布）
+- 进度事件：task_progress（任务中调用 report_progress()，或绑定任务的 self.report_progress()）
+
+事件是可 JSON 序列化的字典，例如：
+    {"type": "task_progress", "task_id": "...", "task_name": "...", "user_id": "user123",
+     "current": 3, "total": 10, "percent": 30.0, "message": "处理中"}
+
+user_id 是发起任务时请求上下文中的用户（BaseTask 写入任务消息头），Web 进程据此投递给该用户。
+需要配置 task_events_enabled 和 redis_url；发布失败只记录日志，不影响任务执行。
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 任务结束状态对应的事件类型
+LIFECYCLE_EVENTS = {
+    "SUCCESS": "task_succeeded",
+    "FAILURE": "task_failed",
+    "RETRY": "task_retry",
+}
+
+# 发布事件用的 Redis 客户端（每个 Worker 进程首次发布时创建）
+_client: Optional[Any] = None
+
+
+def get_request_header(request: Any, key: str) -> Optional[str]:
+    """
+    从任务请求中读取消息头（兼容不同协议版本的存放位置）
+
+    Args:
+        request: 任务请求（task.request）
+        key: 消息头名称
+
+    Returns:
+        Optional[str]: 消息头的值，不存在时为 None
+    """
+    value = getattr(request, key, None)
+    if value is None:
+        headers = getattr(request, "headers", None) or {}
+        value = headers.get(key)
+    return value
+
+
+def events_enabled(task: Any) -> bool:
+    """
+    检查任务是否需要发布事件
+
+    Args:
+        task: 任务实例
+
+    Returns:
+        bool: 已启用任务事件，且任务没有通过 publish_events = False 关闭事件
+    """
+    return settings.task_events_enabled and getattr(task, "publish_events", True)
+
+
+def _get_client(redis_url: str) -> Any:
+    """获取（必要时创建）Redis 客户端"""
+    global _client
+    if _client is None:
+        import redis
+
+        _client = redis.Redis.from_url(redis_url)
+    return _client
+
+
+def publish_task_event(event: Dict[str, Any]) -> bool:
+    """
+    发布任务事件
+
+    Args:
+        event: 事件（字典），无法 JSON 序列化的值转为字符串
+
+    Returns:
+        bool: 是否发布成功（未启用任务事件或未配置 redis_url 时返回 False）
+    """
+    if not settings.task_events_enabled:
+        return False
+    redis_url = settings.redis_url
+    if not redis_url:
+        logger.debug("redis_url 未配置，跳过任务事件发布")
+        return False
+    try:
+        data = json.dumps(event, ensure_ascii=False, default=str)
+        _get_client(redis_url).publish(settings.task_events_channel, data)
+        return True
+    except Exception as e:
+        logger.warning(f"发布任务事件失败 ({event.get('type')}, 任务 {event.get('task_id')}): {e}")
+        return False
+
+
+def build_task_event(
+    event_type: str, task: Any, task_id: Optional[str] = None, **fields: Any
+) -> Dict[str, Any]:
+    """
+    构建任务事件
+
+    Args:
+        event_type: 事件类型
+        task: 任务实例
+        task_id: 任务 ID，默认取当前请求的 ID
+        **fields: 事件的其他字段
+
+    Returns:
+        Dict[str, Any]: 事件
+    """
+    return {
+        "type": event_type,
+        "task_id": task_id or task.request.id,
+        "task_name": task.name,
+        "user_id": get_request_header(task.request, "user_id"),
+        **fields,
+    }
+
+
+def report_progress(
+    task: Any, current: int, total: Optional[int] = None, message: Optional[str] = None
+) -> bool:
+    """
+    发布任务进度事件
+
+    Args:
+        task: 当前执行的任务实例
+        current: 已完成的数量
+        total: 总数量（可选），指定时附带完成百分比
+        message: 进度说明（可选）
+
+    Returns:
+        bool: 是否发布成功
+
+    Example:
+        ```python
+        @task(name="app.tasks.import_users", bind=True)
+        def import_users(self, rows):
+            for index, row in enumerate(rows, 1):
+                ...
+                report_progress(self, index, len(rows))
+        ```
+    """
+    if not events_enabled(task):
+        return False
+    fields: Dict[str, Any] = {"current": current, "total": total, "message": message}
+    if total:
+        fields["percent"] = round(current * 100 / total, 1)
+    return publish_task_event(build_task_event("task_progress", task, **fields))
+
+
+def on_task_started(task: Any, task_id: str) -> None:
+    """
+    任务开始执行时发布 task_started 事件（task_prerun 信号处理器调用）
+
+    Args:
+        task: 任务实例
+        task_id: 任务 ID
+    """
+    if events_enabled(task):
+        publish_task_event(build_task_event("task_started", task, task_id))
+
+
+def on_task_finished(task: Any, task_id: str, state: Optional[str], retval: Any) -> None:
+    """
+    任务执行结束时发布结果事件（task_postrun 信号处理器调用）
+
+    成功时附带任务返回值（result），失败 / 重试时附带错误说明（error）。
+
+    Args:
+        task: 任务实例
+        task_id: 任务 ID
+        state: 任务状态（SUCCESS / FAILURE / RETRY 等）
+        retval: 任务返回值，失败时为异常
+    """
+    event_type = LIFECYCLE_EVENTS.get(state) if state else None
+    if event_type is None or not events_enabled(task):
+        return
+    if state == "SUCCESS":
+        fields = {"result": retval}
+    else:
+        fields = {"error": str(retval)}
+    publish_task_event(build_task_event(event_type, task, task_id, state=state, **fields))
+
+
+# ==================== 导出 ====================
+__all__ = [
+    "LIFECYCLE_EVENTS",
+    "build_task_event",
+    "events_enabled",
+    "get_request_header",
+    "on_task_finished",
+    "on_task_started",
+    "publish_task_event",
+    "report_progress",
+]
@@ -88,14 +88,16 @@ def retryable_task(self, value: int) -> int:
 
 # ==================== 示例 4：长时间运行的任务 ====================
 
-@task(name="app.tasks.examples.long_running_task")
-def long_running_task(duration: int = 5) -> str:
+@task(name="app.tasks.examples.long_running_task", bind=True)
+def long_running_task(self, duration: int = 5) -> str:
     """
     长时间运行的任务示例
     
-    模拟需要较长时间处理的任务。
+    模拟需要较长时间处理的任务。每完成一步发布一次进度事件，
+    启用 task_events_enabled 时由 Web 进程通过 WebSocket 推送给发起任务的用户。
     
     Args:
+        self: 任务实例（bind=True 时可用）
         duration: 任务持续时间（秒）
     
     Returns:
@@ -106,6 +108,7 @@ def long_running_task(duration: int = 5) -> str:
     for i in range(duration):
         time.sleep(1)
         logger.info(f"任务进度: {i + 1}/{duration}")
+        self.report_progress(i + 1, duration)
     
     logger.info("长时间任务完成")
     return f"任务完成，耗时 {duration} 秒"
@@ -160,7 +163,7 @@ def chain_task_3(data: str) -> str:
 # result = retryable_task.delay(10)
 # print(result.get())
 #
-# # 4. 长时间任务
+# # 4. 长时间任务（启用 task_events_enabled 时进度和结果通过 WebSocket 推送，不需要 result.get()）
 # result = long_running_task.delay(10)
 # print(result.get())
 #
@@ -1,7 +1,7 @@
 """
 工具类模块
 
-提供日志、ID 生成、响应格式、异常处理等通用工具。
+提供日志、ID 生成、响应格式、异常处理、响应缓存、认证缓存、权限引擎、请求上下文等通用工具。
 """
 
 from app.utils.logger import logger, get_logger, setup_logger
@@ -22,6 +22,26 @@ from app.utils.exceptions import (
     ConflictError,
     InternalServerError,
 )
+from app.utils.context import (
+    get_request_id,
+    get_user_id,
+    request_context,
+)
+from app.utils.cache import (
+    ResponseCache,
+    response_cache,
+    cache_response,
+    invalidate_cache_tags,
+    invalidate_cache_tags_nowait,
+)
+from app.utils.auth_cache import (
+    AuthCache,
+    auth_cache,
+)
+from app.utils.permissions import (
+    PermissionEngine,
+    permission_engine,
+)
 
 __all__ = [
     # 日志工具
@@ -46,5 +66,21 @@ __all__ = [
     "ForbiddenError",
     "ConflictError",
     "InternalServerError",
+    # 请求上下文
+    "get_request_id",
+    "get_user_id",
+    "request_context",
+    # 响应缓存
+    "ResponseCache",
+    "response_cache",
+    "cache_response",
+    "invalidate_cache_tags",
+    "invalidate_cache_tags_nowait",
+    # 认证缓存
+    "AuthCache",
+    "auth_cache",
+    # 权限引擎
+    "PermissionEngine",
+    "permission_engine",
 ]
 
@@ -0,0 +1,305 @@
+"""
+认证结果缓存模块
+
+缓存认证函数的返回结果，避免每个请求都重复校验 token 并加载用户：
+- 以 token 的 SHA-256 哈希作为缓存键，原始凭证不出现在缓存中
+- 进程内 LRU + TTL（复用 MemoryCacheBackend）
+- 可选 Redis 共享层：多 Worker / 多节点共享认证结果，吊销对所有进程生效
+- 吊销钩子：按 token 或按用户 ID 使缓存失效（登出、修改密码、禁用用户时调用）
+
+两级缓存都保存序列化后的用户数据（默认 jsonable_encoder），每次命中都用 deserialize 还原出新的用户对象：
+进程内命中和共享层命中返回同一类型，请求之间也不会共享同一个可变对象（例如 ORM 实例）。
+因此缓存需要 deserialize 才会生效（见 set_authentication_function），未设置时直接执行认证函数。
+
+只缓存认证成功且带用户 ID 的结果（按用户吊销依赖 ID）；认证失败（返回 None）不缓存，每次都交给认证函数处理。
+由 get_current_user / get_current_user_async 在 auth_cache_enabled 开启时使用。
+"""
+
+import copy
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.utils.cache import CacheBackend, MemoryCacheBackend, RedisCacheBackend
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def default_token_getter(request: Request) -> Optional[str]:
+    """
+    从请求中获取认证凭证（默认读取 Authorization 请求头）
+
+    Args:
+        request: FastAPI Request 对象
+
+    Returns:
+        Optional[str]: 认证凭证，未携带时返回 None
+    """
+    return request.headers.get("authorization") or None
+
+
+def extract_user_id(user: Any) -> Any:
+    """
+    获取用户对象的 ID（兼容 dict 和对象）
+
+    Args:
+        user: 用户对象
+
+    Returns:
+        Any: 用户 ID，无法获取时返回 None
+    """
+    if isinstance(user, dict):
+        return user.get("id")
+    return getattr(user, "id", None)
+
+
+class AuthCache:
+    """
+    认证结果缓存
+
+    两级缓存：进程内 LRU 在前，Redis 共享层（可选）在后。
+    启用 Redis 共享层时，进程内条目的存活时间不超过 local_ttl，
+    其他进程发起的吊销最多延迟 local_ttl 秒生效。
+
+    两级缓存都保存 serialize 转换后的数据（默认 jsonable_encoder），命中时使用 deserialize
+    还原为认证函数返回的用户类型。未设置 deserialize 时缓存不生效。
+
+    Example:
+        ```python
+        from app.utils.auth_cache import auth_cache
+
+        # 用户登出时吊销当前 token
+        auth_cache.revoke_token(request.headers["Authorization"])
+
+        # 用户修改密码或被禁用时吊销其所有 token
+        auth_cache.revoke_user(user.id)
+        ```
+    """
+
+    def __init__(
+        self,
+        ttl: int = 60,
+        max_entries: int = 10000,
+        remote: Optional[CacheBackend] = None,
+        local_ttl: int = 5,
+        enabled: bool = True,
+        token_getter: Callable[[Request], Optional[str]] = default_token_getter,
+        serialize: Callable[[Any], Any] = jsonable_encoder,
+        deserialize: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        初始化认证结果缓存
+
+        Args:
+            ttl: 认证结果缓存时间（秒）
+            max_entries: 进程内缓存最大条目数
+            remote: Redis 共享层（可选）
+            local_ttl: 启用共享层时进程内缓存的最长时间（秒）
+            enabled: 是否启用缓存
+            token_getter: 从请求中获取认证凭证的函数
+            serialize: 写入缓存前转换用户对象的函数
+            deserialize: 命中时还原用户对象的函数，未设置时缓存不生效
+        """
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl) if remote is not None else ttl
+        self.local = MemoryCacheBackend(max_entries=max_entries)
+        self.remote = remote
+        self.enabled = enabled
+        self.token_getter = token_getter
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self._warned_no_deserialize = False
+        self.hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        """
+        计算凭证的缓存键
+
+        Args:
+            token: 认证凭证
+
+        Returns:
+            str: SHA-256 十六进制摘要
+        """
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _user_tag(user_id: Any) -> str:
+        return f"user:{user_id}"
+
+    def get_token(self, request: Request) -> Optional[str]:
+        """
+        获取请求的认证凭证，缓存未启用或未设置 deserialize 时返回 None（调用方直接执行认证）
+
+        Args:
+            request: FastAPI Request 对象
+
+        Returns:
+            Optional[str]: 认证凭证
+        """
+        if not self.enabled:
+            return None
+        if self.deserialize is None:
+            if not self._warned_no_deserialize:
+                self._warned_no_deserialize = True
+                logger.warning("认证缓存已启用，但未设置 deserialize，认证结果不会缓存")
+            return None
+        return self.token_getter(request)
+
+    def get(self, token: str) -> Optional[Any]:
+        """
+        获取缓存的认证结果
+
+        Args:
+            token: 认证凭证
+
+        Returns:
+            Optional[Any]: 还原出的新用户对象，未命中（或未设置 deserialize）时返回 None
+        """
+        if self.deserialize is None:
+            return None
+        key = self.hash_token(token)
+        data = self.local.get(key)
+        if data is not None:
+            self.hits += 1
+            # 进程内条目被所有请求共用，还原前复制，避免 deserialize 直接返回缓存中的数据
+            return self.deserialize(copy.deepcopy(data))
+
+        if self.remote is not None:
+            data = self.remote.get(key)
+            if data is not None:
+                user_id = extract_user_id(data)
+                if user_id is not None:
+                    self.local.set(key, data, self.local_ttl, tags=(self._user_tag(user_id),))
+                self.remote_hits += 1
+                return self.deserialize(data)
+
+        self.misses += 1
+        return None
+
+    def set(self, token: str, user: Any) -> None:
+        """
+        缓存认证结果
+
+        没有用户 ID 的结果无法按用户吊销，不缓存。
+
+        Args:
+            token: 认证凭证
+            user: 认证函数返回的用户对象
+        """
+        if self.deserialize is None:
+            return
+        user_id = extract_user_id(user)
+        if user_id is None:
+            logger.debug("认证结果没有用户 ID，不缓存")
+            return
+        try:
+            data = self.serialize(user)
+        except Exception as e:
+            logger.warning(f"用户对象无法序列化，跳过认证缓存: {e}")
+            return
+
+        key = self.hash_token(token)
+        tags = (self._user_tag(user_id),)
+        self.local.set(key, data, self.local_ttl, tags=tags)
+        if self.remote is not None:
+            self.remote.set(key, data, self.ttl, tags=tags)
+
+    def revoke_token(self, token: str) -> None:
+        """
+        吊销单个凭证的缓存结果
+
+        Args:
+            token: 认证凭证（与请求中携带的值一致，例如 "Bearer xxx"）
+        """
+        key = self.hash_token(token)
+        self.local.delete(key)
+        if self.remote is not None:
+            self.remote.delete(key)
+
+    def revoke_user(self, user_id: Any) -> int:
+        """
+        吊销某个用户所有凭证的缓存结果
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            int: 失效的缓存条目数（进程内 + 共享层）
+        """
+        tag = self._user_tag(user_id)
+        count = self.local.invalidate_tags(tag)
+        if self.remote is not None:
+            count += self.remote.invalidate_tags(tag)
+        return count
+
+    def clear(self) -> None:
+        """清空所有认证缓存"""
+        self.local.clear()
+        if self.remote is not None:
+            self.remote.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取认证缓存统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        total = self.hits + self.remote_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "remote": type(self.remote).__name__ if self.remote is not None else None,
+            "ttl": self.ttl,
+            "local_ttl": self.local_ttl,
+            "entries": len(self.local),
+            "hits": self.hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.remote_hits) / total, 4) if total else 0.0,
+        }
+
+
+def create_auth_cache() -> AuthCache:
+    """
+    根据配置创建认证缓存
+
+    auth_cache_backend 为 redis 但未配置 redis_url 时，只使用进程内缓存。
+
+    Returns:
+        AuthCache: 认证缓存实例
+    """
+    remote = None
+    if settings.auth_cache_enabled and settings.auth_cache_backend == "redis":
+        if settings.redis_url:
+            remote = RedisCacheBackend(settings.redis_url, prefix="auth:")
+        else:
+            logger.warning("auth_cache_backend 配置为 redis，但 redis_url 未配置，只使用进程内缓存")
+    return AuthCache(
+        ttl=settings.auth_cache_ttl,
+        max_entries=settings.auth_cache_max_entries,
+        remote=remote,
+        local_ttl=settings.auth_cache_local_ttl,
+        enabled=settings.auth_cache_enabled,
+    )
+
+
+# 创建全局认证缓存实例
+auth_cache = create_auth_cache()
+
+
+__all__ = [
+    "AuthCache",
+    "auth_cache",
+    "create_auth_cache",
+    "default_token_getter",
+    "extract_user_id",
+]
@@ -0,0 +1,768 @@
+"""
+响应缓存模块
+
+提供路由级响应缓存功能，包括：
+- 可插拔缓存后端（内存 LRU、Redis）
+- 基于 路径 + 查询参数 + 认证主体 的缓存键
+- TTL 过期
+- 防缓存击穿（single-flight：同一缓存键同一时刻只有一个请求回源）
+- 基于标签的缓存失效（由 Repository 写操作自动触发）
+- 标签代数（generation）：回源期间标签被失效时不写入缓存，避免写操作前读到的旧数据在失效后写回
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+# ==================== 缓存后端 ====================
+
+class CacheBackend:
+    """
+    缓存后端基类
+
+    定义缓存后端应具备的方法，子类需要实现具体的存储逻辑。
+    缓存值必须是可 JSON 序列化的对象。
+
+    每个标签有一个代数（generation），invalidate_tags 时递增。回源前读取标签代数，
+    写入时传入 generations，标签代数已变化（回源期间发生过失效）时不写入。
+    """
+
+    # 方法是否执行阻塞 I/O；为 True 时 ResponseCache 在线程池中调用，不阻塞事件循环
+    blocking = False
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Any]: 缓存值，不存在或已过期时返回 None
+        """
+        raise NotImplementedError("子类必须实现 get 方法")
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: int,
+        tags: Iterable[str] = (),
+        generations: Optional[Sequence[int]] = None,
+    ) -> bool:
+        """
+        设置缓存值
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间（秒）
+            tags: 缓存标签，用于批量失效
+            generations: 回源前读取的标签代数（与 tags 一一对应），标签代数已变化时不写入
+
+        Returns:
+            bool: 是否写入
+        """
+        raise NotImplementedError("子类必须实现 set 方法")
+
+    def tag_generations(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        """
+        获取标签的当前代数
+
+        Args:
+            tags: 缓存标签
+
+        Returns:
+            Tuple[int, ...]: 与 tags 一一对应的代数（从未失效的标签为 0）
+        """
+        raise NotImplementedError("子类必须实现 tag_generations 方法")
+
+    def delete(self, key: str) -> None:
+        """
+        删除缓存值
+
+        Args:
+            key: 缓存键
+        """
+        raise NotImplementedError("子类必须实现 delete 方法")
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        使带有指定标签的所有缓存失效
+
+        Args:
+            *tags: 缓存标签
+
+        Returns:
+            int: 失效的缓存条目数
+        """
+        raise NotImplementedError("子类必须实现 invalidate_tags 方法")
+
+    def clear(self) -> None:
+        """清空所有缓存"""
+        raise NotImplementedError("子类必须实现 clear 方法")
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    内存 LRU 缓存后端
+
+    使用 OrderedDict 实现 LRU 淘汰，并维护 标签 -> 缓存键 的倒排索引。
+    仅在当前进程内有效，多 Worker 部署时每个进程各自缓存。
+
+    Repository 写操作可能在线程池中执行，因此所有操作都加锁保护。
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        初始化内存缓存后端
+
+        Args:
+            max_entries: 最大缓存条目数，超出后淘汰最久未使用的条目
+        """
+        self.max_entries = max_entries
+        # 存储格式：{key: (过期时间, 值, 标签)}
+        self._data: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        # 倒排索引：{tag: {key1, key2, ...}}
+        self._tag_index: Dict[str, Set[str]] = {}
+        # 标签代数：{tag: 失效次数}（标签数量等于表的数量，不需要淘汰）
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: int,
+        tags: Iterable[str] = (),
+        generations: Optional[Sequence[int]] = None,
+    ) -> bool:
+        tags = tuple(tags)
+        with self._lock:
+            if generations is not None and tuple(generations) != self._current_generations(tags):
+                return False
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            # LRU 淘汰
+            while len(self._data) > self.max_entries:
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+        return True
+
+    def tag_generations(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return self._current_generations(tags)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        count = 0
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in self._tag_index.pop(tag, set()):
+                    if self._remove(key):
+                        count += 1
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tag_index.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _current_generations(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        """当前标签代数（调用方需持有锁）"""
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _remove(self, key: str) -> bool:
+        """移除缓存条目并维护标签索引（调用方需持有锁）"""
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+        return True
+
+
+# 检查标签代数后写入缓存（一次往返，原子执行）
+# KEYS: 缓存键, 标签集合键..., 标签代数键...；ARGV: 值, 过期时间, 标签集合过期时间, 缓存键（不含前缀）, 标签数, 代数...
+_SET_SCRIPT = """
+local count = tonumber(ARGV[5])
+if #ARGV > 5 then
+    for i = 1, count do
+        local current = redis.call('GET', KEYS[1 + count + i]) or '0'
+        if current ~= ARGV[5 + i] then
+            return 0
+        end
+    end
+end
+redis.call('SETEX', KEYS[1], ARGV[2], ARGV[1])
+for i = 1, count do
+    redis.call('SADD', KEYS[1 + i], ARGV[4])
+    redis.call('EXPIRE', KEYS[1 + i], ARGV[3])
+end
+return 1
+"""
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis 缓存后端
+
+    缓存值以 JSON 格式存储，标签使用 Redis Set 记录其关联的缓存键，标签代数使用计数器。
+    多个 Worker / 多个节点共享同一份缓存，标签失效对所有进程生效。
+
+    使用同步客户端（Repository 写操作中的失效是同步调用），ResponseCache 在线程池中调用读写，
+    不阻塞事件循环。Redis 不可用时记录警告并按缓存未命中处理，不影响正常请求。
+    """
+
+    blocking = True
+
+    def __init__(self, redis_url: str, prefix: str = "cache:", tag_ttl: int = 86400):
+        """
+        初始化 Redis 缓存后端
+
+        Args:
+            redis_url: Redis 连接 URL
+            prefix: 键前缀
+            tag_ttl: 标签集合的最短存活时间（秒），避免长期不失效的标签集合无限增长
+        """
+        import redis
+
+        self.prefix = prefix
+        self.tag_ttl = tag_ttl
+        self._client = redis.Redis.from_url(redis_url)
+        self._set_script = self._client.register_script(_SET_SCRIPT)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _generation_key(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw: Any = self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"读取 Redis 缓存失败: {e}")
+            return None
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: int,
+        tags: Iterable[str] = (),
+        generations: Optional[Sequence[int]] = None,
+    ) -> bool:
+        tags = tuple(tags)
+        keys = [self.prefix + key]
+        keys.extend(self._tag_key(tag) for tag in tags)
+        keys.extend(self._generation_key(tag) for tag in tags)
+        # 标签集合至少与其中的缓存条目存活同样长的时间
+        args: list = [
+            json.dumps(value, ensure_ascii=False),
+            ttl,
+            max(ttl, self.tag_ttl),
+            key,
+            len(tags),
+        ]
+        if generations is not None:
+            args.extend(str(generation) for generation in generations)
+        try:
+            return bool(self._set_script(keys=keys, args=args))
+        except Exception as e:
+            logger.warning(f"写入 Redis 缓存失败: {e}")
+            return False
+
+    def tag_generations(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        if not tags:
+            return ()
+        try:
+            values: Any = self._client.mget([self._generation_key(tag) for tag in tags])
+        except Exception as e:
+            logger.warning(f"读取 Redis 缓存标签代数失败: {e}")
+            # 返回不可能的代数，本次回源结果不写入缓存
+            return tuple(-1 for _ in tags)
+        return tuple(int(value) if value is not None else 0 for value in values)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"删除 Redis 缓存失败: {e}")
+
+    def invalidate_tags(self, *tags: str) -> int:
+        count = 0
+        try:
+            for tag in tags:
+                # 先递增代数，之后回源的结果不会写回失效前读到的数据
+                generation_key = self._generation_key(tag)
+                self._client.incr(generation_key)
+                self._client.expire(generation_key, self.tag_ttl)
+                tag_key = self._tag_key(tag)
+                keys: Any = self._client.smembers(tag_key)
+                if keys:
+                    deleted: Any = self._client.delete(
+                        *[self.prefix + k.decode("utf-8") for k in keys]
+                    )
+                    count += int(deleted)
+                self._client.delete(tag_key)
+        except Exception as e:
+            logger.warning(f"Redis 缓存标签失效失败: {e}")
+        return count
+
+    def clear(self) -> None:
+        try:
+            keys: list = list(self._client.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                self._client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"清空 Redis 缓存失败: {e}")
+
+
+def _worker_count() -> int:
+    """Web 进程数（gunicorn / uvicorn 读取的 WEB_CONCURRENCY 环境变量），未设置时为 1"""
+    try:
+        return int(os.environ.get("WEB_CONCURRENCY", "1"))
+    except ValueError:
+        return 1
+
+
+def create_cache_backend() -> CacheBackend:
+    """
+    根据配置创建缓存后端
+
+    cache_backend 为 redis 但未配置 redis_url 时，回退到内存后端。
+    多进程部署时内存后端的失效只作用于执行写操作的进程，其他进程在 TTL 内仍返回旧数据，此时记录警告。
+
+    Returns:
+        CacheBackend: 缓存后端实例
+    """
+    if settings.cache_backend == "redis":
+        if settings.redis_url:
+            return RedisCacheBackend(settings.redis_url)
+        logger.warning("cache_backend 配置为 redis，但 redis_url 未配置，回退到内存缓存")
+    if settings.cache_enabled and _worker_count() > 1:
+        logger.warning(
+            f"响应缓存使用进程内内存后端，但 WEB_CONCURRENCY={_worker_count()}："
+            f"写操作只失效本进程的缓存，其他进程最多返回 {settings.cache_default_ttl} 秒前的数据，"
+            f"多进程部署请使用 CACHE_BACKEND=redis"
+        )
+    return MemoryCacheBackend(max_entries=settings.cache_max_entries)
+
+
+# ==================== 响应缓存 ====================
+
+# 回源请求被取消时交给等待者的标记：等待者重新查询缓存，由其中一个接替回源
+_RETRY = object()
+
+
+class ResponseCache:
+    """
+    响应缓存管理器
+
+    负责缓存键生成、缓存读写、single-flight 回源合并和标签失效。
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        default_ttl: int = 30,
+        enabled: bool = True,
+    ):
+        """
+        初始化响应缓存管理器
+
+        Args:
+            backend: 缓存后端
+            default_ttl: 默认过期时间（秒）
+            enabled: 是否启用缓存
+        """
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        # 正在回源的请求：{key: Future}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # 后台失效线程（单线程，保持失效顺序），第一次需要时创建
+        self._invalidation_executor: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_principal(request: Request) -> str:
+        """
+        获取请求的认证主体标识
+
+        使用 Authorization 头的哈希值作为主体标识，未携带时视为匿名用户。
+        不直接使用原始 token，避免凭证出现在缓存键中。
+
+        Args:
+            request: FastAPI Request 对象
+
+        Returns:
+            str: 认证主体标识
+        """
+        authorization = request.headers.get("authorization")
+        if not authorization:
+            return "anonymous"
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16]
+
+    def build_key(self, request: Request, vary_on_principal: bool = True) -> str:
+        """
+        生成缓存键
+
+        缓存键由 请求方法 + 路径 + 排序后的查询参数（+ 认证主体）组成，
+        查询参数顺序不同的请求会命中同一缓存。
+
+        Args:
+            request: FastAPI Request 对象
+            vary_on_principal: 是否按认证主体区分缓存
+
+        Returns:
+            str: 缓存键
+        """
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        raw = f"{request.method}:{request.url.path}?{query}"
+        if vary_on_principal:
+            raw += f"|{self.get_principal(request)}"
+        return "resp:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_or_set(
+        self,
+        key: str,
+        producer: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        获取缓存值，未命中时回源并写入缓存
+
+        同一缓存键的并发请求只会有一个执行 producer，其余请求等待其结果，
+        避免缓存过期瞬间大量请求同时打到数据库。
+        producer 抛出异常时不写入缓存，异常会传递给所有等待者；
+        回源请求被取消（如客户端断开）时，等待者中的一个接替回源，其余等待者继续等待。
+        回源期间标签被失效时，结果只返回给本次的请求和等待者，不写入缓存。
+
+        Args:
+            key: 缓存键
+            producer: 回源函数（异步）
+            ttl: 过期时间（秒），默认使用 default_ttl
+            tags: 缓存标签
+
+        Returns:
+            Any: 缓存值（已转换为可 JSON 序列化的对象）
+        """
+        tags = tuple(tags)
+        while True:
+            value = await self._call(self.backend.get, key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            value = await asyncio.shield(inflight)
+            if value is not _RETRY:
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            generations = await self._call(self.backend.tag_generations, tags) if tags else None
+            value = jsonable_encoder(await producer())
+        except asyncio.CancelledError:
+            future.set_result(_RETRY)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # 标记异常已被获取，避免没有等待者时输出警告
+            future.exception()
+            raise
+        else:
+            stored = await self._call(
+                self.backend.set, key, value, ttl or self.default_ttl, tags, generations
+            )
+            if not stored and generations is not None:
+                logger.debug(f"回源期间缓存标签已失效，不写入缓存: {tags}")
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """调用缓存后端方法，阻塞型后端在线程池中执行"""
+        if self.backend.blocking:
+            return await run_in_threadpool(func, *args)
+        return func(*args)
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """
+        使带有指定标签的缓存失效
+
+        Args:
+            *tags: 缓存标签
+
+        Returns:
+            int: 失效的缓存条目数
+        """
+        count = self.backend.invalidate_tags(*tags)
+        if count:
+            logger.debug(f"缓存标签失效: {tags}，失效条目数: {count}")
+        return count
+
+    async def ainvalidate_tags(self, *tags: str) -> int:
+        """
+        使带有指定标签的缓存失效（异步版本，阻塞型后端在线程池中执行）
+
+        Args:
+            *tags: 缓存标签
+
+        Returns:
+            int: 失效的缓存条目数
+        """
+        if self.backend.blocking:
+            return await run_in_threadpool(self.invalidate_tags, *tags)
+        return self.invalidate_tags(*tags)
+
+    def invalidate_tags_nowait(self, *tags: str) -> Optional[Future]:
+        """
+        使带有指定标签的缓存失效，不阻塞调用方（供 Repository 等同步写路径调用）
+
+        内存后端直接失效；阻塞型后端（Redis）交给后台线程执行，不在请求路径上等待网络往返，
+        失效完成前的极短时间内其他请求仍可能读到旧缓存。失效失败只记录日志。
+
+        Args:
+            *tags: 缓存标签
+
+        Returns:
+            Optional[Future]: 后台失效任务，直接失效时为 None
+        """
+        if not self.backend.blocking:
+            self.invalidate_tags(*tags)
+            return None
+        if self._invalidation_executor is None:
+            self._invalidation_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="cache-invalidate"
+            )
+        return self._invalidation_executor.submit(self._invalidate_quietly, tags)
+
+    def _invalidate_quietly(self, tags: Tuple[str, ...]) -> None:
+        """后台失效：异常只记录日志"""
+        try:
+            self.invalidate_tags(*tags)
+        except Exception as e:
+            logger.warning(f"缓存标签失效失败 {tags}: {e}")
+
+    def clear(self) -> None:
+        """清空所有缓存并重置统计"""
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    async def aclear(self) -> None:
+        """清空所有缓存并重置统计（异步版本，阻塞型后端在线程池中执行）"""
+        if self.backend.blocking:
+            await run_in_threadpool(self.clear)
+        else:
+            self.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 缓存统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "default_ttl": self.default_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "inflight": len(self._inflight),
+        }
+
+
+# 创建全局响应缓存实例
+response_cache = ResponseCache(
+    backend=create_cache_backend(),
+    default_ttl=settings.cache_default_ttl,
+    enabled=settings.cache_enabled,
+)
+
+
+def invalidate_cache_tags(*tags: str) -> int:
+    """
+    使带有指定标签的响应缓存失效（便捷函数）
+
+    Args:
+        *tags: 缓存标签
+
+    Returns:
+        int: 失效的缓存条目数
+    """
+    return response_cache.invalidate_tags(*tags)
+
+
+def invalidate_cache_tags_nowait(*tags: str) -> None:
+    """
+    使带有指定标签的响应缓存失效，阻塞型后端在后台线程执行（便捷函数）
+
+    Args:
+        *tags: 缓存标签
+    """
+    response_cache.invalidate_tags_nowait(*tags)
+
+
+def _refresh_timestamp(value: Any) -> Any:
+    """
+    刷新统一响应格式中的 timestamp
+
+    缓存的是 success_response() 生成的响应，命中时返回响应时间而不是缓存写入时间。
+    """
+    if isinstance(value, dict) and "timestamp" in value and "data" in value:
+        return {**value, "timestamp": datetime.now().isoformat()}
+    return value
+
+
+def cache_response(
+    ttl: Optional[int] = None,
+    tags: Iterable[str] = (),
+    vary_on_principal: bool = True,
+    cache: Optional[ResponseCache] = None,
+) -> Callable:
+    """
+    路由响应缓存装饰器
+
+    缓存 GET 路由的返回值，其他请求方法直接执行。
+    装饰器需放在路由装饰器之下；如果路由函数未声明 Request 参数，
+    装饰器会自动注入，不影响原有的参数解析。
+    返回统一响应格式（success_response）时，timestamp 为本次响应的时间。
+
+    Args:
+        ttl: 过期时间（秒），默认使用配置 cache_default_ttl
+        tags: 缓存标签，Repository 写操作会按表名失效对应标签
+        vary_on_principal: 是否按认证主体区分缓存（默认 True）
+        cache: 使用的响应缓存实例，默认使用全局实例
+
+    Returns:
+        Callable: 装饰器
+
+    Example:
+        ```python
+        from app.utils.cache import cache_response
+
+        @router.get("/users/")
+        @cache_response(ttl=30, tags=("users",))
+        async def get_users(page: int = 1):
+            ...
+        ```
+    """
+    tags = tuple(tags)
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        request_param = next(
+            (p.name for p in signature.parameters.values() if p.annotation is Request),
+            None,
+        )
+        inject_request = request_param is None
+        request_name: str = request_param or "_cache_request"
+
+        async def call(kwargs: Dict[str, Any]) -> Any:
+            if inspect.iscoroutinefunction(func):
+                return await func(**kwargs)
+            return await run_in_threadpool(func, **kwargs)
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs: Any) -> Any:
+            request: Request = kwargs.pop(request_name) if inject_request else kwargs[request_name]
+            active_cache = cache or response_cache
+            if not active_cache.enabled or request.method != "GET":
+                return await call(kwargs)
+            key = active_cache.build_key(request, vary_on_principal)
+            return _refresh_timestamp(
+                await active_cache.get_or_set(key, lambda: call(kwargs), ttl, tags)
+            )
+
+        if inject_request:
+            parameters = list(signature.parameters.values())
+            parameters.append(
+                inspect.Parameter(
+                    request_name,
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=Request,
+                )
+            )
+            setattr(wrapper, "__signature__", signature.replace(parameters=parameters))
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "RedisCacheBackend",
+    "create_cache_backend",
+    "ResponseCache",
+    "response_cache",
+    "invalidate_cache_tags",
+    "invalidate_cache_tags_nowait",
+    "cache_response",
+]
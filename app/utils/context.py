@@ -0,0 +1,191 @@
+"""
+请求上下文模块
+
+基于 contextvars 的请求上下文，用于在日志、数据库和异步任务之间关联同一个请求：
+- request_id：请求 ID（来自请求头或自动生成）
+- user_id：当前认证用户 ID
+- timings：请求内各阶段耗时（秒），例如数据库耗时
+
+上下文对象本身是可变的：FastAPI 在线程池中执行同步依赖时会复制 contextvars，
+但复制后仍指向同一个上下文对象，因此在依赖中设置的 user_id 对中间件可见。
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, Optional
+
+from app.utils.id_generator import generate_id
+
+
+class RequestContext:
+    """
+    请求上下文
+
+    Attributes:
+        request_id: 请求 ID
+        user_id: 当前认证用户 ID
+        timings: 各阶段累计耗时（秒）
+        query_count: 请求内执行的 SQL 数量
+        query_fingerprints: 请求内各 SQL 指纹的执行次数（用于 N+1 检测）
+    """
+
+    __slots__ = ("request_id", "user_id", "timings", "query_count", "query_fingerprints")
+
+    def __init__(self, request_id: Optional[str] = None, user_id: Optional[str] = None):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.timings: Dict[str, float] = {}
+        self.query_count = 0
+        self.query_fingerprints: Dict[str, int] = {}
+
+
+_current_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def generate_request_id() -> str:
+    """
+    生成请求 ID
+
+    Returns:
+        str: 请求 ID，格式：req_{uuid}
+    """
+    return generate_id("req", include_timestamp=False)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """
+    获取当前请求上下文
+
+    Returns:
+        Optional[RequestContext]: 当前上下文，不在请求中时返回 None
+    """
+    return _current_context.get()
+
+
+def bind_request_context(
+    request_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> Token:
+    """
+    绑定新的请求上下文
+
+    Args:
+        request_id: 请求 ID（可选）
+        user_id: 用户 ID（可选）
+
+    Returns:
+        Token: 用于 reset_request_context() 恢复之前的上下文
+    """
+    return _current_context.set(RequestContext(request_id=request_id, user_id=user_id))
+
+
+def reset_request_context(token: Token) -> None:
+    """
+    恢复绑定之前的请求上下文
+
+    Args:
+        token: bind_request_context() 返回的 Token
+    """
+    _current_context.reset(token)
+
+
+@contextmanager
+def request_context(
+    request_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+) -> Iterator[RequestContext]:
+    """
+    在代码块内绑定请求上下文
+
+    Args:
+        request_id: 请求 ID（可选）
+        user_id: 用户 ID（可选）
+
+    Example:
+        ```python
+        from app.utils.context import request_context
+
+        with request_context(request_id="req_123"):
+            logger.info("这条日志会带上 request_id")
+        ```
+    """
+    context = RequestContext(request_id=request_id, user_id=user_id)
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        reset_request_context(token)
+
+
+def get_request_id() -> Optional[str]:
+    """获取当前请求 ID"""
+    context = _current_context.get()
+    return context.request_id if context else None
+
+
+def get_user_id() -> Optional[str]:
+    """获取当前用户 ID"""
+    context = _current_context.get()
+    return context.user_id if context else None
+
+
+def set_user_id(user_id: Any) -> None:
+    """
+    设置当前用户 ID
+
+    不在请求上下文中时忽略。
+
+    Args:
+        user_id: 用户 ID
+    """
+    context = _current_context.get()
+    if context is not None and user_id is not None:
+        context.user_id = str(user_id)
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """
+    累加当前请求某一阶段的耗时
+
+    不在请求上下文中时忽略。
+
+    Args:
+        name: 阶段名称，例如 "db"
+        seconds: 耗时（秒）
+    """
+    context = _current_context.get()
+    if context is not None:
+        context.timings[name] = context.timings.get(name, 0.0) + seconds
+
+
+def get_log_context() -> Dict[str, str]:
+    """
+    获取需要注入日志的上下文字段
+
+    Returns:
+        dict: 只包含有值的 request_id / user_id
+    """
+    context = _current_context.get()
+    if context is None:
+        return {}
+    fields = {}
+    if context.request_id is not None:
+        fields["request_id"] = context.request_id
+    if context.user_id is not None:
+        fields["user_id"] = context.user_id
+    return fields
+
+
+__all__ = [
+    "RequestContext",
+    "generate_request_id",
+    "get_request_context",
+    "bind_request_context",
+    "reset_request_context",
+    "request_context",
+    "get_request_id",
+    "get_user_id",
+    "set_user_id",
+    "add_timing",
+    "get_log_context",
+]
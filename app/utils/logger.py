@@ -3,16 +3,46 @@
 
 提供统一的日志记录功能，支持 JSON 和文本两种格式。
 根据配置自动选择日志格式和级别。
+
+可选的异步日志管道（LOG_ASYNC=true）：
+- 业务线程只把日志记录放入有界队列（QueueHandler），不执行 I/O
+- 后台线程（QueueListener）批量取出记录，写完一批后统一 flush
+- 队列满时按溢出策略丢弃日志并计数，不会阻塞事件循环
+- 应用关闭时调用 shutdown_logging() 写出剩余日志，之后恢复为同步写入
 """
 
+import atexit
+import copy
 import json
 import logging
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.config import settings
+from app.utils.context import get_log_context
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None  # type: ignore[assignment]
+
+
+def _record_context(record: logging.LogRecord) -> Dict[str, str]:
+    """
+    获取日志记录的请求上下文字段
+
+    异步管道中格式化发生在后台线程，上下文已在入队时保存到 record.log_context。
+    """
+    context = getattr(record, "log_context", None)
+    if context is None:
+        context = get_log_context()
+    return context
 
 
 class JSONFormatter(logging.Formatter):
@@ -42,9 +72,14 @@ class JSONFormatter(logging.Formatter):
             "line": record.lineno,
         }
         
-        # 添加异常信息
+        # 添加请求上下文（request_id / user_id）
+        log_data.update(_record_context(record))
+
+        # 添加异常信息（异步管道中异常已在入队时格式化为 exc_text）
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
         
         # 添加额外字段（如果存在）
         if hasattr(record, "extra_fields"):
@@ -53,6 +88,94 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_data, ensure_ascii=False)
 
 
+class FastJSONFormatter(JSONFormatter):
+    """
+    高性能 JSON 日志格式化器
+
+    输出字段与 JSONFormatter 相同，另外附加静态字段（默认为应用名称、版本和运行环境）。
+    针对高吞吐场景的优化：
+    - 静态字段在初始化时预先序列化，每条日志直接拼接
+    - 时间戳使用日志记录的创建时间，同一毫秒内复用已格式化的字符串
+    - 安装 orjson 时使用 orjson 序列化，否则回退到标准库 json
+    """
+
+    def __init__(self, static_fields: Optional[Dict[str, Any]] = None):
+        """
+        初始化高性能 JSON 格式化器
+
+        Args:
+            static_fields: 每条日志都包含的静态字段，默认为 app / version / environment
+        """
+        super().__init__()
+        if static_fields is None:
+            static_fields = {
+                "app": settings.app_name,
+                "version": settings.app_version,
+                "environment": settings.environment,
+            }
+        self.static_fields = dict(static_fields)
+        # 预序列化静态字段：'"app":"x","version":"y"'（去掉首尾花括号）
+        self._static_fragment = self._dumps(self.static_fields)[1:-1] if self.static_fields else ""
+        self._cached_ms = -1
+        self._cached_timestamp = ""
+
+    @staticmethod
+    def _dumps(data: Dict[str, Any]) -> str:
+        if orjson is not None:
+            return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        return json.dumps(data, ensure_ascii=False, default=str, separators=(",", ":"))
+
+    def _timestamp(self, created: float) -> str:
+        """格式化时间戳（UTC，毫秒精度），同一毫秒内复用缓存"""
+        ms_total = int(created * 1000)
+        if ms_total != self._cached_ms:
+            seconds, ms = divmod(ms_total, 1000)
+            self._cached_timestamp = (
+                time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{ms:03d}Z"
+            )
+            self._cached_ms = ms_total
+        return self._cached_timestamp
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        格式化日志记录为 JSON 字符串
+
+        Args:
+            record: 日志记录对象
+
+        Returns:
+            str: JSON 格式的日志字符串
+        """
+        log_data: Dict[str, Any] = {
+            "timestamp": self._timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        log_data.update(_record_context(record))
+
+        # 与 logging.Formatter 一致，异常文本格式化后缓存在 exc_text 中
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_data["exception"] = record.exc_text
+
+        extra_fields = getattr(record, "extra_fields", None)
+        if extra_fields:
+            if any(key in self.static_fields for key in extra_fields):
+                # 额外字段覆盖静态字段时无法直接拼接，合并后完整序列化
+                return self._dumps({**log_data, **self.static_fields, **extra_fields})
+            log_data.update(extra_fields)
+
+        body = self._dumps(log_data)
+        if not self._static_fragment:
+            return body
+        return f"{body[:-1]},{self._static_fragment}}}"
+
+
 class TextFormatter(logging.Formatter):
     """
     文本格式日志格式化器
@@ -77,7 +200,261 @@ class TextFormatter(logging.Formatter):
         Returns:
             str: 文本格式的日志字符串
         """
-        return super().format(record)
+        message = super().format(record)
+        request_id = _record_context(record).get("request_id")
+        if request_id:
+            return f"{message} [request_id={request_id}]"
+        return message
+
+
+# ==================== 异步日志管道 ====================
+
+# QueueListener 的停止标记。它是私有属性 _sentinel（CPython 3.2 至今均为 None），
+# BatchingQueueListener._monitor 的重写和 drop_oldest 溢出策略都需要识别它，统一从这里读取
+_SENTINEL = getattr(QueueListener, "_sentinel", None)
+
+# 停止管道时等待放入停止标记、等待后台线程退出的最长时间（秒）
+_STOP_TIMEOUT = 5.0
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    有界队列日志处理器
+
+    只负责把日志记录放入队列，永不阻塞调用方。队列满时按溢出策略处理：
+    - drop_new：丢弃当前日志
+    - drop_oldest：丢弃队列中最旧的日志，放入当前日志（不会丢弃监听器的停止标记）
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "drop_new"):
+        """
+        初始化有界队列处理器
+
+        Args:
+            log_queue: 有界队列
+            overflow: 溢出策略（drop_new / drop_oldest）
+        """
+        super().__init__(log_queue)
+        if overflow not in ("drop_new", "drop_oldest"):
+            raise ValueError(f"不支持的溢出策略: {overflow}")
+        self.log_queue = log_queue
+        self.overflow = overflow
+        self.enqueued = 0
+        self.dropped = 0
+        # 多个线程同时写日志：保护计数器，并串行化 drop_oldest 的“取出最旧 + 放入”
+        self._stats_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        准备入队的日志记录
+
+        在调用线程中合并消息参数、格式化异常信息并保存请求上下文，保证记录可以
+        安全地跨线程传递，但保留原始字段，交给后台线程中的格式化器处理。
+        """
+        record = copy.copy(record)
+        record.log_context = get_log_context()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        log_queue = self.log_queue
+        try:
+            log_queue.put_nowait(record)
+        except queue.Full:
+            with self._stats_lock:
+                if self.overflow == "drop_new":
+                    self.dropped += 1
+                    return
+                self._enqueue_drop_oldest(record)
+            return
+        with self._stats_lock:
+            self.enqueued += 1
+
+    def _enqueue_drop_oldest(self, record: logging.LogRecord) -> None:
+        """丢弃最旧的日志后放入当前日志（调用方需持有锁）"""
+        log_queue = self.log_queue
+        try:
+            oldest = log_queue.get_nowait()
+        except queue.Empty:
+            oldest = record
+        if oldest is _SENTINEL:
+            # 监听器正在停止：放回停止标记（占用刚腾出的位置），丢弃当前日志
+            log_queue.put_nowait(oldest)
+            self.dropped += 1
+            return
+        if oldest is not record:
+            self.dropped += 1
+        try:
+            log_queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取队列统计信息
+
+        Returns:
+            dict: 入队数、丢弃数、当前队列长度和容量
+        """
+        with self._stats_lock:
+            enqueued, dropped = self.enqueued, self.dropped
+        return {
+            "enqueued": enqueued,
+            "dropped": dropped,
+            "queue_size": self.log_queue.qsize(),
+            "capacity": self.log_queue.maxsize,
+            "overflow": self.overflow,
+        }
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    批量写出的队列监听器
+
+    每次从队列中最多取出 batch_size 条记录，全部交给处理器写入后统一 flush，
+    减少高并发下的系统调用次数。
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, batch_size: int = 100):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.log_queue = log_queue
+        self.batch_size = batch_size
+
+    def stop(self) -> None:
+        """
+        停止监听器，写出队列中剩余的日志
+
+        与 QueueListener.stop 不同：队列已满时阻塞等待放入停止标记（put_nowait 会抛出 queue.Full），
+        等待线程退出也有超时，后台线程异常时不会让应用关闭卡住。
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self.log_queue.put(_SENTINEL, timeout=_STOP_TIMEOUT)
+        except queue.Full:
+            sys.stderr.write("异步日志队列已满，无法通知后台线程停止，剩余日志可能丢失\n")
+        thread.join(_STOP_TIMEOUT)
+        self._thread = None
+
+    # 重写 QueueListener._monitor（私有方法，签名自 CPython 3.2 起未变），按批次取出并 flush
+    def _monitor(self) -> None:
+        log_queue = self.log_queue
+        while True:
+            record = self.dequeue(True)
+            batch: List[logging.LogRecord] = []
+            stop = record is _SENTINEL
+            if not stop:
+                batch.append(record)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    record = log_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _SENTINEL:
+                    stop = True
+                else:
+                    batch.append(record)
+
+            for item in batch:
+                self.handle(item)
+            for handler in self.handlers:
+                handler.flush()
+
+            for _ in range(len(batch) + (1 if stop else 0)):
+                log_queue.task_done()
+            if stop:
+                break
+
+
+class _BatchWriteMixin(logging.StreamHandler):
+    """
+    异步管道中只写入流而不 flush，由 BatchingQueueListener 在每批结束后统一 flush
+
+    管道停止后 batched 置为 False，恢复为每条日志写入后 flush 的同步处理器。
+    """
+
+    batched = True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.batched:
+            super().emit(record)
+            return
+        try:
+            msg = self.format(record)
+            self.stream.write(msg + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchStreamHandler(_BatchWriteMixin, logging.StreamHandler):
+    pass
+
+
+class _BatchFileHandler(_BatchWriteMixin, logging.FileHandler):
+    pass
+
+
+# 已启动的异步日志管道：{日志记录器名称: (队列处理器, 监听器)}
+_async_pipelines: Dict[str, Tuple[BoundedQueueHandler, BatchingQueueListener]] = {}
+
+
+def _stop_pipeline(name: str, restore: bool = True) -> None:
+    """
+    停止指定日志记录器的异步管道，并写出剩余日志
+
+    Args:
+        name: 日志记录器名称
+        restore: 是否把输出处理器改为同步模式挂回日志记录器；为 False 时关闭处理器（重新配置时使用）
+    """
+    pipeline = _async_pipelines.pop(name, None)
+    if pipeline is None:
+        return
+    queue_handler, listener = pipeline
+    target = logging.getLogger(name)
+    # 先摘下队列处理器，之后的日志不再进入无人读取的队列
+    if restore:
+        for handler in listener.handlers:
+            if isinstance(handler, _BatchWriteMixin):
+                handler.batched = False
+            target.addHandler(handler)
+    target.removeHandler(queue_handler)
+    listener.stop()
+    if not restore:
+        for handler in listener.handlers:
+            handler.close()
+
+
+def shutdown_logging() -> None:
+    """
+    关闭所有异步日志管道
+
+    等待后台线程写出队列中剩余的日志后返回，之后日志恢复为同步写入（不会丢失）。
+    应在应用关闭时调用（已注册 atexit）。
+    """
+    for name in list(_async_pipelines):
+        _stop_pipeline(name)
+
+
+def get_logging_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    获取异步日志管道的统计信息
+
+    Returns:
+        dict: {日志记录器名称: 统计信息}
+    """
+    return {name: handler.stats() for name, (handler, _) in _async_pipelines.items()}
+
+
+atexit.register(shutdown_logging)
 
 
 def setup_logger(
@@ -85,6 +462,7 @@ def setup_logger(
     log_level: Optional[str] = None,
     log_format: Optional[str] = None,
     log_file: Optional[str] = None,
+    async_mode: Optional[bool] = None,
 ) -> logging.Logger:
     """
     设置并返回日志记录器
@@ -94,6 +472,7 @@ def setup_logger(
         log_level: 日志级别，默认从配置读取
         log_format: 日志格式（json/text），默认从配置读取
         log_file: 日志文件路径（可选），如果提供则同时输出到文件
+        async_mode: 是否使用异步日志管道，默认从配置读取（log_async）
         
     Returns:
         logging.Logger: 配置好的日志记录器
@@ -101,35 +480,56 @@ def setup_logger(
     # 获取配置
     level = log_level or settings.log_level
     fmt = log_format or settings.log_format
+    use_async = settings.log_async if async_mode is None else async_mode
+    logger_name = name or "app"
     
     # 创建日志记录器
-    logger = logging.getLogger(name or "app")
+    logger = logging.getLogger(logger_name)
     logger.setLevel(getattr(logging, level.upper()))
     
-    # 清除已有的处理器
+    # 清除已有的处理器（包括之前启动的异步管道）
+    _stop_pipeline(logger_name, restore=False)
     logger.handlers.clear()
     
     # 创建格式化器
+    formatter: logging.Formatter
     if fmt.lower() == "json":
-        formatter = JSONFormatter()
+        formatter = FastJSONFormatter()
     else:
         formatter = TextFormatter()
     
+    handlers: List[logging.Handler] = []
+
     # 创建控制台处理器
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = (
+        _BatchStreamHandler(sys.stdout) if use_async else logging.StreamHandler(sys.stdout)
+    )
     console_handler.setLevel(getattr(logging, level.upper()))
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # 如果指定了日志文件，添加文件处理器
     if log_file:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler_class = _BatchFileHandler if use_async else logging.FileHandler
+        file_handler = file_handler_class(log_file, encoding="utf-8")
         file_handler.setLevel(getattr(logging, level.upper()))
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    if use_async:
+        # 业务线程只入队，I/O 在后台线程中批量完成
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+        queue_handler = BoundedQueueHandler(log_queue, overflow=settings.log_queue_overflow)
+        listener = BatchingQueueListener(log_queue, *handlers, batch_size=settings.log_batch_size)
+        listener.start()
+        _async_pipelines[logger_name] = (queue_handler, listener)
+        logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     # 防止日志传播到根记录器
     logger.propagate = False
@@ -163,5 +563,16 @@ def get_logger(name: str) -> logging.Logger:
 
 
 # 导出全局日志记录器
-__all__ = ["logger", "get_logger", "setup_logger", "JSONFormatter", "TextFormatter"]
+__all__ = [
+    "logger",
+    "get_logger",
+    "setup_logger",
+    "shutdown_logging",
+    "get_logging_stats",
+    "JSONFormatter",
+    "FastJSONFormatter",
+    "TextFormatter",
+    "BoundedQueueHandler",
+    "BatchingQueueListener",
+]
 
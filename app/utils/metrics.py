@@ -0,0 +1,388 @@
+"""
+性能指标模块
+
+基于 prometheus_client 提供 Prometheus 格式的指标，包括：
+- HTTP：按路由模板统计的请求数、延迟直方图、进行中请求数
+- 数据库：连接池状态、SQL 执行次数和耗时
+- WebSocket：当前连接数、在线用户数、广播耗时、被断开的连接数、出站队列深度和丢弃数
+- Celery：任务执行次数（按状态）、耗时和异常次数
+
+多进程部署（gunicorn / uvicorn --workers）时，在启动前设置环境变量
+PROMETHEUS_MULTIPROC_DIR 指向一个空目录，/metrics 会汇总所有 worker 的指标。
+"""
+
+import os
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+from app.utils.logger import get_logger
+
+# 配置日志
+logger = get_logger(__name__)
+
+
+# 是否运行在多进程模式（由 prometheus_client 在导入时读取同一环境变量）
+MULTIPROCESS_MODE = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# SQL 耗时直方图桶（秒），比 HTTP 延迟更细
+DB_QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+# ==================== 指标定义 ====================
+
+HTTP_REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "HTTP 请求总数",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 请求处理耗时（秒）",
+    ["method", "route"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "正在处理的 HTTP 请求数",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_QUERIES_TOTAL = Counter(
+    "db_queries_total",
+    "SQL 语句执行次数",
+    ["operation"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL 语句执行耗时（秒）",
+    ["operation"],
+    buckets=DB_QUERY_BUCKETS,
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections",
+    "当前 WebSocket 连接数",
+    multiprocess_mode="livesum",
+)
+WEBSOCKET_USERS = Gauge(
+    "websocket_connected_users",
+    "当前 WebSocket 在线用户数",
+    multiprocess_mode="livesum",
+)
+
+WEBSOCKET_BROADCAST_DURATION = Histogram(
+    "websocket_broadcast_duration_seconds",
+    "WebSocket 广播耗时（秒）",
+)
+WEBSOCKET_EVICTIONS_TOTAL = Counter(
+    "websocket_evictions_total",
+    "服务端主动断开的 WebSocket 连接数",
+    ["reason"],
+)
+WEBSOCKET_QUEUE_DEPTH = Gauge(
+    "websocket_outbound_queued_messages",
+    "WebSocket 出站队列中等待发送的消息总数",
+    multiprocess_mode="livesum",
+)
+WEBSOCKET_QUEUE_DROPS_TOTAL = Counter(
+    "websocket_outbound_dropped_total",
+    "WebSocket 出站队列丢弃 / 合并的消息数",
+    ["reason"],
+)
+WEBSOCKET_BACKPLANE_MESSAGES_TOTAL = Counter(
+    "websocket_backplane_messages_total",
+    "经 WebSocket 跨进程通道发布 / 接收的消息数",
+    ["direction"],
+)
+WEBSOCKET_INBOUND_MESSAGES_TOTAL = Counter(
+    "websocket_inbound_messages_total",
+    "WebSocket 客户端消息的处理结果",
+    ["outcome"],
+)
+
+CELERY_TASKS_TOTAL = Counter(
+    "celery_tasks_total",
+    "Celery 任务执行次数",
+    ["task", "state"],
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery 任务执行耗时（秒）",
+    ["task"],
+)
+CELERY_TASK_EXCEPTIONS = Counter(
+    "celery_task_exceptions_total",
+    "Celery 任务异常次数",
+    ["task", "exception"],
+)
+
+
+# ==================== HTTP 指标 ====================
+
+def route_template(scope: Mapping[str, Any]) -> str:
+    """
+    获取请求对应的路由模板，用作指标标签
+
+    使用路由模板（例如 /api/v1/users/{user_id}）而不是实际路径，避免标签基数爆炸：
+    - 匹配到路由时使用路由声明的路径（scope["route"].path），挂载的子应用加上挂载路径
+    - 只匹配到挂载（例如 /static 静态文件）时使用挂载路径加 /{path}
+    - 未匹配任何路由时返回固定的 "unmatched"
+
+    Args:
+        scope: 请求处理完成后的 ASGI scope
+
+    Returns:
+        str: 路由模板
+    """
+    # Mount 匹配时把挂载路径追加到 root_path，app_root_path 保留应用原本的 root_path
+    mount_path = ""
+    if "app_root_path" in scope:
+        mount_path = scope.get("root_path", "")[len(scope["app_root_path"]):]
+    route_path = getattr(scope.get("route"), "path", None)
+    if isinstance(route_path, str):
+        return mount_path + route_path
+    if mount_path and "endpoint" in scope:
+        return mount_path + "/{path}"
+    return "unmatched"
+
+
+def observe_http_request(method: str, route: str, status_code: int, duration: float) -> None:
+    """
+    记录一次 HTTP 请求
+
+    Args:
+        method: 请求方法
+        route: 路由模板
+        status_code: 响应状态码
+        duration: 处理耗时（秒）
+    """
+    HTTP_REQUESTS_TOTAL.labels(method, route, str(status_code)).inc()
+    HTTP_REQUEST_DURATION.labels(method, route).observe(duration)
+
+
+# ==================== 数据库指标 ====================
+
+def observe_db_query(operation: str, duration: float) -> None:
+    """
+    记录一次 SQL 执行
+
+    由 app.db.instrumentation 的引擎事件调用。
+
+    Args:
+        operation: 操作类型（SELECT / INSERT / UPDATE / DELETE / OTHER）
+        duration: 耗时（秒）
+    """
+    DB_QUERIES_TOTAL.labels(operation).inc()
+    DB_QUERY_DURATION.labels(operation).observe(duration)
+
+
+class DatabasePoolCollector:
+    """
+    数据库连接池指标收集器
+
+    在每次抓取时读取连接池的实时状态。只反映当前进程的连接池，
+    多进程模式下由处理 /metrics 请求的 worker 报告。
+    """
+
+    def __init__(self, engine_getter):
+        """
+        初始化收集器
+
+        Args:
+            engine_getter: 返回数据库引擎的函数（通常是 get_engine）
+        """
+        self.engine_getter = engine_getter
+
+    def describe(self) -> Iterable[GaugeMetricFamily]:
+        # 不预先声明指标，避免注册时访问数据库引擎
+        return []
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        try:
+            pool = self.engine_getter().pool
+        except Exception:
+            return []
+
+        metrics = []
+        for name, documentation, getter in (
+            ("db_pool_size", "连接池大小", "size"),
+            ("db_pool_checked_in", "连接池中空闲的连接数", "checkedin"),
+            ("db_pool_checked_out", "已借出的连接数", "checkedout"),
+            ("db_pool_overflow", "溢出连接数", "overflow"),
+        ):
+            if hasattr(pool, getter):
+                metrics.append(
+                    GaugeMetricFamily(name, documentation, value=getattr(pool, getter)())
+                )
+        return metrics
+
+
+# ==================== WebSocket 指标 ====================
+
+def set_websocket_gauges(connections: int, users: int) -> None:
+    """
+    更新 WebSocket 连接数指标
+
+    Args:
+        connections: 当前连接数
+        users: 当前在线用户数
+    """
+    WEBSOCKET_CONNECTIONS.set(connections)
+    WEBSOCKET_USERS.set(users)
+
+
+def observe_websocket_broadcast(duration: float) -> None:
+    """
+    记录一次 WebSocket 广播耗时
+
+    Args:
+        duration: 耗时（秒）
+    """
+    WEBSOCKET_BROADCAST_DURATION.observe(duration)
+
+
+def observe_websocket_eviction(reason: str) -> None:
+    """
+    记录服务端主动断开的 WebSocket 连接
+
+    Args:
+        reason: 断开原因，例如 slow_consumer（发送超时）、send_error（发送失败）
+    """
+    WEBSOCKET_EVICTIONS_TOTAL.labels(reason).inc()
+
+
+def update_websocket_queue_depth(delta: int) -> None:
+    """
+    调整 WebSocket 出站队列中的消息总数
+
+    Args:
+        delta: 变化量（入队为正，出队 / 丢弃为负）
+    """
+    if delta:
+        WEBSOCKET_QUEUE_DEPTH.inc(delta)
+
+
+def observe_websocket_queue_drop(reason: str) -> None:
+    """
+    记录出站队列丢弃或合并的消息
+
+    Args:
+        reason: drop_oldest / drop_newest / coalesced
+    """
+    WEBSOCKET_QUEUE_DROPS_TOTAL.labels(reason).inc()
+
+
+def observe_websocket_backplane_message(direction: str) -> None:
+    """
+    记录经跨进程通道发布或接收的消息
+
+    Args:
+        direction: published（发布）/ received（接收）
+    """
+    WEBSOCKET_BACKPLANE_MESSAGES_TOTAL.labels(direction).inc()
+
+
+def observe_websocket_inbound_message(outcome: str) -> None:
+    """
+    记录客户端消息的处理结果
+
+    Args:
+        outcome: handled（已处理）/ fallback（未注册类型，由 fallback 处理）/ unknown（未注册类型）/
+            invalid（验证失败）/ error（处理异常）/ rate_limited（被限流）
+    """
+    WEBSOCKET_INBOUND_MESSAGES_TOTAL.labels(outcome).inc()
+
+
+# ==================== Celery 指标 ====================
+
+_task_start_times: Dict[str, float] = {}
+
+
+def task_started(task_id: str, task_name: str) -> None:
+    """记录任务开始执行"""
+    _task_start_times[task_id] = time.perf_counter()
+    CELERY_TASKS_TOTAL.labels(task_name, "started").inc()
+
+
+def task_finished(task_id: str, task_name: str, state: Optional[str]) -> None:
+    """记录任务执行结束，state 为 Celery 任务状态（SUCCESS / FAILURE / RETRY 等）"""
+    start = _task_start_times.pop(task_id, None)
+    if start is not None:
+        CELERY_TASK_DURATION.labels(task_name).observe(time.perf_counter() - start)
+    CELERY_TASKS_TOTAL.labels(task_name, (state or "unknown").lower()).inc()
+
+
+def task_failed(task_name: str, exception: BaseException) -> None:
+    """记录任务异常（按异常类型统计）"""
+    CELERY_TASK_EXCEPTIONS.labels(task_name, type(exception).__name__).inc()
+
+
+# ==================== 指标导出 ====================
+
+def create_registry(engine_getter=None) -> CollectorRegistry:
+    """
+    创建用于导出指标的注册表
+
+    单进程模式使用默认注册表；多进程模式创建新的注册表并汇总所有 worker 的指标文件。
+
+    Args:
+        engine_getter: 返回数据库引擎的函数（可选），用于导出连接池指标
+
+    Returns:
+        CollectorRegistry: 指标注册表
+    """
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    if engine_getter is not None:
+        registry.register(DatabasePoolCollector(engine_getter))
+    return registry
+
+
+def render_metrics(registry: CollectorRegistry) -> bytes:
+    """
+    生成 Prometheus 文本格式的指标
+
+    Args:
+        registry: 指标注册表
+
+    Returns:
+        bytes: 指标文本
+    """
+    return generate_latest(registry)
+
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "MULTIPROCESS_MODE",
+    "route_template",
+    "observe_http_request",
+    "observe_db_query",
+    "DatabasePoolCollector",
+    "set_websocket_gauges",
+    "observe_websocket_broadcast",
+    "observe_websocket_eviction",
+    "update_websocket_queue_depth",
+    "observe_websocket_queue_drop",
+    "observe_websocket_backplane_message",
+    "observe_websocket_inbound_message",
+    "task_started",
+    "task_finished",
+    "task_failed",
+    "create_registry",
+    "render_metrics",
+    "mark_process_dead",
+]
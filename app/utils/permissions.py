@@ -0,0 +1,401 @@
+"""
+权限引擎模块
+
+提供预编译、带缓存的权限检查，可作为 require_permission 使用的权限检查函数：
+- 启动时将 角色 -> 权限列表 编译为 (resource, action) 元组的 frozenset，检查时只做集合查找
+- 按用户缓存有效权限集合（多个角色的并集），TTL 过期，角色定义更新或用户角色变化时失效
+- 批量检查：一次取得有效权限后过滤整个资源列表，避免逐条回调
+
+权限写法为 "resource:action"，支持通配符：
+- "user:*"：user 资源的所有操作
+- "*:read"：所有资源的 read 操作
+- "*" 或 "*:*"：所有权限
+
+检查时 resource / action 为 None 视为 "*"，只有持有对应通配权限的用户才能通过。
+"""
+
+import logging
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from app.config import settings
+from app.utils.auth_cache import extract_user_id
+from app.utils.cache import MemoryCacheBackend
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 通配符
+WILDCARD = "*"
+
+# 编译后的权限：(resource, action)
+Permission = Tuple[str, str]
+PermissionSet = FrozenSet[Permission]
+
+T = TypeVar("T")
+
+_EMPTY: PermissionSet = frozenset()
+
+
+def parse_permission(permission: str) -> Permission:
+    """
+    解析权限字符串
+
+    Args:
+        permission: 权限字符串，例如 "user:read"、"user:*"、"*"
+
+    Returns:
+        tuple: (resource, action)
+
+    Raises:
+        ValueError: 权限格式不正确时抛出
+    """
+    if permission == WILDCARD:
+        return (WILDCARD, WILDCARD)
+    resource, sep, action = permission.partition(":")
+    if not sep or not resource or not action:
+        raise ValueError(f"权限格式不正确（应为 resource:action）: {permission!r}")
+    return (resource, action)
+
+
+def compile_permissions(permissions: Iterable[str]) -> PermissionSet:
+    """
+    将权限字符串列表编译为权限集合
+
+    Args:
+        permissions: 权限字符串列表
+
+    Returns:
+        frozenset: (resource, action) 集合
+    """
+    return frozenset(parse_permission(permission) for permission in permissions)
+
+
+def has_permission(
+    permissions: PermissionSet, resource: Optional[str], action: Optional[str]
+) -> bool:
+    """
+    判断权限集合是否包含指定权限（考虑通配符）
+
+    Args:
+        permissions: 编译后的权限集合
+        resource: 资源标识，None 视为 "*"
+        action: 操作类型，None 视为 "*"
+
+    Returns:
+        bool: 是否有权限
+    """
+    resource = resource or WILDCARD
+    action = action or WILDCARD
+    return (
+        (resource, action) in permissions
+        or (resource, WILDCARD) in permissions
+        or (WILDCARD, action) in permissions
+        or (WILDCARD, WILDCARD) in permissions
+    )
+
+
+def default_role_getter(user: Any) -> Iterable[str]:
+    """
+    获取用户的角色列表（默认读取 roles 或 role 属性 / 键）
+
+    Args:
+        user: 认证用户对象
+
+    Returns:
+        Iterable[str]: 角色名称列表
+    """
+    if isinstance(user, dict):
+        roles = user.get("roles")
+        role = user.get("role")
+    else:
+        roles = getattr(user, "roles", None)
+        role = getattr(user, "role", None)
+    if roles:
+        return cast(Iterable[str], roles)
+    return (role,) if role else ()
+
+
+class PermissionEngine:
+    """
+    权限引擎
+
+    线程安全：角色定义整体替换，有效权限缓存复用 MemoryCacheBackend（带锁）。
+
+    用户的角色由 role_getter 决定，结果按用户 ID 缓存 ttl 秒；
+    用户角色变化时调用 invalidate_user()，角色定义变化时自动失效持有该角色的用户。
+
+    Example:
+        ```python
+        from app.dependencies import set_permission_check_function
+        from app.utils.permissions import permission_engine
+
+        permission_engine.set_roles({
+            "admin": ["*"],
+            "editor": ["user:read", "user:update", "post:*"],
+            "viewer": ["*:read"],
+        })
+        set_permission_check_function(permission_engine.as_check_function())
+
+        # 批量过滤：只保留用户可以读取的资源
+        visible = permission_engine.filter(user, ["user", "post", "billing"], action="read")
+        ```
+    """
+
+    def __init__(
+        self,
+        roles: Optional[Mapping[str, Iterable[str]]] = None,
+        ttl: int = 60,
+        max_users: int = 10000,
+        role_getter: Callable[[Any], Iterable[str]] = default_role_getter,
+    ):
+        """
+        初始化权限引擎
+
+        Args:
+            roles: 角色定义，{角色名: 权限字符串列表}
+            ttl: 有效权限缓存时间（秒）
+            max_users: 缓存的最大用户数
+            role_getter: 获取用户角色列表的函数
+        """
+        self.ttl = ttl
+        self.role_getter = role_getter
+        self._roles: Dict[str, PermissionSet] = {}
+        self._cache = MemoryCacheBackend(max_entries=max_users)
+        self.hits = 0
+        self.misses = 0
+        if roles:
+            self.set_roles(roles)
+
+    # ==================== 角色定义 ====================
+
+    def set_roles(self, roles: Mapping[str, Iterable[str]]) -> None:
+        """
+        编译并替换全部角色定义（清空有效权限缓存）
+
+        Args:
+            roles: 角色定义，{角色名: 权限字符串列表}
+        """
+        self._roles = {
+            name: compile_permissions(permissions) for name, permissions in roles.items()
+        }
+        self._cache.clear()
+
+    def set_role(self, name: str, permissions: Iterable[str]) -> None:
+        """
+        编译并设置单个角色（只失效持有该角色的用户缓存）
+
+        Args:
+            name: 角色名
+            permissions: 权限字符串列表
+        """
+        roles = dict(self._roles)
+        roles[name] = compile_permissions(permissions)
+        self._roles = roles
+        self._cache.invalidate_tags(self._role_tag(name))
+
+    def remove_role(self, name: str) -> None:
+        """
+        删除角色（只失效持有该角色的用户缓存）
+
+        Args:
+            name: 角色名
+        """
+        roles = dict(self._roles)
+        roles.pop(name, None)
+        self._roles = roles
+        self._cache.invalidate_tags(self._role_tag(name))
+
+    def get_role(self, name: str) -> PermissionSet:
+        """
+        获取角色编译后的权限集合
+
+        Args:
+            name: 角色名
+
+        Returns:
+            frozenset: 权限集合，角色不存在时为空集合
+        """
+        return self._roles.get(name, _EMPTY)
+
+    @staticmethod
+    def _role_tag(name: str) -> str:
+        return f"role:{name}"
+
+    # ==================== 有效权限 ====================
+
+    def effective_permissions(self, user: Any) -> PermissionSet:
+        """
+        获取用户的有效权限集合（所有角色权限的并集）
+
+        有用户 ID 时结果按 ID 缓存。
+
+        Args:
+            user: 认证用户对象
+
+        Returns:
+            frozenset: 有效权限集合
+        """
+        user_id = extract_user_id(user)
+        if user_id is not None:
+            cached = self._cache.get(str(user_id))
+            if cached is not None:
+                self.hits += 1
+                return cast(FrozenSet[Tuple[str, str]], cached)
+        self.misses += 1
+
+        role_names = tuple(self.role_getter(user))
+        roles = self._roles
+        if len(role_names) == 1:
+            # 单个角色直接复用编译好的集合
+            permissions = roles.get(role_names[0], _EMPTY)
+        else:
+            permissions = frozenset().union(*(roles.get(name, _EMPTY) for name in role_names))
+
+        if user_id is not None:
+            self._cache.set(
+                str(user_id),
+                permissions,
+                self.ttl,
+                tags=[self._role_tag(name) for name in role_names],
+            )
+        return permissions
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """
+        使用户的有效权限缓存失效（用户角色变化时调用）
+
+        Args:
+            user_id: 用户 ID
+        """
+        self._cache.delete(str(user_id))
+
+    def clear_cache(self) -> None:
+        """清空有效权限缓存"""
+        self._cache.clear()
+
+    # ==================== 权限检查 ====================
+
+    def check(
+        self, user: Any, resource: Optional[str] = None, action: Optional[str] = None
+    ) -> bool:
+        """
+        检查用户是否有权限
+
+        签名与 set_permission_check_function 要求的权限检查函数一致。
+
+        Args:
+            user: 认证用户对象
+            resource: 资源标识
+            action: 操作类型
+
+        Returns:
+            bool: 是否有权限
+        """
+        return has_permission(self.effective_permissions(user), resource, action)
+
+    def check_many(
+        self, user: Any, checks: Iterable[Tuple[Optional[str], Optional[str]]]
+    ) -> List[bool]:
+        """
+        批量检查多个 (resource, action)
+
+        Args:
+            user: 认证用户对象
+            checks: (resource, action) 列表
+
+        Returns:
+            list: 与 checks 顺序一致的检查结果
+        """
+        permissions = self.effective_permissions(user)
+        return [has_permission(permissions, resource, action) for resource, action in checks]
+
+    def filter(
+        self,
+        user: Any,
+        items: Iterable[T],
+        action: Optional[str] = None,
+        resource_getter: Optional[Callable[[T], str]] = None,
+    ) -> List[T]:
+        """
+        批量过滤出用户有权限的资源
+
+        Args:
+            user: 认证用户对象
+            items: 资源列表（资源标识或任意对象）
+            action: 操作类型
+            resource_getter: 从对象中取资源标识的函数，不提供时对象本身即资源标识
+
+        Returns:
+            list: 有权限的资源（保持原顺序）
+        """
+        permissions = self.effective_permissions(user)
+        action = action or WILDCARD
+        if (WILDCARD, action) in permissions or (WILDCARD, WILDCARD) in permissions:
+            return list(items)
+        if resource_getter is None:
+            return [
+                item for item in items
+                if (item, action) in permissions or (item, WILDCARD) in permissions
+            ]
+        result = []
+        for item in items:
+            resource = resource_getter(item)
+            if (resource, action) in permissions or (resource, WILDCARD) in permissions:
+                result.append(item)
+        return result
+
+    def as_check_function(self) -> Callable[[Any, Optional[str], Optional[str]], bool]:
+        """
+        获取可传给 set_permission_check_function 的权限检查函数
+
+        Returns:
+            Callable: 权限检查函数
+        """
+        return self.check
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取权限引擎统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        total = self.hits + self.misses
+        return {
+            "roles": len(self._roles),
+            "cached_users": len(self._cache),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# 创建全局权限引擎实例（需调用 set_roles() 定义角色，并通过 set_permission_check_function 启用）
+permission_engine = PermissionEngine(
+    ttl=settings.permission_cache_ttl,
+    max_users=settings.permission_cache_max_users,
+)
+
+
+__all__ = [
+    "WILDCARD",
+    "PermissionEngine",
+    "permission_engine",
+    "parse_permission",
+    "compile_permissions",
+    "has_permission",
+    "default_role_getter",
+]
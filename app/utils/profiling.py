@@ -0,0 +1,185 @@
+"""
+请求性能剖析模块
+
+保存按请求采集的 cProfile 剖析结果，包括：
+- 内存中保留最近 N 份剖析结果（超出后丢弃最旧的）
+- 可选将 .prof 文件写入目录，供 snakeviz / pstats 等工具离线分析
+- 生成按累计耗时等字段排序的文本报告
+- 数据库耗时与 Python 耗时拆分
+
+剖析结果由 ProfilingMiddleware 写入，管理后台接口 /admin/profiles 查看。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.utils.id_generator import generate_id
+from app.utils.logger import get_logger
+
+# 配置日志
+logger = get_logger(__name__)
+
+# 报告支持的排序字段
+SORT_KEYS = ("cumulative", "tottime", "ncalls", "pcalls")
+
+
+class ProfileStore:
+    """
+    剖析结果存储
+
+    线程安全。每份结果保存 pstats.Stats 和请求元数据（路径、耗时、数据库耗时等）。
+    """
+
+    def __init__(self, max_profiles: int = 50, storage_dir: Optional[str] = None):
+        """
+        初始化剖析结果存储
+
+        Args:
+            max_profiles: 内存中保留的剖析结果数量
+            storage_dir: .prof 文件写入目录（可选）
+        """
+        self.max_profiles = max_profiles
+        self.storage_dir = storage_dir
+        self._lock = threading.Lock()
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def new_id() -> str:
+        """
+        生成剖析结果 ID
+
+        Returns:
+            str: 剖析结果 ID，格式：prof_{uuid}
+        """
+        return generate_id("prof", include_timestamp=False)
+
+    def add(
+        self, profiler: cProfile.Profile, profile_id: Optional[str] = None, **metadata: Any
+    ) -> str:
+        """
+        保存一份剖析结果
+
+        Args:
+            profiler: 已停止的 cProfile.Profile
+            profile_id: 剖析结果 ID（可选），未提供时自动生成
+            **metadata: 请求元数据（method、path、total_ms、db_ms 等）
+
+        Returns:
+            str: 剖析结果 ID
+        """
+        profile_id = profile_id or self.new_id()
+        stats = pstats.Stats(profiler)
+        entry = {
+            "id": profile_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **metadata,
+        }
+
+        if self.storage_dir:
+            try:
+                os.makedirs(self.storage_dir, exist_ok=True)
+                path = os.path.join(self.storage_dir, f"{profile_id}.prof")
+                stats.dump_stats(path)
+                entry["file"] = path
+            except OSError as e:
+                logger.warning(f"写入剖析文件失败: {e}")
+
+        with self._lock:
+            self._profiles[profile_id] = {"meta": entry, "stats": stats}
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        列出所有剖析结果的元数据（最新的在前）
+
+        Returns:
+            list: 元数据列表
+        """
+        with self._lock:
+            return [item["meta"] for item in reversed(self._profiles.values())]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取剖析结果的元数据
+
+        Args:
+            profile_id: 剖析结果 ID
+
+        Returns:
+            Optional[dict]: 元数据，不存在时返回 None
+        """
+        with self._lock:
+            item = self._profiles.get(profile_id)
+        return item["meta"] if item else None
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 30) -> Optional[str]:
+        """
+        生成剖析结果的文本报告
+
+        Args:
+            profile_id: 剖析结果 ID
+            sort: 排序字段（cumulative / tottime / ncalls / pcalls）
+            limit: 输出的函数数量
+
+        Returns:
+            Optional[str]: pstats 文本报告，不存在时返回 None
+        """
+        with self._lock:
+            item = self._profiles.get(profile_id)
+        if item is None:
+            return None
+        if sort not in SORT_KEYS:
+            sort = "cumulative"
+        output = io.StringIO()
+        # 排序会修改 Stats 对象的内部状态，合并到新对象后再输出
+        stats = pstats.Stats(stream=output)
+        stats.add(item["stats"])
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def clear(self) -> None:
+        """清空内存中的剖析结果（不删除已写入的文件）"""
+        with self._lock:
+            self._profiles.clear()
+
+
+def time_breakdown(total_seconds: float, timings: Dict[str, float]) -> Dict[str, float]:
+    """
+    拆分请求耗时
+
+    数据库耗时来自请求上下文中累计的 "db" 耗时，其余计为 Python 耗时
+    （包括序列化、业务逻辑以及等待线程池等非数据库时间）。
+
+    Args:
+        total_seconds: 请求总耗时（秒）
+        timings: 请求上下文中的阶段耗时
+
+    Returns:
+        dict: total_ms / db_ms / python_ms
+    """
+    db_seconds = min(timings.get("db", 0.0), total_seconds)
+    return {
+        "total_ms": round(total_seconds * 1000, 3),
+        "db_ms": round(db_seconds * 1000, 3),
+        "python_ms": round((total_seconds - db_seconds) * 1000, 3),
+    }
+
+
+# 全局剖析结果存储（应用启动时按配置更新）
+profile_store = ProfileStore()
+
+
+__all__ = [
+    "SORT_KEYS",
+    "ProfileStore",
+    "time_breakdown",
+    "profile_store",
+]
@@ -4,13 +4,35 @@ WebSocket 模块
 提供 WebSocket 连接管理、消息处理和路由功能。
 """
 
+from app.websocket.backplane import Backplane, InMemoryBackplane, InMemoryBus, RedisBackplane
 from app.websocket.manager import ConnectionManager, manager
+from app.websocket.payload import EncodedMessage, encode_message
+from app.websocket.registry import ConnectionRecord, ConnectionRegistry
 from app.websocket.handler import WebSocketHandler, SimpleWebSocketHandler
+from app.websocket.ratelimit import TokenBucket
+from app.websocket.replay import InMemoryReplayBuffer, RedisReplayBuffer, ReplayBuffer
+from app.websocket.task_events import TaskEventListener, task_channel
+from app.websocket.router import MessageRouter
 
 __all__ = [
     "ConnectionManager",
     "manager",
     "WebSocketHandler",
     "SimpleWebSocketHandler",
+    "Backplane",
+    "InMemoryBus",
+    "InMemoryBackplane",
+    "RedisBackplane",
+    "EncodedMessage",
+    "encode_message",
+    "ConnectionRecord",
+    "ConnectionRegistry",
+    "MessageRouter",
+    "TokenBucket",
+    "ReplayBuffer",
+    "InMemoryReplayBuffer",
+    "RedisReplayBuffer",
+    "TaskEventListener",
+    "task_channel",
 ]
 
@@ -0,0 +1,340 @@
+"""
+WebSocket 跨进程通道（backplane）模块
+
+每个 uvicorn worker / 节点只持有连接到本进程的 WebSocket，跨进程通道负责：
+- 转发个人消息和广播：一个进程发布，所有进程收到后投递给本进程的连接
+- 在线状态（presence）：每个节点上报本节点的 {用户: 连接数}，查询时汇总为集群视图
+
+提供两种实现：
+- InMemoryBackplane：进程内总线，多个 ConnectionManager 共享同一个 InMemoryBus（单进程部署 / 测试）
+- RedisBackplane：Redis pub/sub 转发消息，每个节点一个带过期时间的 Hash 记录在线状态
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+from app.utils.logger import get_logger
+
+# 配置日志
+logger = get_logger(__name__)
+
+# 收到消息时的回调，参数为消息信封
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+# 返回本节点当前在线状态 {user_id: 连接数} 的函数
+PresenceSnapshot = Callable[[], Dict[str, int]]
+
+
+def generate_node_id() -> str:
+    """
+    生成节点 ID（主机名 + 进程号 + 随机后缀）
+
+    Returns:
+        str: 节点 ID
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+# ==================== 通道基类 ====================
+
+class Backplane:
+    """
+    跨进程通道基类
+
+    消息信封是可 JSON 序列化的字典，至少包含 origin（发布节点 ID）和 kind（消息类型）。
+    发布的消息会投递给所有已启动的节点（包括发布者自己），由接收方按 origin 过滤。
+
+    Args:
+        node_id: 节点 ID，默认自动生成
+    """
+
+    def __init__(self, node_id: Optional[str] = None):
+        self.node_id = node_id or generate_node_id()
+
+    async def start(self, on_message: MessageHandler, snapshot: PresenceSnapshot) -> None:
+        """
+        启动通道：订阅消息并开始上报在线状态
+
+        Args:
+            on_message: 收到消息时的回调
+            snapshot: 返回本节点当前在线状态的函数（用于定期全量上报）
+        """
+        raise NotImplementedError("子类必须实现 start 方法")
+
+    async def stop(self) -> None:
+        """停止通道：取消订阅并清除本节点的在线状态"""
+        raise NotImplementedError("子类必须实现 stop 方法")
+
+    async def publish(self, envelope: Dict[str, Any]) -> bool:
+        """
+        发布消息
+
+        Args:
+            envelope: 消息信封
+
+        Returns:
+            bool: 是否发布成功
+        """
+        raise NotImplementedError("子类必须实现 publish 方法")
+
+    async def update_presence(self, counts: Dict[str, int]) -> None:
+        """
+        更新本节点部分用户的连接数
+
+        Args:
+            counts: {user_id: 连接数}，连接数为 0 表示该用户已离线
+        """
+        raise NotImplementedError("子类必须实现 update_presence 方法")
+
+    async def get_presence(self) -> Dict[str, int]:
+        """
+        获取集群在线状态
+
+        Returns:
+            Dict[str, int]: {user_id: 所有节点上的连接数之和}
+        """
+        raise NotImplementedError("子类必须实现 get_presence 方法")
+
+
+# ==================== 进程内实现 ====================
+
+class InMemoryBus:
+    """
+    进程内消息总线
+
+    模拟 pub/sub 服务：保存已启动节点的消息回调和各节点的在线状态。
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[str, MessageHandler] = {}
+        # {node_id: {user_id: 连接数}}
+        self.presence: Dict[str, Dict[str, int]] = {}
+
+
+class InMemoryBackplane(Backplane):
+    """
+    进程内跨进程通道
+
+    共享同一个 InMemoryBus 的多个实例相互转发消息，用于单进程部署和测试多节点场景。
+
+    Args:
+        bus: 消息总线，默认使用模块级共享总线
+        node_id: 节点 ID，默认自动生成
+    """
+
+    def __init__(self, bus: Optional[InMemoryBus] = None, node_id: Optional[str] = None):
+        super().__init__(node_id)
+        self.bus = bus if bus is not None else default_bus
+
+    async def start(self, on_message: MessageHandler, snapshot: PresenceSnapshot) -> None:
+        self.bus.subscribers[self.node_id] = on_message
+        self.bus.presence[self.node_id] = {
+            user_id: count for user_id, count in snapshot().items() if count > 0
+        }
+
+    async def stop(self) -> None:
+        self.bus.subscribers.pop(self.node_id, None)
+        self.bus.presence.pop(self.node_id, None)
+
+    async def publish(self, envelope: Dict[str, Any]) -> bool:
+        # 与 Redis 一致：经过序列化，接收方拿到的是独立的副本
+        payload = json.dumps(envelope, ensure_ascii=False)
+        for node_id, handler in list(self.bus.subscribers.items()):
+            try:
+                await handler(json.loads(payload))
+            except Exception as e:
+                logger.error(f"节点 {node_id} 处理跨进程消息失败: {e}")
+        return True
+
+    async def update_presence(self, counts: Dict[str, int]) -> None:
+        presence = self.bus.presence.setdefault(self.node_id, {})
+        for user_id, count in counts.items():
+            if count > 0:
+                presence[user_id] = count
+            else:
+                presence.pop(user_id, None)
+
+    async def get_presence(self) -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        for presence in self.bus.presence.values():
+            for user_id, count in presence.items():
+                total[user_id] = total.get(user_id, 0) + count
+        return total
+
+
+# 模块级共享总线（同一进程内的 InMemoryBackplane 默认共享）
+default_bus = InMemoryBus()
+
+
+# ==================== Redis 实现 ====================
+
+class RedisBackplane(Backplane):
+    """
+    基于 Redis pub/sub 的跨进程通道
+
+    - 消息：发布到频道 {prefix}{channel}，每个节点一个订阅协程，连接断开时自动重连
+    - 在线状态：每个节点一个 Hash {prefix}presence:{node_id}（字段为用户 ID，值为连接数），
+      带过期时间并定期全量刷新；节点异常退出时其在线状态在 presence_ttl 秒后自动消失
+
+    Args:
+        redis_url: Redis 连接 URL
+        channel: 频道名
+        presence_ttl: 在线状态过期时间（秒），每 presence_ttl / 3 秒刷新一次
+        prefix: 键前缀
+        node_id: 节点 ID，默认自动生成
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        channel: str = "backplane",
+        presence_ttl: int = 30,
+        prefix: str = "ws:",
+        node_id: Optional[str] = None,
+    ):
+        import redis.asyncio as aioredis
+
+        super().__init__(node_id)
+        self._client = aioredis.Redis.from_url(redis_url)
+        self.channel = f"{prefix}{channel}"
+        self.presence_ttl = presence_ttl
+        self.presence_prefix = f"{prefix}presence:"
+        self.presence_key = f"{self.presence_prefix}{self.node_id}"
+        self._tasks: list = []
+
+    async def start(self, on_message: MessageHandler, snapshot: PresenceSnapshot) -> None:
+        self._tasks = [
+            asyncio.ensure_future(self._listen(on_message)),
+            asyncio.ensure_future(self._refresh_presence(snapshot)),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self._client.delete(self.presence_key)
+            await self._client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭 Redis 跨进程通道失败: {e}")
+
+    async def publish(self, envelope: Dict[str, Any]) -> bool:
+        try:
+            await self._client.publish(self.channel, json.dumps(envelope, ensure_ascii=False))
+            return True
+        except Exception as e:
+            logger.warning(f"发布跨进程消息失败: {e}")
+            return False
+
+    async def update_presence(self, counts: Dict[str, int]) -> None:
+        online = {user_id: count for user_id, count in counts.items() if count > 0}
+        offline = [user_id for user_id, count in counts.items() if count <= 0]
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                if online:
+                    pipe.hset(self.presence_key, mapping=online)
+                if offline:
+                    pipe.hdel(self.presence_key, *offline)
+                pipe.expire(self.presence_key, self.presence_ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"更新 Redis 在线状态失败: {e}")
+
+    async def get_presence(self) -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        try:
+            keys = [key async for key in self._client.scan_iter(match=f"{self.presence_prefix}*")]
+            if not keys:
+                return total
+            async with self._client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hgetall(key)
+                results = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"读取 Redis 在线状态失败: {e}")
+            return total
+        for presence in results:
+            for user_id, count in presence.items():
+                user_id = user_id.decode() if isinstance(user_id, bytes) else user_id
+                total[user_id] = total.get(user_id, 0) + int(count)
+        return total
+
+    async def _listen(self, on_message: MessageHandler) -> None:
+        """订阅协程：接收频道消息并回调，连接异常时每秒重试"""
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        await on_message(json.loads(message["data"]))
+                    except Exception as e:
+                        logger.error(f"处理跨进程消息失败: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Redis 跨进程通道订阅中断，1 秒后重试: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def _refresh_presence(self, snapshot: PresenceSnapshot) -> None:
+        """定期全量写入本节点在线状态并续期（Redis 重启或键过期后自动恢复）"""
+        interval = max(1.0, self.presence_ttl / 3)
+        while True:
+            try:
+                online = {user_id: count for user_id, count in snapshot().items() if count > 0}
+                async with self._client.pipeline(transaction=True) as pipe:
+                    pipe.delete(self.presence_key)
+                    if online:
+                        pipe.hset(self.presence_key, mapping=online)
+                    pipe.expire(self.presence_key, self.presence_ttl)
+                    await pipe.execute()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"刷新 Redis 在线状态失败: {e}")
+            await asyncio.sleep(interval)
+
+
+def create_backplane() -> Optional[Backplane]:
+    """
+    根据配置创建跨进程通道
+
+    websocket_backplane 为 none 时返回 None（只投递给本进程的连接）；
+    为 redis 但未配置 redis_url 时，回退为 None。
+
+    Returns:
+        Optional[Backplane]: 跨进程通道实例
+    """
+    if settings.websocket_backplane == "memory":
+        return InMemoryBackplane()
+    if settings.websocket_backplane == "redis":
+        if settings.redis_url:
+            return RedisBackplane(
+                settings.redis_url,
+                channel=settings.websocket_backplane_channel,
+                presence_ttl=settings.websocket_presence_ttl,
+            )
+        logger.warning("websocket_backplane 配置为 redis，但 redis_url 未配置，只投递给本进程的连接")
+    return None
+
+
+__all__ = [
+    "Backplane",
+    "InMemoryBus",
+    "InMemoryBackplane",
+    "RedisBackplane",
+    "create_backplane",
+    "generate_node_id",
+]
@@ -4,16 +4,25 @@ WebSocket 基础处理器模块
 提供 WebSocket 连接处理的基础框架，包括：
 - 连接处理框架
 - 消息接收框架
+- 按消息类型分发（MessageRouter）和消息 Schema 验证
+- 入站限流（每个连接一个令牌桶）和可选的并发消息处理
 - 扩展接口
 """
 
+import asyncio
 import json
-import logging
-from typing import Optional, Any, Callable, Awaitable, Dict
+from typing import Optional, Any, Dict, Set
 from fastapi import WebSocket, WebSocketDisconnect
 
+from app.config import settings
+from app.schemas.websocket_schema import EchoMessage, PingMessage, SubscribeMessage
 from app.websocket.manager import manager
+from app.websocket.payload import ENCODING_JSON, ENCODING_MSGPACK, decode_frame
+from app.websocket.ratelimit import TokenBucket
+from app.websocket.router import MessageRouter
 from app.utils.logger import get_logger
+from app.utils.context import set_user_id
+from app.utils.metrics import observe_websocket_inbound_message
 
 # 配置日志
 logger = get_logger(__name__)
@@ -25,17 +34,60 @@ class WebSocketHandler:
     
     提供 WebSocket 连接处理的基础框架，包括连接建立、消息接收、错误处理等。
     子类可以继承此类并重写特定方法来扩展功能。
+
+    子类设置类属性 router（MessageRouter）后，on_message 按消息类型分发给注册的处理函数，
+    不需要再重写 on_message。
+
+    开启服务端心跳（websocket_heartbeat_interval > 0）时，客户端收到 {"type": "ping"} 需要回复
+    {"type": "pong"}（任何客户端消息都会刷新最后活跃时间），否则空闲超时后连接被断开。
+
+    每个连接有一个入站令牌桶：超过速率的消息直接丢弃（连续丢弃时只回复一次 RATE_LIMITED 错误）。
+    max_concurrency 大于 1 时，同一连接最多同时处理 max_concurrency 条消息，
+    达到上限时暂停接收，消息的处理顺序不再保证；单条消息处理失败交给 on_error，不断开连接。
+
+    指定 last_seq（客户端最后收到的个人消息序号）时为断线续传：连接建立后先补发缺失的消息，
+    再回复 {"type": "resumed", "last_seq": ..., "replayed": 补发数}；缺口无法补齐时回复
+    {"type": "resume_failed", "last_seq": ...}，客户端需要重新全量同步。
     """
     
-    def __init__(self, user_id: str):
+    # 消息路由（可选），为 None 时子类必须重写 on_message
+    router: Optional[MessageRouter] = None
+
+    def __init__(
+        self,
+        user_id: str,
+        max_concurrency: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        rate_limit_burst: Optional[int] = None,
+        last_seq: Optional[int] = None,
+    ):
         """
         初始化处理器
         
         Args:
             user_id: 用户 ID
+            max_concurrency: 同时处理的消息数上限，默认使用配置 websocket_message_concurrency
+            rate_limit: 每秒允许的消息数，0 表示不限流，默认使用配置 websocket_rate_limit
+            rate_limit_burst: 允许的突发消息数，默认使用配置 websocket_rate_limit_burst
+            last_seq: 客户端最后收到的个人消息序号（可选），指定时补发之后的消息
         """
         self.user_id = user_id
+        self.last_seq = last_seq
         self.websocket: Optional[WebSocket] = None
+        # 连接协商的编码格式（json / msgpack），连接建立后由连接管理器确定
+        self.encoding = ENCODING_JSON
+        self.max_concurrency = max_concurrency or settings.websocket_message_concurrency
+        if rate_limit is None:
+            rate_limit = settings.websocket_rate_limit
+        self.rate_limiter: Optional[TokenBucket] = None
+        if rate_limit > 0:
+            self.rate_limiter = TokenBucket(
+                rate_limit, rate_limit_burst or settings.websocket_rate_limit_burst
+            )
+        # 是否处于限流状态（限流期间只回复一次错误）
+        self._throttled = False
+        # 并发处理中的消息任务
+        self._tasks: Set[asyncio.Task] = set()
     
     async def on_connect(self, websocket: WebSocket) -> None:
         """
@@ -59,38 +111,52 @@ class WebSocketHandler:
             ```
         """
         self.websocket = websocket
-        await manager.connect(websocket, self.user_id)
+        set_user_id(self.user_id)
+        await manager.connect(websocket, self.user_id, resume=self.last_seq is not None)
+        self.encoding = manager.get_encoding(websocket)
         logger.info(f"WebSocket 连接已建立: 用户 {self.user_id}")
     
+    async def on_resume(self, last_seq: int) -> None:
+        """
+        断线续传：补发 last_seq 之后的个人消息，并告知客户端结果
+
+        Args:
+            last_seq: 客户端最后收到的序号
+        """
+        if not self.websocket:
+            return
+        replayed = await manager.resume(self.websocket, last_seq)
+        if replayed is None:
+            logger.info(f"用户 {self.user_id} 断线续传失败，序号 {last_seq} 之后的消息已不可补发")
+            await self.send_message({"type": "resume_failed", "last_seq": last_seq})
+        else:
+            await self.send_message({"type": "resumed", "last_seq": last_seq, "replayed": replayed})
+
     async def on_message(self, message: str) -> None:
         """
         接收到消息时的处理逻辑
         
-        子类必须重写此方法来处理接收到的消息。
+        设置了 router 时按消息类型分发；否则子类必须重写此方法来处理接收到的消息。
         
         Args:
             message: 接收到的消息文本
             
         Raises:
-            NotImplementedError: 如果子类未重写此方法
+            NotImplementedError: 如果未设置 router 且子类未重写此方法
             
         Example:
             ```python
             class CustomHandler(WebSocketHandler):
-                async def on_message(self, message: str):
-                    try:
-                        data = json.loads(message)
-                        message_type = data.get("type")
-                        
-                        if message_type == "ping":
-                            await self.send_pong()
-                        elif message_type == "chat":
-                            await self.handle_chat(data)
-                    except json.JSONDecodeError:
-                        await self.send_error("消息格式错误")
+                router = MessageRouter()
+
+                @router.route("chat", schema=ChatMessage)
+                async def handle_chat(self, message: ChatMessage):
+                    await self.send_message({"type": "chat_ack", "id": message.id})
             ```
         """
-        raise NotImplementedError("子类必须实现 on_message 方法")
+        if self.router is None:
+            raise NotImplementedError("子类必须设置 router 或实现 on_message 方法")
+        await self.router.dispatch(self, message)
     
     async def on_disconnect(self) -> None:
         """
@@ -134,8 +200,10 @@ class WebSocketHandler:
         """
         发送消息给当前连接
         
+        按连接协商的编码格式发送（json 文本帧或 msgpack 二进制帧）。
+
         Args:
-            message: 要发送的消息（可以是字符串、字典等，会自动序列化为 JSON）
+            message: 要发送的消息（可以是字符串、字典等，会自动序列化；也可以是预编码载荷）
             
         Example:
             ```python
@@ -151,12 +219,8 @@ class WebSocketHandler:
             return
         
         try:
-            if isinstance(message, str):
-                message_text = message
-            else:
-                message_text = json.dumps(message, ensure_ascii=False)
-            
-            await self.websocket.send_text(message_text)
+            # 经由连接管理器发送：连接有出站队列时入队，与推送消息保持顺序
+            await manager.send_to_connection(self.websocket, message)
         except Exception as e:
             logger.error(f"发送消息失败 (用户 {self.user_id}): {e}")
             raise
@@ -183,11 +247,75 @@ class WebSocketHandler:
         
         await self.send_message(error_data)
     
+    async def receive_message(self, websocket: WebSocket) -> str:
+        """
+        接收一条客户端消息
+
+        msgpack 连接发来的二进制帧解码后转换为 JSON 文本，on_message 始终收到 str。
+
+        Args:
+            websocket: WebSocket 连接对象
+
+        Returns:
+            str: 消息文本
+
+        Raises:
+            WebSocketDisconnect: 客户端断开连接
+        """
+        if self.encoding != ENCODING_MSGPACK:
+            return await websocket.receive_text()
+
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+        if message.get("bytes") is not None:
+            return json.dumps(decode_frame(message["bytes"]), ensure_ascii=False)
+        return message.get("text") or ""
+
+    async def allow_message(self) -> bool:
+        """
+        入站限流检查（每条消息调用一次）
+
+        令牌不足时丢弃消息；进入限流状态时回复一次 RATE_LIMITED 错误，恢复前不再重复回复。
+
+        Returns:
+            bool: 是否处理该消息
+        """
+        if self.rate_limiter is None or self.rate_limiter.consume():
+            self._throttled = False
+            return True
+        observe_websocket_inbound_message("rate_limited")
+        if not self._throttled:
+            self._throttled = True
+            logger.warning(f"WebSocket 消息过于频繁，已限流: 用户 {self.user_id}")
+            await self.send_error("消息过于频繁，请稍后再试", "RATE_LIMITED")
+        return False
+
+    async def _process_message(self, message: str, semaphore: asyncio.Semaphore) -> None:
+        """并发模式下处理一条消息（异常交给 on_error，不断开连接）"""
+        try:
+            await self.on_message(message)
+        except Exception as e:
+            await self.on_error(e)
+        finally:
+            semaphore.release()
+
+    async def _cancel_pending(self) -> None:
+        """取消仍在处理中的消息任务（连接断开时调用）"""
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
     async def handle_connection(self, websocket: WebSocket) -> None:
         """
         处理 WebSocket 连接的完整生命周期
         
         这是主要的入口方法，处理连接的建立、消息接收和断开。
+        max_concurrency 为 1 时逐条处理消息；大于 1 时每条消息在独立任务中处理，
+        处理中的消息达到上限时暂停接收（背压），连接断开时取消未完成的消息任务。
         
         Args:
             websocket: WebSocket 连接对象
@@ -198,16 +326,38 @@ class WebSocketHandler:
             await handler.handle_connection(websocket)
             ```
         """
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency > 1 else None
         try:
             # 建立连接
             await self.on_connect(websocket)
+            if self.last_seq is not None:
+                await self.on_resume(self.last_seq)
             
             # 持续接收消息
             while True:
                 try:
+                    # 并发模式下先占用处理额度，达到上限时不再接收新消息
+                    if semaphore is not None:
+                        await semaphore.acquire()
                     # 接收消息
-                    message = await websocket.receive_text()
-                    await self.on_message(message)
+                    try:
+                        message = await self.receive_message(websocket)
+                    except BaseException:
+                        if semaphore is not None:
+                            semaphore.release()
+                        raise
+                    # 任何客户端消息都说明连接存活
+                    manager.touch(websocket)
+                    if not await self.allow_message():
+                        if semaphore is not None:
+                            semaphore.release()
+                        continue
+                    if semaphore is None:
+                        await self.on_message(message)
+                    else:
+                        task = asyncio.ensure_future(self._process_message(message, semaphore))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
                 except WebSocketDisconnect:
                     # 正常断开连接
                     break
@@ -223,6 +373,7 @@ class WebSocketHandler:
             await self.on_error(e)
         finally:
             # 断开连接
+            await self._cancel_pending()
             await self.on_disconnect()
 
 
@@ -230,10 +381,21 @@ class SimpleWebSocketHandler(WebSocketHandler):
     """
     简单的 WebSocket 处理器实现
     
-    提供一个基础的实现示例，支持 ping/pong 心跳和简单的消息回显。
+    提供一个基础的实现示例，支持 ping/pong 心跳（客户端 ping 回复 pong，
+    服务端 ping 的 pong 回复不再应答）、频道订阅和简单的消息回显。
     可以作为其他处理器的参考或直接使用。
+
+    频道订阅消息格式：
+    - {"type": "subscribe", "channel": "news.*"}，成功时回复 {"type": "subscribed", "channel": ...}
+    - {"type": "unsubscribe", "channel": "news.*"}，回复 {"type": "unsubscribed", "channel": ...}
+    子类可以重写 can_subscribe 限制可订阅的频道。
+
+    消息按 type 分发给 router 中注册的方法；子类通过 router = SimpleWebSocketHandler.router.copy()
+    继承这些消息类型，再注册自己的消息类型。未注册的消息类型原样回显。
     """
     
+    router = MessageRouter()
+
     async def on_connect(self, websocket: WebSocket) -> None:
         """连接建立时发送欢迎消息"""
         await super().on_connect(websocket)
@@ -245,43 +407,89 @@ class SimpleWebSocketHandler(WebSocketHandler):
             "user_id": self.user_id,
         })
     
-    async def on_message(self, message: str) -> None:
-        """处理接收到的消息"""
-        try:
-            # 尝试解析 JSON 消息
-            try:
-                data = json.loads(message)
-                message_type = data.get("type", "unknown")
-            except json.JSONDecodeError:
-                # 如果不是 JSON，当作普通文本处理
-                data = {"type": "text", "content": message}
-                message_type = "text"
+    @router.route("ping", schema=PingMessage)
+    async def handle_ping(self, message: PingMessage) -> None:
+        """心跳消息：回复 pong"""
+        await self.send_message({
+            "type": "pong",
+            "timestamp": message.timestamp,
+        })
+
+    @router.route("pong")
+    async def handle_pong(self, message: Dict[str, Any]) -> None:
+        """服务端心跳的回复，最后活跃时间已在接收时刷新"""
+
+    @router.route("echo", schema=EchoMessage)
+    async def handle_echo(self, message: EchoMessage) -> None:
+        """回显消息"""
+        await self.send_message({
+            "type": "echo",
+            "content": message.content,
+            "original": message.model_dump(),
+        })
+
+    @router.fallback()
+    async def handle_default(self, data: Dict[str, Any], message: str) -> None:
+        """默认处理：回显原始消息（非 JSON 消息按 {"type": "text", "content": 原文} 处理）"""
+        await self.send_message({
+            "type": "message",
+            "content": data,
+            "message": f"收到消息: {message}",
+        })
+
+    async def can_subscribe(self, channel: str) -> bool:
+        """
+        检查当前用户是否可以订阅频道
+
+        默认允许订阅任意频道，子类可以重写此方法实现频道级授权。
+
+        Args:
+            channel: 频道名或通配符模式
             
-            # 根据消息类型处理
-            if message_type == "ping":
-                # 心跳消息
-                await self.send_message({
-                    "type": "pong",
-                    "timestamp": data.get("timestamp"),
-                })
-            elif message_type == "echo":
-                # 回显消息
-                await self.send_message({
-                    "type": "echo",
-                    "content": data.get("content", ""),
-                    "original": data,
-                })
-            else:
-                # 默认处理：回显原始消息
-                await self.send_message({
-                    "type": "message",
-                    "content": data,
-                    "message": f"收到消息: {message}",
-                })
+        Returns:
+            bool: 是否允许订阅
+
+        Example:
+            ```python
+            class UserChannelHandler(SimpleWebSocketHandler):
+                async def can_subscribe(self, channel: str) -> bool:
+                    # 只允许订阅自己的私有频道和公共频道
+                    return channel == f"user.{self.user_id}" or channel.startswith("public.")
+            ```
+        """
+        return True
+
+    @router.route("subscribe", schema=SubscribeMessage, error_code="INVALID_CHANNEL")
+    async def handle_subscribe(self, message: SubscribeMessage) -> None:
+        """
+        处理订阅请求
         
-        except Exception as e:
-            logger.error(f"处理消息失败 (用户 {self.user_id}): {e}")
-            await self.send_error("处理消息时发生错误", "MESSAGE_PROCESSING_ERROR")
+        Args:
+            message: 订阅消息（channel 为频道名或通配符模式）
+        """
+        channel = message.channel
+        if not self.websocket:
+            return
+        if not await self.can_subscribe(channel):
+            await self.send_error(f"无权订阅频道: {channel}", "SUBSCRIBE_FORBIDDEN")
+            return
+        if not manager.subscribe(self.websocket, channel):
+            await self.send_error(f"订阅频道失败: {channel}（订阅数量已达上限）", "SUBSCRIBE_FAILED")
+            return
+        await self.send_message({"type": "subscribed", "channel": channel})
+
+    @router.route("unsubscribe", schema=SubscribeMessage, error_code="INVALID_CHANNEL")
+    async def handle_unsubscribe(self, message: SubscribeMessage) -> None:
+        """
+        处理取消订阅请求（未订阅的频道也回复 unsubscribed）
+
+        Args:
+            message: 取消订阅消息（channel 为订阅时使用的频道名或通配符模式）
+        """
+        if not self.websocket:
+            return
+        manager.unsubscribe(self.websocket, message.channel)
+        await self.send_message({"type": "unsubscribed", "channel": message.channel})
 
 
 # 导出
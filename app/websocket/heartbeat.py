@@ -0,0 +1,216 @@
+"""
+WebSocket 心跳调度模块
+
+使用时间轮（hashed timing wheel）为所有连接调度心跳，包括：
+- 记录每个连接最后一次收到客户端消息的时间（last seen）
+- 连接空闲达到心跳间隔时由服务端发送 ping
+- 空闲超过超时时间的连接判定为失效，交给连接管理器断开
+- 每个 tick 只处理到期的连接（O(到期数)），不扫描全部连接
+
+客户端的任何消息都会刷新 last seen；刷新只写一次字典，不移动时间轮中的条目，
+到期时再按最新的 last seen 重新调度（惰性调度）。
+"""
+
+import math
+import time
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+# 调度的键（连接管理器中为 ConnectionRecord）
+K = TypeVar("K", bound=Hashable)
+
+
+class TimerWheel(Generic[K]):
+    """
+    时间轮
+
+    时间按 tick 划分，第 n 个 tick 到期的键放在 slots[n % len(slots)] 中。
+    调度、取消都是 O(1)；advance 只访问经过的槽位，到期时间超过一圈的键会在槽位中保留到对应的轮次。
+
+    Args:
+        tick: 每个槽位的时间跨度（秒）
+        slots: 槽位数量
+        now: 当前时间（与 advance 使用同一时钟）
+    """
+
+    def __init__(self, tick: float, slots: int, now: float):
+        if tick <= 0:
+            raise ValueError("tick 必须大于 0")
+        self.tick = tick
+        self.slots: List[Set[K]] = [set() for _ in range(slots)]
+        # {键: 到期 tick 序号}
+        self._deadlines: Dict[K, int] = {}
+        self._current = int(now // tick)
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: K, when: float) -> None:
+        """
+        调度（或重新调度）键在 when 时刻到期
+
+        Args:
+            key: 键
+            when: 到期时间，早于下一个 tick 时按下一个 tick 处理
+        """
+        deadline = max(math.ceil(when / self.tick), self._current + 1)
+        previous = self._deadlines.get(key)
+        if previous is not None:
+            self.slots[previous % len(self.slots)].discard(key)
+        self._deadlines[key] = deadline
+        self.slots[deadline % len(self.slots)].add(key)
+
+    def cancel(self, key: K) -> None:
+        """
+        取消键的调度
+
+        Args:
+            key: 键
+        """
+        deadline = self._deadlines.pop(key, None)
+        if deadline is not None:
+            self.slots[deadline % len(self.slots)].discard(key)
+
+    def advance(self, now: float) -> List[K]:
+        """
+        推进时间轮到 now，取出所有已到期的键
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            List[K]: 到期的键（已从时间轮中移除）
+        """
+        target = int(now // self.tick)
+        if target <= self._current:
+            return []
+
+        expired: List[K] = []
+        size = len(self.slots)
+        # 跨度超过一圈时每个槽位只需访问一次
+        for offset in range(1, min(target - self._current, size) + 1):
+            bucket = self.slots[(self._current + offset) % size]
+            if not bucket:
+                continue
+            for key in [key for key in bucket if self._deadlines[key] <= target]:
+                bucket.discard(key)
+                del self._deadlines[key]
+                expired.append(key)
+        self._current = target
+        return expired
+
+
+class HeartbeatScheduler(Generic[K]):
+    """
+    心跳调度器
+
+    只负责记录和计算，不做网络操作：process() 返回本次需要 ping 的连接和已超时的连接，
+    由连接管理器发送 ping / 断开连接。
+
+    Args:
+        interval: 心跳间隔（秒），连接空闲达到该时间时发送 ping
+        timeout: 空闲超时时间（秒），空闲超过该时间的连接被判定为失效
+        tick: 时间轮精度（秒），默认 min(1, interval / 4)
+        clock: 时钟函数，默认 time.monotonic
+
+    Example:
+        ```python
+        scheduler = HeartbeatScheduler(interval=30, timeout=75)
+        scheduler.register(websocket)
+        scheduler.touch(websocket)          # 收到客户端消息时调用
+        pings, expired = scheduler.process()  # 每个 tick 调用一次
+        ```
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        timeout: float,
+        tick: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if interval <= 0:
+            raise ValueError("interval 必须大于 0")
+        self.interval = interval
+        self.timeout = max(timeout, interval)
+        self.tick = tick or min(1.0, interval / 4)
+        self.clock = clock
+        # 槽位数覆盖一个超时周期，正常情况下所有条目都在一圈之内
+        slots = max(16, math.ceil(self.timeout / self.tick) + 1)
+        self.wheel: TimerWheel[K] = TimerWheel(self.tick, slots, clock())
+        # {连接: 最后一次收到消息的时间}
+        self.last_seen: Dict[K, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.last_seen)
+
+    def register(self, key: K) -> None:
+        """
+        注册连接，interval 秒后检查
+
+        Args:
+            key: 连接
+        """
+        now = self.clock()
+        self.last_seen[key] = now
+        self.wheel.schedule(key, now + self.interval)
+
+    def unregister(self, key: K) -> None:
+        """
+        注销连接
+
+        Args:
+            key: 连接
+        """
+        if self.last_seen.pop(key, None) is not None:
+            self.wheel.cancel(key)
+
+    def touch(self, key: K) -> None:
+        """
+        刷新连接的最后活跃时间（O(1)，不移动时间轮条目）
+
+        Args:
+            key: 连接
+        """
+        if key in self.last_seen:
+            self.last_seen[key] = self.clock()
+
+    def process(self, now: Optional[float] = None) -> Tuple[List[K], List[K]]:
+        """
+        处理到期的连接
+
+        对每个到期的连接：
+        - 空闲超过 timeout：判定为失效，注销并返回
+        - 空闲达到 interval：需要发送 ping，在 min(now + interval, last_seen + timeout) 再次检查
+        - 期间有活动：按最新的 last_seen 重新调度
+
+        Args:
+            now: 当前时间，默认使用时钟
+
+        Returns:
+            Tuple[List, List]: (需要 ping 的连接, 已失效的连接)
+        """
+        if now is None:
+            now = self.clock()
+        pings: List[K] = []
+        expired: List[K] = []
+        last_seen = self.last_seen
+        for key in self.wheel.advance(now):
+            seen = last_seen.get(key)
+            if seen is None:
+                continue
+            idle = now - seen
+            if idle >= self.timeout:
+                del last_seen[key]
+                expired.append(key)
+            elif idle >= self.interval:
+                pings.append(key)
+                self.wheel.schedule(key, min(now + self.interval, seen + self.timeout))
+            else:
+                self.wheel.schedule(key, seen + self.interval)
+        return pings, expired
+
+
+__all__ = ["TimerWheel", "HeartbeatScheduler"]
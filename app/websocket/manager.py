@@ -5,49 +5,282 @@ WebSocket 连接管理器模块
 - 连接注册和注销
 - 个人消息推送
 - 广播消息推送
+- 每个连接一个有界出站队列，由写协程发送（生产者不等待网络写入）
+- 发送超时与慢消费者断开
 - 连接状态跟踪
+- 跨进程通道（backplane）：多 worker / 多节点间转发消息，汇总集群在线状态
+- 消息只编码一次，所有接收者共享同一帧；支持按连接协商的 msgpack 二进制帧
+- 频道订阅：频道 -> 连接的倒排索引，支持通配符模式，publish 只投递给订阅者
+- 服务端心跳：时间轮调度 ping，回收空闲 / 失效连接
+- 紧凑的连接注册表：每个连接一条 __slots__ 记录，O(1) 统计，在线用户按页遍历
+- 个人消息回放：按用户分配递增序号并保存最近的消息，客户端重连时补发缺失的消息
 """
 
-import json
+import asyncio
+import fnmatch
 import logging
-from typing import Dict, Set, Optional, Any
-from fastapi import WebSocket
+import re
+import time
+from typing import Any, Awaitable, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+from fastapi import WebSocket, status
 
+from app.config import settings
 from app.utils.logger import get_logger
+from app.utils.metrics import (
+    observe_websocket_backplane_message,
+    observe_websocket_broadcast,
+    observe_websocket_eviction,
+    set_websocket_gauges,
+)
+from app.websocket.backplane import Backplane, create_backplane
+from app.websocket.heartbeat import HeartbeatScheduler
+from app.websocket.outbound import OutboundQueue
+from app.websocket.payload import (
+    ENCODING_JSON,
+    EncodedMessage,
+    Frame,
+    encode_message,
+    negotiate_encoding,
+)
+from app.websocket.registry import ConnectionRecord, ConnectionRegistry
+from app.websocket.replay import ReplayBuffer, create_replay_buffer
 
 # 配置日志
 logger = get_logger(__name__)
 
 
+def is_pattern(channel: str) -> bool:
+    """
+    判断频道名是否为通配符模式
+
+    Args:
+        channel: 频道名
+
+    Returns:
+        bool: 包含 *、? 或 [ 时为通配符模式
+    """
+    return any(char in channel for char in "*?[")
+
+
 class ConnectionManager:
     """
     WebSocket 连接管理器
     
     管理所有活跃的 WebSocket 连接，提供连接注册、注销、消息推送等功能。
     支持按用户 ID 管理连接，一个用户可以拥有多个连接（多设备登录）。
+
+    默认每个连接有一个有界出站队列（queue_size 条），消息推送只入队、立即返回，
+    由连接各自的写协程发送；队列满时按 overflow 策略丢弃消息或断开连接，
+    带相同 coalesce_key 的未发送消息会被新消息替换。
+    queue_size 为 0 时不使用队列，由调用方并发发送（最多 broadcast_concurrency 个同时进行）。
+
+    每次发送最多等待 send_timeout 秒：超时的连接视为慢消费者，从管理器中移除并关闭，
+    发送失败的连接直接移除，一个慢客户端不会拖慢其他连接。
+
+    配置了跨进程通道（backplane）时，个人消息和广播在投递给本进程连接的同时发布到通道，
+    其他 worker / 节点收到后投递给各自的连接；本进程连接的在线状态上报到通道，
+    get_cluster_presence() 返回集群视图。通道需要在应用启动时调用 start() 启动。
+
+    消息在发送前包装为 EncodedMessage，每种编码格式只编码一次，所有接收者共享同一帧；
+    连接建立时按子协议协商编码格式（json 文本帧或 msgpack 二进制帧）。
+
+    连接可以订阅频道（精确频道名或 Redis PSUBSCRIBE 风格的通配符模式，如 news.*），
+    publish() 只投递给订阅者：精确频道通过倒排索引 O(1) 定位订阅者，
+    通配符模式按"不同模式"而不是"连接"匹配，频道与模式的匹配结果会被缓存。
+
+    heartbeat_interval 大于 0 时，start() 启动心跳协程：连接空闲（未收到客户端消息）
+    达到 heartbeat_interval 时发送 {"type": "ping"}，空闲超过 idle_timeout 时断开（关闭码 1001）。
+    处理器收到客户端消息时调用 touch() 刷新连接的最后活跃时间。
+
+    每个连接的状态（用户、编码格式、出站队列、订阅）集中在一条 ConnectionRecord 中，
+    由 ConnectionRegistry 按连接和按用户索引；连接数、用户数等统计直接读取索引大小，
+    在线用户通过 get_connected_users_page() 按页获取，不复制整个用户集合。
+
+    配置了回放缓冲区（replay）时，发给用户的字典消息会带上按用户递增的序号 seq 并保存到缓冲区，
+    用户当时不在线也不会丢失。客户端重连时以 connect(..., resume=True) 注册连接，
+    再调用 resume() 补发最后收到的序号之后的消息；补发完成前推送给该连接的消息先暂存，
+    补发后按顺序发送（跳过已补发的序号），客户端收到的消息序号保持递增。
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        send_timeout: Optional[float] = None,
+        broadcast_concurrency: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+        backplane: Optional[Backplane] = None,
+        max_subscriptions: Optional[int] = None,
+        heartbeat_interval: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        replay: Optional[ReplayBuffer] = None,
+    ):
         """
         初始化连接管理器
         
-        使用字典存储连接，key 为用户 ID，value 为 WebSocket 连接集合。
+        连接记录保存在注册表中，按连接和按用户两个维度索引，
         这样可以支持一个用户多个连接（多设备登录）。
+
+        Args:
+            send_timeout: 单次发送超时时间（秒），默认使用配置 websocket_send_timeout
+            broadcast_concurrency: 同时进行的发送数量上限，默认使用配置 websocket_broadcast_concurrency
+            queue_size: 每个连接的出站队列容量，0 表示不使用队列，默认使用配置 websocket_outbound_queue_size
+            overflow: 出站队列溢出策略，默认使用配置 websocket_overflow_policy
+            backplane: 跨进程通道（可选），为 None 时只投递给本进程的连接
+            max_subscriptions: 每个连接最多订阅的频道数，默认使用配置 websocket_max_subscriptions
+            heartbeat_interval: 心跳间隔（秒），0 表示关闭心跳，默认使用配置 websocket_heartbeat_interval
+            idle_timeout: 空闲超时时间（秒），默认使用配置 websocket_idle_timeout
+            replay: 个人消息回放缓冲区（可选），为 None 时不分配序号、不回放
+        """
+        # 连接注册表：{websocket: 记录} 和 {user_id: [记录, ...]}
+        self.registry = ConnectionRegistry()
+        self.send_timeout = send_timeout or settings.websocket_send_timeout
+        self.broadcast_concurrency = (
+            broadcast_concurrency or settings.websocket_broadcast_concurrency
+        )
+        self.queue_size = (
+            settings.websocket_outbound_queue_size if queue_size is None else queue_size
+        )
+        self.overflow = overflow or settings.websocket_overflow_policy
+        # 频道订阅倒排索引：{频道名: {连接记录, ...}}，通配符模式单独索引
+        # （连接订阅了哪些频道记录在 ConnectionRecord.subscriptions 中，用于断开时清理）
+        self.channels: Dict[str, Set[ConnectionRecord]] = {}
+        self.patterns: Dict[str, Set[ConnectionRecord]] = {}
+        self.max_subscriptions = max_subscriptions or settings.websocket_max_subscriptions
+        # 编译后的通配符模式，以及 {频道名: 匹配的模式} 缓存（模式集合变化时清空）
+        self._pattern_regex: Dict[str, Pattern] = {}
+        self._pattern_matches: Dict[str, Tuple[str, ...]] = {}
+        # 心跳调度器（heartbeat_interval 为 0 时不启用）
+        if heartbeat_interval is None:
+            heartbeat_interval = settings.websocket_heartbeat_interval
+        self.heartbeat: Optional[HeartbeatScheduler[ConnectionRecord]] = None
+        if heartbeat_interval > 0:
+            self.heartbeat = HeartbeatScheduler(
+                interval=heartbeat_interval,
+                timeout=idle_timeout or settings.websocket_idle_timeout,
+            )
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.replay = replay
+        # 正在断线续传（暂存推送消息）的连接数
+        self._held_connections = 0
+        self.backplane = backplane
+        # 后台任务：关闭慢消费者连接、上报在线状态（保留引用，避免任务被回收）
+        self._background_tasks: Set[asyncio.Task] = set()
+        # 在线状态有变化、尚未上报到通道的用户
+        self._presence_dirty: Set[str] = set()
+        self._presence_task: Optional[asyncio.Task] = None
+
+    @property
+    def active_connections(self) -> Dict[str, Set[WebSocket]]:
+        """
+        兼容视图：{user_id: {websocket, ...}}
+
+        每次访问都会重新构建（O(连接数)），只用于调试和兼容旧代码，新代码请使用 registry。
+        """
+        return {
+            user_id: {record.websocket for record in records}
+            for user_id, records in self.registry.users.items()
+        }
+
+    @property
+    def connection_to_user(self) -> Dict[WebSocket, str]:
+        """
+        兼容视图：{websocket: user_id}
+
+        每次访问都会重新构建（O(连接数)），新代码请使用 registry.get()。
+        """
+        return {websocket: record.user_id for websocket, record in self.registry.records.items()}
+
+    @property
+    def node_id(self) -> Optional[str]:
+        """本节点 ID（未配置跨进程通道时为 None）"""
+        return self.backplane.node_id if self.backplane is not None else None
+
+    async def start(self) -> None:
+        """
+        启动跨进程通道和心跳协程（应用启动时调用）
+
+        订阅其他节点发布的消息，并上报本节点的在线状态。
+        """
+        if self.backplane is not None:
+            await self.backplane.start(self._on_backplane_message, self._presence_snapshot)
+            logger.info(f"WebSocket 跨进程通道已启动: 节点 {self.backplane.node_id}")
+        if self.heartbeat is not None and self._heartbeat_task is None:
+            self._heartbeat_task = self._spawn(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        """停止心跳协程和跨进程通道（应用关闭时调用）"""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self.backplane is not None:
+            await self.backplane.stop()
+            logger.info("WebSocket 跨进程通道已停止")
+        if self.replay is not None:
+            await self.replay.close()
+    
+    def touch(self, websocket: WebSocket) -> None:
+        """
+        刷新连接的最后活跃时间（收到客户端消息时调用）
+
+        Args:
+            websocket: WebSocket 连接对象
+        """
+        if self.heartbeat is not None:
+            record = self.registry.get(websocket)
+            if record is not None:
+                self.heartbeat.touch(record)
+
+    async def run_heartbeat(self) -> Tuple[int, int]:
+        """
+        执行一次心跳检查
+
+        向空闲达到心跳间隔的连接发送 ping（同一条 ping 消息只编码一次），
+        断开空闲超过超时时间的连接。只处理本次到期的连接。
+
+        Returns:
+            Tuple[int, int]: (发送 ping 的连接数, 断开的连接数)
         """
-        # 存储格式：{user_id: {websocket1, websocket2, ...}}
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
-        # 反向映射：{websocket: user_id}，用于快速查找连接所属的用户
-        self.connection_to_user: Dict[WebSocket, str] = {}
+        if self.heartbeat is None:
+            return 0, 0
+        pings, expired = self.heartbeat.process()
+        for record in expired:
+            self._evict(record.websocket, "idle_timeout")
+        if pings:
+            ping = encode_message({"type": "ping", "timestamp": int(time.time() * 1000)})
+            await self._deliver(pings, ping)
+        return len(pings), len(expired)
+
+    async def _heartbeat_loop(self) -> None:
+        """心跳协程：每个时间轮 tick 执行一次心跳检查"""
+        heartbeat = self.heartbeat
+        if heartbeat is None:
+            return
+        while True:
+            await asyncio.sleep(heartbeat.tick)
+            try:
+                await self.run_heartbeat()
+            except Exception as e:
+                logger.error(f"WebSocket 心跳检查失败: {e}", exc_info=True)
     
-    async def connect(self, websocket: WebSocket, user_id: str) -> None:
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        encoding: Optional[str] = None,
+        resume: bool = False,
+    ) -> None:
         """
         注册 WebSocket 连接
         
         将新的 WebSocket 连接注册到管理器中，并建立用户 ID 与连接的映射关系。
+        未指定 encoding 时按客户端请求的子协议协商编码格式（json / msgpack），
+        协商成功时在握手响应中回应该子协议。
         
         Args:
             websocket: WebSocket 连接对象
             user_id: 用户 ID（用于标识连接所属的用户）
+            encoding: 编码格式（可选），由调用方自行协商时传入
+            resume: 是否为断线续传的连接，为 True 时推送给该连接的消息先暂存，直到调用 resume()
             
         Example:
             ```python
@@ -55,23 +288,45 @@ class ConnectionManager:
             await manager.connect(websocket, "user123")
             ```
         """
-        # 接受 WebSocket 连接
-        await websocket.accept()
+        # 协商编码格式并接受 WebSocket 连接
+        subprotocol = None
+        if encoding is None:
+            scope = getattr(websocket, "scope", None) or {}
+            encoding, subprotocol = negotiate_encoding(scope.get("subprotocols") or ())
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
         
         # 注册连接
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-        
-        self.active_connections[user_id].add(websocket)
-        self.connection_to_user[websocket] = user_id
+        record = ConnectionRecord(websocket, user_id, encoding)
+        if self.queue_size > 0:
+            record.queue = OutboundQueue(
+                websocket,
+                max_size=self.queue_size,
+                overflow=self.overflow,
+                send_timeout=self.send_timeout,
+                on_failure=self._evict,
+            )
+        if resume:
+            record.held = []
+            self._held_connections += 1
+        self.registry.add(record)
+        if self.heartbeat is not None:
+            self.heartbeat.register(record)
+        set_websocket_gauges(len(self.registry), self.registry.user_count)
+        self._mark_presence(user_id)
         
-        logger.info(f"WebSocket 连接已注册: 用户 {user_id}, 当前连接数: {len(self.active_connections[user_id])}")
+        logger.info(
+            f"WebSocket 连接已注册: 用户 {user_id}, "
+            f"当前连接数: {self.registry.user_connection_count(user_id)}"
+        )
     
     def disconnect(self, websocket: WebSocket) -> Optional[str]:
         """
         注销 WebSocket 连接
         
-        从管理器中移除指定的 WebSocket 连接。
+        从管理器中移除指定的 WebSocket 连接，出站队列中未发送的消息会被丢弃。
         
         Args:
             websocket: 要注销的 WebSocket 连接对象
@@ -84,37 +339,52 @@ class ConnectionManager:
             user_id = manager.disconnect(websocket)
             ```
         """
-        # 获取连接所属的用户 ID
-        user_id = self.connection_to_user.get(websocket)
+        # 从注册表中移除（用户没有其他连接时同时删除用户记录）
+        record = self.registry.remove(websocket)
+        if record is None:
+            return None
         
-        if user_id:
-            # 从用户连接集合中移除
-            if user_id in self.active_connections:
-                self.active_connections[user_id].discard(websocket)
-                
-                # 如果用户没有其他连接，删除用户记录
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
-            
-            # 从反向映射中移除
-            self.connection_to_user.pop(websocket, None)
-            
-            logger.info(f"WebSocket 连接已注销: 用户 {user_id}")
+        user_id = record.user_id
+        if self.heartbeat is not None:
+            self.heartbeat.unregister(record)
+        if record.subscriptions:
+            for channel in record.subscriptions:
+                self._remove_subscriber(channel, record)
+            record.subscriptions = None
+        if record.queue is not None:
+            record.queue.close()
+        if record.held is not None:
+            record.held = None
+            self._held_connections -= 1
+        set_websocket_gauges(len(self.registry), self.registry.user_count)
+        self._mark_presence(user_id)
         
+        logger.info(f"WebSocket 连接已注销: 用户 {user_id}")
         return user_id
     
-    async def send_personal_message(self, message: Any, user_id: str) -> bool:
+    async def send_personal_message(
+        self,
+        message: Any,
+        user_id: str,
+        coalesce_key: Optional[str] = None,
+    ) -> bool:
         """
         向指定用户发送个人消息
         
         向指定用户的所有活跃连接发送消息。如果用户没有活跃连接，返回 False。
+        使用出站队列时，消息入队后立即返回。
+        配置了跨进程通道时，消息同时发布到通道，由其他节点投递给该用户在其上的连接。
+        配置了回放缓冲区时，字典消息带上序号 seq 并保存，用户不在线时也可以在重连后补发。
         
         Args:
-            message: 要发送的消息（可以是字符串、字典等，会自动序列化为 JSON）
+            message: 要发送的消息（可以是字符串、字典等，会自动序列化；
+                也可以是 encode_message() 返回的预编码载荷，多次发送时只编码一次）
             user_id: 目标用户 ID
+            coalesce_key: 合并键（可选），连接队列中相同键的未发送消息会被替换
             
         Returns:
-            bool: 是否成功发送（如果用户没有活跃连接，返回 False）
+            bool: 是否成功发送 / 入队；配置了跨进程通道时，发布成功也返回 True
+                （用户不在线时返回 False，但消息仍会保存到回放缓冲区）
             
         Example:
             ```python
@@ -125,32 +395,35 @@ class ConnectionManager:
             await manager.send_personal_message({"type": "notification", "content": "新消息"}, "user123")
             ```
         """
-        if user_id not in self.active_connections:
-            logger.warning(f"用户 {user_id} 没有活跃的 WebSocket 连接")
-            return False
-        
-        # 序列化消息
-        if isinstance(message, str):
-            message_text = message
-        else:
-            message_text = json.dumps(message, ensure_ascii=False)
-        
-        # 向用户的所有连接发送消息
-        disconnected_connections = set()
-        success_count = 0
-        
-        for websocket in self.active_connections[user_id]:
+        payload = encode_message(message)
+        if self.replay is not None and isinstance(payload.message, dict):
             try:
-                await websocket.send_text(message_text)
-                success_count += 1
+                payload = EncodedMessage(await self.replay.append(user_id, payload.message))
             except Exception as e:
-                logger.error(f"向用户 {user_id} 发送消息失败: {e}")
-                # 标记为断开连接
-                disconnected_connections.add(websocket)
+                logger.warning(f"保存用户 {user_id} 的消息到回放缓冲区失败: {e}")
+        delivered = await self._send_personal_local(payload, user_id, coalesce_key)
+        if self.backplane is not None:
+            published = await self._publish({
+                "kind": "personal",
+                "user_id": user_id,
+                "message": payload.message,
+                "coalesce_key": coalesce_key,
+            })
+            return delivered or published
+        return delivered
+
+    async def _send_personal_local(
+        self, payload: EncodedMessage, user_id: str, coalesce_key: Optional[str]
+    ) -> bool:
+        """向指定用户在本进程的所有连接投递消息"""
+        records = self.registry.user_records(user_id)
+        if not records:
+            if self.backplane is None and self.replay is None:
+                logger.warning(f"用户 {user_id} 没有活跃的 WebSocket 连接")
+            return False
         
-        # 清理断开的连接
-        for websocket in disconnected_connections:
-            self.disconnect(websocket)
+        # 向用户的所有连接发送消息（发送失败或超时的连接会被移除）
+        success_count = await self._deliver(records, payload, coalesce_key)
         
         if success_count > 0:
             logger.info(f"向用户 {user_id} 发送消息成功，成功连接数: {success_count}")
@@ -159,18 +432,26 @@ class ConnectionManager:
             logger.warning(f"向用户 {user_id} 发送消息失败，所有连接已断开")
             return False
     
-    async def broadcast(self, message: Any, exclude_user: Optional[str] = None) -> int:
+    async def broadcast(
+        self,
+        message: Any,
+        exclude_user: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+    ) -> int:
         """
         广播消息给所有连接的客户端
         
         向所有活跃连接发送消息，可以选择排除特定用户。
+        使用出站队列时，消息入队后立即返回。
+        配置了跨进程通道时，消息同时发布到通道，由其他节点投递给各自的连接。
         
         Args:
-            message: 要发送的消息（可以是字符串、字典等，会自动序列化为 JSON）
+            message: 要发送的消息（可以是字符串、字典等，会自动序列化；也可以是预编码载荷）
             exclude_user: 要排除的用户 ID（可选），该用户不会收到广播消息
+            coalesce_key: 合并键（可选），连接队列中相同键的未发送消息会被替换
             
         Returns:
-            int: 成功发送的连接数
+            int: 本进程成功发送 / 入队的连接数
             
         Example:
             ```python
@@ -181,39 +462,556 @@ class ConnectionManager:
             count = await manager.broadcast("系统消息", exclude_user="user123")
             ```
         """
-        # 序列化消息
-        if isinstance(message, str):
-            message_text = message
+        payload = encode_message(message)
+        success_count = await self._broadcast_local(payload, exclude_user, coalesce_key)
+        if self.backplane is not None:
+            await self._publish({
+                "kind": "broadcast",
+                "exclude_user": exclude_user,
+                "message": payload.message,
+                "coalesce_key": coalesce_key,
+            })
+        return success_count
+
+    async def _broadcast_local(
+        self,
+        payload: EncodedMessage,
+        exclude_user: Optional[str],
+        coalesce_key: Optional[str],
+    ) -> int:
+        """向本进程的所有连接投递广播消息"""
+        start = time.perf_counter()
+
+        # 收集所有连接（快照，发送期间连接的注册 / 注销不影响本次广播）
+        all_connections = list(self.registry.iter_records(exclude_user or None))
+        
+        # 发送消息（发送失败或超时的连接会被移除）
+        success_count = await self._deliver(all_connections, payload, coalesce_key)
+
+        duration = time.perf_counter() - start
+        observe_websocket_broadcast(duration)
+        logger.info(
+            f"广播消息完成，成功连接数: {success_count}/{len(all_connections)}，"
+            f"耗时: {duration * 1000:.1f}ms"
+        )
+        return success_count
+
+    def subscribe(self, websocket: WebSocket, channel: str) -> bool:
+        """
+        订阅频道
+
+        channel 包含 *、? 或 [ 时作为通配符模式（glob 语法，与 Redis PSUBSCRIBE 一致），
+        例如 news.* 匹配 news.sports、news.tech.ai。
+
+        Args:
+            websocket: 已注册的连接
+            channel: 频道名或通配符模式
+
+        Returns:
+            bool: 是否订阅成功（连接未注册、频道名为空或超过订阅数上限时返回 False；重复订阅返回 True）
+
+        Example:
+            ```python
+            manager.subscribe(websocket, "orders.42")
+            manager.subscribe(websocket, "news.*")
+            ```
+        """
+        record = self.registry.get(websocket)
+        if not channel or record is None:
+            return False
+        subscribed = record.subscriptions
+        if subscribed is None:
+            subscribed = record.subscriptions = set()
+        if channel in subscribed:
+            return True
+        if len(subscribed) >= self.max_subscriptions:
+            logger.warning(f"用户 {record.user_id} 订阅数量已达上限 {self.max_subscriptions}")
+            return False
+
+        subscribed.add(channel)
+        if is_pattern(channel):
+            if channel not in self.patterns:
+                self.patterns[channel] = set()
+                self._pattern_regex[channel] = re.compile(fnmatch.translate(channel))
+                self._pattern_matches.clear()
+            self.patterns[channel].add(record)
         else:
-            message_text = json.dumps(message, ensure_ascii=False)
+            self.channels.setdefault(channel, set()).add(record)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, channel: str) -> bool:
+        """
+        取消订阅频道
         
-        # 收集所有连接
-        all_connections = []
-        for user_id, connections in self.active_connections.items():
-            if exclude_user and user_id == exclude_user:
-                continue
-            all_connections.extend(connections)
+        Args:
+            websocket: 连接
+            channel: 订阅时使用的频道名或通配符模式
+
+        Returns:
+            bool: 是否取消成功（未订阅时返回 False）
+        """
+        record = self.registry.get(websocket)
+        if record is None or not record.subscriptions or channel not in record.subscriptions:
+            return False
+        record.subscriptions.discard(channel)
+        if not record.subscriptions:
+            record.subscriptions = None
+        self._remove_subscriber(channel, record)
+        return True
+
+    def _remove_subscriber(self, channel: str, record: ConnectionRecord) -> None:
+        """从倒排索引中移除订阅者，频道没有订阅者时删除索引项"""
+        index = self.patterns if channel in self.patterns else self.channels
+        subscribers = index.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(record)
+        if not subscribers:
+            del index[channel]
+            if index is self.patterns:
+                del self._pattern_regex[channel]
+                self._pattern_matches.clear()
+
+    async def publish(
+        self,
+        channel: str,
+        message: Any,
+        coalesce_key: Optional[str] = None,
+    ) -> int:
+        """
+        向频道发布消息
         
-        # 发送消息
-        disconnected_connections = set()
-        success_count = 0
+        只投递给订阅了该频道（或匹配该频道的通配符模式）的连接，每个连接最多收到一次。
+        配置了跨进程通道时，消息同时发布到通道，由其他节点投递给各自的订阅者。
+
+        Args:
+            channel: 频道名（不能是通配符模式）
+            message: 要发送的消息（可以是字符串、字典等，会自动序列化；也可以是预编码载荷）
+            coalesce_key: 合并键（可选），连接队列中相同键的未发送消息会被替换
+
+        Returns:
+            int: 本进程成功发送 / 入队的订阅者数
+
+        Example:
+            ```python
+            await manager.publish("orders.42", {"type": "order_updated", "status": "paid"})
+            ```
+        """
+        payload = encode_message(message)
+        success_count = await self._publish_local(channel, payload, coalesce_key)
+        if self.backplane is not None:
+            await self._publish({
+                "kind": "channel",
+                "channel": channel,
+                "message": payload.message,
+                "coalesce_key": coalesce_key,
+            })
+        return success_count
+
+    async def _publish_local(
+        self, channel: str, payload: EncodedMessage, coalesce_key: Optional[str]
+    ) -> int:
+        """向本进程中频道的订阅者投递消息"""
+        subscribers = self.channels.get(channel)
+        matched = self._match_patterns(channel) if self.patterns else ()
+        if not matched:
+            if not subscribers:
+                return 0
+            targets = list(subscribers)
+        else:
+            # 同一连接可能同时通过频道名和多个模式订阅，合并去重
+            merged = set(subscribers) if subscribers else set()
+            for pattern in matched:
+                merged.update(self.patterns[pattern])
+            targets = list(merged)
+        return await self._deliver(targets, payload, coalesce_key)
+
+    def _match_patterns(self, channel: str) -> Tuple[str, ...]:
+        """返回匹配频道的通配符模式（结果按频道名缓存）"""
+        matched = self._pattern_matches.get(channel)
+        if matched is None:
+            if len(self._pattern_matches) >= 4096:
+                self._pattern_matches.clear()
+            matched = tuple(
+                pattern for pattern, regex in self._pattern_regex.items() if regex.match(channel)
+            )
+            self._pattern_matches[channel] = matched
+        return matched
+
+    def get_channel_subscribers_count(self, channel: str) -> int:
+        """
+        获取频道的订阅者数量（包括通过通配符模式订阅的连接）
+
+        Args:
+            channel: 频道名
+
+        Returns:
+            int: 本进程的订阅连接数
+        """
+        subscribers = set(self.channels.get(channel, ()))
+        for pattern in self._match_patterns(channel) if self.patterns else ():
+            subscribers.update(self.patterns[pattern])
+        return len(subscribers)
+
+    def get_subscriptions(self, websocket: WebSocket) -> Set[str]:
+        """
+        获取连接订阅的频道和模式
+
+        Args:
+            websocket: 连接
+
+        Returns:
+            Set[str]: 频道名和通配符模式集合
+        """
+        record = self.registry.get(websocket)
+        if record is None or record.subscriptions is None:
+            return set()
+        return set(record.subscriptions)
+
+    async def resume(self, websocket: WebSocket, last_seq: int) -> Optional[int]:
+        """
+        断线续传：补发序号大于 last_seq 的个人消息
+
+        连接需要以 resume=True 注册。先按顺序发送回放缓冲区中缺失的消息，
+        再发送补发期间暂存的推送消息（跳过已补发的序号），之后恢复正常推送。
+
+        Args:
+            websocket: 以 resume=True 注册的连接
+            last_seq: 客户端最后收到的序号
+
+        Returns:
+            Optional[int]: 补发的消息数；缺口无法补齐（消息已超出缓冲区、未配置回放缓冲区等）时返回 None，
+                客户端需要重新全量同步
+
+        Example:
+            ```python
+            await manager.connect(websocket, "user123", resume=True)
+            replayed = await manager.resume(websocket, last_seq=1700000000042)
+            ```
+        """
+        record = self.registry.get(websocket)
+        if record is None:
+            return None
         
-        for websocket in all_connections:
+        missed: Optional[List[Dict[str, Any]]] = None
+        if self.replay is not None:
             try:
-                await websocket.send_text(message_text)
-                success_count += 1
+                missed = await self.replay.since(record.user_id, last_seq)
             except Exception as e:
-                logger.error(f"广播消息失败: {e}")
-                # 标记为断开连接
-                disconnected_connections.add(websocket)
+                logger.warning(f"读取用户 {record.user_id} 的回放缓冲区失败: {e}")
+
+        replayed_seq = last_seq
+        for message in missed or ():
+            await self._send_to_record(record, EncodedMessage(message))
+            replayed_seq = message["seq"]
+
+        # 发送暂存的推送消息；发送期间新到的消息继续追加到 held，直到全部发出
+        held = record.held
+        if held is not None:
+            index = 0
+            while index < len(held):
+                payload, coalesce_key = held[index]
+                index += 1
+                seq = payload.message.get("seq") if isinstance(payload.message, dict) else None
+                if isinstance(seq, int) and seq <= replayed_seq:
+                    continue
+                await self._send_to_record(record, payload, coalesce_key)
+            if record.held is held:
+                record.held = None
+                self._held_connections -= 1
+
+        if missed is not None:
+            logger.info(f"用户 {record.user_id} 断线续传，补发消息数: {len(missed)}")
+        return None if missed is None else len(missed)
+
+    async def get_cluster_presence(self) -> Dict[str, int]:
+        """
+        获取集群在线状态
+
+        配置了跨进程通道时汇总所有节点上报的连接数，否则只包含本进程的连接。
+
+        Returns:
+            Dict[str, int]: {user_id: 连接数}
+        """
+        if self.backplane is None:
+            return self._presence_snapshot()
+        # 先上报本进程尚未上报的变化，保证结果包含本进程的最新状态
+        await self._flush_presence()
+        return await self.backplane.get_presence()
+
+    async def _publish(self, envelope: Dict[str, Any]) -> bool:
+        """将消息发布到跨进程通道（未配置时返回 False）"""
+        backplane = self.backplane
+        if backplane is None:
+            return False
+        envelope["origin"] = backplane.node_id
+        published = await backplane.publish(envelope)
+        if published:
+            observe_websocket_backplane_message("published")
+        return published
+
+    async def _on_backplane_message(self, envelope: Dict[str, Any]) -> None:
+        """
+        处理跨进程通道收到的消息
+
+        只投递给本进程的连接，不再转发；本节点自己发布的消息已在发布时投递，直接忽略。
+        """
+        if self.backplane is not None and envelope.get("origin") == self.backplane.node_id:
+            return
+        observe_websocket_backplane_message("received")
+        await self.deliver(envelope)
+
+    async def deliver(self, envelope: Dict[str, Any]) -> None:
+        """
+        投递其他进程发布的消息（只投递给本进程的连接，不发布到跨进程通道）
+
+        用于每个进程都会收到的外部消息（跨进程通道、Celery 任务事件等），
+        避免各进程重复转发。个人消息不分配回放序号。
+
+        Args:
+            envelope: 消息信封，kind 为 personal（user_id）、broadcast（exclude_user）
+                或 channel（channel），message 为消息内容，coalesce_key 可选
+
+        Example:
+            ```python
+            await manager.deliver({"kind": "channel", "channel": "task.42", "message": event})
+            ```
+        """
+        kind = envelope.get("kind")
+        payload = EncodedMessage(envelope["message"])
+        if kind == "personal":
+            await self._send_personal_local(
+                payload, envelope["user_id"], envelope.get("coalesce_key")
+            )
+        elif kind == "broadcast":
+            await self._broadcast_local(
+                payload, envelope.get("exclude_user"), envelope.get("coalesce_key")
+            )
+        elif kind == "channel":
+            await self._publish_local(envelope["channel"], payload, envelope.get("coalesce_key"))
+        else:
+            logger.warning(f"未知的跨进程消息类型: {kind}")
+
+    def _presence_snapshot(self) -> Dict[str, int]:
+        """本进程的在线状态：{user_id: 连接数}"""
+        return {user_id: len(records) for user_id, records in self.registry.users.items()}
+
+    def _mark_presence(self, user_id: str) -> None:
+        """
+        记录在线状态变化，由后台任务批量上报
+
+        同一轮事件循环内的多次连接 / 断开合并为一次上报。
+        """
+        if self.backplane is None:
+            return
+        self._presence_dirty.add(user_id)
+        if self._presence_task is None or self._presence_task.done():
+            self._presence_task = self._spawn(self._flush_presence())
+
+    async def _flush_presence(self) -> None:
+        """将有变化的用户的连接数上报到跨进程通道"""
+        if not self._presence_dirty or self.backplane is None:
+            return
+        dirty, self._presence_dirty = self._presence_dirty, set()
+        counts = {user_id: self.get_user_connections_count(user_id) for user_id in dirty}
+        try:
+            await self.backplane.update_presence(counts)
+        except Exception as e:
+            logger.warning(f"上报 WebSocket 在线状态失败: {e}")
+
+    def _spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """创建后台任务并保留引用"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def send_to_connection(
+        self,
+        websocket: WebSocket,
+        message: Any,
+        coalesce_key: Optional[str] = None,
+    ) -> bool:
+        """
+        向单个连接发送消息
+
+        连接有出站队列时入队，保证与推送消息的顺序一致；
+        未注册到管理器的连接直接发送，发送失败时抛出异常。
+
+        Args:
+            websocket: 目标连接
+            message: 要发送的消息（可以是字符串、字典等，会自动序列化；也可以是预编码载荷）
+            coalesce_key: 合并键（可选）
+
+        Returns:
+            bool: 是否成功发送 / 入队
+        """
+        payload = encode_message(message)
+        record = self.registry.get(websocket)
+        if record is None:
+            await websocket.send_text(payload.text)
+            return True
+        return await self._send_to_record(record, payload, coalesce_key)
+
+    async def _send_to_record(
+        self,
+        record: ConnectionRecord,
+        payload: EncodedMessage,
+        coalesce_key: Optional[str] = None,
+    ) -> bool:
+        """向已注册的连接发送消息（有出站队列时入队）"""
+        if record.queue is not None:
+            return record.queue.put(self._frame_for(record, payload), coalesce_key)
+        return await self._send(record, self._frame_for(record, payload))
+
+    def get_encoding(self, websocket: WebSocket) -> str:
+        """
+        获取连接协商的编码格式
+
+        Args:
+            websocket: WebSocket 连接对象
+
+        Returns:
+            str: 编码格式（json / msgpack）
+        """
+        record = self.registry.get(websocket)
+        return record.encoding if record is not None else ENCODING_JSON
+
+    @staticmethod
+    def _frame_for(record: ConnectionRecord, payload: EncodedMessage) -> Frame:
+        """按连接的编码格式获取帧（同一载荷的同一格式只编码一次）"""
+        encoding = record.encoding
+        return payload.text if encoding == ENCODING_JSON else payload.frame(encoding)
+
+    async def _deliver(
+        self,
+        connections: Iterable[ConnectionRecord],
+        payload: EncodedMessage,
+        coalesce_key: Optional[str] = None,
+    ) -> int:
+        """
+        向多个连接投递同一条消息
+
+        有出站队列的连接只入队；没有队列的连接由 _fan_out 并发发送；
+        断线续传中的连接暂存消息，由 resume() 发送。所有连接共享载荷中已编码的帧。
         
-        # 清理断开的连接
-        for websocket in disconnected_connections:
-            self.disconnect(websocket)
+        Returns:
+            int: 成功入队 / 发送 / 暂存的连接数
+        """
+        if self.queue_size <= 0 and not self._held_connections:
+            return await self._fan_out(list(connections), payload)
         
-        logger.info(f"广播消息完成，成功连接数: {success_count}")
+        success_count = 0
+        direct: List[ConnectionRecord] = []
+        frame_for = self._frame_for
+        for record in connections:
+            if record.held is not None:
+                record.held.append((payload, coalesce_key))
+                success_count += 1
+                continue
+            queue = record.queue
+            if queue is None:
+                direct.append(record)
+            elif queue.put(frame_for(record, payload), coalesce_key):
+                success_count += 1
+        if direct:
+            success_count += await self._fan_out(direct, payload)
         return success_count
     
+    async def _fan_out(self, connections: List[ConnectionRecord], payload: EncodedMessage) -> int:
+        """
+        向多个连接并发发送同一条消息
+
+        使用固定数量的发送协程依次从连接列表中取连接发送，同时进行的发送不超过
+        broadcast_concurrency 个；慢连接只占用一个发送协程，不会阻塞整批连接。
+
+        Args:
+            connections: 目标连接列表
+            payload: 预编码载荷
+
+        Returns:
+            int: 发送成功的连接数
+        """
+        if not connections:
+            return 0
+        frame_for = self._frame_for
+        if len(connections) == 1:
+            return int(await self._send(connections[0], frame_for(connections[0], payload)))
+        
+        success_count = 0
+        pending = iter(connections)
+        
+        async def worker() -> None:
+            nonlocal success_count
+            # 所有发送协程共享同一个迭代器，每个连接只会被取出一次
+            for record in pending:
+                if await self._send(record, frame_for(record, payload)):
+                    success_count += 1
+        
+        workers = min(self.broadcast_concurrency, len(connections))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return success_count
+    
+    async def _send(self, record: ConnectionRecord, frame: Frame) -> bool:
+        """
+        向单个连接发送消息（带超时）
+
+        发送超时的连接视为慢消费者，从管理器移除并在后台关闭；发送失败的连接直接移除。
+
+        Args:
+            record: 目标连接记录
+            frame: 帧（文本帧为 str，二进制帧为 bytes）
+
+        Returns:
+            bool: 是否发送成功
+        """
+        websocket = record.websocket
+        try:
+            if isinstance(frame, bytes):
+                await asyncio.wait_for(websocket.send_bytes(frame), timeout=self.send_timeout)
+            else:
+                await asyncio.wait_for(websocket.send_text(frame), timeout=self.send_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._evict(websocket, "slow_consumer")
+        except Exception as e:
+            logger.error(f"向用户 {record.user_id} 发送消息失败: {e}")
+            self._evict(websocket, "send_error")
+        return False
+
+    def _evict(self, websocket: WebSocket, reason: str) -> None:
+        """
+        服务端主动断开连接
+
+        从管理器移除连接；慢消费者（slow_consumer）和队列溢出（queue_overflow）的连接
+        仍然可写，在后台以 1013 关闭码关闭；空闲超时（idle_timeout）的连接以 1001 关闭码关闭；
+        发送失败（send_error）的连接已不可用，只移除。
+
+        Args:
+            websocket: 要断开的连接
+            reason: 断开原因
+        """
+        user_id = self.disconnect(websocket)
+        if user_id is None:
+            return
+        observe_websocket_eviction(reason)
+        if reason == "send_error":
+            return
+        logger.warning(f"WebSocket 连接被断开（{reason}）: 用户 {user_id}")
+        code = (
+            status.WS_1001_GOING_AWAY
+            if reason == "idle_timeout"
+            else status.WS_1013_TRY_AGAIN_LATER
+        )
+        self._spawn(self._close(websocket, code))
+
+    async def _close(self, websocket: WebSocket, code: int) -> None:
+        """关闭被断开的连接（最多等待 send_timeout 秒，忽略关闭失败）"""
+        try:
+            await asyncio.wait_for(websocket.close(code=code), timeout=self.send_timeout)
+        except Exception:
+            pass
+
     def get_user_connections_count(self, user_id: str) -> int:
         """
         获取指定用户的连接数
@@ -224,27 +1022,72 @@ class ConnectionManager:
         Returns:
             int: 用户的活跃连接数
         """
-        if user_id not in self.active_connections:
-            return 0
-        return len(self.active_connections[user_id])
+        return self.registry.user_connection_count(user_id)
     
     def get_total_connections_count(self) -> int:
         """
-        获取总连接数
+        获取总连接数（O(1)）
         
         Returns:
             int: 所有用户的活跃连接总数
         """
-        return sum(len(connections) for connections in self.active_connections.values())
+        return len(self.registry)
+
+    def get_connected_users_count(self) -> int:
+        """
+        获取在线用户数（O(1)）
+
+        Returns:
+            int: 有活跃连接的用户数
+        """
+        return self.registry.user_count
     
     def get_connected_users(self) -> Set[str]:
         """
         获取所有已连接的用户 ID 列表
         
+        会复制整个用户集合，连接数较多时请使用 get_connected_users_page()。
+
         Returns:
             Set[str]: 所有已连接的用户 ID 集合
         """
-        return set(self.active_connections.keys())
+        return set(self.registry.users)
+
+    def get_connected_users_page(self, offset: int = 0, limit: int = 100) -> List[str]:
+        """
+        按页获取已连接的用户 ID
+
+        按用户首次连接的顺序返回；只遍历 offset + limit 个用户，不复制整个用户集合。
+
+        Args:
+            offset: 跳过的用户数
+            limit: 返回的最大用户数
+
+        Returns:
+            List[str]: 用户 ID 列表
+
+        Example:
+            ```python
+            users = manager.get_connected_users_page(offset=200, limit=100)  # 第 3 页
+            ```
+        """
+        return self.registry.users_page(offset, limit)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取本进程的连接统计（O(1)，不遍历连接）
+
+        Returns:
+            Dict[str, int]: 连接数、在线用户数、频道数、通配符模式数、累计连接 / 断开次数
+        """
+        return {
+            "connections": len(self.registry),
+            "users": self.registry.user_count,
+            "channels": len(self.channels),
+            "patterns": len(self.patterns),
+            "connects_total": self.registry.connects_total,
+            "disconnects_total": self.registry.disconnects_total,
+        }
     
     def is_user_connected(self, user_id: str) -> bool:
         """
@@ -256,14 +1099,15 @@ class ConnectionManager:
         Returns:
             bool: 用户是否有活跃连接
         """
-        return user_id in self.active_connections and len(self.active_connections[user_id]) > 0
+        return user_id in self.registry.users
 
 
 # 创建全局连接管理器实例
-# 在应用启动时创建，所有 WebSocket 路由共享此实例
-manager = ConnectionManager()
+# 在应用启动时创建，所有 WebSocket 路由共享此实例；跨进程通道和回放缓冲区按配置创建，
+# 跨进程通道在应用生命周期中启动
+manager = ConnectionManager(backplane=create_backplane(), replay=create_replay_buffer())
 
 
 # 导出
-__all__ = ["ConnectionManager", "manager"]
+__all__ = ["ConnectionManager", "manager", "is_pattern"]
 
@@ -0,0 +1,197 @@
+"""
+WebSocket 出站队列模块
+
+每个连接一个有界出站队列，由写协程依次发送，包括：
+- 生产者只入队、不等待网络写入，慢客户端不会阻塞调用方
+- 队列满时按溢出策略处理：丢弃最旧（drop_oldest）、丢弃最新（drop_newest）或断开连接（disconnect）
+- 合并（coalesce）：带相同 coalesce_key 的消息尚未发出时，用新消息替换旧消息（只保留最新状态）
+- 发送超时 / 发送失败时通知连接管理器断开连接
+- 写协程和队列缓冲区只在有待发送消息时存在，空闲连接不占用任务和缓冲区（大量空闲连接时节省内存）
+- 队列深度指标
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.utils.logger import get_logger
+from app.utils.metrics import observe_websocket_queue_drop, update_websocket_queue_depth
+
+# 配置日志
+logger = get_logger(__name__)
+
+# 溢出策略
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_DISCONNECT)
+
+
+class OutboundQueue:
+    """
+    单个连接的出站队列
+
+    队列条目为 [coalesce_key, 消息]，合并时原地替换消息，保持其在队列中的位置。
+    入队时如果没有写协程则创建一个，写协程发完队列中的消息后退出；同一时刻最多一个写协程，
+    消息按入队顺序发送。所有方法都在事件循环线程中调用，不需要加锁。
+
+    Args:
+        websocket: WebSocket 连接
+        max_size: 队列容量
+        overflow: 溢出策略（drop_oldest / drop_newest / disconnect）
+        send_timeout: 单次发送超时时间（秒）
+        on_failure: 连接需要断开时的回调，参数为 (websocket, 原因)，
+            原因为 slow_consumer / send_error / queue_overflow
+    """
+
+    __slots__ = (
+        "websocket",
+        "max_size",
+        "overflow",
+        "send_timeout",
+        "on_failure",
+        "dropped",
+        "coalesced",
+        "_queue",
+        "_pending_keys",
+        "_task",
+        "_closed",
+    )
+
+    def __init__(
+        self,
+        websocket: Any,
+        max_size: int,
+        overflow: str,
+        send_timeout: float,
+        on_failure: Callable[[Any, str], None],
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow 必须是 {list(OVERFLOW_POLICIES)} 之一")
+        self.websocket = websocket
+        self.max_size = max_size
+        self.overflow = overflow
+        self.send_timeout = send_timeout
+        self.on_failure = on_failure
+        self.dropped = 0
+        self.coalesced = 0
+        # 队列缓冲区和合并索引在入队时创建，发送完毕后释放
+        self._queue: Optional[Deque[List[Any]]] = None
+        # 尚未发出的可合并消息：{coalesce_key: 队列条目}
+        self._pending_keys: Optional[Dict[str, List[Any]]] = None
+        # 当前的写协程（队列为空时为 None）
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._queue) if self._queue else 0
+
+    def put(self, message: Any, coalesce_key: Optional[str] = None) -> bool:
+        """
+        消息入队（不等待发送）
+
+        Args:
+            message: 已编码的帧（文本帧为 str，二进制帧为 bytes）
+            coalesce_key: 合并键（可选），队列中已有相同键的未发送消息时直接替换
+
+        Returns:
+            bool: 是否入队（丢弃或连接已关闭时返回 False）
+        """
+        if self._closed:
+            return False
+
+        if coalesce_key is not None and self._pending_keys:
+            entry = self._pending_keys.get(coalesce_key)
+            if entry is not None:
+                entry[1] = message
+                self.coalesced += 1
+                observe_websocket_queue_drop("coalesced")
+                return True
+
+        queue = self._queue
+        if queue is None:
+            queue = self._queue = deque()
+        if len(queue) >= self.max_size:
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                self.dropped += 1
+                observe_websocket_queue_drop(OVERFLOW_DROP_NEWEST)
+                return False
+            if self.overflow == OVERFLOW_DISCONNECT:
+                self.close()
+                self.on_failure(self.websocket, "queue_overflow")
+                return False
+            self._discard(queue.popleft())
+            self.dropped += 1
+            observe_websocket_queue_drop(OVERFLOW_DROP_OLDEST)
+
+        entry = [coalesce_key, message]
+        queue.append(entry)
+        if coalesce_key is not None:
+            if self._pending_keys is None:
+                self._pending_keys = {}
+            self._pending_keys[coalesce_key] = entry
+        update_websocket_queue_depth(1)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._writer())
+        return True
+
+    def close(self) -> None:
+        """关闭队列：丢弃未发送的消息并停止写协程"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._queue:
+            update_websocket_queue_depth(-len(self._queue))
+            self._queue.clear()
+        self._queue = None
+        self._pending_keys = None
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def _discard(self, entry: List[Any]) -> None:
+        """移除已出队的条目（维护合并索引和深度指标）"""
+        key = entry[0]
+        if key is not None and self._pending_keys and self._pending_keys.get(key) is entry:
+            del self._pending_keys[key]
+        update_websocket_queue_depth(-1)
+
+    async def _writer(self) -> None:
+        """写协程：依次发送队列中的消息（str 作为文本帧，bytes 作为二进制帧），队列为空时退出"""
+        send_text = self.websocket.send_text
+        queue = self._queue
+        while queue and not self._closed:
+            entry = queue.popleft()
+            self._discard(entry)
+            frame = entry[1]
+            try:
+                if isinstance(frame, bytes):
+                    await asyncio.wait_for(
+                        self.websocket.send_bytes(frame), timeout=self.send_timeout
+                    )
+                else:
+                    await asyncio.wait_for(send_text(frame), timeout=self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self.close()
+                self.on_failure(self.websocket, "slow_consumer")
+                return
+            except Exception as e:
+                logger.debug(f"WebSocket 出站消息发送失败: {e}")
+                self.close()
+                self.on_failure(self.websocket, "send_error")
+                return
+        # 检查队列与清空 _task 之间没有 await，不会遗漏新入队的消息
+        self._task = None
+        if not self._closed:
+            self._queue = None
+            self._pending_keys = None
+
+
+__all__ = [
+    "OVERFLOW_DROP_OLDEST",
+    "OVERFLOW_DROP_NEWEST",
+    "OVERFLOW_DISCONNECT",
+    "OVERFLOW_POLICIES",
+    "OutboundQueue",
+]
@@ -0,0 +1,158 @@
+"""
+WebSocket 消息编码模块
+
+提供"编码一次、发送给所有接收者"的消息载荷，包括：
+- EncodedMessage：按连接的编码格式惰性编码并缓存帧，同一条消息对所有接收者只编码一次
+- 两种编码格式：json（文本帧，默认）和 msgpack（二进制帧，需要安装可选依赖 msgpack）
+- 连接建立时按 WebSocket 子协议（Sec-WebSocket-Protocol）协商编码格式
+"""
+
+import json
+from typing import Any, Iterable, Optional, Tuple, Union
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+# 编码格式（同时也是协商时使用的子协议名）
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+# 一个帧：文本帧为 str，二进制帧为 bytes
+Frame = Union[str, bytes]
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """
+    当前环境支持的编码格式
+
+    Returns:
+        Tuple[str, ...]: 编码格式列表，未安装 msgpack 时只有 json
+    """
+    if msgpack is not None:
+        return (ENCODING_JSON, ENCODING_MSGPACK)
+    return (ENCODING_JSON,)
+
+
+def negotiate_encoding(subprotocols: Iterable[str]) -> Tuple[str, Optional[str]]:
+    """
+    根据客户端请求的子协议协商编码格式
+
+    按客户端给出的顺序选择第一个支持的格式；都不支持时使用 json，且不回应子协议。
+
+    Args:
+        subprotocols: 客户端请求的子协议列表（scope["subprotocols"]）
+
+    Returns:
+        Tuple[str, Optional[str]]: (编码格式, 回应给客户端的子协议)
+
+    Example:
+        ```python
+        negotiate_encoding(["msgpack", "json"])  # 安装 msgpack 时为 ("msgpack", "msgpack")
+        negotiate_encoding([])                   # ("json", None)
+        ```
+    """
+    supported = available_encodings()
+    for subprotocol in subprotocols:
+        if subprotocol in supported:
+            return subprotocol, subprotocol
+    return ENCODING_JSON, None
+
+
+def decode_frame(data: bytes) -> Any:
+    """
+    解码客户端发来的 msgpack 二进制帧
+
+    Args:
+        data: 二进制帧
+
+    Returns:
+        Any: 解码后的对象
+    """
+    if msgpack is None:
+        raise RuntimeError("未安装 msgpack，无法解码二进制帧")
+    return msgpack.unpackb(data, raw=False)
+
+
+class EncodedMessage:
+    """
+    预编码的消息载荷
+
+    各编码格式的帧在第一次需要时生成并缓存，之后所有接收者共享同一个 str / bytes 对象。
+    字符串消息的 json 帧就是字符串本身（不再做 JSON 序列化），与之前的行为一致。
+
+    Args:
+        message: 原始消息（字符串或可 JSON 序列化的对象）
+
+    Example:
+        ```python
+        payload = encode_message({"type": "announcement", "content": "系统通知"})
+        for user_id in user_ids:
+            await manager.send_personal_message(payload, user_id)  # 只序列化一次
+        ```
+    """
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: Any):
+        self.message = message
+        self._text: Optional[str] = message if isinstance(message, str) else None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        """json 文本帧"""
+        if self._text is None:
+            self._text = json.dumps(self.message, ensure_ascii=False)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        """msgpack 二进制帧"""
+        if self._binary is None:
+            if msgpack is None:
+                raise RuntimeError("未安装 msgpack，无法编码二进制帧")
+            self._binary = msgpack.packb(self.message, use_bin_type=True)
+        return self._binary
+
+    def frame(self, encoding: str = ENCODING_JSON) -> Frame:
+        """
+        获取指定编码格式的帧
+
+        Args:
+            encoding: 编码格式
+
+        Returns:
+            Frame: 文本帧（str）或二进制帧（bytes）
+        """
+        if encoding == ENCODING_MSGPACK:
+            return self.binary
+        return self.text
+
+
+def encode_message(message: Any) -> EncodedMessage:
+    """
+    将消息包装为预编码载荷（已经是 EncodedMessage 时原样返回）
+
+    Args:
+        message: 原始消息或 EncodedMessage
+
+    Returns:
+        EncodedMessage: 预编码载荷
+    """
+    if isinstance(message, EncodedMessage):
+        return message
+    return EncodedMessage(message)
+
+
+__all__ = [
+    "ENCODING_JSON",
+    "ENCODING_MSGPACK",
+    "Frame",
+    "EncodedMessage",
+    "available_encodings",
+    "decode_frame",
+    "encode_message",
+    "negotiate_encoding",
+]
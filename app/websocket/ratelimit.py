@@ -0,0 +1,63 @@
+"""
+WebSocket 入站限流模块
+
+每个连接一个令牌桶，限制客户端发送消息的速率，包括：
+- 令牌按 rate 个 / 秒补充，桶容量 burst 决定允许的突发消息数
+- 每条消息消耗一个令牌，没有令牌时消息被拒绝
+- 惰性补充：只在消费时按经过的时间计算，不需要定时任务
+"""
+
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    Args:
+        rate: 每秒补充的令牌数
+        burst: 桶容量（初始令牌数）
+        clock: 时钟函数，默认 time.monotonic
+
+    Example:
+        ```python
+        bucket = TokenBucket(rate=20, burst=40)
+        if not bucket.consume():
+            await handler.send_error("消息过于频繁，请稍后再试", "RATE_LIMITED")
+        ```
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "clock")
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.clock = clock
+        self.updated = clock()
+
+    def consume(self, tokens: float = 1.0) -> bool:
+        """
+        尝试消耗令牌
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            bool: 令牌足够时消耗并返回 True，否则返回 False（不消耗）
+        """
+        now = self.clock()
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+            self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+
+__all__ = ["TokenBucket"]
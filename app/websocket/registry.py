@@ -0,0 +1,182 @@
+"""
+WebSocket 连接注册表模块
+
+为大量并发连接设计的紧凑连接注册表，包括：
+- ConnectionRecord：每个连接一条 __slots__ 记录，集中保存用户、编码格式、出站队列、订阅
+- ConnectionRegistry：连接 -> 记录、用户 -> 记录元组 两个索引
+- O(1) 统计：连接数、用户数、累计连接 / 断开次数
+- 按页遍历在线用户，不复制整个用户集合
+"""
+
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.websocket.outbound import OutboundQueue
+from app.websocket.payload import ENCODING_JSON
+
+
+class ConnectionRecord:
+    """
+    单个连接的状态
+
+    使用 __slots__，不为每个连接创建 __dict__；订阅集合在第一次订阅时才创建。
+    记录按对象身份哈希，可以直接放入频道索引等集合中。
+
+    Args:
+        websocket: WebSocket 连接
+        user_id: 用户 ID
+        encoding: 编码格式
+    """
+
+    __slots__ = (
+        "websocket",
+        "user_id",
+        "encoding",
+        "queue",
+        "subscriptions",
+        "held",
+        "connected_at",
+    )
+
+    def __init__(self, websocket: Any, user_id: str, encoding: str = ENCODING_JSON):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.encoding = encoding
+        # 出站队列，不使用队列时为 None
+        self.queue: Optional[OutboundQueue] = None
+        # 订阅的频道和模式，没有订阅时为 None
+        self.subscriptions: Optional[Set[str]] = None
+        # 断线续传期间暂存的推送消息 [(载荷, coalesce_key), ...]，不在续传中时为 None
+        self.held: Optional[List[Tuple[Any, Optional[str]]]] = None
+        self.connected_at = time.time()
+
+
+class ConnectionRegistry:
+    """
+    连接注册表
+
+    每个用户的连接保存在元组中：绝大多数用户只有一两个连接，元组比集合、列表都小；
+    连接 / 断开时替换整个元组（开销与该用户的连接数成正比），
+    读取时直接返回元组，向用户推送消息时不需要复制连接集合。
+    """
+
+    def __init__(self):
+        # {websocket: 记录}
+        self.records: Dict[Any, ConnectionRecord] = {}
+        # {user_id: (记录, ...)}，按用户首次连接的顺序排列
+        self.users: Dict[str, Tuple[ConnectionRecord, ...]] = {}
+        # 累计连接 / 断开次数
+        self.connects_total = 0
+        self.disconnects_total = 0
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, websocket: Any) -> bool:
+        return websocket in self.records
+
+    def add(self, record: ConnectionRecord) -> None:
+        """
+        注册连接记录
+
+        Args:
+            record: 连接记录
+        """
+        self.records[record.websocket] = record
+        self.users[record.user_id] = self.users.get(record.user_id, ()) + (record,)
+        self.connects_total += 1
+
+    def remove(self, websocket: Any) -> Optional[ConnectionRecord]:
+        """
+        注销连接
+
+        Args:
+            websocket: WebSocket 连接
+
+        Returns:
+            Optional[ConnectionRecord]: 被移除的记录，连接不存在时返回 None
+        """
+        record = self.records.pop(websocket, None)
+        if record is None:
+            return None
+        connections = tuple(item for item in self.users[record.user_id] if item is not record)
+        if connections:
+            self.users[record.user_id] = connections
+        else:
+            del self.users[record.user_id]
+        self.disconnects_total += 1
+        return record
+
+    def get(self, websocket: Any) -> Optional[ConnectionRecord]:
+        """
+        获取连接记录
+
+        Args:
+            websocket: WebSocket 连接
+
+        Returns:
+            Optional[ConnectionRecord]: 连接记录，未注册时返回 None
+        """
+        return self.records.get(websocket)
+
+    def user_records(self, user_id: str) -> Tuple[ConnectionRecord, ...]:
+        """
+        获取用户的所有连接记录
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            Tuple[ConnectionRecord, ...]: 连接记录（不可变，之后的连接 / 断开不影响已取得的元组）
+        """
+        return self.users.get(user_id, ())
+
+    def user_connection_count(self, user_id: str) -> int:
+        """
+        获取用户的连接数
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            int: 连接数
+        """
+        return len(self.users.get(user_id, ()))
+
+    @property
+    def user_count(self) -> int:
+        """在线用户数"""
+        return len(self.users)
+
+    def iter_records(self, exclude_user: Optional[str] = None) -> Iterator[ConnectionRecord]:
+        """
+        遍历所有连接记录
+
+        Args:
+            exclude_user: 要排除的用户 ID（可选）
+
+        Returns:
+            Iterator[ConnectionRecord]: 连接记录迭代器（遍历期间不能修改注册表）
+        """
+        if exclude_user is None:
+            return iter(self.records.values())
+        return (record for record in self.records.values() if record.user_id != exclude_user)
+
+    def users_page(self, offset: int, limit: int) -> List[str]:
+        """
+        按页获取在线用户 ID
+
+        只遍历 offset + limit 个用户，不复制整个用户集合。
+
+        Args:
+            offset: 跳过的用户数
+            limit: 返回的最大用户数
+
+        Returns:
+            List[str]: 用户 ID 列表
+        """
+        return list(islice(self.users, offset, offset + limit))
+
+
+__all__ = ["ConnectionRecord", "ConnectionRegistry"]
@@ -0,0 +1,266 @@
+"""
+WebSocket 消息回放模块
+
+为每个用户保留最近的个人消息，客户端断线重连后补发缺失的消息，包括：
+- 每个用户一个有界缓冲区（最多 size 条，超过 ttl 秒没有新消息的缓冲区被清除）
+- 每条消息一个按用户单调递增的序号（seq），随消息一起发给客户端
+- 客户端重连时带上最后收到的序号，只补发之后的消息；缺口已超出缓冲区时返回 None，客户端需要全量同步
+
+序号从缓冲区创建时的毫秒时间戳开始递增，缓冲区过期重建或进程重启后序号仍然大于之前的序号，
+客户端不会把新消息误判为重复消息。
+
+提供两种实现：
+- InMemoryReplayBuffer：进程内环形缓冲区（单进程部署 / 测试）
+- RedisReplayBuffer：Redis 列表 + 计数器（多 worker / 多节点部署，所有节点共享序号和缓冲区）
+"""
+
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import get_logger
+
+# 配置日志
+logger = get_logger(__name__)
+
+
+def initial_sequence() -> int:
+    """
+    新缓冲区的起始序号（当前毫秒时间戳）
+
+    Returns:
+        int: 起始序号
+    """
+    return int(time.time() * 1000)
+
+
+# ==================== 缓冲区基类 ====================
+
+class ReplayBuffer:
+    """
+    消息回放缓冲区基类
+
+    缓冲区中的消息是带 seq 字段的字典。
+
+    Args:
+        size: 每个用户保留的消息数
+        ttl: 缓冲区过期时间（秒），超过该时间没有新消息的用户缓冲区被清除
+    """
+
+    def __init__(self, size: int, ttl: float):
+        if size <= 0:
+            raise ValueError("size 必须大于 0")
+        self.size = size
+        self.ttl = ttl
+
+    async def append(self, user_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        为消息分配序号并保存
+
+        Args:
+            user_id: 用户 ID
+            message: 消息（字典）
+
+        Returns:
+            Dict[str, Any]: 带 seq 字段的消息（新字典，不修改原消息）
+        """
+        raise NotImplementedError("子类必须实现 append 方法")
+
+    async def since(self, user_id: str, last_seq: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取序号大于 last_seq 的消息
+
+        Args:
+            user_id: 用户 ID
+            last_seq: 客户端最后收到的序号
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 按序号排列的消息；没有缺失消息时为空列表；
+                缺口无法补齐（消息已被挤出缓冲区、缓冲区已过期或序号无效）时为 None
+        """
+        raise NotImplementedError("子类必须实现 since 方法")
+
+    async def close(self) -> None:
+        """释放资源"""
+
+    @staticmethod
+    def _select(
+        entries: List[Tuple[int, Dict[str, Any]]], current: int, last_seq: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """从 [(seq, 消息), ...] 中选出 last_seq 之后的消息，缺口无法补齐时返回 None"""
+        if last_seq == current:
+            return []
+        if last_seq > current:
+            return None
+        oldest = entries[0][0] if entries else current + 1
+        if last_seq + 1 < oldest:
+            return None
+        return [message for seq, message in entries if seq > last_seq]
+
+
+# ==================== 进程内实现 ====================
+
+class _UserBuffer:
+    """单个用户的环形缓冲区"""
+
+    __slots__ = ("seq", "entries", "updated")
+
+    def __init__(self, size: int):
+        self.seq = initial_sequence()
+        self.entries: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=size)
+        self.updated = time.monotonic()
+
+
+class InMemoryReplayBuffer(ReplayBuffer):
+    """
+    进程内回放缓冲区
+
+    用户缓冲区按最后写入时间排序，写入时顺带清除过期的缓冲区，内存占用与 ttl 内有消息的用户数成正比。
+    多 worker / 多节点部署时每个进程的序号和缓冲区相互独立，请使用 RedisReplayBuffer。
+
+    Args:
+        size: 每个用户保留的消息数
+        ttl: 缓冲区过期时间（秒）
+    """
+
+    def __init__(self, size: int = 100, ttl: float = 300):
+        super().__init__(size, ttl)
+        self._users: "OrderedDict[str, _UserBuffer]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    async def append(self, user_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._expire(now)
+        buffer = self._users.get(user_id)
+        if buffer is None:
+            buffer = self._users[user_id] = _UserBuffer(self.size)
+        else:
+            self._users.move_to_end(user_id)
+        buffer.seq += 1
+        buffer.updated = now
+        message = {**message, "seq": buffer.seq}
+        buffer.entries.append((buffer.seq, message))
+        return message
+
+    async def since(self, user_id: str, last_seq: int) -> Optional[List[Dict[str, Any]]]:
+        buffer = self._users.get(user_id)
+        if buffer is None or time.monotonic() - buffer.updated > self.ttl:
+            return None
+        return self._select(list(buffer.entries), buffer.seq, last_seq)
+
+    def _expire(self, now: float) -> None:
+        """清除过期的用户缓冲区（按最后写入时间从旧到新检查）"""
+        users = self._users
+        while users:
+            user_id, buffer = next(iter(users.items()))
+            if now - buffer.updated <= self.ttl:
+                break
+            del users[user_id]
+
+
+# ==================== Redis 实现 ====================
+
+# 分配序号并写入列表（一次往返，原子执行）
+# KEYS[1]: 序号键，KEYS[2]: 列表键；ARGV: 起始序号、消息 JSON、保留条数、过期时间
+_APPEND_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+if seq == 1 then
+    seq = tonumber(ARGV[1]) + 1
+    redis.call('SET', KEYS[1], seq)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('RPUSH', KEYS[2], string.format('%d', seq) .. ':' .. ARGV[2])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[3]), -1)
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return seq
+"""
+
+
+class RedisReplayBuffer(ReplayBuffer):
+    """
+    基于 Redis 的回放缓冲区
+
+    - 序号：ws:replay:{用户 ID}:seq 计数器（INCR），所有节点共享
+    - 消息：ws:replay:{用户 ID} 列表，元素为 "序号:消息 JSON"，只保留最近 size 条
+    两个键都带过期时间，每次写入时刷新；花括号中的用户 ID 是 hash tag，Redis Cluster 中两个键位于同一槽位。
+
+    Args:
+        redis_url: Redis 连接 URL
+        size: 每个用户保留的消息数
+        ttl: 缓冲区过期时间（秒）
+        prefix: 键前缀
+    """
+
+    def __init__(self, redis_url: str, size: int = 100, ttl: float = 300, prefix: str = "ws:"):
+        import redis.asyncio as aioredis
+
+        super().__init__(size, ttl)
+        self._client = aioredis.Redis.from_url(redis_url)
+        self._append = self._client.register_script(_APPEND_SCRIPT)
+        self.prefix = f"{prefix}replay:"
+
+    async def append(self, user_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        key = f"{self.prefix}{{{user_id}}}"
+        seq = await self._append(
+            keys=[f"{key}:seq", key],
+            args=[
+                initial_sequence(),
+                json.dumps(message, ensure_ascii=False),
+                self.size,
+                int(self.ttl),
+            ],
+        )
+        return {**message, "seq": int(seq)}
+
+    async def since(self, user_id: str, last_seq: int) -> Optional[List[Dict[str, Any]]]:
+        key = f"{self.prefix}{{{user_id}}}"
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.get(f"{key}:seq")
+            pipe.lrange(key, 0, -1)
+            current, items = await pipe.execute()
+        if current is None:
+            return None
+        entries = []
+        for item in items:
+            seq, _, data = item.partition(b":")
+            entries.append((int(seq), {**json.loads(data), "seq": int(seq)}))
+        return self._select(entries, int(current), last_seq)
+
+    async def close(self) -> None:
+        try:
+            await self._client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭 Redis 回放缓冲区失败: {e}")
+
+
+def create_replay_buffer() -> Optional[ReplayBuffer]:
+    """
+    根据配置创建回放缓冲区
+
+    websocket_replay 为 none 时返回 None（不分配序号、不回放）；
+    为 redis 但未配置 redis_url 时，回退为进程内缓冲区。
+
+    Returns:
+        Optional[ReplayBuffer]: 回放缓冲区实例
+    """
+    if settings.websocket_replay == "none":
+        return None
+    size, ttl = settings.websocket_replay_size, settings.websocket_replay_ttl
+    if settings.websocket_replay == "redis":
+        if settings.redis_url:
+            return RedisReplayBuffer(settings.redis_url, size=size, ttl=ttl)
+        logger.warning("websocket_replay 配置为 redis，但 redis_url 未配置，使用进程内回放缓冲区")
+    return InMemoryReplayBuffer(size=size, ttl=ttl)
+
+
+__all__ = [
+    "ReplayBuffer",
+    "InMemoryReplayBuffer",
+    "RedisReplayBuffer",
+    "create_replay_buffer",
+    "initial_sequence",
+]
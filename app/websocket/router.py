@@ -0,0 +1,204 @@
+"""
+WebSocket 消息路由模块
+
+按消息的 type 字段把客户端消息分发给注册的处理函数，包括：
+- 装饰器注册：@router.route("ping", schema=PingMessage)
+- 分发前用 Pydantic Schema 验证消息，验证失败时回复错误，不调用处理函数
+- 未注册的消息类型交给 fallback 处理函数（未设置时回复 UNKNOWN_MESSAGE_TYPE 错误）
+- 处理函数抛出的异常回复 MESSAGE_PROCESSING_ERROR 错误，不断开连接
+
+查找处理函数是一次字典查找，与注册的消息类型数量无关。
+"""
+
+import json
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from app.utils.logger import get_logger
+from app.utils.metrics import observe_websocket_inbound_message
+
+if TYPE_CHECKING:
+    from app.websocket.handler import WebSocketHandler
+
+# 配置日志
+logger = get_logger(__name__)
+
+# 处理函数：(处理器, 消息) -> None，消息为 Schema 实例（未指定 Schema 时为 dict）
+RouteHandler = Callable[[Any, Any], Awaitable[None]]
+# fallback 处理函数：(处理器, 消息 dict, 原始消息文本) -> None
+FallbackHandler = Callable[[Any, Dict[str, Any], str], Awaitable[None]]
+
+
+class MessageRoute:
+    """
+    一条消息路由
+
+    Args:
+        message_type: 消息类型
+        handler: 处理函数
+        schema: 消息 Schema（可选）
+        error_code: 验证失败时回复的错误代码
+    """
+
+    __slots__ = ("message_type", "handler", "schema", "error_code")
+
+    def __init__(
+        self,
+        message_type: str,
+        handler: RouteHandler,
+        schema: Optional[Type[BaseModel]],
+        error_code: str,
+    ):
+        self.message_type = message_type
+        self.handler = handler
+        self.schema = schema
+        self.error_code = error_code
+
+
+class MessageRouter:
+    """
+    WebSocket 消息路由
+
+    处理函数的第一个参数是当前连接的处理器，因此可以直接在处理器类中用装饰器注册方法。
+    子类通过 copy() 继承父类的路由并追加 / 覆盖消息类型。
+
+    Example:
+        ```python
+        class ChatHandler(SimpleWebSocketHandler):
+            router = SimpleWebSocketHandler.router.copy()
+
+            @router.route("chat", schema=ChatMessage)
+            async def handle_chat(self, message: ChatMessage) -> None:
+                await manager.publish(f"room.{message.room}", message.model_dump())
+        ```
+    """
+
+    def __init__(self):
+        # {消息类型: 路由}
+        self.routes: Dict[str, MessageRoute] = {}
+        self.fallback_handler: Optional[FallbackHandler] = None
+
+    def route(
+        self,
+        message_type: str,
+        schema: Optional[Type[BaseModel]] = None,
+        error_code: str = "INVALID_MESSAGE",
+    ) -> Callable[[RouteHandler], RouteHandler]:
+        """
+        注册消息类型的处理函数（装饰器）
+
+        Args:
+            message_type: 消息类型（消息的 type 字段）
+            schema: 消息 Schema（可选），指定时处理函数收到验证后的 Schema 实例，否则收到 dict
+            error_code: 验证失败时回复的错误代码
+
+        Returns:
+            Callable: 装饰器，原样返回处理函数
+        """
+        def decorator(handler: RouteHandler) -> RouteHandler:
+            self.routes[message_type] = MessageRoute(message_type, handler, schema, error_code)
+            return handler
+        return decorator
+
+    def fallback(self) -> Callable[[FallbackHandler], FallbackHandler]:
+        """
+        注册未匹配消息类型的处理函数（装饰器）
+
+        非 JSON 对象的消息按 {"type": "text", "content": 原始文本} 处理，同样会进入 fallback。
+
+        Returns:
+            Callable: 装饰器，原样返回处理函数
+        """
+        def decorator(handler: FallbackHandler) -> FallbackHandler:
+            self.fallback_handler = handler
+            return handler
+        return decorator
+
+    def copy(self) -> "MessageRouter":
+        """
+        复制路由（用于子类扩展，修改副本不影响原路由）
+
+        Returns:
+            MessageRouter: 路由副本
+        """
+        router = MessageRouter()
+        router.routes = dict(self.routes)
+        router.fallback_handler = self.fallback_handler
+        return router
+
+    @staticmethod
+    def parse(message: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        解析消息文本
+
+        Args:
+            message: 消息文本
+
+        Returns:
+            Tuple[Dict, Optional[str]]: (消息 dict, 消息类型)；非 JSON 对象的消息类型为 text
+        """
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
+            return {"type": "text", "content": message}, "text"
+        message_type = data.get("type")
+        return data, message_type if isinstance(message_type, str) else None
+
+    async def dispatch(self, handler: "WebSocketHandler", message: str) -> None:
+        """
+        分发一条消息
+
+        Args:
+            handler: 当前连接的处理器
+            message: 消息文本
+        """
+        data, message_type = self.parse(message)
+        route = self.routes.get(message_type) if message_type is not None else None
+
+        try:
+            if route is None:
+                if self.fallback_handler is None:
+                    observe_websocket_inbound_message("unknown")
+                    await handler.send_error(f"不支持的消息类型: {message_type}", "UNKNOWN_MESSAGE_TYPE")
+                    return
+                await self.fallback_handler(handler, data, message)
+                observe_websocket_inbound_message("fallback")
+                return
+
+            payload: Any = data
+            if route.schema is not None:
+                try:
+                    payload = route.schema.model_validate(data)
+                except ValidationError as e:
+                    observe_websocket_inbound_message("invalid")
+                    await handler.send_error(
+                        f"消息格式错误: {format_validation_error(e)}", route.error_code
+                    )
+                    return
+            await route.handler(handler, payload)
+            observe_websocket_inbound_message("handled")
+        except Exception as e:
+            observe_websocket_inbound_message("error")
+            logger.error(f"处理消息失败 (用户 {handler.user_id}, 类型 {message_type}): {e}")
+            await handler.send_error("处理消息时发生错误", "MESSAGE_PROCESSING_ERROR")
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    将验证错误格式化为简短的说明（只取第一个错误）
+
+    Args:
+        error: Pydantic 验证错误
+
+    Returns:
+        str: 例如 "channel: Field required"
+    """
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first.get("loc", ()))
+    return f"{location}: {first.get('msg')}" if location else str(first.get("msg"))
+
+
+__all__ = ["MessageRoute", "MessageRouter", "format_validation_error"]
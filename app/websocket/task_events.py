@@ -0,0 +1,193 @@
+"""
+Celery 任务事件推送模块
+
+订阅 Worker 发布的任务事件（见 app.tasks.events），通过 WebSocket 推送给用户，包括：
+- 发起任务的用户（事件中的 user_id）：该用户在本进程上的所有连接都会收到完整事件
+- 订阅了 task.{task_id} 频道（或匹配的通配符模式）的连接：只收到状态和进度字段
+  （CHANNEL_EVENT_FIELDS），不包含任务结果、错误、进度说明和发起用户，
+  因为默认的 can_subscribe 允许任何连接订阅任意频道和通配符模式
+
+每个 Web 进程各自订阅事件频道，只投递给本进程的连接，不经过跨进程通道转发。
+进度事件按任务合并：慢消费者的出站队列中只保留最新的进度。
+发起任务的用户已自动收到事件，不需要再订阅 task.{task_id}（否则同一连接会收到两次）。
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.logger import get_logger
+from app.websocket.manager import ConnectionManager
+
+# 配置日志
+logger = get_logger(__name__)
+
+# 任务频道前缀，客户端订阅 task.{task_id} 接收指定任务的事件
+TASK_CHANNEL_PREFIX = "task."
+
+# 频道订阅者收到的事件字段（任务结果、错误等只发给发起任务的用户）
+CHANNEL_EVENT_FIELDS = ("type", "task_id", "task_name", "state", "current", "total", "percent")
+
+
+def channel_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    生成发给频道订阅者的事件：只保留 CHANNEL_EVENT_FIELDS 中的字段
+
+    Args:
+        event: 完整的任务事件
+
+    Returns:
+        Dict[str, Any]: 去掉结果、错误等字段后的事件
+    """
+    return {key: event[key] for key in CHANNEL_EVENT_FIELDS if key in event}
+
+
+def task_channel(task_id: str) -> str:
+    """
+    任务事件的频道名
+
+    Args:
+        task_id: 任务 ID
+
+    Returns:
+        str: 频道名，例如 task.8f3c...
+    """
+    return f"{TASK_CHANNEL_PREFIX}{task_id}"
+
+
+class TaskEventListener:
+    """
+    任务事件订阅器
+
+    订阅 Redis 频道，把收到的任务事件交给 dispatch() 投递；连接异常时每秒重试。
+
+    Args:
+        manager: 连接管理器
+        redis_url: Redis 连接 URL
+        channel: 任务事件频道名
+
+    Example:
+        ```python
+        listener = TaskEventListener(manager, settings.redis_url, settings.task_events_channel)
+        await listener.start()
+        ```
+    """
+
+    def __init__(self, manager: ConnectionManager, redis_url: str, channel: str):
+        self.manager = manager
+        self.redis_url = redis_url
+        self.channel = channel
+        self._client: Optional[Any] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """开始订阅任务事件"""
+        if self._task is not None:
+            return
+        import redis.asyncio as aioredis
+
+        self._client = aioredis.Redis.from_url(self.redis_url)
+        self._task = asyncio.ensure_future(self._listen())
+        logger.info(f"任务事件订阅已启动: 频道 {self.channel}")
+
+    async def stop(self) -> None:
+        """停止订阅并关闭 Redis 连接"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception as e:
+                logger.warning(f"关闭任务事件订阅失败: {e}")
+            self._client = None
+
+    async def dispatch(self, event: Dict[str, Any]) -> None:
+        """
+        投递一个任务事件
+
+        Args:
+            event: 任务事件（至少包含 type 和 task_id）
+        """
+        task_id = event.get("task_id")
+        if not task_id:
+            logger.warning(f"任务事件缺少 task_id: {event.get('type')}")
+            return
+        # 进度事件按任务合并，结果事件不合并（不能被后续事件替换）
+        coalesce_key = f"task:{task_id}" if event.get("type") == "task_progress" else None
+        envelopes: List[Dict[str, Any]] = []
+        user_id = event.get("user_id")
+        if user_id:
+            envelopes.append({
+                "kind": "personal",
+                "user_id": user_id,
+                "message": event,
+                "coalesce_key": coalesce_key,
+            })
+        envelopes.append({
+            "kind": "channel",
+            "channel": task_channel(task_id),
+            "message": channel_event(event),
+            "coalesce_key": coalesce_key,
+        })
+        for envelope in envelopes:
+            await self.manager.deliver(envelope)
+
+    async def _listen(self) -> None:
+        """订阅协程：接收任务事件并投递，连接异常时每秒重试"""
+        client = self._client
+        if client is None:
+            return
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        await self.dispatch(json.loads(message["data"]))
+                    except Exception as e:
+                        logger.error(f"投递任务事件失败: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"任务事件订阅中断，1 秒后重试: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+def create_task_event_listener(manager: ConnectionManager) -> Optional[TaskEventListener]:
+    """
+    根据配置创建任务事件订阅器
+
+    未启用 task_events_enabled 或未配置 redis_url 时返回 None。
+
+    Args:
+        manager: 连接管理器
+
+    Returns:
+        Optional[TaskEventListener]: 任务事件订阅器
+    """
+    if not settings.task_events_enabled:
+        return None
+    if not settings.redis_url:
+        logger.warning("task_events_enabled 已启用，但 redis_url 未配置，任务事件不会推送")
+        return None
+    return TaskEventListener(manager, settings.redis_url, settings.task_events_channel)
+
+
+__all__ = [
+    "CHANNEL_EVENT_FIELDS",
+    "TASK_CHANNEL_PREFIX",
+    "TaskEventListener",
+    "channel_event",
+    "create_task_event_listener",
+    "task_channel",
+]
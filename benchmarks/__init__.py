@@ -0,0 +1,7 @@
+"""
+性能基准测试模块
+
+提供可复现的性能基准测试脚本，不属于 pytest 测试集，需要手动运行：
+
+    python -m benchmarks.bench_compression
+"""
@@ -0,0 +1,114 @@
+"""
+响应压缩基准测试
+
+对用户列表接口（GET /api/v1/users/）分别使用 identity / gzip / br / zstd 编码请求，
+统计每个请求的传输字节数、平均延迟和 CPU 开销，用于评估压缩级别与阈值配置。
+
+使用方法：
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --users 5000 --page-size 100 --requests 500
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import (
+    create_sqlite_engine,
+    override_database,
+    prepare_environment,
+    print_table,
+    seed_users,
+    summarize_latencies,
+)
+
+prepare_environment()
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.middleware.compression import available_encodings  # noqa: E402
+from app.utils.cache import response_cache  # noqa: E402
+
+
+async def run_encoding(client: httpx.AsyncClient, encoding: str, url: str, requests: int) -> dict:
+    """
+    使用指定编码重复请求并统计结果
+
+    Args:
+        client: HTTP 客户端
+        encoding: Accept-Encoding 的值
+        url: 请求路径
+        requests: 请求次数
+
+    Returns:
+        dict: 统计结果
+    """
+    headers = {"Accept-Encoding": encoding}
+
+    # 预热
+    for _ in range(5):
+        await client.get(url, headers=headers)
+
+    latencies = []
+    wire_bytes = 0
+    body_bytes = 0
+    cpu_start = time.process_time()
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        wire_bytes += response.num_bytes_downloaded
+        body_bytes += len(response.content)
+    cpu_total = time.process_time() - cpu_start
+
+    summary = summarize_latencies(latencies)
+    return {
+        "encoding": encoding,
+        "content_encoding": response.headers.get("content-encoding", "identity"),
+        "body_bytes": body_bytes // requests,
+        "wire_bytes": wire_bytes // requests,
+        "ratio": wire_bytes / body_bytes if body_bytes else 0.0,
+        "cpu_ms_per_req": cpu_total / requests * 1000,
+        "mean_ms": summary["mean_ms"],
+        "p95_ms": summary["p95_ms"],
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    engine = create_sqlite_engine()
+    seed_users(engine, args.users)
+    override_database(app, engine)
+    response_cache.enabled = args.with_cache
+
+    url = f"/api/v1/users/?page=1&page_size={args.page_size}"
+    transport = httpx.ASGITransport(app=app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for encoding in ["identity"] + available_encodings():
+            rows.append(await run_encoding(client, encoding, url, args.requests))
+
+    baseline_cpu = rows[0]["cpu_ms_per_req"]
+    for row in rows:
+        row["extra_cpu_ms"] = row["cpu_ms_per_req"] - baseline_cpu
+
+    print(f"\n用户列表接口压缩基准（users={args.users}, page_size={args.page_size}, "
+          f"requests={args.requests}, cache={'on' if args.with_cache else 'off'}）\n")
+    print_table(rows, [
+        "encoding", "content_encoding", "body_bytes", "wire_bytes", "ratio",
+        "cpu_ms_per_req", "extra_cpu_ms", "mean_ms", "p95_ms",
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="响应压缩基准测试")
+    parser.add_argument("--users", type=int, default=1000, help="填充的用户数量")
+    parser.add_argument("--page-size", type=int, default=100, help="列表接口每页数量（最大 100）")
+    parser.add_argument("--requests", type=int, default=200, help="每种编码的请求次数")
+    parser.add_argument("--with-cache", action="store_true", help="启用响应缓存（默认关闭，测量完整请求开销）")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+JSON 日志格式化器基准测试
+
+对比 JSONFormatter 与 FastJSONFormatter（orjson / 标准库 json 两种序列化）
+每秒可格式化的日志条数。
+
+注意：同一条记录会被重复格式化，exception 场景下 FastJSONFormatter 复用缓存的
+exc_text（与一条日志经过控制台、文件多个处理器时的情况相同）。
+
+使用方法：
+    python -m benchmarks.bench_log_formatter
+    python -m benchmarks.bench_log_formatter --records 500000
+"""
+
+import argparse
+import importlib
+import logging
+import sys
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import prepare_environment, print_table
+
+prepare_environment()
+
+from app.utils.logger import FastJSONFormatter, JSONFormatter  # noqa: E402
+
+# app.utils 包导出了同名的 logger 对象，这里需要取得模块本身
+logger_module = importlib.import_module("app.utils.logger")
+
+
+def make_records() -> Dict[str, logging.LogRecord]:
+    """
+    构造不同类型的日志记录
+
+    Returns:
+        dict: {场景名称: 日志记录}
+    """
+    def make(msg: str, args=(), exc_info=None, extra=None) -> logging.LogRecord:
+        record = logging.LogRecord(
+            name="app.access",
+            level=logging.INFO,
+            pathname=__file__,
+            lineno=42,
+            msg=msg,
+            args=args,
+            exc_info=exc_info,
+            func="handler",
+        )
+        if extra is not None:
+            record.extra_fields = extra
+        return record
+
+    try:
+        raise ValueError("基准测试异常")
+    except ValueError:
+        exc_info = sys.exc_info()
+
+    return {
+        "plain": make("用户登录成功"),
+        "args": make("%s %s %d %.2fms", args=("GET", "/api/v1/users/", 200, 3.14159)),
+        "extra_fields": make(
+            "GET /api/v1/users/ 200",
+            extra={
+                "event": "access",
+                "method": "GET",
+                "path": "/api/v1/users/",
+                "status": 200,
+                "duration_ms": 3.142,
+                "response_size": 17589,
+                "client": "127.0.0.1",
+            },
+        ),
+        "exception": make("处理失败", exc_info=exc_info),
+    }
+
+
+def measure(formatter: logging.Formatter, record: logging.LogRecord, count: int) -> float:
+    """
+    测量格式化速度
+
+    Returns:
+        float: 每秒格式化条数
+    """
+    fmt = formatter.format
+    for _ in range(1000):
+        fmt(record)
+    start = time.perf_counter()
+    for _ in range(count):
+        fmt(record)
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON 日志格式化器基准测试")
+    parser.add_argument("--records", type=int, default=100000, help="每个场景格式化的日志条数")
+    args = parser.parse_args()
+
+    formatters: Dict[str, Callable[[], logging.Formatter]] = {
+        "JSONFormatter": JSONFormatter,
+        "FastJSONFormatter (json)": FastJSONFormatter,
+    }
+    if logger_module.orjson is not None:
+        formatters["FastJSONFormatter (orjson)"] = FastJSONFormatter
+
+    rows: List[dict] = []
+    records = make_records()
+    for scenario, record in records.items():
+        baseline = None
+        for name, factory in formatters.items():
+            # 标准库 json 场景：临时禁用 orjson
+            saved = logger_module.orjson
+            if name.endswith("(json)"):
+                logger_module.orjson = None
+            try:
+                rate = measure(factory(), record, args.records)
+            finally:
+                logger_module.orjson = saved
+            baseline = baseline or rate
+            rows.append({
+                "scenario": scenario,
+                "formatter": name,
+                "records_per_sec": int(rate),
+                "speedup": rate / baseline,
+            })
+
+    print(f"\nJSON 日志格式化器基准（records={args.records}）\n")
+    print_table(rows, ["scenario", "formatter", "records_per_sec", "speedup"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+中间件栈开销基准测试
+
+直接以 ASGI 协议调用应用（不经过 HTTP 客户端和网络），对比不同中间件组合下
+单个请求的耗时，用于评估中间件栈（CORS、压缩、访问日志、处理时间、异常处理）的开销。
+
+对照组包含基于 @app.middleware("http")（BaseHTTPMiddleware）的处理时间中间件，
+用于和纯 ASGI 实现比较。
+
+使用方法：
+    python -m benchmarks.bench_middleware
+    python -m benchmarks.bench_middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.common import prepare_environment, print_table, summarize_latencies
+
+prepare_environment()
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from app.middleware import (  # noqa: E402
+    AccessLogMiddleware,
+    CompressionMiddleware,
+    ProcessTimeMiddleware,
+)
+from app.utils.exceptions import BaseAppException  # noqa: E402
+from app.utils.logger import JSONFormatter  # noqa: E402
+
+
+# ==================== 中间件组合 ====================
+
+def add_cors(app: FastAPI) -> None:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+
+def add_compression(app: FastAPI) -> None:
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+
+def add_access_log(app: FastAPI) -> None:
+    app.add_middleware(AccessLogMiddleware)
+
+
+def add_process_time(app: FastAPI) -> None:
+    app.add_middleware(ProcessTimeMiddleware)
+
+
+def add_legacy_process_time(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def add_process_time_header(request: Request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = str(time.perf_counter() - start_time)
+        return response
+
+
+def add_exception_handlers(app: FastAPI) -> None:
+    from app.main import app_exception_handler, general_exception_handler, http_exception_handler
+    from starlette.exceptions import HTTPException as StarletteHTTPException
+
+    app.add_exception_handler(BaseAppException, app_exception_handler)
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+
+
+STACKS: Dict[str, List[Callable[[FastAPI], None]]] = {
+    "bare": [],
+    "process_time (BaseHTTPMiddleware)": [add_legacy_process_time],
+    "process_time (ASGI)": [add_process_time],
+    "cors": [add_cors],
+    "compression": [add_compression],
+    "access_log": [add_access_log],
+    "exception_handlers": [add_exception_handlers],
+    "full": [add_cors, add_compression, add_access_log, add_process_time, add_exception_handlers],
+}
+
+
+def build_app(stack: List[Callable[[FastAPI], None]]) -> FastAPI:
+    """
+    构建只包含一个简单路由的应用，并按顺序添加中间件
+
+    Args:
+        stack: 中间件添加函数列表
+
+    Returns:
+        FastAPI: 应用实例
+    """
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"code": 200, "message": "ok", "data": {"pong": True}}
+
+    for add in stack:
+        add(app)
+    return app
+
+
+# ==================== ASGI 调用 ====================
+
+SCOPE_TEMPLATE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/ping",
+    "raw_path": b"/ping",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"bench"),
+        (b"origin", b"http://localhost:3000"),
+        (b"accept-encoding", b"gzip"),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("bench", 80),
+}
+
+
+async def asgi_get(app: FastAPI) -> int:
+    """
+    以 ASGI 协议发送一次 GET /ping 请求
+
+    Returns:
+        int: 响应状态码
+    """
+    status_code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(dict(SCOPE_TEMPLATE), receive, send)
+    return status_code
+
+
+async def run_stack(name: str, app: FastAPI, requests: int) -> dict:
+    """
+    对单个中间件组合执行基准测试
+
+    Returns:
+        dict: 统计结果
+    """
+    # 预热（包括首次请求时构建中间件栈）
+    for _ in range(1000):
+        assert await asgi_get(app) == 200
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await asgi_get(app)
+        latencies.append(time.perf_counter() - start)
+
+    summary = summarize_latencies(latencies)
+    summary["stack"] = name
+    summary["us_per_req"] = summary["mean_ms"] * 1000
+    return summary
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    # 访问日志输出到内存，包含完整的格式化开销但不受终端 I/O 影响
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(JSONFormatter())
+    access_logger = logging.getLogger("app.access")
+    access_logger.handlers = [handler]
+    access_logger.setLevel(args.log_level)
+    access_logger.propagate = False
+
+    rows = []
+    for name, stack in STACKS.items():
+        rows.append(await run_stack(name, build_app(stack), args.requests))
+
+    bare = rows[0]["us_per_req"]
+    for row in rows:
+        row["overhead_us"] = row["us_per_req"] - bare
+
+    print(f"\n中间件栈开销基准（requests={args.requests}, access_log_level={args.log_level}）\n")
+    print_table(rows, ["stack", "us_per_req", "overhead_us", "p50_ms", "p95_ms", "p99_ms"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="中间件栈开销基准测试")
+    parser.add_argument("--requests", type=int, default=5000, help="每个组合的请求次数")
+    parser.add_argument("--log-level", default="INFO", help="访问日志级别（WARNING 可测试日志关闭时的开销）")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
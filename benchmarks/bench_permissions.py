@@ -0,0 +1,172 @@
+"""
+权限检查基准测试
+
+对比两种权限检查方式每秒可执行的检查次数：
+- callback：典型的回调实现，每次检查从用户角色出发，在权限字符串列表中逐个查找
+- engine：PermissionEngine（预编译 frozenset + 按用户缓存有效权限）
+
+场景：
+- single：单次检查（命中 / 未命中各一半）
+- filter：一次过滤 N 个资源（callback 逐个检查，engine 使用 filter()）
+
+使用方法：
+    python -m benchmarks.bench_permissions
+    python -m benchmarks.bench_permissions --checks 500000 --resources 1000
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.common import prepare_environment, print_table
+
+prepare_environment()
+
+from app.utils.permissions import PermissionEngine  # noqa: E402
+
+ACTIONS = ("read", "create", "update", "delete", "export")
+
+
+# ==================== 数据构造 ====================
+
+def build_roles(resources: List[str], roles: int, rng: random.Random) -> Dict[str, List[str]]:
+    """
+    构造角色定义：每个角色随机持有一部分资源的部分操作，少数角色带通配权限
+
+    Args:
+        resources: 资源列表
+        roles: 角色数量
+        rng: 随机数生成器
+
+    Returns:
+        dict: {角色名: 权限字符串列表}
+    """
+    definitions = {}
+    for index in range(roles):
+        permissions = [
+            f"{resource}:{action}"
+            for resource in rng.sample(resources, k=max(1, len(resources) // 4))
+            for action in rng.sample(ACTIONS, k=2)
+        ]
+        if index % 5 == 0:
+            permissions.append(f"{rng.choice(resources)}:*")
+        definitions[f"role_{index}"] = permissions
+    definitions["auditor"] = ["*:read"]
+    return definitions
+
+
+def make_callback(
+    definitions: Dict[str, List[str]]
+) -> Callable[[Any, Optional[str], Optional[str]], bool]:
+    """
+    典型的回调式权限检查：每次检查格式化权限字符串，在用户每个角色的权限列表中查找
+
+    Args:
+        definitions: 角色定义
+
+    Returns:
+        Callable: 权限检查函数
+    """
+    def check(user: Any, resource: Optional[str] = None, action: Optional[str] = None) -> bool:
+        wanted = (f"{resource}:{action}", f"{resource}:*", f"*:{action}", "*")
+        for role in user["roles"]:
+            for permission in definitions.get(role, ()):
+                if permission in wanted:
+                    return True
+        return False
+
+    return check
+
+
+# ==================== 测量 ====================
+
+def measure(func: Callable[[int], Any], count: int) -> float:
+    """
+    测量每秒执行次数
+
+    Args:
+        func: 被测函数（参数为序号）
+        count: 执行次数
+
+    Returns:
+        float: 每秒执行次数
+    """
+    for i in range(min(count, 1000)):
+        func(i)
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="权限检查基准测试")
+    parser.add_argument("--checks", type=int, default=200000, help="single 场景的检查次数")
+    parser.add_argument("--resources", type=int, default=200, help="资源数量（filter 场景每次过滤的资源数）")
+    parser.add_argument("--roles", type=int, default=20, help="角色数量")
+    parser.add_argument("--users", type=int, default=1000, help="用户数量")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    resources = [f"resource_{i}" for i in range(args.resources)]
+    definitions = build_roles(resources, args.roles, rng)
+    role_names = [name for name in definitions if name != "auditor"]
+    users = [{"id": i, "roles": rng.sample(role_names, k=3)} for i in range(args.users)]
+    checks = [
+        (users[rng.randrange(args.users)], rng.choice(resources), rng.choice(ACTIONS))
+        for _ in range(4096)
+    ]
+
+    callback = make_callback(definitions)
+    engine = PermissionEngine(roles=definitions, ttl=3600, max_users=args.users)
+
+    # 两种实现的结果必须一致
+    for user, resource, action in checks[:500]:
+        assert callback(user, resource, action) == engine.check(user, resource, action)
+
+    def callback_single(i: int) -> bool:
+        user, resource, action = checks[i & 4095]
+        return callback(user, resource, action)
+
+    def engine_single(i: int) -> bool:
+        user, resource, action = checks[i & 4095]
+        return engine.check(user, resource, action)
+
+    def callback_filter(i: int) -> List[str]:
+        user = users[i % args.users]
+        return [resource for resource in resources if callback(user, resource, "read")]
+
+    def engine_filter(i: int) -> List[str]:
+        return engine.filter(users[i % args.users], resources, action="read")
+
+    filter_count = max(1, args.checks // args.resources)
+    scenarios = [
+        ("single", "callback", callback_single, args.checks, 1),
+        ("single", "engine", engine_single, args.checks, 1),
+        ("filter", "callback", callback_filter, filter_count, args.resources),
+        ("filter", "engine", engine_filter, filter_count, args.resources),
+    ]
+
+    rows = []
+    baseline: Dict[str, float] = {}
+    for scenario, name, func, count, per_call in scenarios:
+        rate = measure(func, count) * per_call
+        baseline.setdefault(scenario, rate)
+        rows.append({
+            "scenario": scenario,
+            "implementation": name,
+            "checks_per_sec": int(rate),
+            "speedup": rate / baseline[scenario],
+        })
+
+    print(
+        f"\n权限检查基准（roles={len(definitions)}, resources={args.resources}, "
+        f"users={args.users}, 每个用户 3 个角色）\n"
+    )
+    print_table(rows, ["scenario", "implementation", "checks_per_sec", "speedup"])
+    print(f"\nengine 缓存统计: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Repository 层微基准测试
+
+在不同数据量（默认 1k / 100k / 1M 行）的 SQLite 数据库上测量 BaseRepository 各操作的开销：
+- create / create_many / get_by_id / paginate / search / update / delete
+- 每个操作的耗时（mean / p50 / p95）和执行的 SQL 语句数量
+- 保存基线结果，后续运行与基线比较：耗时超过阈值或语句数量增加时以非零状态退出；
+  基线的数据量或执行次数与本次运行不同时拒绝比较（退出码 2）
+
+用于评估 app/repositories/base.py 的改动（例如减少 refresh 往返、优化 count 查询）。
+
+使用方法：
+    python -m benchmarks.bench_repository
+    python -m benchmarks.bench_repository --sizes 1000,100000 --iterations 100
+    python -m benchmarks.bench_repository --save-baseline      # 记录基线
+    python -m benchmarks.bench_repository --threshold 0.3      # 与基线比较（默认 25%）
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import (
+    compare_to_baseline,
+    create_sqlite_engine,
+    load_baseline,
+    prepare_environment,
+    print_table,
+    save_baseline,
+    seed_users,
+    summarize_latencies,
+)
+
+prepare_environment()
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.models.user_model import User  # noqa: E402
+from app.repositories.base import BaseRepository  # noqa: E402
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "bench_repository.json")
+
+# 参与基线比较的耗时指标（受机器负载影响，按阈值比较）
+TIMING_METRICS = {"mean_ms": "lower", "p95_ms": "lower"}
+# 语句数量是确定的，任何增加都视为回归
+STATEMENT_METRICS = {"statements": "lower"}
+
+CREATE_MANY_BATCH = 100
+
+
+# ==================== 语句计数 ====================
+
+class StatementCounter:
+    """统计引擎上执行的 SQL 语句数量"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+
+# ==================== 操作定义 ====================
+
+def build_operations(
+    repo: BaseRepository, size: int, rng: random.Random
+) -> Dict[str, Callable[[int], Any]]:
+    """
+    构建各 Repository 操作
+
+    create 创建的记录由 update / delete 使用，因此操作按定义顺序执行。
+
+    Args:
+        repo: 用户 Repository
+        size: 已填充的行数
+        rng: 随机数生成器（固定种子，保证可复现）
+
+    Returns:
+        dict: 操作名 -> 操作（参数为序号）
+    """
+    created_ids: List[int] = []
+
+    def create(index: int) -> None:
+        user = repo.create(
+            {"name": f"基准用户{index}", "email": f"bench_{size}_{index}@example.com", "age": 30}
+        )
+        created_ids.append(user.id)
+
+    def create_many(index: int) -> None:
+        repo.create_many([
+            {"name": f"批量用户{index}_{i}", "email": f"bulk_{size}_{index}_{i}@example.com", "age": 40}
+            for i in range(CREATE_MANY_BATCH)
+        ])
+
+    def get_by_id(index: int) -> None:
+        repo.get_by_id(rng.randint(1, size))
+
+    def paginate(index: int) -> None:
+        repo.paginate(page=rng.randint(1, max(1, size // 20)), page_size=20, order_by="id")
+
+    def search(index: int) -> None:
+        repo.search(["name", "email"], f"user{rng.randint(1, size)}@", limit=20)
+
+    def update(index: int) -> None:
+        repo.update(created_ids[index % len(created_ids)], {"age": 50 + index % 30})
+
+    def delete(index: int) -> None:
+        repo.delete(created_ids[index])
+
+    return {
+        "create": create,
+        "create_many": create_many,
+        "get_by_id": get_by_id,
+        "paginate": paginate,
+        "search": search,
+        "update": update,
+        "delete": delete,
+    }
+
+
+def run_size(size: int, iterations: int) -> List[Dict[str, Any]]:
+    """
+    在指定数据量下运行所有操作
+
+    Args:
+        size: 填充的行数
+        iterations: 每个操作的执行次数
+
+    Returns:
+        list: 每个操作一行统计结果
+    """
+    engine = create_sqlite_engine()
+    seed_start = time.perf_counter()
+    seed_users(engine, size, batch_size=20000)
+    seed_seconds = time.perf_counter() - seed_start
+    print(f"已填充 {size} 行（{seed_seconds:.1f}s）")
+
+    counter = StatementCounter(engine)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    rng = random.Random(42)
+
+    rows = []
+    with session_local() as db:
+        repo = BaseRepository(User, db)
+        for name, operation in build_operations(repo, size, rng).items():
+            # 预热（编译缓存、页缓存），不计入统计
+            if name in ("get_by_id", "paginate", "search"):
+                for i in range(min(5, iterations)):
+                    operation(i)
+
+            latencies = []
+            statements_before = counter.count
+            for i in range(iterations):
+                start = time.perf_counter()
+                operation(i)
+                latencies.append(time.perf_counter() - start)
+            statements = counter.count - statements_before
+
+            summary = summarize_latencies(latencies)
+            rows.append({
+                "size": size,
+                "operation": name,
+                "statements": statements / iterations,
+                "mean_ms": summary["mean_ms"],
+                "p50_ms": summary["p50_ms"],
+                "p95_ms": summary["p95_ms"],
+            })
+            # 避免身份映射随迭代增长影响后续操作
+            db.expunge_all()
+
+    engine.dispose()
+    return rows
+
+
+# ==================== 入口 ====================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Repository 层微基准测试")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="数据量列表（逗号分隔）")
+    parser.add_argument("--iterations", type=int, default=50, help="每个操作的执行次数")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的耗时相对回归幅度（默认 0.25）")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    rows = []
+    for size in sizes:
+        rows.extend(run_size(size, args.iterations))
+
+    print(f"\nRepository 微基准（SQLite, iterations={args.iterations}, "
+          f"create_many 每批 {CREATE_MANY_BATCH} 行）\n")
+    print_table(rows, ["size", "operation", "statements", "mean_ms", "p50_ms", "p95_ms"])
+
+    results = {
+        f"{row['size']}:{row['operation']}": {
+            metric: round(row[metric], 4) for metric in ("statements", "mean_ms", "p95_ms")
+        }
+        for row in rows
+    }
+    params = {"sizes": sizes, "iterations": args.iterations}
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, params)
+        print(f"\n基线已保存: {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\n未找到基线文件 {args.baseline}，使用 --save-baseline 记录基线")
+        return
+    # 数据量或执行次数不同时耗时不可比，拒绝比较，避免误报或漏报回归
+    if baseline.get("params") != params:
+        print(f"\n基线参数 {baseline.get('params')} 与本次运行参数 {params} 不同，无法比较；"
+              f"请使用相同参数运行，或使用 --save-baseline 重新记录基线")
+        sys.exit(2)
+
+    regressions = (
+        compare_to_baseline(results, baseline, STATEMENT_METRICS, 0.0)
+        + compare_to_baseline(results, baseline, TIMING_METRICS, args.threshold)
+    )
+    if regressions:
+        print(f"\n检测到性能回归（耗时阈值 {args.threshold:.0%}，语句数量不允许增加）：\n")
+        print_table(regressions, ["scenario", "metric", "baseline", "current", "change"])
+        sys.exit(1)
+    print("\n与基线相比未发现回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+WebSocket 广播基准测试
+
+使用模拟连接（每次发送耗时 --send-delay 秒，模拟网络写入）测量一次广播的耗时：
+- sequential：逐个 await send_text 的串行广播（改造前的实现）
+- concurrent：ConnectionManager.broadcast，不使用出站队列（限制并发数的并发发送 + 发送超时）
+- queued：ConnectionManager.broadcast，使用出站队列（调用方只入队，耗时为入队耗时；
+  drain_ms 为所有连接的写协程发送完毕的耗时）
+
+每种规模分别测量没有慢客户端和存在一个慢客户端（发送耗时远超超时时间）两种情况；
+慢客户端在每次广播前重新注册，以测量其对每次广播的影响。
+
+使用方法：
+    python -m benchmarks.bench_websocket
+    python -m benchmarks.bench_websocket --sizes 1000,10000 --iterations 10 --send-delay 0.001
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, List
+
+from benchmarks.common import prepare_environment, print_table, summarize_latencies
+
+prepare_environment()
+
+from app.websocket.manager import ConnectionManager  # noqa: E402
+
+
+# ==================== 模拟连接 ====================
+
+class SimulatedWebSocket:
+    """模拟 WebSocket 连接：每次发送等待固定时间"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.received = 0
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+async def sequential_broadcast(manager: ConnectionManager, message: Any) -> int:
+    """改造前的串行广播实现（作为对照）"""
+    message_text = json.dumps(message, ensure_ascii=False)
+    success_count = 0
+    for websocket in list(manager.registry.records):
+        try:
+            await websocket.send_text(message_text)
+            success_count += 1
+        except Exception:
+            manager.disconnect(websocket)
+    return success_count
+
+
+# ==================== 测量 ====================
+
+async def measure(
+    broadcast: Callable[[ConnectionManager, Any], Awaitable[int]],
+    queue_size: int,
+    size: int,
+    iterations: int,
+    send_delay: float,
+    slow_delay: float,
+    send_timeout: float,
+    concurrency: int,
+) -> dict:
+    """
+    测量广播耗时
+
+    Args:
+        broadcast: 广播实现
+        queue_size: 出站队列容量，0 表示不使用队列
+        size: 连接数
+        iterations: 广播次数
+        send_delay: 普通连接每次发送耗时（秒）
+        slow_delay: 慢客户端每次发送耗时（秒），0 表示没有慢客户端
+        send_timeout: 发送超时（秒）
+        concurrency: 并发发送数量上限
+
+    Returns:
+        dict: 耗时统计和送达数
+    """
+    manager = ConnectionManager(
+        send_timeout=send_timeout,
+        broadcast_concurrency=concurrency,
+        queue_size=queue_size,
+    )
+    clients = [SimulatedWebSocket(send_delay) for _ in range(size)]
+    for index, client in enumerate(clients):
+        await manager.connect(client, f"user{index}")
+
+    latencies: List[float] = []
+    drain_latencies: List[float] = []
+    delivered = 0
+    for i in range(iterations):
+        slow_client = SimulatedWebSocket(slow_delay) if slow_delay else None
+        if slow_client is not None:
+            await manager.connect(slow_client, "slow_user")
+        start = time.perf_counter()
+        delivered += await broadcast(manager, {"type": "announcement", "seq": i})
+        latencies.append(time.perf_counter() - start)
+        # 等待所有普通连接收到本条消息（使用出站队列时发送在广播返回后进行）
+        while any(client.received <= i for client in clients):
+            await asyncio.sleep(send_delay)
+        drain_latencies.append(time.perf_counter() - start)
+        if slow_client is not None:
+            manager.disconnect(slow_client)
+
+    for client in clients:
+        manager.disconnect(client)
+
+    summary = summarize_latencies(latencies)
+    summary["drain_ms"] = summarize_latencies(drain_latencies)["mean_ms"]
+    summary["delivered"] = delivered / iterations
+    return summary
+
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    def managed_broadcast(manager: ConnectionManager, message: Any) -> Awaitable[int]:
+        return manager.broadcast(message)
+
+    # 名称 -> (广播实现, 出站队列容量)
+    implementations = {
+        "sequential": (sequential_broadcast, 0),
+        "concurrent": (managed_broadcast, 0),
+        "queued": (managed_broadcast, args.queue_size),
+    }
+    rows = []
+    for size in args.sizes:
+        for slow in (False, True):
+            for name, (broadcast, queue_size) in implementations.items():
+                summary = await measure(
+                    broadcast,
+                    queue_size,
+                    size,
+                    args.iterations,
+                    args.send_delay,
+                    args.slow_delay if slow else 0.0,
+                    args.send_timeout,
+                    args.concurrency,
+                )
+                rows.append({
+                    "connections": size,
+                    "slow_client": "yes" if slow else "no",
+                    "implementation": name,
+                    "mean_ms": summary["mean_ms"],
+                    "p95_ms": summary["p95_ms"],
+                    "drain_ms": summary["drain_ms"],
+                    "delivered": summary["delivered"],
+                })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WebSocket 广播基准测试")
+    parser.add_argument("--sizes", default="1000,10000", help="连接数列表（逗号分隔）")
+    parser.add_argument("--iterations", type=int, default=5, help="每种场景的广播次数")
+    parser.add_argument("--send-delay", type=float, default=0.0002, help="普通连接每次发送耗时（秒）")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="慢客户端每次发送耗时（秒）")
+    parser.add_argument("--send-timeout", type=float, default=0.1, help="发送超时（秒）")
+    parser.add_argument("--concurrency", type=int, default=1000, help="并发发送数量上限")
+    parser.add_argument("--queue-size", type=int, default=256, help="queued 场景的出站队列容量")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    rows = asyncio.run(run(args))
+
+    print(
+        f"\nWebSocket 广播基准（send_delay={args.send_delay}s, slow_delay={args.slow_delay}s, "
+        f"send_timeout={args.send_timeout}s, concurrency={args.concurrency}）\n"
+    )
+    print_table(
+        rows,
+        [
+            "connections",
+            "slow_client",
+            "implementation",
+            "mean_ms",
+            "p95_ms",
+            "drain_ms",
+            "delivered",
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+WebSocket 连接注册表基准测试
+
+使用 tracemalloc 测量每个连接占用的内存，并测量一次 /ws/stats 统计的耗时：
+- legacy：改造前的布局（{user_id: set} + {websocket: user_id} 两个字典，
+  出站队列 / 编码 / 心跳各自按连接建字典，每个出站队列常驻一个等待 Event 的写协程）
+- registry：ConnectionManager 的连接注册表（每个连接一条 __slots__ 记录），不使用队列和心跳
+- registry_queued：ConnectionManager 默认配置（出站队列 + 心跳），写协程只在有待发送消息时存在
+
+模拟连接对象在开始测量前创建，不计入连接内存。
+stats_us 为一次统计（总连接数、用户数、一页用户）的耗时：legacy 为求和 + 复制整个用户集合，
+registry 为读取计数 + 取一页（100 个）用户。
+
+使用方法：
+    python -m benchmarks.bench_websocket_registry
+    python -m benchmarks.bench_websocket_registry --connections 50000 --users-ratio 0.8
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Set
+
+from benchmarks.common import prepare_environment, print_table
+
+prepare_environment()
+
+from app.websocket.heartbeat import HeartbeatScheduler  # noqa: E402
+from app.websocket.manager import ConnectionManager  # noqa: E402
+from app.websocket.outbound import OutboundQueue  # noqa: E402
+
+
+# ==================== 模拟连接 ====================
+
+class IdleWebSocket:
+    """模拟空闲的 WebSocket 连接"""
+
+    __slots__ = ("scope",)
+
+    def __init__(self):
+        self.scope = {}
+
+    async def accept(self, subprotocol: Any = None) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+# ==================== 改造前的布局（对照） ====================
+
+class LegacyRegistry:
+    """改造前的连接管理器数据布局"""
+
+    def __init__(self, queued: bool):
+        self.queued = queued
+        self.active_connections: Dict[str, Set[Any]] = {}
+        self.connection_to_user: Dict[Any, str] = {}
+        self.outbound: Dict[Any, OutboundQueue] = {}
+        self.encodings: Dict[Any, str] = {}
+        self.subscriptions: Dict[Any, Set[str]] = {}
+        self.events: Dict[Any, asyncio.Event] = {}
+        self.heartbeat = HeartbeatScheduler(interval=30, timeout=75) if queued else None
+
+    def connect(self, websocket: Any, user_id: str) -> None:
+        self.active_connections.setdefault(user_id, set()).add(websocket)
+        self.connection_to_user[websocket] = user_id
+        if self.queued:
+            self.heartbeat.register(websocket)
+            self.outbound[websocket] = OutboundQueue(
+                websocket,
+                max_size=256,
+                overflow="drop_oldest",
+                send_timeout=5.0,
+                on_failure=lambda *_: None,
+            )
+            # 改造前每个队列常驻一个等待 Event 的写协程
+            event = asyncio.Event()
+            self.events[websocket] = event
+            asyncio.ensure_future(event.wait())
+
+    def stats(self) -> dict:
+        users = set(self.active_connections.keys())
+        return {
+            "total_connections": sum(
+                len(connections) for connections in self.active_connections.values()
+            ),
+            "connected_users_count": len(users),
+            "connected_users": list(users),
+        }
+
+
+# ==================== 测量 ====================
+
+def user_ids(connections: int, users_ratio: float) -> List[str]:
+    """生成每个连接的用户 ID（users_ratio 为用户数 / 连接数，其余连接作为同一用户的其他设备）"""
+    users = max(1, int(connections * users_ratio))
+    return [f"user{index % users}" for index in range(connections)]
+
+
+async def measure(
+    name: str,
+    connect: Callable[[List[Any], List[str]], Any],
+    stats: Callable[[], Any],
+    connections: int,
+    users_ratio: float,
+) -> dict:
+    """
+    测量每个连接的内存占用和统计耗时
+
+    Args:
+        name: 实现名称
+        connect: 注册所有连接的函数
+        stats: 统计函数
+        connections: 连接数
+        users_ratio: 用户数 / 连接数
+
+    Returns:
+        dict: 测量结果
+    """
+    sockets = [IdleWebSocket() for _ in range(connections)]
+    ids = user_ids(connections, users_ratio)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = connect(sockets, ids)
+    if asyncio.iscoroutine(result):
+        await result
+    # 让写协程 / 后台任务进入等待状态
+    await asyncio.sleep(0)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    rounds = 20
+    start = time.perf_counter()
+    for _ in range(rounds):
+        stats()
+    stats_us = (time.perf_counter() - start) / rounds * 1e6
+
+    return {
+        "connections": connections,
+        "implementation": name,
+        "bytes_per_connection": round(used / connections, 1),
+        "total_mb": round(used / 1024 / 1024, 2),
+        "stats_us": round(stats_us, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    rows = []
+    for queued in (False, True):
+        legacy = LegacyRegistry(queued)
+
+        def legacy_connect(sockets: List[Any], ids: List[str]) -> None:
+            for websocket, user_id in zip(sockets, ids):
+                legacy.connect(websocket, user_id)
+
+        rows.append(await measure(
+            "legacy_queued" if queued else "legacy",
+            legacy_connect,
+            legacy.stats,
+            args.connections,
+            args.users_ratio,
+        ))
+
+        manager = ConnectionManager(
+            queue_size=256 if queued else 0,
+            heartbeat_interval=30 if queued else 0,
+        )
+
+        async def manager_connect(sockets: List[Any], ids: List[str]) -> None:
+            for websocket, user_id in zip(sockets, ids):
+                await manager.connect(websocket, user_id)
+
+        def manager_stats() -> dict:
+            return {
+                **manager.stats(),
+                "connected_users": manager.get_connected_users_page(0, 100),
+            }
+
+        rows.append(await measure(
+            "registry_queued" if queued else "registry",
+            manager_connect,
+            manager_stats,
+            args.connections,
+            args.users_ratio,
+        ))
+
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="WebSocket 连接注册表基准测试")
+    parser.add_argument("--connections", type=int, default=50000, help="连接数")
+    parser.add_argument("--users-ratio", type=float, default=0.8, help="用户数 / 连接数")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+
+    print(f"\nWebSocket 连接注册表基准（{args.connections} 个连接，用户数 / 连接数 = {args.users_ratio}）\n")
+    print_table(
+        rows, ["connections", "implementation", "bytes_per_connection", "total_mb", "stats_us"]
+    )
+
+
+if __name__ == "__main__":
+    main()
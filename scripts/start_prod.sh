@@ -6,8 +6,10 @@
 
 # 启动生产服务器（多进程模式）
 # 注意：需要安装 gunicorn: pip install gunicorn
+# WEB_CONCURRENCY 同时供应用判断是否为多进程部署（例如内存缓存后端的告警）
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-4}
 gunicorn app.main:app \
-    --workers 4 \
+    --workers "$WEB_CONCURRENCY" \
     --worker-class uvicorn.workers.UvicornWorker \
     --bind 0.0.0.0:8100 \
     --access-logfile - \
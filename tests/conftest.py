@@ -5,16 +5,18 @@ Pytest 配置和共享 Fixture
 - 测试数据库配置
 - 数据库会话 fixture
 - 测试客户端 fixture
+- SQL 查询计数断言
 - 其他通用测试工具
 """
 
 import sys
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import Callable, ContextManager, Generator, Iterator, List
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -124,6 +126,109 @@ def authenticated_client(client: TestClient) -> TestClient:
     return client
 
 
+@pytest.fixture
+def db_client(test_engine) -> Generator[TestClient, None, None]:
+    """
+    创建使用测试数据库的 FastAPI 测试客户端
+
+    将 get_db 依赖替换为绑定 test_engine 的会话，并关闭响应缓存，
+    保证每个请求都真实访问数据库。测试结束后清空所有表。
+
+    Yields:
+        TestClient: FastAPI 测试客户端实例
+    """
+    from app.dependencies import get_db
+    from app.utils.cache import response_cache
+
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    cache_enabled = response_cache.enabled
+    response_cache.enabled = False
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        response_cache.enabled = cache_enabled
+        with TestingSessionLocal() as db:
+            cleanup_database(db)
+
+
+# ==================== SQL 查询计数 ====================
+
+class QueryCounter:
+    """
+    SQL 语句计数器
+
+    Attributes:
+        statements: 已执行的 SQL 语句列表
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        """已执行的 SQL 语句数量"""
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine) -> Iterator[QueryCounter]:
+    """
+    统计代码块内在指定引擎上执行的 SQL 语句
+
+    Args:
+        engine: SQLAlchemy 引擎
+
+    Yields:
+        QueryCounter: 语句计数器
+    """
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def assert_max_queries(test_engine) -> Callable[[int], ContextManager[QueryCounter]]:
+    """
+    断言代码块内执行的 SQL 语句数量不超过上限
+
+    用于锁定接口的查询次数，及时发现 N+1 查询和多余的 refresh 往返。
+
+    Example:
+        ```python
+        def test_list_users(db_client, assert_max_queries):
+            with assert_max_queries(2):
+                db_client.get("/api/v1/users/")
+        ```
+    """
+    @contextmanager
+    def _assert_max_queries(max_queries: int) -> Iterator[QueryCounter]:
+        with count_queries(test_engine) as counter:
+            yield counter
+        assert counter.count <= max_queries, (
+            f"执行了 {counter.count} 条 SQL，超过上限 {max_queries}：\n"
+            + "\n".join(counter.statements)
+        )
+
+    return _assert_max_queries
+
+
 # ==================== 测试数据 Fixture ====================
 
 @pytest.fixture
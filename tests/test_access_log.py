@@ -0,0 +1,155 @@
+"""
+访问日志中间件测试模块
+
+测试访问日志功能，包括：
+- 每个请求一条结构化日志
+- 查询字符串中敏感参数脱敏
+- 跳过指定路径
+- 采样与慢请求阈值
+- 日志级别未启用时不记录
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.middleware.access_log import (
+    SENSITIVE_QUERY_PARAMS,
+    AccessLogMiddleware,
+    redact_query_string,
+)
+
+
+LOGGER_NAME = "tests.access"
+
+
+# ==================== 测试 Fixtures ====================
+
+def make_client(**kwargs) -> TestClient:
+    """创建带访问日志中间件的测试客户端"""
+    test_app = FastAPI()
+    test_app.add_middleware(AccessLogMiddleware, logger_name=LOGGER_NAME, **kwargs)
+
+    @test_app.get("/items")
+    async def items():
+        return {"items": [1, 2, 3]}
+
+    @test_app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @test_app.get("/error")
+    async def error():
+        raise ValueError("boom")
+
+    return TestClient(test_app, raise_server_exceptions=False)
+
+
+def access_records(caplog):
+    """获取访问日志记录"""
+    return [record for record in caplog.records if record.name == LOGGER_NAME]
+
+
+# ==================== 日志内容测试 ====================
+
+def test_one_structured_record_per_request(caplog):
+    """测试每个请求只记录一条结构化日志"""
+    client = make_client()
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        client.get("/items?page=1")
+
+    records = access_records(caplog)
+    assert len(records) == 1
+    record = records[0]
+    assert record.levelno == logging.INFO
+    assert record.getMessage().startswith("GET /items 200")
+    fields = record.extra_fields
+    assert fields["method"] == "GET"
+    assert fields["path"] == "/items"
+    assert fields["query"] == "page=1"
+    assert fields["status"] == 200
+    assert fields["response_size"] > 0
+    assert fields["duration_ms"] >= 0
+
+
+def test_sensitive_query_params_redacted(caplog):
+    """测试查询字符串中的 token 等敏感参数值不写入日志"""
+    client = make_client()
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        client.get("/items?page=1&token=secret-token&Access_Token=abc")
+
+    fields = access_records(caplog)[0].extra_fields
+    assert fields["query"] == "page=1&token=***&Access_Token=***"
+    assert "secret-token" not in access_records(caplog)[0].getMessage()
+
+
+def test_redact_query_string():
+    """测试查询字符串脱敏规则"""
+    assert redact_query_string(b"", SENSITIVE_QUERY_PARAMS) == ""
+    assert redact_query_string(b"page=1&q=a%20b", SENSITIVE_QUERY_PARAMS) == "page=1&q=a%20b"
+    # 参数名按解码后匹配，没有值的参数保持原样
+    redacted = redact_query_string(b"api%5Fkey=x&token", SENSITIVE_QUERY_PARAMS)
+    assert redacted == "api%5Fkey=***&token"
+    assert redact_query_string(b"user=bob", frozenset({"user"})) == "user=***"
+    assert redact_query_string(b"token=abc", frozenset()) == "token=abc"
+
+
+def test_skip_paths(caplog):
+    """测试跳过健康检查路径"""
+    client = make_client(skip_paths=["/health"])
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        client.get("/health")
+
+    assert access_records(caplog) == []
+
+
+def test_server_error_logged_as_error(caplog):
+    """测试未处理异常以 ERROR 级别记录"""
+    client = make_client()
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        client.get("/error")
+
+    records = access_records(caplog)
+    assert len(records) == 1
+    assert records[0].levelno == logging.ERROR
+    assert records[0].extra_fields["status"] == 500
+
+
+# ==================== 采样与阈值测试 ====================
+
+def test_sample_rate_zero_skips_normal_requests(caplog):
+    """测试采样率为 0 时不记录普通请求"""
+    client = make_client(sample_rate=0.0)
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        for _ in range(5):
+            client.get("/items")
+
+    assert access_records(caplog) == []
+
+
+def test_slow_request_always_logged(caplog):
+    """测试慢请求不受采样率影响"""
+    client = make_client(sample_rate=0.0, slow_threshold_ms=0)
+    with caplog.at_level(logging.INFO, logger=LOGGER_NAME):
+        client.get("/items")
+
+    records = access_records(caplog)
+    assert len(records) == 1
+    assert records[0].levelno == logging.WARNING
+    assert records[0].extra_fields["slow"] is True
+
+
+def test_disabled_level_not_logged(caplog):
+    """测试日志级别未启用时不记录"""
+    client = make_client()
+    with caplog.at_level(logging.WARNING, logger=LOGGER_NAME):
+        client.get("/items")
+
+    assert access_records(caplog) == []
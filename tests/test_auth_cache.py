@@ -0,0 +1,316 @@
+"""
+认证结果缓存测试模块
+
+测试认证结果缓存和异步认证依赖，包括：
+- 按 token 哈希缓存、TTL 过期、LRU 淘汰
+- 按 token / 按用户吊销
+- 共享层（Redis 层使用内存后端模拟）的读写和序列化
+- 命中时返回还原出的新对象，未设置 deserialize 或没有用户 ID 时不缓存
+- get_current_user / get_current_user_async 与缓存、同步 / 异步认证函数的配合
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import app.dependencies as dependencies
+from app.dependencies import (
+    get_authentication_function,
+    get_current_user,
+    get_current_user_async,
+    set_authentication_function,
+)
+from app.main import app_exception_handler
+from app.utils.auth_cache import AuthCache
+from app.utils.cache import MemoryCacheBackend
+from app.utils.exceptions import BaseAppException
+
+
+# ==================== 测试 Fixtures ====================
+
+class User:
+    """测试用户对象"""
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+
+
+def load_user(data: dict) -> User:
+    """从缓存数据还原测试用户对象"""
+    return User(data["id"], data.get("name"))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """替换依赖模块使用的全局认证缓存，并在测试结束后恢复认证函数"""
+    cache = AuthCache(ttl=60, max_entries=100, deserialize=load_user)
+    monkeypatch.setattr(dependencies, "auth_cache", cache)
+    original = get_authentication_function()
+    yield cache
+    set_authentication_function(original)
+
+
+def create_app() -> FastAPI:
+    """创建同时提供同步 / 异步认证依赖的测试应用"""
+    test_app = FastAPI()
+    test_app.add_exception_handler(BaseAppException, app_exception_handler)
+
+    @test_app.get("/sync")
+    def sync_route(user=Depends(get_current_user)):
+        return {"id": user.id}
+
+    @test_app.get("/async")
+    async def async_route(user=Depends(get_current_user_async)):
+        return {"id": user.id}
+
+    return test_app
+
+
+# ==================== AuthCache 测试 ====================
+
+def test_cache_keys_are_token_hashes():
+    """测试缓存键使用 token 哈希，原始凭证不出现在缓存中"""
+    cache = AuthCache(deserialize=load_user)
+    cache.set("Bearer secret-token", User(1, "alice"))
+
+    assert cache.get("Bearer secret-token").name == "alice"
+    assert cache.get("Bearer other-token") is None
+    assert all("secret-token" not in key for key in cache.local._data)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_ttl_and_lru(monkeypatch):
+    """测试 TTL 过期和 LRU 淘汰"""
+    cache = AuthCache(ttl=10, max_entries=2, deserialize=load_user)
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+
+    cache.set("t1", User(1, "a"))
+    cache.set("t2", User(2, "b"))
+    cache.get("t1")
+    cache.set("t3", User(3, "c"))
+    assert cache.get("t2") is None, "最久未使用的条目应被淘汰"
+    assert cache.get("t1") is not None
+
+    now[0] += 11
+    assert cache.get("t1") is None, "过期条目不应命中"
+
+
+def test_revoke_token_and_user():
+    """测试按 token 和按用户吊销"""
+    cache = AuthCache(deserialize=load_user)
+    cache.set("t1", User(1, "a"))
+    cache.set("t2", User(1, "a"))
+    cache.set("t3", User(2, "b"))
+
+    cache.revoke_token("t3")
+    assert cache.get("t3") is None
+
+    assert cache.revoke_user(1) == 2
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+
+
+def test_remote_tier_shared_between_processes():
+    """测试共享层：一个进程写入，另一个进程读取、吊销"""
+    remote = MemoryCacheBackend()
+    worker_a = AuthCache(remote=remote, local_ttl=5, deserialize=load_user)
+    worker_b = AuthCache(remote=remote, local_ttl=5, deserialize=load_user)
+
+    worker_a.set("token", User(7, "grace"))
+    assert remote.get(AuthCache.hash_token("token")) == {"id": 7, "name": "grace"}
+
+    user = worker_b.get("token")
+    assert isinstance(user, User) and user.name == "grace"
+    assert worker_b.stats()["remote_hits"] == 1
+
+    worker_a.revoke_user(7)
+    worker_b.local.clear()
+    assert worker_b.get("token") is None
+
+
+def test_local_and_remote_hits_return_fresh_objects():
+    """测试进程内命中和共享层命中返回同一类型的新对象，修改返回值不影响缓存"""
+    remote = MemoryCacheBackend()
+    worker_a = AuthCache(remote=remote, deserialize=dict)
+    worker_b = AuthCache(remote=remote, deserialize=dict)
+    worker_a.set("token", User(7, "grace"))
+
+    remote_hit = worker_b.get("token")
+    local_hit = worker_a.get("token")
+    assert type(remote_hit) is type(local_hit) is dict
+    local_hit["name"] = "mallory"
+    assert worker_a.get("token") == {"id": 7, "name": "grace"}
+    assert worker_a.get("token") is not worker_a.get("token")
+
+
+def test_cache_requires_deserialize():
+    """测试未设置 deserialize 时不缓存，请求直接执行认证"""
+    cache = AuthCache()
+    request = type("R", (), {"headers": {"authorization": "t"}})()
+
+    cache.set("t", User(1, "alice"))
+    assert cache.get("t") is None
+    assert cache.get_token(request) is None
+    assert len(cache.local) == 0
+
+
+def test_users_without_id_not_cached():
+    """测试没有用户 ID 的结果不缓存，不会共用 user:None 标签"""
+    cache = AuthCache(deserialize=dict)
+    cache.set("t1", {"name": "anonymous"})
+    cache.set("t2", {"id": None, "name": "anonymous"})
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.revoke_user(None) == 0
+
+
+def test_local_ttl_bounded_when_remote_enabled():
+    """测试启用共享层时进程内缓存时间不超过 local_ttl"""
+    assert AuthCache(ttl=60, local_ttl=5, remote=MemoryCacheBackend()).local_ttl == 5
+    assert AuthCache(ttl=60, local_ttl=5).local_ttl == 60
+
+
+# ==================== 认证依赖测试 ====================
+
+def test_get_current_user_uses_cache(cache):
+    """测试同步依赖缓存认证结果，相同 token 只认证一次"""
+    calls = []
+
+    def auth(request):
+        calls.append(request.headers.get("Authorization"))
+        return User(1, "alice")
+
+    set_authentication_function(auth, deserialize=load_user)
+    client = TestClient(create_app())
+
+    for _ in range(3):
+        assert client.get("/sync", headers={"Authorization": "Bearer a"}).json() == {"id": 1}
+    client.get("/sync", headers={"Authorization": "Bearer b"})
+    assert calls == ["Bearer a", "Bearer b"]
+
+    cache.revoke_token("Bearer a")
+    client.get("/sync", headers={"Authorization": "Bearer a"})
+    assert len(calls) == 3
+
+
+def test_failed_authentication_not_cached(cache):
+    """测试认证失败的结果不缓存"""
+    calls = []
+
+    def auth(request):
+        calls.append(1)
+        return None
+
+    set_authentication_function(auth, deserialize=load_user)
+    client = TestClient(create_app())
+
+    assert client.get("/sync", headers={"Authorization": "bad"}).status_code == 401
+    assert client.get("/async", headers={"Authorization": "bad"}).status_code == 401
+    assert len(calls) == 2
+    assert len(cache.local) == 0
+
+
+def test_cache_disabled_and_explicit_auth_func(cache):
+    """测试缓存关闭时每次都认证，显式传入的认证函数不使用缓存"""
+    calls = []
+
+    def auth(request):
+        calls.append(1)
+        return User(1, "alice")
+
+    cache.enabled = False
+    set_authentication_function(auth, deserialize=load_user)
+    client = TestClient(create_app())
+    client.get("/sync", headers={"Authorization": "t"})
+    client.get("/sync", headers={"Authorization": "t"})
+    assert len(calls) == 2
+
+    cache.enabled = True
+    request = type("R", (), {"headers": {"authorization": "t"}})()
+    get_current_user(request, auth_func=auth)
+    get_current_user(request, auth_func=auth)
+    assert len(calls) == 4
+    assert len(cache.local) == 0
+
+
+def test_set_authentication_function_resets_deserialize(cache):
+    """测试更换认证函数且未提供还原函数时，不沿用上一个认证函数的还原函数"""
+    set_authentication_function(lambda request: User(1, "old"), deserialize=load_user)
+    assert cache.deserialize is load_user
+
+    set_authentication_function(lambda request: {"id": 2})
+    assert cache.deserialize is None
+    request = type("R", (), {"headers": {"authorization": "t"}})()
+    assert get_current_user(request) == {"id": 2}
+    assert len(cache.local) == 0
+
+
+def test_set_authentication_function_clears_cache(cache):
+    """测试更换认证函数时清空缓存"""
+    set_authentication_function(lambda request: User(1, "old"), deserialize=load_user)
+    client = TestClient(create_app())
+    client.get("/sync", headers={"Authorization": "t"})
+    assert len(cache.local) == 1
+
+    set_authentication_function(lambda request: User(2, "new"), deserialize=load_user)
+    assert len(cache.local) == 0
+    assert client.get("/sync", headers={"Authorization": "t"}).json() == {"id": 2}
+
+
+def test_async_auth_function(cache):
+    """测试 async 认证函数可用于同步和异步依赖"""
+    calls = []
+
+    async def auth(request):
+        await asyncio.sleep(0)
+        calls.append(1)
+        return User(5, "async")
+
+    set_authentication_function(auth, deserialize=load_user)
+    client = TestClient(create_app())
+
+    assert client.get("/async", headers={"Authorization": "t1"}).json() == {"id": 5}
+    assert client.get("/async", headers={"Authorization": "t1"}).json() == {"id": 5}
+    assert client.get("/sync", headers={"Authorization": "t2"}).json() == {"id": 5}
+    assert len(calls) == 2
+
+
+def test_async_dependency_runs_sync_auth_in_threadpool(cache):
+    """测试异步依赖在线程池中执行同步认证函数，不阻塞事件循环"""
+    in_event_loop = []
+
+    def auth(request):
+        try:
+            asyncio.get_running_loop()
+            in_event_loop.append(True)
+        except RuntimeError:
+            in_event_loop.append(False)
+        return User(1, "alice")
+
+    set_authentication_function(auth, deserialize=load_user)
+    client = TestClient(create_app())
+    client.get("/async", headers={"Authorization": "t"})
+
+    assert in_event_loop == [False]
+
+
+async def test_get_current_user_async_direct_call(cache):
+    """测试直接调用异步依赖"""
+    set_authentication_function(lambda request: {"id": 9}, deserialize=load_user)
+    request = type("R", (), {"headers": {"authorization": "t"}})()
+
+    assert await get_current_user_async(request) == {"id": 9}
+    assert cache.get("t").id == 9
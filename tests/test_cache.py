@@ -0,0 +1,395 @@
+"""
+响应缓存测试模块
+
+测试响应缓存功能，包括：
+- 内存 LRU 后端（过期、淘汰、标签失效）
+- 缓存键生成（查询参数顺序、认证主体）
+- cache_response 装饰器
+- single-flight 回源合并
+- Repository 写操作触发的标签失效
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.utils import cache as cache_module
+from app.utils.cache import (
+    MemoryCacheBackend,
+    ResponseCache,
+    cache_response,
+    create_cache_backend,
+    response_cache,
+)
+from app.repositories.base import BaseRepository
+from app.utils.response import success_response
+
+
+# ==================== 测试 Fixtures ====================
+
+@pytest.fixture
+def cache():
+    """创建独立的响应缓存实例"""
+    return ResponseCache(backend=MemoryCacheBackend(max_entries=16), default_ttl=60)
+
+
+@pytest.fixture
+def cached_app(cache):
+    """创建带缓存路由的测试应用，并记录路由实际执行次数"""
+    test_app = FastAPI()
+    calls = {"count": 0}
+
+    @test_app.get("/items")
+    @cache_response(tags=("items",), cache=cache)
+    async def list_items(page: int = 1):
+        calls["count"] += 1
+        return {"page": page, "count": calls["count"]}
+
+    return TestClient(test_app), calls
+
+
+# ==================== 内存后端测试 ====================
+
+def test_memory_backend_get_set():
+    """测试内存后端基本读写"""
+    backend = MemoryCacheBackend()
+    backend.set("k", {"v": 1}, ttl=60)
+
+    assert backend.get("k") == {"v": 1}
+    assert backend.get("missing") is None
+
+
+def test_memory_backend_ttl_expired():
+    """测试内存后端过期"""
+    backend = MemoryCacheBackend()
+    backend.set("k", "v", ttl=60)
+
+    # 模拟过期：直接修改过期时间
+    expires_at, value, tags = backend._data["k"]
+    backend._data["k"] = (time.monotonic() - 1, value, tags)
+
+    assert backend.get("k") is None
+    assert len(backend) == 0
+
+
+def test_memory_backend_lru_eviction():
+    """测试内存后端 LRU 淘汰"""
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+
+    # 访问 a，使 b 成为最久未使用
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+    assert backend.get("c") == 3
+
+
+def test_memory_backend_invalidate_tags():
+    """测试内存后端标签失效"""
+    backend = MemoryCacheBackend()
+    backend.set("u1", 1, ttl=60, tags=("users",))
+    backend.set("u2", 2, ttl=60, tags=("users", "admin"))
+    backend.set("o1", 3, ttl=60, tags=("orders",))
+
+    assert backend.invalidate_tags("users") == 2
+    assert backend.get("u1") is None
+    assert backend.get("u2") is None
+    assert backend.get("o1") == 3
+    # 被失效条目的其他标签索引也应被清理
+    assert "admin" not in backend._tag_index
+
+
+# ==================== 装饰器测试 ====================
+
+def test_cache_response_hit(cached_app, cache):
+    """测试相同请求命中缓存"""
+    client, calls = cached_app
+
+    first = client.get("/items?page=1").json()
+    second = client.get("/items?page=1").json()
+
+    assert first == second
+    assert calls["count"] == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_response_query_order(cached_app):
+    """测试查询参数顺序不影响缓存键"""
+    client, calls = cached_app
+
+    client.get("/items?page=2&x=1")
+    client.get("/items?x=1&page=2")
+
+    assert calls["count"] == 1
+
+
+def test_cache_response_vary_on_principal(cached_app):
+    """测试不同认证主体使用不同缓存"""
+    client, calls = cached_app
+
+    client.get("/items", headers={"Authorization": "Bearer a"})
+    client.get("/items", headers={"Authorization": "Bearer b"})
+    client.get("/items", headers={"Authorization": "Bearer a"})
+
+    assert calls["count"] == 2
+
+
+def test_cache_response_invalidate(cached_app, cache):
+    """测试标签失效后重新回源"""
+    client, calls = cached_app
+
+    client.get("/items")
+    cache.invalidate_tags("items")
+    client.get("/items")
+
+    assert calls["count"] == 2
+
+
+def test_cache_response_disabled(cached_app, cache):
+    """测试禁用缓存时每次都回源"""
+    client, calls = cached_app
+    cache.enabled = False
+
+    client.get("/items")
+    client.get("/items")
+
+    assert calls["count"] == 2
+
+
+def test_cache_response_keeps_query_params_in_openapi(cached_app):
+    """测试装饰器注入的 Request 参数不出现在接口文档中"""
+    client, _ = cached_app
+
+    schema = client.get("/openapi.json").json()
+    params = [p["name"] for p in schema["paths"]["/items"]["get"]["parameters"]]
+
+    assert params == ["page"]
+
+
+# ==================== single-flight 测试 ====================
+
+async def test_single_flight(cache):
+    """测试并发请求同一缓存键时只回源一次"""
+    calls = {"count": 0}
+
+    async def producer():
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"value": calls["count"]}
+
+    results = await asyncio.gather(*[
+        cache.get_or_set("key", producer) for _ in range(10)
+    ])
+
+    assert calls["count"] == 1
+    assert all(result == {"value": 1} for result in results)
+
+
+async def test_single_flight_error_not_cached(cache):
+    """测试回源异常时不写入缓存"""
+    async def failing_producer():
+        raise ValueError("回源失败")
+
+    with pytest.raises(ValueError):
+        await cache.get_or_set("key", failing_producer)
+
+    assert cache.backend.get("key") is None
+    assert cache._inflight == {}
+
+
+async def test_single_flight_leader_cancelled(cache):
+    """测试回源请求被取消时，等待者接替回源而不是收到 CancelledError"""
+    calls = {"count": 0}
+
+    async def producer():
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"value": calls["count"]}
+
+    leader = asyncio.ensure_future(cache.get_or_set("key", producer))
+    await asyncio.sleep(0)
+    waiters = [asyncio.ensure_future(cache.get_or_set("key", producer)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    results = await asyncio.gather(*waiters)
+
+    assert leader.cancelled()
+    assert calls["count"] == 2
+    assert all(result == {"value": 2} for result in results)
+    assert cache.backend.get("key") == {"value": 2}
+
+
+async def test_invalidate_during_produce_not_cached(cache):
+    """测试回源期间标签被失效时，结果不写入缓存（避免旧数据在失效后写回）"""
+    async def producer():
+        await asyncio.sleep(0.01)
+        # 模拟回源读取之后发生的写操作
+        cache.invalidate_tags("items")
+        return {"value": "stale"}
+
+    assert await cache.get_or_set("key", producer, tags=("items",)) == {"value": "stale"}
+    assert cache.backend.get("key") is None
+
+    async def fresh_producer():
+        return {"value": "fresh"}
+
+    await cache.get_or_set("key", fresh_producer, tags=("items",))
+    assert cache.backend.get("key") == {"value": "fresh"}
+
+
+def test_memory_backend_rejects_outdated_generations():
+    """测试标签代数变化后写入被拒绝"""
+    backend = MemoryCacheBackend()
+    generations = backend.tag_generations(("users",))
+    backend.invalidate_tags("users")
+
+    assert backend.set("k", 1, ttl=60, tags=("users",), generations=generations) is False
+    assert backend.get("k") is None
+    assert backend.set(
+        "k", 1, ttl=60, tags=("users",), generations=backend.tag_generations(("users",))
+    )
+    assert backend.get("k") == 1
+
+
+async def test_blocking_backend_runs_in_threadpool():
+    """测试阻塞型后端（Redis）在线程池中调用，不阻塞事件循环"""
+    threads = set()
+
+    class BlockingBackend(MemoryCacheBackend):
+        blocking = True
+
+        def get(self, key):
+            threads.add(threading.get_ident())
+            return super().get(key)
+
+    cache = ResponseCache(backend=BlockingBackend(), default_ttl=60)
+
+    async def producer():
+        return {"value": 1}
+
+    await cache.get_or_set("key", producer)
+    assert await cache.get_or_set("key", producer) == {"value": 1}
+    assert threads and threading.get_ident() not in threads
+
+
+def test_invalidate_nowait_runs_blocking_backend_in_background():
+    """测试阻塞型后端的失效在后台线程执行，内存后端直接失效"""
+    threads = set()
+
+    class BlockingBackend(MemoryCacheBackend):
+        blocking = True
+
+        def invalidate_tags(self, *tags):
+            threads.add(threading.get_ident())
+            return super().invalidate_tags(*tags)
+
+    backend = BlockingBackend()
+    cache = ResponseCache(backend=backend, default_ttl=60)
+    backend.set("k", 1, ttl=60, tags=("users",))
+
+    future = cache.invalidate_tags_nowait("users")
+    future.result(timeout=5)
+    assert backend.get("k") is None
+    assert threads and threading.get_ident() not in threads
+
+    memory = ResponseCache(backend=MemoryCacheBackend(), default_ttl=60)
+    memory.backend.set("k", 1, ttl=60, tags=("users",))
+    assert memory.invalidate_tags_nowait("users") is None
+    assert memory.backend.get("k") is None
+
+
+def test_background_invalidation_failure_is_logged():
+    """测试后台失效失败只记录日志，不抛出异常"""
+    class BrokenBackend(MemoryCacheBackend):
+        blocking = True
+
+        def invalidate_tags(self, *tags):
+            raise ConnectionError("Redis 不可用")
+
+    cache = ResponseCache(backend=BrokenBackend(), default_ttl=60)
+    assert cache.invalidate_tags_nowait("users").result(timeout=5) is None
+
+
+def test_memory_backend_warns_with_multiple_workers(monkeypatch, caplog):
+    """测试多进程部署启用内存缓存后端时记录警告"""
+    monkeypatch.setattr(cache_module.settings, "cache_enabled", True)
+    monkeypatch.setattr(cache_module.settings, "cache_backend", "memory")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    # 应用日志记录器可能不向根记录器传播，直接挂上捕获处理器
+    cache_module.logger.addHandler(caplog.handler)
+    caplog.set_level("WARNING", logger=cache_module.logger.name)
+    try:
+        assert isinstance(create_cache_backend(), MemoryCacheBackend)
+        assert "WEB_CONCURRENCY=4" in caplog.text
+
+        caplog.clear()
+        monkeypatch.setenv("WEB_CONCURRENCY", "1")
+        create_cache_backend()
+        assert caplog.text == ""
+    finally:
+        cache_module.logger.removeHandler(caplog.handler)
+
+
+def test_cache_response_refreshes_timestamp(cache):
+    """测试命中缓存时返回本次响应的 timestamp，数据来自缓存"""
+    test_app = FastAPI()
+    calls = {"count": 0}
+
+    @test_app.get("/wrapped")
+    @cache_response(cache=cache)
+    async def wrapped():
+        calls["count"] += 1
+        return success_response(data={"count": calls["count"]})
+
+    client = TestClient(test_app)
+    first = client.get("/wrapped").json()
+    time.sleep(0.01)
+    second = client.get("/wrapped").json()
+
+    assert calls["count"] == 1
+    assert second["data"] == first["data"]
+    assert second["timestamp"] > first["timestamp"]
+
+
+# ==================== Repository 失效测试 ====================
+
+def test_repository_write_invalidates_tag(monkeypatch):
+    """测试 Repository 写操作按表名失效缓存标签"""
+    invalidated = []
+    monkeypatch.setattr(
+        "app.repositories.base.invalidate_cache_tags_nowait",
+        lambda *tags: invalidated.extend(tags),
+    )
+
+    class FakeModel:
+        __tablename__ = "users"
+
+    repository = BaseRepository(FakeModel, db=None)
+    repository._invalidate_cache()
+
+    assert invalidated == ["users"]
+
+
+def test_global_response_cache_stats():
+    """测试全局响应缓存统计信息"""
+    stats = response_cache.stats()
+
+    assert "hits" in stats
+    assert "misses" in stats
+    assert "hit_rate" in stats
+    assert stats["backend"] in ["MemoryCacheBackend", "RedisCacheBackend"]
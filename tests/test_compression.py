@@ -0,0 +1,154 @@
+"""
+响应压缩中间件测试模块
+
+测试响应压缩功能，包括：
+- Accept-Encoding 协商
+- 最小压缩阈值
+- Content-Type 白名单
+- 流式响应压缩
+"""
+
+import sys
+import gzip
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.middleware.compression import CompressionMiddleware, parse_accept_encoding
+
+
+# ==================== 测试 Fixtures ====================
+
+LARGE_TEXT = "用户数据" * 1000
+
+
+@pytest.fixture
+def client():
+    """创建带压缩中间件的测试客户端"""
+    test_app = FastAPI()
+    test_app.add_middleware(CompressionMiddleware, minimum_size=500, encodings=["gzip"])
+
+    @test_app.get("/large")
+    async def large():
+        return {"items": [LARGE_TEXT]}
+
+    @test_app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @test_app.get("/binary")
+    async def binary():
+        return Response(content=b"\x00" * 5000, media_type="image/png")
+
+    @test_app.get("/stream")
+    async def stream():
+        async def generate():
+            for i in range(10):
+                yield f"chunk-{i}-".encode() * 100
+        return StreamingResponse(generate(), media_type="text/plain")
+
+    @test_app.get("/small-stream")
+    async def small_stream():
+        async def generate():
+            yield b"a"
+            yield b"b"
+        return StreamingResponse(generate(), media_type="text/plain")
+
+    @test_app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse(LARGE_TEXT, headers={"Content-Encoding": "identity"})
+
+    return TestClient(test_app)
+
+
+# ==================== Accept-Encoding 协商测试 ====================
+
+def test_parse_accept_encoding():
+    """测试 Accept-Encoding 解析"""
+    result = parse_accept_encoding("gzip;q=0.5, br, zstd;q=0")
+
+    assert result == {"gzip": 0.5, "br": 1.0, "zstd": 0.0}
+
+
+def test_select_encoding_respects_q_value():
+    """测试 q=0 的编码不会被选中"""
+    middleware = CompressionMiddleware(app=None, encodings=["gzip"])
+
+    assert middleware.select_encoding("gzip") == "gzip"
+    assert middleware.select_encoding("gzip;q=0") is None
+    assert middleware.select_encoding("*") == "gzip"
+    assert middleware.select_encoding("identity") is None
+    assert middleware.select_encoding("") is None
+
+
+# ==================== 压缩行为测试 ====================
+
+def test_large_response_compressed(client):
+    """测试超过阈值的响应被压缩"""
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # TestClient 会自动解压
+    assert response.json() == {"items": [LARGE_TEXT]}
+    assert int(response.headers["content-length"]) < len(LARGE_TEXT.encode())
+
+
+def test_no_accept_encoding_not_compressed(client):
+    """测试客户端不支持压缩时不压缩"""
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"items": [LARGE_TEXT]}
+
+
+def test_small_response_not_compressed(client):
+    """测试小于阈值的响应不压缩"""
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+
+def test_content_type_not_in_allowlist(client):
+    """测试不在白名单中的 Content-Type 不压缩"""
+    response = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert len(response.content) == 5000
+
+
+def test_already_encoded_response_passthrough(client):
+    """测试已设置 Content-Encoding 的响应不重复压缩"""
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "identity"
+
+
+# ==================== 流式响应测试 ====================
+
+def test_streaming_response_compressed(client):
+    """测试流式响应逐块压缩"""
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    expected = b"".join(f"chunk-{i}-".encode() * 100 for i in range(10))
+    assert gzip.decompress(raw) == expected
+
+
+def test_small_streaming_response_not_compressed(client):
+    """测试总大小低于阈值的流式响应不压缩"""
+    response = client.get("/small-stream", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == b"ab"
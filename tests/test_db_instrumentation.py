@@ -0,0 +1,229 @@
+"""
+SQL 查询监控测试模块
+
+测试 SQL 查询监控功能，包括：
+- 语句指纹
+- 按指纹聚合统计
+- 慢查询日志和 EXPLAIN 捕获
+- 请求级查询计数与 N+1 检测
+- 管理后台查询统计接口
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.db.instrumentation import QueryMonitor, fingerprint, instrument_engine, query_monitor
+from app.utils.context import request_context
+
+
+# ==================== 测试 Fixtures ====================
+
+@pytest.fixture
+def monitor():
+    """创建独立的查询统计器"""
+    return QueryMonitor(slow_query_ms=10_000, n_plus_one_threshold=3)
+
+
+@pytest.fixture
+def engine(monitor):
+    """创建带查询监控的 SQLite 内存引擎"""
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine, monitor=monitor, metrics=False)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b')"))
+    monitor.reset()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def captured_logs(caplog):
+    """直接捕获查询监控日志（应用日志记录器可能不向根记录器传播）"""
+    instrumentation_logger = logging.getLogger("app.db.instrumentation")
+    instrumentation_logger.addHandler(caplog.handler)
+    caplog.set_level(logging.WARNING, logger="app.db.instrumentation")
+    yield caplog
+    instrumentation_logger.removeHandler(caplog.handler)
+
+
+# ==================== 语句指纹测试 ====================
+
+def test_fingerprint_normalizes_literals():
+    """测试字面量、占位符和 IN 列表被归一化"""
+    assert fingerprint("SELECT * FROM users WHERE id IN (1, 2, 3) AND name = 'a'") == (
+        "SELECT * FROM users WHERE id IN (...) AND name = ?"
+    )
+    assert fingerprint("SELECT *\n  FROM users WHERE id = %(id_1)s") == (
+        fingerprint("SELECT * FROM users WHERE id = :id")
+    )
+    # 标识符中的数字保持不变
+    assert (
+        fingerprint("SELECT t1.id FROM users_2 t1 LIMIT 10")
+        == "SELECT t1.id FROM users_2 t1 LIMIT ?"
+    )
+
+
+def test_fingerprint_ignores_comments():
+    """测试注释被去除"""
+    assert fingerprint("/* app */ SELECT 1 -- trailing") == "SELECT ?"
+
+
+# ==================== 查询统计测试 ====================
+
+def test_monitor_aggregates_by_fingerprint(engine, monitor):
+    """测试同一类查询按指纹聚合"""
+    with engine.connect() as conn:
+        for item_id in (1, 2, 1):
+            conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+        conn.execute(text("SELECT COUNT(*) FROM items"))
+
+    summary = monitor.summary(order_by="count")
+    assert summary["total_queries"] == 4
+    assert summary["fingerprints"] == 2
+    top = summary["top_queries"][0]
+    assert top["fingerprint"] == "SELECT name FROM items WHERE id = ?"
+    assert top["count"] == 3
+
+    monitor.reset()
+    assert monitor.summary()["total_queries"] == 0
+
+
+def test_monitor_limits_fingerprints():
+    """测试超过指纹数量上限后聚合到 <other>"""
+    monitor = QueryMonitor(max_fingerprints=2)
+    for table in ("a", "b", "c", "d"):
+        monitor.record(f"SELECT * FROM {table}", 0.001)
+
+    summary = monitor.summary()
+    assert summary["fingerprints"] == 3
+    fingerprints = {row["fingerprint"] for row in summary["top_queries"]}
+    assert QueryMonitor.OTHER_FINGERPRINT in fingerprints
+
+
+# ==================== 慢查询测试 ====================
+
+def test_slow_query_logged_with_explain(engine, monitor, captured_logs):
+    """测试慢查询被记录并捕获 EXPLAIN 执行计划"""
+    monitor.configure(slow_query_ms=0, explain_slow_queries=True, slow_query_log_size=5)
+
+    with request_context(request_id="req-slow"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 1})
+
+    slow = monitor.summary()["slow_queries"][0]
+    assert slow["fingerprint"] == "SELECT name FROM items WHERE id = ?"
+    assert slow["request_id"] == "req-slow"
+    assert slow["explain"]
+    assert any("慢查询" in record.getMessage() for record in captured_logs.records)
+
+
+def test_slow_query_does_not_store_parameters(engine, monitor):
+    """测试慢查询只记录语句文本，不记录参数值"""
+    monitor.configure(slow_query_ms=0)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT id FROM items WHERE name = :name"), {"name": "secret-token"})
+
+    slow = monitor.summary()["slow_queries"][0]
+    assert "parameters" not in slow
+    assert "secret-token" not in repr(slow)
+
+
+def test_explain_keeps_caller_transaction(engine, monitor):
+    """测试 EXPLAIN 在保存点中执行，不提交也不破坏调用方的事务"""
+    monitor.configure(slow_query_ms=0, explain_slow_queries=True)
+
+    with engine.connect() as conn:
+        conn.execute(text("INSERT INTO items (id, name) VALUES (3, 'c')"))
+        conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 3})
+        assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 3
+        conn.rollback()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM items")).scalar() == 2
+    slow_queries = {slow["fingerprint"]: slow for slow in monitor.summary()["slow_queries"]}
+    assert slow_queries["SELECT name FROM items WHERE id = ?"]["explain"]
+    # EXPLAIN 和保存点语句不计入统计
+    assert monitor.summary()["total_queries"] == 4
+
+
+def test_monitoring_disabled_only_times_queries():
+    """测试关闭查询统计时只记录耗时，不做指纹统计"""
+    monitor = QueryMonitor(slow_query_ms=0)
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine, monitor=monitor, metrics=False, monitoring=False)
+
+    with request_context() as context:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    assert context.timings["db"] > 0
+    assert context.query_count == 0
+    assert monitor.summary()["total_queries"] == 0
+    engine.dispose()
+
+
+def test_slow_query_log_is_bounded(engine, monitor):
+    """测试慢查询列表有长度上限"""
+    monitor.configure(slow_query_ms=0, slow_query_log_size=2)
+
+    with engine.connect() as conn:
+        for _ in range(5):
+            conn.execute(text("SELECT 1"))
+
+    assert len(monitor.summary()["slow_queries"]) == 2
+
+
+# ==================== N+1 检测测试 ====================
+
+def test_request_query_count_and_n_plus_one(engine, monitor, captured_logs):
+    """测试请求级查询计数，同一指纹达到阈值时只告警一次"""
+    with request_context() as context:
+        with engine.connect() as conn:
+            for item_id in range(5):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+
+    assert context.query_count == 5
+    assert context.timings["db"] > 0
+    assert monitor.summary()["n_plus_one_warnings"] == 1
+    assert sum("N+1" in record.getMessage() for record in captured_logs.records) == 1
+
+
+def test_no_request_context_skips_n_plus_one(engine, monitor):
+    """测试请求上下文之外的查询不参与 N+1 检测"""
+    with engine.connect() as conn:
+        for item_id in range(5):
+            conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": item_id})
+
+    assert monitor.summary()["n_plus_one_warnings"] == 0
+
+
+# ==================== 管理后台接口测试 ====================
+
+def test_admin_query_stats_endpoint():
+    """测试管理后台查询统计接口"""
+    from app.main import app
+
+    query_monitor.reset()
+    query_monitor.record("SELECT * FROM users WHERE id = 1", 0.002)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/admin/db/queries", params={"limit": 5, "order_by": "count"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["total_queries"] == 1
+    assert data["top_queries"][0]["fingerprint"] == "SELECT * FROM users WHERE id = ?"
+
+    response = client.delete("/api/v1/admin/db/queries")
+    assert response.status_code == 200
+    assert query_monitor.summary()["total_queries"] == 0
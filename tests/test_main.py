@@ -340,6 +340,27 @@ def test_response_format_version(client):
     assert isinstance(data["timestamp"], str)
 
 
+# ==================== 用户接口路由测试 ====================
+
+def test_users_search_route_not_shadowed(db_client, sample_users_data):
+    """测试 /users/search 不会被 /users/{user_id} 匹配（回归：曾返回 422）"""
+    for data in sample_users_data:
+        db_client.post("/api/v1/users/", json=data)
+
+    response = db_client.get("/api/v1/users/search", params={"keyword": "user2"})
+
+    assert response.status_code == 200
+    assert [user["email"] for user in response.json()["data"]["items"]] == ["user2@example.com"]
+
+
+def test_users_id_route_only_matches_integers(db_client, sample_user_data):
+    """测试用户 ID 路由只匹配整数，其他路径返回 404"""
+    user_id = db_client.post("/api/v1/users/", json=sample_user_data).json()["data"]["id"]
+
+    assert db_client.get(f"/api/v1/users/{user_id}").status_code == 200
+    assert db_client.get("/api/v1/users/not-a-number").status_code == 404
+
+
 # ==================== 集成测试 ====================
 
 def test_app_startup_and_shutdown():
@@ -0,0 +1,213 @@
+"""
+性能指标测试模块
+
+测试 Prometheus 指标功能，包括：
+- 路由模板标签
+- HTTP 指标中间件
+- /metrics 接口
+- SQL 执行指标
+- WebSocket 连接数指标
+- Celery 任务指标
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.db.instrumentation import QueryMonitor, instrument_engine
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.metrics import route_template
+from app.websocket.manager import ConnectionManager
+
+
+def sample(name: str, **labels) -> float:
+    """读取指标当前值（不存在时为 0）"""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+# ==================== 路由模板测试 ====================
+
+def test_route_template_uses_route_path():
+    """测试使用路由声明的路径，而不是请求的实际路径"""
+    scope = {
+        "path": "/api/v1/users/42",
+        "root_path": "",
+        "route": SimpleNamespace(path="/api/v1/users/{user_id}"),
+        "path_params": {"user_id": 42},
+    }
+
+    assert route_template(scope) == "/api/v1/users/{user_id}"
+
+
+def test_route_template_mount_excludes_app_root_path():
+    """测试挂载路径不重复计入应用自身的 root_path"""
+    scope = {
+        "path": "/prefix/static/js/app.js",
+        "root_path": "/prefix/static",
+        "app_root_path": "/prefix",
+        "endpoint": object(),
+    }
+
+    assert route_template(scope) == "/static/{path}"
+
+
+def test_route_template_unmatched():
+    """测试未匹配路由时使用固定标签，避免基数爆炸"""
+    assert route_template({"path": "/random/path/123"}) == "unmatched"
+
+
+# ==================== HTTP 指标测试 ====================
+
+def test_metrics_middleware_records_route():
+    """测试中间件按路由模板记录请求数和耗时"""
+    test_app = FastAPI()
+    test_app.add_middleware(MetricsMiddleware)
+
+    @test_app.get("/metrics-test/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id}
+
+    client = TestClient(test_app)
+    route = "/metrics-test/items/{item_id}"
+    before = sample("http_requests_total", method="GET", route=route, status="200")
+
+    client.get("/metrics-test/items/1")
+    client.get("/metrics-test/items/2")
+
+    assert sample("http_requests_total", method="GET", route=route, status="200") == before + 2
+    assert sample("http_request_duration_seconds_count", method="GET", route=route) >= 2
+    assert sample("http_requests_in_progress", method="GET") == 0
+
+
+def test_metrics_middleware_mount_label_is_bounded(tmp_path):
+    """测试挂载的静态文件和子应用使用挂载路径作为标签，随机路径不会产生新标签"""
+    (tmp_path / "app.js").write_text("console.log(1)")
+    sub_app = FastAPI()
+
+    @sub_app.get("/items/{item_id}")
+    async def get_sub_item(item_id: int):
+        return {"item_id": item_id}
+
+    test_app = FastAPI()
+    test_app.add_middleware(MetricsMiddleware)
+    test_app.mount("/metrics-static", StaticFiles(directory=tmp_path), name="metrics-static")
+    test_app.mount("/metrics-sub", sub_app)
+    client = TestClient(test_app)
+    static_route = "/metrics-static/{path}"
+    before_found = sample("http_requests_total", method="GET", route=static_route, status="200")
+    before_missing = sample("http_requests_total", method="GET", route=static_route, status="404")
+
+    client.get("/metrics-static/app.js")
+    for index in range(5):
+        client.get(f"/metrics-static/nonexistent{index}.js")
+    client.get("/metrics-sub/items/7")
+    client.get("/no-such-route/1")
+
+    assert (
+        sample("http_requests_total", method="GET", route=static_route, status="200")
+        == before_found + 1
+    )
+    assert (
+        sample("http_requests_total", method="GET", route=static_route, status="404")
+        == before_missing + 5
+    )
+    item_route = "/metrics-sub/items/{item_id}"
+    assert sample("http_requests_total", method="GET", route=item_route, status="200") >= 1
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    labels = {
+        sample_.labels["route"]
+        for metric in REGISTRY.collect()
+        if metric.name == "http_requests"
+        for sample_ in metric.samples
+        if "route" in sample_.labels
+    }
+    assert not any("nonexistent" in label for label in labels)
+
+
+def test_metrics_endpoint(client):
+    """测试 /metrics 接口输出 Prometheus 文本格式"""
+    client.get("/version")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/version",status="200"}' in body
+    assert "websocket_connections" in body
+
+
+# ==================== 数据库指标测试 ====================
+
+def test_instrument_engine_counts_queries():
+    """测试 SQL 执行次数和耗时指标"""
+    engine = create_engine("sqlite:///:memory:")
+    monitor = QueryMonitor()
+    instrument_engine(engine, monitor=monitor)
+    # 重复注册不会重复计数
+    instrument_engine(engine, monitor=monitor)
+    before = sample("db_queries_total", operation="SELECT")
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    assert sample("db_queries_total", operation="SELECT") == before + 2
+    assert sample("db_query_duration_seconds_count", operation="SELECT") >= 2
+
+
+# ==================== WebSocket 指标测试 ====================
+
+async def test_websocket_gauges():
+    """测试 WebSocket 连接数指标随连接注册和注销更新"""
+    manager = ConnectionManager()
+    ws1 = MagicMock()
+    ws1.accept = AsyncMock()
+    ws2 = MagicMock()
+    ws2.accept = AsyncMock()
+
+    await manager.connect(ws1, "user_a")
+    await manager.connect(ws2, "user_a")
+    assert sample("websocket_connections") == 2
+    assert sample("websocket_connected_users") == 1
+
+    manager.disconnect(ws1)
+    manager.disconnect(ws2)
+    assert sample("websocket_connections") == 0
+    assert sample("websocket_connected_users") == 0
+
+
+# ==================== Celery 指标测试 ====================
+
+@pytest.mark.integration
+def test_celery_task_metrics():
+    """测试 Celery 任务信号更新任务指标（使用 EAGER 模式）"""
+    from app.tasks.celery_app import celery_app
+    from app.tasks.examples import simple_task
+
+    original_backend = celery_app.conf.result_backend
+    celery_app.conf.result_backend = None
+    celery_app.conf.task_always_eager = True
+    celery_app.conf.task_eager_propagates = True
+
+    try:
+        before = sample("celery_tasks_total", task=simple_task.name, state="success")
+        simple_task.delay("metrics")
+
+        assert sample("celery_tasks_total", task=simple_task.name, state="success") == before + 1
+        assert sample("celery_task_duration_seconds_count", task=simple_task.name) >= 1
+    finally:
+        celery_app.conf.task_always_eager = False
+        celery_app.conf.task_eager_propagates = False
+        celery_app.conf.result_backend = original_backend
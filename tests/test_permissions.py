@@ -0,0 +1,187 @@
+"""
+权限引擎测试模块
+
+测试 PermissionEngine，包括：
+- 权限字符串解析和通配符匹配
+- 多角色有效权限、按用户缓存和失效
+- 批量检查 / 过滤
+- 与 require_permission / create_permission_dependency 的集成
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.dependencies import (
+    create_permission_dependency,
+    get_current_user,
+    get_permission_check_function,
+    require_permission,
+    set_permission_check_function,
+)
+from app.main import app_exception_handler
+from app.utils.exceptions import BaseAppException, ForbiddenError
+from app.utils.permissions import PermissionEngine, has_permission, parse_permission
+
+
+ROLES = {
+    "admin": ["*"],
+    "editor": ["user:read", "user:update", "post:*"],
+    "viewer": ["*:read"],
+}
+
+
+# ==================== 测试 Fixtures ====================
+
+@pytest.fixture
+def engine():
+    """创建带测试角色的权限引擎"""
+    return PermissionEngine(roles=ROLES, ttl=60)
+
+
+@pytest.fixture
+def installed(engine):
+    """将权限引擎设置为全局权限检查函数，测试结束后恢复"""
+    original = get_permission_check_function()
+    set_permission_check_function(engine.as_check_function())
+    yield engine
+    set_permission_check_function(original)
+
+
+# ==================== 解析与匹配测试 ====================
+
+def test_parse_permission():
+    """测试权限字符串解析"""
+    assert parse_permission("user:read") == ("user", "read")
+    assert parse_permission("*") == ("*", "*")
+    for invalid in ("user", "user:", ":read"):
+        with pytest.raises(ValueError):
+            parse_permission(invalid)
+
+
+def test_wildcard_matching(engine):
+    """测试通配符匹配"""
+    editor = engine.get_role("editor")
+    assert has_permission(editor, "post", "delete")
+    assert has_permission(editor, "user", "read")
+    assert not has_permission(editor, "user", "delete")
+    assert not has_permission(editor, "user", None), "action 为 None 需要 user:* 权限"
+
+    viewer = engine.get_role("viewer")
+    assert has_permission(viewer, "billing", "read")
+    assert not has_permission(viewer, "billing", "update")
+
+    assert has_permission(engine.get_role("admin"), None, None)
+
+
+# ==================== 有效权限与缓存测试 ====================
+
+def test_multiple_roles_union(engine):
+    """测试多个角色的权限取并集"""
+    user = {"id": 1, "roles": ["editor", "viewer", "unknown"]}
+    assert engine.check(user, "billing", "read")
+    assert engine.check(user, "post", "publish")
+    assert not engine.check(user, "billing", "update")
+
+
+def test_effective_permissions_cached_per_user(engine):
+    """测试有效权限按用户缓存，角色获取函数只调用一次"""
+    calls = []
+
+    def role_getter(user):
+        calls.append(user["id"])
+        return ["editor"]
+
+    engine.role_getter = role_getter
+    user = {"id": 1}
+    for _ in range(5):
+        assert engine.check(user, "user", "read")
+    assert calls == [1]
+    assert engine.stats()["hits"] == 4
+
+    engine.invalidate_user(1)
+    engine.check(user, "user", "read")
+    assert calls == [1, 1]
+
+
+def test_role_update_invalidates_holders(engine):
+    """测试更新角色定义只失效持有该角色的用户"""
+    editor = {"id": 1, "role": "editor"}
+    viewer = {"id": 2, "role": "viewer"}
+    assert not engine.check(editor, "user", "delete")
+    engine.check(viewer, "user", "read")
+
+    engine.set_role("editor", ["user:*"])
+    assert engine.check(editor, "user", "delete")
+    assert engine.stats()["cached_users"] == 2
+
+    engine.remove_role("editor")
+    assert not engine.check(editor, "user", "read")
+
+
+def test_users_without_id_not_cached(engine):
+    """测试没有 ID 的用户不缓存"""
+    assert engine.check({"role": "admin"}, "anything", "delete")
+    assert engine.stats()["cached_users"] == 0
+
+
+# ==================== 批量检查测试 ====================
+
+def test_filter_and_check_many(engine):
+    """测试批量过滤和批量检查"""
+    editor = {"id": 1, "role": "editor"}
+    resources = ["user", "post", "billing"]
+
+    assert engine.filter(editor, resources, action="update") == ["user", "post"]
+    assert engine.filter({"id": 2, "role": "viewer"}, resources, action="read") == resources
+    assert engine.filter({"id": 3, "role": "admin"}, resources, action="delete") == resources
+
+    documents = [{"type": "post"}, {"type": "billing"}]
+    assert engine.filter(
+        editor, documents, action="delete", resource_getter=lambda d: d["type"]
+    ) == [{"type": "post"}]
+
+    assert engine.check_many(editor, [("user", "read"), ("user", "delete"), ("post", "x")]) == [
+        True, False, True
+    ]
+
+
+# ==================== 依赖集成测试 ====================
+
+def test_require_permission_with_engine(installed):
+    """测试 require_permission 使用权限引擎"""
+    editor = {"id": 1, "role": "editor"}
+    assert require_permission(resource="user", action="update", user=editor) is editor
+    with pytest.raises(ForbiddenError):
+        require_permission(resource="user", action="delete", user=editor)
+
+
+def test_create_permission_dependency_is_cached(installed):
+    """测试相同权限的依赖函数只创建一次，并在路由中正常工作"""
+    dependency = create_permission_dependency(resource="post", action="delete")
+    assert create_permission_dependency(resource="post", action="delete") is dependency
+    assert create_permission_dependency(resource="post", action="read") is not dependency
+
+    test_app = FastAPI()
+    test_app.add_exception_handler(BaseAppException, app_exception_handler)
+    users = {"editor": {"id": 1, "role": "editor"}, "viewer": {"id": 2, "role": "viewer"}}
+
+    def current_user(role: str = "viewer"):
+        return users[role]
+
+    @test_app.delete("/posts")
+    def delete_post(user=Depends(dependency)):
+        return {"id": user["id"]}
+
+    test_app.dependency_overrides[get_current_user] = current_user
+    client = TestClient(test_app)
+
+    assert client.delete("/posts", params={"role": "editor"}).status_code == 200
+    assert client.delete("/posts", params={"role": "viewer"}).status_code == 403
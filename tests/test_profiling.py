@@ -0,0 +1,206 @@
+"""
+性能剖析测试模块
+
+测试按请求性能剖析功能，包括：
+- 请求头 / 查询参数开启剖析
+- 授权检查（认证函数和权限检查函数）
+- 随机采样
+- 数据库耗时与 Python 耗时拆分
+- 剖析结果存储和管理后台接口
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.db.instrumentation import QueryMonitor, instrument_engine
+from app.dependencies import (
+    get_authentication_function,
+    get_permission_check_function,
+    set_authentication_function,
+    set_permission_check_function,
+)
+from app.middleware.profiling import ProfilingMiddleware, authorize_profiling
+from app.middleware.request_context import RequestContextMiddleware
+from app.utils.profiling import ProfileStore, profile_store, time_breakdown
+
+
+# ==================== 测试 Fixtures ====================
+
+def slow_python_work() -> int:
+    """被剖析的业务函数"""
+    return sum(i * i for i in range(20000))
+
+
+@pytest.fixture
+def store():
+    """创建独立的剖析结果存储"""
+    return ProfileStore(max_profiles=3)
+
+
+def create_app(store: ProfileStore, **kwargs) -> FastAPI:
+    """创建带剖析中间件的测试应用，请求头 X-Admin: 1 视为已授权"""
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine, monitor=QueryMonitor(), metrics=False)
+
+    test_app = FastAPI()
+    kwargs.setdefault("authorize", lambda request: request.headers.get("X-Admin") == "1")
+    test_app.add_middleware(ProfilingMiddleware, store=store, **kwargs)
+    test_app.add_middleware(RequestContextMiddleware)
+
+    @test_app.get("/work")
+    async def work():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"result": slow_python_work()}
+
+    return test_app
+
+
+# ==================== 开启剖析测试 ====================
+
+def test_request_not_profiled_by_default(store):
+    """测试未开启剖析的请求不受影响"""
+    client = TestClient(create_app(store))
+
+    response = client.get("/work")
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert "Server-Timing" not in response.headers
+    assert store.list() == []
+
+
+def test_profile_requested_by_header(store):
+    """测试请求头开启剖析，返回剖析 ID 和耗时拆分"""
+    client = TestClient(create_app(store))
+
+    response = client.get("/work", headers={"X-Profile": "1", "X-Admin": "1"})
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert "db;dur=" in response.headers["Server-Timing"]
+
+    meta = store.get(profile_id)
+    assert meta["path"] == "/work"
+    assert meta["status"] == 200
+    assert meta["db_queries"] == 1
+    assert meta["db_ms"] > 0
+    assert meta["request_id"] == response.headers["X-Request-ID"]
+    assert not meta["sampled"]
+    assert "slow_python_work" in store.report(profile_id, sort="cumulative", limit=100)
+
+
+def test_profile_requested_by_query_param(store):
+    """测试查询参数开启剖析"""
+    client = TestClient(create_app(store))
+
+    response = client.get("/work?profile=true", headers={"X-Admin": "1"})
+
+    assert "X-Profile-Id" in response.headers
+
+
+def test_unauthorized_profile_request_ignored(store):
+    """测试未授权的剖析请求正常处理但不剖析"""
+    client = TestClient(create_app(store))
+
+    response = client.get("/work", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert store.list() == []
+
+
+def test_sampled_profile_not_exposed(store):
+    """测试采样剖析的结果只保存在服务端"""
+    client = TestClient(create_app(store, sample_rate=1.0))
+
+    response = client.get("/work")
+
+    assert "X-Profile-Id" not in response.headers
+    assert store.list()[0]["sampled"] is True
+
+
+# ==================== 授权检查测试 ====================
+
+def test_authorize_profiling_uses_auth_hooks():
+    """测试默认授权检查使用认证函数和权限检查函数"""
+    original_auth = get_authentication_function()
+    original_check = get_permission_check_function()
+    try:
+        set_authentication_function(
+            lambda request: {"id": 1, "role": request.headers.get("X-Role")}
+        )
+        set_permission_check_function(
+            lambda user, resource, action: resource == "profiling" and user["role"] == "admin"
+        )
+        store = ProfileStore()
+        client = TestClient(create_app(store, authorize=authorize_profiling))
+
+        admin_response = client.get("/work", headers={"X-Profile": "1", "X-Role": "admin"})
+        user_response = client.get("/work", headers={"X-Profile": "1", "X-Role": "user"})
+        assert "X-Profile-Id" in admin_response.headers
+        assert "X-Profile-Id" not in user_response.headers
+    finally:
+        set_authentication_function(original_auth)
+        set_permission_check_function(original_check)
+
+
+# ==================== 存储测试 ====================
+
+def test_store_evicts_oldest_and_writes_files(store, tmp_path):
+    """测试剖析结果数量上限和 .prof 文件写入"""
+    store.storage_dir = str(tmp_path)
+    client = TestClient(create_app(store))
+
+    ids = [
+        client.get("/work", headers={"X-Profile": "1", "X-Admin": "1"}).headers["X-Profile-Id"]
+        for _ in range(4)
+    ]
+
+    assert [meta["id"] for meta in store.list()] == list(reversed(ids[1:]))
+    assert store.get(ids[0]) is None
+    assert (tmp_path / f"{ids[-1]}.prof").exists()
+
+
+def test_time_breakdown():
+    """测试数据库耗时与 Python 耗时拆分"""
+    assert time_breakdown(0.1, {"db": 0.03}) == {
+        "total_ms": 100.0,
+        "db_ms": 30.0,
+        "python_ms": 70.0,
+    }
+    assert time_breakdown(0.01, {})["db_ms"] == 0.0
+
+
+# ==================== 管理后台接口测试 ====================
+
+def test_admin_profile_endpoints():
+    """测试管理后台剖析结果接口"""
+    from app.main import app
+
+    profile_store.clear()
+    client = TestClient(create_app(profile_store))
+    response = client.get("/work", headers={"X-Profile": "1", "X-Admin": "1"})
+    profile_id = response.headers["X-Profile-Id"]
+    admin_client = TestClient(app)
+
+    response = admin_client.get("/api/v1/admin/profiles")
+    assert response.json()["data"][0]["id"] == profile_id
+
+    response = admin_client.get(f"/api/v1/admin/profiles/{profile_id}", params={"limit": 5})
+    assert response.status_code == 200
+    assert "function calls" in response.json()["data"]["report"]
+
+    assert admin_client.get("/api/v1/admin/profiles/prof_missing").status_code == 404
+
+    admin_client.delete("/api/v1/admin/profiles")
+    assert profile_store.list() == []
@@ -0,0 +1,90 @@
+"""
+SQL 查询次数测试模块
+
+锁定用户接口执行的 SQL 语句数量上限，包括：
+- 用户列表（分页）
+- 创建 / 获取 / 更新 / 删除用户
+- 搜索用户
+
+查询次数增加（N+1 查询、多余的 refresh 往返）时测试失败。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+# ==================== 测试 Fixtures ====================
+
+@pytest.fixture
+def created_users(db_client, sample_users_data):
+    """通过接口创建示例用户，返回用户 ID 列表"""
+    return [
+        db_client.post("/api/v1/users/", json=data).json()["data"]["id"]
+        for data in sample_users_data
+    ]
+
+
+# ==================== 查询次数测试 ====================
+
+def test_list_users_query_count(db_client, created_users, assert_max_queries):
+    """测试用户列表最多 2 条 SQL（count + 分页查询），与每页数量无关"""
+    with assert_max_queries(2):
+        response = db_client.get("/api/v1/users/", params={"page_size": 100})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["total"] == len(created_users)
+
+
+def test_create_user_query_count(db_client, sample_user_data, assert_max_queries):
+    """测试创建用户最多 3 条 SQL（邮箱查重 + INSERT + 刷新）"""
+    with assert_max_queries(3):
+        response = db_client.post("/api/v1/users/", json=sample_user_data)
+
+    assert response.status_code == 201
+
+
+def test_get_user_query_count(db_client, created_users, assert_max_queries):
+    """测试获取用户只执行 1 条 SQL"""
+    with assert_max_queries(1):
+        response = db_client.get(f"/api/v1/users/{created_users[0]}")
+
+    assert response.status_code == 200
+
+
+def test_update_user_query_count(db_client, created_users, assert_max_queries):
+    """测试更新用户最多 4 条 SQL"""
+    with assert_max_queries(4):
+        response = db_client.put(f"/api/v1/users/{created_users[0]}", json={"age": 40})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["age"] == 40
+
+
+def test_delete_user_query_count(db_client, created_users, assert_max_queries):
+    """测试删除用户最多 3 条 SQL"""
+    with assert_max_queries(3):
+        response = db_client.delete(f"/api/v1/users/{created_users[0]}")
+
+    assert response.status_code == 200
+
+
+def test_search_users_query_count(db_client, created_users, assert_max_queries):
+    """测试搜索用户最多 2 条 SQL（count + 分页查询）"""
+    with assert_max_queries(2):
+        response = db_client.get("/api/v1/users/search", params={"keyword": "user"})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["total"] == len(created_users)
+
+
+def test_assert_max_queries_reports_statements(db_client, created_users, assert_max_queries):
+    """测试超过上限时断言失败并列出执行的 SQL"""
+    with pytest.raises(AssertionError, match="超过上限 0"):
+        with assert_max_queries(0):
+            db_client.get("/api/v1/users/")
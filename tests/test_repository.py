@@ -15,7 +15,7 @@ from typing import Optional
 
 import pytest
 from sqlalchemy import Column, String, Integer, Boolean
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import IntegrityError
 
 # 将项目根目录添加到 Python 路径
@@ -30,6 +30,7 @@ from app.repositories.base import (
     PaginationParams,
     PaginationResult,
 )
+from app.repositories.user_repository import UserRepository as AppUserRepository
 
 
 # ==================== 测试模型 ====================
@@ -675,6 +676,59 @@ def test_repository_full_workflow(repository: UserRepository):
     assert repository.get_count() == 1
 
 
+# ==================== 用户 Repository 测试 ====================
+
+@pytest.fixture
+def app_user_repository(test_engine):
+    """创建绑定 SQLite 测试引擎的业务用户 Repository，测试结束后清空用户表"""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    db = TestingSessionLocal()
+    repository = AppUserRepository(db)
+    repository.create_many([
+        {"name": "张三", "email": "zhangsan@example.com", "is_active": True},
+        {"name": "李四", "email": "lisi@example.com", "is_active": False},
+        {"name": "王五", "email": "wangwu@test.org", "is_active": True},
+    ])
+    try:
+        yield repository
+    finally:
+        db.rollback()
+        db.query(repository.model).delete()
+        db.commit()
+        db.close()
+
+
+def test_user_repository_get_by_email(app_user_repository: AppUserRepository):
+    """测试按邮箱查询用户（回归：曾向 filter_one 传入位置参数而报错）"""
+    user = app_user_repository.get_by_email("lisi@example.com")
+    assert user is not None
+    assert user.name == "李四"
+    assert app_user_repository.get_by_email("nobody@example.com") is None
+
+
+def test_user_repository_search_users(app_user_repository: AppUserRepository):
+    """测试按姓名或邮箱搜索用户并分页（回归：曾调用基类不支持的参数而报错）"""
+    result = app_user_repository.search_users("example.com", page=1, page_size=1)
+    assert result.total == 2
+    assert [user.name for user in result.items] == ["张三"]
+    assert result.has_next is True
+
+    result = app_user_repository.search_users("王五")
+    assert [user.email for user in result.items] == ["wangwu@test.org"]
+
+
+def test_user_repository_paginate_active_users(app_user_repository: AppUserRepository):
+    """测试分页查询激活用户，支持按字段排序（回归：曾调用基类不支持的参数而报错）"""
+    result = app_user_repository.paginate_active_users(page=1, page_size=10, order_by="name")
+    assert result.total == 2
+    assert {user.name for user in result.items} == {"张三", "王五"}
+    assert all(user.is_active for user in result.items)
+
+    result = app_user_repository.paginate_active_users(page=2, page_size=1)
+    assert result.total == 2
+    assert len(result.items) == 1
+
+
 # ==================== 运行所有测试 ====================
 
 def run_all_tests():
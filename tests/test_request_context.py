@@ -0,0 +1,155 @@
+"""
+请求上下文测试模块
+
+测试请求上下文功能，包括：
+- 请求 ID 生成、接收与回传
+- 日志自动注入 request_id / user_id
+- 认证依赖设置 user_id
+- Celery 任务上下文传播
+"""
+
+import sys
+import json
+import logging
+from pathlib import Path
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.middleware.request_context import RequestContextMiddleware
+from app.utils.context import (
+    add_timing,
+    get_log_context,
+    get_request_context,
+    get_request_id,
+    get_user_id,
+    request_context,
+)
+from app.utils.logger import FastJSONFormatter, JSONFormatter
+from app.dependencies import get_current_user
+
+
+# ==================== 测试 Fixtures ====================
+
+class MockUser:
+    """模拟用户"""
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+@pytest.fixture
+def client():
+    """创建带请求上下文中间件的测试客户端"""
+    test_app = FastAPI()
+    test_app.add_middleware(RequestContextMiddleware)
+
+    def current_user(request: Request):
+        return get_current_user(request, auth_func=lambda request: MockUser(42))
+
+    @test_app.get("/context")
+    async def context_endpoint():
+        return {"request_id": get_request_id()}
+
+    @test_app.get("/me")
+    async def me(user=Depends(current_user)):
+        # 同步依赖在线程池中执行，设置的 user_id 仍然对当前请求可见
+        return {"user_id": get_user_id()}
+
+    return TestClient(test_app)
+
+
+# ==================== 请求 ID 测试 ====================
+
+def test_request_id_generated_and_echoed(client):
+    """测试自动生成请求 ID 并在响应头中回传"""
+    response = client.get("/context")
+
+    request_id = response.headers["X-Request-ID"]
+    assert request_id.startswith("req_")
+    assert response.json()["request_id"] == request_id
+
+
+def test_request_id_accepted_from_header(client):
+    """测试接收请求头中的请求 ID"""
+    response = client.get("/context", headers={"X-Request-ID": "gateway-123"})
+
+    assert response.headers["X-Request-ID"] == "gateway-123"
+    assert response.json()["request_id"] == "gateway-123"
+
+
+def test_invalid_request_id_replaced(client):
+    """测试不合法的请求 ID 会被重新生成"""
+    response = client.get("/context", headers={"X-Request-ID": "bad id\nwith newline"})
+
+    assert response.headers["X-Request-ID"].startswith("req_")
+
+
+def test_user_id_set_by_dependency(client):
+    """测试认证依赖把用户 ID 写入请求上下文"""
+    response = client.get("/me")
+
+    assert response.json() == {"user_id": "42"}
+
+
+def test_context_outside_request():
+    """测试不在请求中时上下文为空，辅助函数不报错"""
+    assert get_request_context() is None
+    assert get_log_context() == {}
+    add_timing("db", 0.1)
+
+    with request_context(request_id="req_1") as context:
+        add_timing("db", 0.1)
+        add_timing("db", 0.2)
+        assert context.timings["db"] == pytest.approx(0.3)
+
+    assert get_request_id() is None
+
+
+# ==================== 日志注入测试 ====================
+
+@pytest.mark.parametrize("formatter_class", [JSONFormatter, FastJSONFormatter])
+def test_formatter_includes_context(formatter_class):
+    """测试 JSON 日志自动包含 request_id / user_id"""
+    formatter = formatter_class()
+    record = logging.LogRecord("test_context", logging.INFO, __file__, 1, "消息", (), None)
+
+    with request_context(request_id="req_abc", user_id="7"):
+        log_data = json.loads(formatter.format(record))
+
+    assert log_data["request_id"] == "req_abc"
+    assert log_data["user_id"] == "7"
+
+
+# ==================== Celery 上下文传播测试 ====================
+
+@pytest.mark.integration
+def test_celery_task_receives_context():
+    """测试 BaseTask 通过消息头传播请求上下文（使用 EAGER 模式）"""
+    from app.tasks.base import task
+    from app.tasks.celery_app import celery_app
+
+    @task(name="tests.context_task")
+    def context_task():
+        return {"request_id": get_request_id(), "user_id": get_user_id()}
+
+    original_backend = celery_app.conf.result_backend
+    celery_app.conf.result_backend = None
+    celery_app.conf.task_always_eager = True
+    celery_app.conf.task_eager_propagates = True
+
+    try:
+        with request_context(request_id="req_task", user_id="9"):
+            result = context_task.delay()
+
+        assert result.result == {"request_id": "req_task", "user_id": "9"}
+        assert context_task.delay().result == {"request_id": None, "user_id": None}
+    finally:
+        celery_app.conf.task_always_eager = False
+        celery_app.conf.task_eager_propagates = False
+        celery_app.conf.result_backend = original_backend
@@ -0,0 +1,193 @@
+"""
+Celery 任务事件测试模块
+
+测试任务进度 / 结果通过 WebSocket 推送，包括：
+- Worker 端：任务信号发布生命周期事件、report_progress 发布进度事件、未启用时不发布
+- Web 端：任务事件投递给发起任务的用户和 task.{task_id} 频道的订阅者（订阅者收不到结果和错误）
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.config import settings
+from app.tasks import events
+from app.tasks.base import task
+from app.tasks.examples import long_running_task
+from app.websocket import ConnectionManager, TaskEventListener, task_channel
+from app.websocket.task_events import create_task_event_listener
+
+
+class FakeRedis:
+    """记录 publish 调用的 Redis 客户端替身"""
+
+    def __init__(self):
+        self.published: List[Tuple[str, Any]] = []
+
+    def publish(self, channel: str, data: str) -> int:
+        self.published.append((channel, json.loads(data)))
+        return 1
+
+
+class FakeWebSocket:
+    """记录发送内容的模拟 WebSocket 连接"""
+
+    def __init__(self):
+        self.sent: List[Any] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """启用任务事件，并用替身记录发布的事件"""
+    client = FakeRedis()
+    monkeypatch.setattr(settings, "task_events_enabled", True)
+    monkeypatch.setattr(settings, "redis_url", "redis://localhost:6379/0")
+    monkeypatch.setattr(events, "_client", client)
+    return client
+
+
+@task(name="test.task_events.failing_task")
+def failing_task() -> None:
+    raise ValueError("导入失败")
+
+
+@task(name="test.task_events.quiet_task")
+def quiet_task() -> str:
+    return "ok"
+
+
+quiet_task.publish_events = False
+
+
+# ==================== Worker 端测试 ====================
+
+def test_events_disabled_by_default(monkeypatch):
+    """测试未启用任务事件时不发布，也不创建 Redis 客户端"""
+    monkeypatch.setattr(settings, "task_events_enabled", False)
+    monkeypatch.setattr(events, "_client", None)
+
+    assert events.publish_task_event({"type": "task_started", "task_id": "1"}) is False
+    assert events._client is None
+
+
+def test_long_running_task_publishes_progress_and_result(redis_client, monkeypatch):
+    """测试长任务发布开始、每一步的进度和结果事件，并带上发起任务的用户"""
+    monkeypatch.setattr("app.tasks.examples.time.sleep", lambda seconds: None)
+
+    result = long_running_task.apply(args=(2,), task_id="task-1", headers={"user_id": "user123"})
+
+    assert result.successful()
+    published = [event for channel, event in redis_client.published]
+    assert {channel for channel, _ in redis_client.published} == {settings.task_events_channel}
+    assert [event["type"] for event in published] == [
+        "task_started",
+        "task_progress",
+        "task_progress",
+        "task_succeeded",
+    ]
+    assert all(
+        event["task_id"] == "task-1" and event["user_id"] == "user123" for event in published
+    )
+    assert [event["percent"] for event in published[1:3]] == [50.0, 100.0]
+    assert published[-1]["result"] == "任务完成，耗时 2 秒"
+
+
+def test_failed_task_publishes_error(redis_client):
+    """测试任务失败时发布 task_failed 事件"""
+    failing_task.apply(task_id="task-2")
+
+    last = redis_client.published[-1][1]
+    assert last["type"] == "task_failed"
+    assert last["state"] == "FAILURE"
+    assert last["error"] == "导入失败"
+    assert last["user_id"] is None
+
+
+def test_task_can_opt_out_of_events(redis_client):
+    """测试 publish_events = False 的任务不发布事件"""
+    quiet_task.apply()
+
+    assert redis_client.published == []
+
+
+def test_publish_failure_does_not_break_task(redis_client, monkeypatch):
+    """测试发布失败只记录日志，任务正常完成"""
+    def broken_publish(channel: str, data: str) -> int:
+        raise ConnectionError("Redis 不可用")
+
+    monkeypatch.setattr(redis_client, "publish", broken_publish)
+    assert quiet_task.apply().get() == "ok"
+    assert events.publish_task_event({"type": "task_started", "task_id": "3"}) is False
+
+
+# ==================== Web 端测试 ====================
+
+async def test_listener_delivers_to_owner_and_subscribers():
+    """测试发起任务的用户收到完整事件，task.{task_id} 的订阅者只收到状态和进度，其他用户收不到"""
+    manager = ConnectionManager(queue_size=0)
+    owner, watcher, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(owner, "user123")
+    await manager.connect(watcher, "admin")
+    await manager.connect(other, "someone")
+    manager.subscribe(watcher, task_channel("task-1"))
+
+    listener = TaskEventListener(manager, "redis://localhost:6379/0", settings.task_events_channel)
+    event = {
+        "type": "task_progress", "task_id": "task-1", "user_id": "user123",
+        "current": 1, "total": 2, "message": "处理 secret.csv",
+    }
+    await listener.dispatch(event)
+    await listener.dispatch({
+        "type": "task_succeeded", "task_id": "task-1", "user_id": "user123",
+        "state": "SUCCESS", "result": {"token": "secret"},
+    })
+
+    assert [message["type"] for message in owner.sent] == ["task_progress", "task_succeeded"]
+    assert owner.sent[-1]["result"] == {"token": "secret"}
+    assert watcher.sent == [
+        {"type": "task_progress", "task_id": "task-1", "current": 1, "total": 2},
+        {"type": "task_succeeded", "task_id": "task-1", "state": "SUCCESS"},
+    ]
+    assert other.sent == []
+
+
+async def test_listener_ignores_events_without_task_id():
+    """测试缺少 task_id 的事件被忽略"""
+    manager = ConnectionManager(queue_size=0)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "user123")
+
+    listener = TaskEventListener(manager, "redis://localhost:6379/0", settings.task_events_channel)
+    await listener.dispatch({"type": "task_started", "user_id": "user123"})
+
+    assert websocket.sent == []
+
+
+def test_create_listener_requires_redis(monkeypatch):
+    """测试未启用任务事件或未配置 redis_url 时不创建订阅器"""
+    manager = ConnectionManager()
+    monkeypatch.setattr(settings, "task_events_enabled", False)
+    assert create_task_event_listener(manager) is None
+
+    monkeypatch.setattr(settings, "task_events_enabled", True)
+    monkeypatch.setattr(settings, "redis_url", None)
+    assert create_task_event_listener(manager) is None
+
+    monkeypatch.setattr(settings, "redis_url", "redis://localhost:6379/0")
+    assert isinstance(create_task_event_listener(manager), TaskEventListener)
@@ -15,9 +15,17 @@ from app.utils.logger import (
     logger,
     get_logger,
     setup_logger,
+    shutdown_logging,
+    get_logging_stats,
     JSONFormatter,
+    FastJSONFormatter,
     TextFormatter,
+    BoundedQueueHandler,
+    BatchingQueueListener,
 )
+import queue
+import threading
+import time
 
 # 测试 ID 生成器
 from app.utils.id_generator import (
@@ -94,6 +102,33 @@ def test_logger_json_format():
     print("✓ JSON 格式日志测试通过")
 
 
+def test_fast_json_formatter():
+    """测试高性能 JSON 格式化器"""
+    print("\n=== 测试高性能 JSON 格式化器 ===")
+
+    formatter = FastJSONFormatter(static_fields={"app": "demo", "version": "1.0"})
+    record = logging.LogRecord(
+        "test_fast", logging.INFO, __file__, 10, "用户 %s 登录", ("alice",), None
+    )
+    record.extra_fields = {"user_id": 1}
+
+    log_data = json.loads(formatter.format(record))
+    assert log_data["message"] == "用户 alice 登录"
+    assert log_data["level"] == "INFO"
+    assert log_data["app"] == "demo"
+    assert log_data["version"] == "1.0"
+    assert log_data["user_id"] == 1
+    assert log_data["timestamp"].endswith("Z")
+
+    # 额外字段与静态字段同名时，以额外字段为准
+    record.extra_fields = {"app": "override"}
+    log_data = json.loads(formatter.format(record))
+    assert log_data["app"] == "override"
+    assert list(log_data).count("app") == 1
+
+    print("✓ 高性能 JSON 格式化器测试通过")
+
+
 def test_logger_text_format():
     """测试文本格式日志"""
     print("\n=== 测试文本格式日志 ===")
@@ -154,6 +189,139 @@ def test_get_logger():
     print("✓ 获取日志记录器测试通过")
 
 
+def test_logger_async_file_output():
+    """测试异步日志管道输出到文件"""
+    print("\n=== 测试异步日志管道 ===")
+
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.log') as f:
+        log_file = f.name
+
+    try:
+        async_logger = setup_logger(
+            "test_async_file", log_format="json", log_file=log_file, async_mode=True
+        )
+        for i in range(50):
+            async_logger.info("异步日志 %d", i)
+        try:
+            raise ValueError("异步异常")
+        except ValueError:
+            async_logger.exception("记录异常")
+
+        assert get_logging_stats()["test_async_file"]["enqueued"] == 51
+
+        # 关闭管道后所有日志都应写入文件
+        shutdown_logging()
+        with open(log_file, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+
+        assert [line["message"] for line in lines[:50]] == [f"异步日志 {i}" for i in range(50)]
+        assert "ValueError: 异步异常" in lines[50]["exception"]
+        assert "test_async_file" not in get_logging_stats()
+
+        print("✓ 异步日志管道测试通过")
+    finally:
+        logging.getLogger("test_async_file").handlers.clear()
+        Path(log_file).unlink(missing_ok=True)
+
+
+def test_bounded_queue_handler_drop_new():
+    """测试队列满时丢弃新日志"""
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow="drop_new")
+    test_logger = logging.getLogger("test_drop_new")
+    test_logger.handlers = [handler]
+    test_logger.propagate = False
+
+    for i in range(5):
+        test_logger.warning("日志 %d", i)
+
+    assert handler.enqueued == 2
+    assert handler.dropped == 3
+    assert handler.queue.get_nowait().getMessage() == "日志 0"
+
+
+def test_bounded_queue_handler_drop_oldest():
+    """测试队列满时丢弃最旧日志"""
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow="drop_oldest")
+    test_logger = logging.getLogger("test_drop_oldest")
+    test_logger.handlers = [handler]
+    test_logger.propagate = False
+
+    for i in range(5):
+        test_logger.warning("日志 %d", i)
+
+    assert handler.dropped == 3
+    messages = [handler.queue.get_nowait().getMessage() for _ in range(2)]
+    assert messages == ["日志 3", "日志 4"]
+
+
+def test_logging_after_shutdown_is_synchronous():
+    """测试关闭异步管道后日志恢复为同步写入，不会进入无人读取的队列"""
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.log') as f:
+        log_file = f.name
+
+    try:
+        async_logger = setup_logger(
+            "test_async_restore", log_format="text", log_file=log_file, async_mode=True
+        )
+        async_logger.info("关闭前")
+        shutdown_logging()
+
+        assert not any(isinstance(h, BoundedQueueHandler) for h in async_logger.handlers)
+        async_logger.info("关闭后")
+
+        with open(log_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert "关闭前" in content
+        assert "关闭后" in content
+    finally:
+        for handler in logging.getLogger("test_async_restore").handlers:
+            handler.close()
+        logging.getLogger("test_async_restore").handlers.clear()
+        Path(log_file).unlink(missing_ok=True)
+
+
+def test_listener_stop_with_full_queue():
+    """测试队列已满时停止监听器：等待放入停止标记，不抛出 queue.Full，剩余日志全部写出"""
+    release = threading.Event()
+    handled = []
+
+    class SlowHandler(logging.Handler):
+        def handle(self, record):
+            release.wait(5)
+            handled.append(record.getMessage())
+            return True
+
+    log_queue = queue.Queue(maxsize=1)
+    listener = BatchingQueueListener(log_queue, SlowHandler(), batch_size=1)
+    listener.start()
+    log_queue.put(logging.makeLogRecord({"msg": "第一条", "levelno": logging.INFO}))
+    # 等后台线程取走第一条并阻塞在处理中，再填满队列
+    while not log_queue.empty():
+        time.sleep(0.001)
+    log_queue.put(logging.makeLogRecord({"msg": "第二条", "levelno": logging.INFO}))
+
+    stopper = threading.Thread(target=listener.stop)
+    stopper.start()
+    time.sleep(0.05)
+    release.set()
+    stopper.join(5)
+
+    assert not stopper.is_alive()
+    assert handled == ["第一条", "第二条"]
+
+
+def test_drop_oldest_keeps_stop_sentinel():
+    """测试 drop_oldest 不会丢弃监听器的停止标记"""
+    log_queue = queue.Queue(maxsize=1)
+    log_queue.put(None)
+    handler = BoundedQueueHandler(log_queue, overflow="drop_oldest")
+
+    handler.emit(logging.makeLogRecord({"msg": "停止期间的日志"}))
+
+    assert handler.dropped == 1
+    assert log_queue.get_nowait() is None
+
+
 # ==================== ID 生成器测试 ====================
 
 def test_generate_id_basic():
@@ -418,8 +586,12 @@ def run_all_tests():
         # 日志工具测试
         test_logger_basic()
         test_logger_json_format()
+        test_fast_json_formatter()
         test_logger_text_format()
         test_logger_file_output()
+        test_logger_async_file_output()
+        test_bounded_queue_handler_drop_new()
+        test_bounded_queue_handler_drop_oldest()
         test_get_logger()
         
         # ID 生成器测试
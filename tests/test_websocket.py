@@ -22,6 +22,7 @@ sys.path.insert(0, str(project_root))
 from fastapi.testclient import TestClient
 from app.main import app
 from app.websocket import manager, ConnectionManager
+from app.websocket.payload import msgpack
 
 
 # ==================== 测试客户端 ====================
@@ -81,6 +82,18 @@ def test_websocket_ping_pong(client):
         assert pong_data["timestamp"] == 1234567890
 
 
+def test_websocket_pong_not_answered(client):
+    """测试客户端回复服务端心跳的 pong 不会产生响应"""
+    with client.websocket_connect("/ws/test_user") as websocket:
+        websocket.receive_json()
+
+        websocket.send_json({"type": "pong", "timestamp": 1})
+        websocket.send_json({"type": "ping", "timestamp": 2})
+
+        # 下一条响应是 ping 的 pong，而不是对 pong 的回显
+        assert websocket.receive_json() == {"type": "pong", "timestamp": 2}
+
+
 def test_websocket_echo_message(client):
     """测试消息回显功能"""
     with client.websocket_connect("/ws/test_user") as websocket:
@@ -134,6 +147,41 @@ def test_websocket_json_message(client):
         assert "content" in response
 
 
+def test_websocket_subprotocol_negotiation(client):
+    """测试按子协议协商编码格式：请求 json 时回应 json 子协议"""
+    with client.websocket_connect("/ws/test_user", subprotocols=["json"]) as websocket:
+        assert websocket.accepted_subprotocol == "json"
+        assert websocket.receive_json()["type"] == "welcome"
+
+
+@pytest.mark.skipif(msgpack is None, reason="未安装 msgpack")
+def test_websocket_msgpack_frames(client):
+    """测试 msgpack 连接收发二进制帧"""
+    with client.websocket_connect("/ws/test_user", subprotocols=["msgpack"]) as websocket:
+        assert websocket.accepted_subprotocol == "msgpack"
+        assert msgpack.unpackb(websocket.receive_bytes())["type"] == "welcome"
+
+        websocket.send_bytes(msgpack.packb({"type": "ping", "timestamp": 1}))
+        assert msgpack.unpackb(websocket.receive_bytes()) == {"type": "pong", "timestamp": 1}
+
+
+def test_websocket_subscribe_and_unsubscribe(client):
+    """测试通过消息订阅和取消订阅频道"""
+    with client.websocket_connect("/ws/sub_user") as websocket:
+        websocket.receive_json()
+
+        websocket.send_json({"type": "subscribe", "channel": "news.*"})
+        assert websocket.receive_json() == {"type": "subscribed", "channel": "news.*"}
+        assert manager.get_channel_subscribers_count("news.sports") == 1
+
+        websocket.send_json({"type": "subscribe"})
+        assert websocket.receive_json()["code"] == "INVALID_CHANNEL"
+
+        websocket.send_json({"type": "unsubscribe", "channel": "news.*"})
+        assert websocket.receive_json() == {"type": "unsubscribed", "channel": "news.*"}
+        assert manager.get_channel_subscribers_count("news.sports") == 0
+
+
 # ==================== 连接管理测试 ====================
 
 def test_connection_manager_connect(clean_manager):
@@ -236,6 +284,28 @@ def test_websocket_stats_with_connections(client):
         assert "stats_user" in data["connected_users"]
 
 
+def test_websocket_stats_pagination(client):
+    """测试统计接口按页返回已连接用户"""
+    first = client.websocket_connect("/ws/page_user_a")
+    second = client.websocket_connect("/ws/page_user_b")
+    with first, second:
+        first.receive_json()
+        second.receive_json()
+
+        data = client.get("/ws/stats", params={"page_size": 1}).json()["data"]
+        assert data["connected_users_count"] >= 2
+        assert len(data["connected_users"]) == 1
+        assert data["total_pages"] == data["connected_users_count"]
+
+        users = set()
+        for page in range(1, data["total_pages"] + 1):
+            page_data = client.get("/ws/stats", params={"page": page, "page_size": 1}).json()
+            users.update(page_data["data"]["connected_users"])
+        assert {"page_user_a", "page_user_b"} <= users
+
+    assert client.get("/ws/stats", params={"page_size": 0}).status_code == 422
+
+
 # ==================== 错误处理测试 ====================
 
 def test_websocket_invalid_json(client):
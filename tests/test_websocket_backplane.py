@@ -0,0 +1,168 @@
+"""
+WebSocket 跨进程通道测试模块
+
+使用共享同一个 InMemoryBus 的多个 ConnectionManager 模拟多个 worker，测试：
+- 个人消息、广播和频道消息跨节点投递（发布节点不重复投递）
+- 集群在线状态汇总
+- 按配置创建通道
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.config import settings
+from app.websocket import ConnectionManager, InMemoryBackplane, InMemoryBus
+from app.websocket.backplane import create_backplane
+
+
+# ==================== 模拟连接 ====================
+
+class FakeWebSocket:
+    """模拟 WebSocket 连接：记录收到的消息"""
+
+    def __init__(self):
+        self.sent: List[str] = []
+        self.closed_code: Optional[int] = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_code = code
+
+
+# ==================== 测试 Fixtures ====================
+
+@pytest.fixture
+async def nodes():
+    """创建两个共享消息总线的连接管理器（模拟两个 worker）"""
+    bus = InMemoryBus()
+    managers = [
+        ConnectionManager(queue_size=0, backplane=InMemoryBackplane(bus, node_id=f"node{i}"))
+        for i in range(2)
+    ]
+    for manager in managers:
+        await manager.start()
+    yield managers
+    for manager in managers:
+        await manager.stop()
+
+
+# ==================== 消息转发测试 ====================
+
+async def test_personal_message_reaches_other_node(nodes):
+    """测试个人消息投递到连接在其他节点上的用户"""
+    node_a, node_b = nodes
+    remote = FakeWebSocket()
+    await node_b.connect(remote, "alice")
+
+    assert await node_a.send_personal_message({"type": "notification"}, "alice") is True
+    assert [json.loads(text) for text in remote.sent] == [{"type": "notification"}]
+
+
+async def test_personal_message_to_user_on_both_nodes(nodes):
+    """测试用户在多个节点都有连接时每个连接只收到一次"""
+    node_a, node_b = nodes
+    local, remote = FakeWebSocket(), FakeWebSocket()
+    await node_a.connect(local, "alice")
+    await node_b.connect(remote, "alice")
+
+    await node_a.send_personal_message("hello", "alice")
+    assert local.sent == ["hello"]
+    assert remote.sent == ["hello"]
+
+
+async def test_broadcast_across_nodes_with_exclude_user(nodes):
+    """测试广播投递到所有节点，exclude_user 在所有节点生效"""
+    node_a, node_b = nodes
+    a1, b1, b2 = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await node_a.connect(a1, "alice")
+    await node_b.connect(b1, "bob")
+    await node_b.connect(b2, "carol")
+
+    local_count = await node_a.broadcast("announcement", exclude_user="carol")
+    assert local_count == 1, "返回值只统计本节点的连接"
+    assert a1.sent == ["announcement"]
+    assert b1.sent == ["announcement"]
+    assert b2.sent == []
+
+
+async def test_channel_publish_across_nodes(nodes):
+    """测试频道消息只投递给各节点上的订阅者"""
+    node_a, node_b = nodes
+    subscriber, other = FakeWebSocket(), FakeWebSocket()
+    await node_b.connect(subscriber, "alice")
+    await node_b.connect(other, "bob")
+    node_b.subscribe(subscriber, "orders.*")
+
+    assert await node_a.publish("orders.42", {"status": "paid"}) == 0
+    assert [json.loads(text) for text in subscriber.sent] == [{"status": "paid"}]
+    assert other.sent == []
+
+
+async def test_manager_without_backplane_stays_local():
+    """测试未配置通道时只投递给本进程连接"""
+    manager = ConnectionManager(queue_size=0)
+    assert manager.node_id is None
+    assert await manager.send_personal_message("hi", "nobody") is False
+    assert await manager.get_cluster_presence() == {}
+
+
+# ==================== 在线状态测试 ====================
+
+async def test_cluster_presence_aggregates_nodes(nodes):
+    """测试集群在线状态汇总所有节点的连接"""
+    node_a, node_b = nodes
+    sockets = [FakeWebSocket() for _ in range(3)]
+    await node_a.connect(sockets[0], "alice")
+    await node_b.connect(sockets[1], "alice")
+    await node_b.connect(sockets[2], "bob")
+    await asyncio.sleep(0)  # 在线状态由后台任务异步上报
+
+    expected = {"alice": 2, "bob": 1}
+    assert await node_a.get_cluster_presence() == expected
+    assert await node_b.get_cluster_presence() == expected
+
+    node_b.disconnect(sockets[2])
+    await asyncio.sleep(0)
+    assert await node_a.get_cluster_presence() == {"alice": 2}
+
+    await node_b.stop()
+    assert await node_a.get_cluster_presence() == {"alice": 1}
+
+
+async def test_presence_snapshot_reported_on_start():
+    """测试节点启动时上报启动前已有的连接"""
+    bus = InMemoryBus()
+    manager = ConnectionManager(queue_size=0, backplane=InMemoryBackplane(bus, node_id="late"))
+    await manager.connect(FakeWebSocket(), "alice")
+    await manager.start()
+    assert bus.presence["late"] == {"alice": 1}
+    await manager.stop()
+
+
+# ==================== 配置测试 ====================
+
+def test_create_backplane_from_settings(monkeypatch):
+    """测试按配置创建通道，redis 未配置 redis_url 时回退为仅本进程"""
+    monkeypatch.setattr(settings, "websocket_backplane", "none")
+    assert create_backplane() is None
+
+    monkeypatch.setattr(settings, "websocket_backplane", "memory")
+    assert isinstance(create_backplane(), InMemoryBackplane)
+
+    monkeypatch.setattr(settings, "websocket_backplane", "redis")
+    monkeypatch.setattr(settings, "redis_url", None)
+    assert create_backplane() is None
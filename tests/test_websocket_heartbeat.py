@@ -0,0 +1,162 @@
+"""
+WebSocket 心跳调度测试模块
+
+测试时间轮和心跳调度器，包括：
+- 时间轮调度、取消、跨圈到期
+- 空闲连接 ping、超时回收、活动刷新
+- 连接管理器的心跳协程
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.websocket import ConnectionManager
+from app.websocket.heartbeat import HeartbeatScheduler, TimerWheel
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeWebSocket:
+    """模拟 WebSocket 连接"""
+
+    def __init__(self):
+        self.sent: List[str] = []
+        self.closed_code: Optional[int] = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_code = code
+
+
+# ==================== 时间轮测试 ====================
+
+def test_timer_wheel_expires_only_due_keys():
+    """测试时间轮只取出已到期的键"""
+    wheel = TimerWheel(tick=1.0, slots=8, now=0.0)
+    wheel.schedule("a", 2.0)
+    wheel.schedule("b", 5.0)
+    wheel.schedule("c", 5.0)
+
+    assert wheel.advance(1.5) == []
+    assert wheel.advance(2.0) == ["a"]
+    wheel.cancel("b")
+    assert wheel.advance(6.0) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_reschedule_and_multiple_rounds():
+    """测试重新调度，以及到期时间超过一圈的键在对应轮次才到期"""
+    wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+    wheel.schedule("far", 10.0)
+    wheel.schedule("moved", 1.0)
+    wheel.schedule("moved", 3.0)
+
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ["moved"]
+    assert wheel.advance(6.0) == []
+    assert "far" in wheel
+    # 一次推进超过一圈
+    assert wheel.advance(100.0) == ["far"]
+
+
+# ==================== 心跳调度测试 ====================
+
+def test_scheduler_pings_then_expires_idle_connection():
+    """测试空闲连接先收到 ping，超过超时时间后被回收"""
+    clock = FakeClock()
+    scheduler = HeartbeatScheduler(interval=10, timeout=25, tick=1, clock=clock)
+    scheduler.register("idle")
+
+    clock.now += 9
+    assert scheduler.process() == ([], [])
+
+    clock.now += 1
+    assert scheduler.process() == (["idle"], [])
+
+    clock.now += 10
+    assert scheduler.process() == (["idle"], [])
+
+    clock.now += 5
+    assert scheduler.process() == ([], ["idle"])
+    assert len(scheduler) == 0
+
+
+def test_scheduler_touch_defers_ping():
+    """测试有活动的连接不会收到 ping，也不会被回收"""
+    clock = FakeClock()
+    scheduler = HeartbeatScheduler(interval=10, timeout=25, tick=1, clock=clock)
+    scheduler.register("active")
+    scheduler.register("idle")
+
+    for _ in range(6):
+        clock.now += 5
+        scheduler.touch("active")
+        pings, expired = scheduler.process()
+        assert "active" not in pings and "active" not in expired
+
+    assert "idle" not in scheduler.last_seen
+    assert "active" in scheduler.last_seen
+
+
+def test_scheduler_unregister_cancels_timer():
+    """测试注销的连接不再出现在结果中"""
+    clock = FakeClock()
+    scheduler = HeartbeatScheduler(interval=10, timeout=25, tick=1, clock=clock)
+    scheduler.register("gone")
+    scheduler.unregister("gone")
+
+    clock.now += 30
+    assert scheduler.process() == ([], [])
+    assert len(scheduler.wheel) == 0
+
+
+# ==================== 连接管理器集成测试 ====================
+
+async def test_manager_heartbeat_reaps_idle_connection():
+    """测试心跳协程向空闲连接发送 ping 并断开超时的连接"""
+    manager = ConnectionManager(queue_size=0, heartbeat_interval=0.05, idle_timeout=0.15)
+    active, idle = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(active, "active")
+    await manager.connect(idle, "idle")
+    await manager.start()
+
+    try:
+        for _ in range(15):
+            await asyncio.sleep(0.02)
+            manager.touch(active)
+    finally:
+        await manager.stop()
+    await asyncio.sleep(0)
+
+    assert manager.is_user_connected("active")
+    assert not manager.is_user_connected("idle")
+    assert idle.closed_code == 1001
+    assert json.loads(idle.sent[0])["type"] == "ping"
+    assert active.sent == []
+
+
+def test_manager_heartbeat_disabled():
+    """测试心跳间隔为 0 时不启用心跳"""
+    manager = ConnectionManager(heartbeat_interval=0)
+    assert manager.heartbeat is None
+    assert asyncio.run(manager.run_heartbeat()) == (0, 0)
@@ -0,0 +1,472 @@
+"""
+WebSocket 连接管理器测试模块
+
+使用模拟连接直接测试 ConnectionManager，包括：
+- 并发广播（限制并发数，不使用出站队列）
+- 发送超时与慢消费者断开
+- 发送失败的连接清理
+- 出站队列：生产者不阻塞、溢出策略、消息合并、顺序
+- 预编码载荷：每条消息只编码一次，按连接协商的编码格式发送
+- 频道订阅：只投递给订阅者、通配符模式、索引清理
+- 连接注册表：计数、按页获取在线用户、空闲连接不占用写协程
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, List, Optional
+
+import pytest
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.websocket import ConnectionManager, encode_message
+from app.websocket import payload as payload_module
+from app.websocket.payload import negotiate_encoding
+
+
+# ==================== 模拟连接 ====================
+
+class FakeWebSocket:
+    """
+    模拟 WebSocket 连接
+
+    Args:
+        delay: 每次发送耗时（秒）
+        fail: 发送时是否抛出异常
+    """
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent: List[Any] = []
+        self.closed_code: Optional[int] = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        if self.fail:
+            raise RuntimeError("连接已断开")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.send_text(data)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_code = code
+
+
+async def connect_all(
+    manager: ConnectionManager, sockets: List[FakeWebSocket], prefix: str = "user"
+) -> None:
+    """将模拟连接注册到管理器"""
+    for index, websocket in enumerate(sockets):
+        await manager.connect(websocket, f"{prefix}{index}")
+
+
+# ==================== 直接发送测试 ====================
+
+async def test_broadcast_sends_concurrently():
+    """测试广播并发发送：总耗时接近单次发送耗时，而不是逐个累加"""
+    manager = ConnectionManager(send_timeout=1.0, broadcast_concurrency=100, queue_size=0)
+    sockets = [FakeWebSocket(delay=0.05) for _ in range(50)]
+    await connect_all(manager, sockets)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    count = await manager.broadcast({"type": "announcement"})
+    elapsed = loop.time() - start
+
+    assert count == 50
+    assert elapsed < 0.5, f"50 个连接串行发送需要 2.5s，实际 {elapsed:.2f}s"
+    assert all(json.loads(ws.sent[0]) == {"type": "announcement"} for ws in sockets)
+
+
+async def test_broadcast_respects_concurrency_limit():
+    """测试同时进行的发送数量不超过 broadcast_concurrency"""
+    manager = ConnectionManager(send_timeout=1.0, broadcast_concurrency=3, queue_size=0)
+    in_flight = 0
+    peak = 0
+
+    class TrackingWebSocket(FakeWebSocket):
+        async def send_text(self, text: str) -> None:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await connect_all(manager, [TrackingWebSocket() for _ in range(10)])
+    assert await manager.broadcast("hello") == 10
+    assert peak == 3
+
+
+async def test_broadcast_evicts_slow_consumer():
+    """测试发送超时的慢消费者被断开，其他连接不受影响"""
+    manager = ConnectionManager(send_timeout=0.05, broadcast_concurrency=10, queue_size=0)
+    fast = [FakeWebSocket() for _ in range(5)]
+    slow = FakeWebSocket(delay=1.0)
+    await connect_all(manager, fast)
+    await manager.connect(slow, "slow_user")
+
+    count = await manager.broadcast("hello")
+    await asyncio.sleep(0)  # 让后台关闭任务执行
+
+    assert count == 5
+    assert not manager.is_user_connected("slow_user")
+    assert slow.closed_code == 1013
+    assert manager.get_total_connections_count() == 5
+
+
+async def test_broadcast_removes_failed_connections_and_excludes_user():
+    """测试发送失败的连接被移除，exclude_user 不接收广播"""
+    manager = ConnectionManager(send_timeout=1.0, queue_size=0)
+    ok = FakeWebSocket()
+    broken = FakeWebSocket(fail=True)
+    excluded = FakeWebSocket()
+    await manager.connect(ok, "ok")
+    await manager.connect(broken, "broken")
+    await manager.connect(excluded, "excluded")
+
+    assert await manager.broadcast("hello", exclude_user="excluded") == 1
+    assert not manager.is_user_connected("broken")
+    assert excluded.sent == []
+
+
+async def test_send_personal_message_to_all_user_connections():
+    """测试个人消息发送到用户的所有连接，慢连接被断开"""
+    manager = ConnectionManager(send_timeout=0.05, queue_size=0)
+    devices = [FakeWebSocket(), FakeWebSocket(), FakeWebSocket(delay=1.0)]
+    for websocket in devices:
+        await manager.connect(websocket, "user1")
+
+    assert await manager.send_personal_message({"type": "notification"}, "user1") is True
+    assert [len(ws.sent) for ws in devices] == [1, 1, 0]
+    assert manager.get_user_connections_count("user1") == 2
+    assert await manager.send_personal_message("hi", "nobody") is False
+
+
+# ==================== 出站队列测试 ====================
+
+async def drain() -> None:
+    """让写协程有机会发送队列中的消息"""
+    await asyncio.sleep(0.01)
+
+
+async def test_queued_broadcast_does_not_block_on_slow_client():
+    """测试使用出站队列时广播立即返回，慢客户端不影响其他连接"""
+    manager = ConnectionManager(send_timeout=5.0, queue_size=10)
+    slow = FakeWebSocket(delay=1.0)
+    fast = FakeWebSocket()
+    await manager.connect(slow, "slow")
+    await manager.connect(fast, "fast")
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for i in range(3):
+        assert await manager.broadcast({"seq": i}) == 2
+    assert loop.time() - start < 0.1
+
+    await drain()
+    assert [json.loads(text)["seq"] for text in fast.sent] == [0, 1, 2]
+    assert slow.sent == []
+    manager.disconnect(slow)
+    manager.disconnect(fast)
+
+
+@pytest.mark.parametrize(
+    "overflow, expected_sent, still_connected",
+    [
+        ("drop_oldest", ["m2", "m3", "m4"], True),
+        ("drop_newest", ["m0", "m1", "m2"], True),
+        ("disconnect", [], False),
+    ],
+)
+async def test_queue_overflow_policies(overflow, expected_sent, still_connected):
+    """测试出站队列溢出策略"""
+    manager = ConnectionManager(queue_size=3, overflow=overflow)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "user1")
+
+    # 在写协程运行之前连续入队，超出容量
+    for i in range(5):
+        await manager.send_personal_message(f"m{i}", "user1")
+    await drain()
+
+    assert websocket.sent == expected_sent
+    assert manager.is_user_connected("user1") is still_connected
+    if not still_connected:
+        assert websocket.closed_code == 1013
+    manager.disconnect(websocket)
+
+
+async def test_queue_coalesces_messages_with_same_key():
+    """测试相同合并键的未发送消息被替换，且保持原来的位置"""
+    manager = ConnectionManager(queue_size=10)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "user1")
+
+    await manager.send_personal_message("price=1", "user1", coalesce_key="price")
+    await manager.send_personal_message("news", "user1")
+    await manager.send_personal_message("price=2", "user1", coalesce_key="price")
+    await manager.send_personal_message("price=3", "user1", coalesce_key="price")
+    await drain()
+
+    assert websocket.sent == ["price=3", "news"]
+    assert manager.registry.get(websocket).queue.coalesced == 2
+
+    # 已发出的消息不再参与合并
+    await manager.send_personal_message("price=4", "user1", coalesce_key="price")
+    await drain()
+    assert websocket.sent[-1] == "price=4"
+    manager.disconnect(websocket)
+
+
+async def test_queue_writer_evicts_slow_consumer():
+    """测试写协程发送超时时断开连接"""
+    manager = ConnectionManager(send_timeout=0.05, queue_size=10)
+    slow = FakeWebSocket(delay=1.0)
+    await manager.connect(slow, "slow")
+
+    await manager.broadcast("hello")
+    await asyncio.sleep(0.1)
+
+    assert not manager.is_user_connected("slow")
+    assert slow.closed_code == 1013
+
+
+async def test_send_to_connection_keeps_order_with_pushes():
+    """测试处理器回复与推送消息经过同一队列，顺序一致"""
+    manager = ConnectionManager(queue_size=10)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "user1")
+
+    await manager.send_to_connection(websocket, {"type": "welcome"})
+    await manager.broadcast({"type": "announcement"})
+    await manager.send_to_connection(websocket, "reply")
+    await drain()
+
+    assert websocket.sent == ['{"type": "welcome"}', '{"type": "announcement"}', "reply"]
+    manager.disconnect(websocket)
+    assert await manager.send_to_connection(websocket, "direct") is True
+    assert websocket.sent[-1] == "direct"
+
+
+# ==================== 预编码载荷测试 ====================
+
+@pytest.fixture
+def count_json_dumps(monkeypatch):
+    """统计载荷模块中 JSON 序列化的次数"""
+    calls = []
+    original = payload_module.json.dumps
+
+    class CountingJson:
+        @staticmethod
+        def dumps(*args, **kwargs):
+            calls.append(args[0])
+            return original(*args, **kwargs)
+
+    monkeypatch.setattr(payload_module, "json", CountingJson)
+    return calls
+
+
+@pytest.mark.parametrize("queue_size", [0, 10])
+async def test_broadcast_encodes_once_and_shares_frame(count_json_dumps, queue_size):
+    """测试广播只序列化一次，所有连接收到同一个帧对象"""
+    manager = ConnectionManager(queue_size=queue_size)
+    sockets = [FakeWebSocket() for _ in range(20)]
+    await connect_all(manager, sockets)
+
+    assert await manager.broadcast({"type": "announcement"}) == 20
+    await drain()
+
+    assert len(count_json_dumps) == 1
+    assert all(ws.sent[0] is sockets[0].sent[0] for ws in sockets)
+    for websocket in sockets:
+        manager.disconnect(websocket)
+
+
+async def test_encoded_message_reused_across_personal_messages(count_json_dumps):
+    """测试预编码载荷发送给多个用户时只序列化一次"""
+    manager = ConnectionManager(queue_size=0)
+    sockets = [FakeWebSocket() for _ in range(5)]
+    await connect_all(manager, sockets)
+
+    payload = encode_message({"type": "notification"})
+    for index in range(5):
+        assert await manager.send_personal_message(payload, f"user{index}") is True
+
+    assert len(count_json_dumps) == 1
+    assert encode_message(payload) is payload
+    assert [json.loads(ws.sent[0]) for ws in sockets] == [{"type": "notification"}] * 5
+
+
+def test_negotiate_encoding_without_msgpack(monkeypatch):
+    """测试未安装 msgpack 时请求 msgpack 回退到 json，且不回应子协议"""
+    monkeypatch.setattr(payload_module, "msgpack", None)
+    assert negotiate_encoding(["msgpack"]) == ("json", None)
+    assert negotiate_encoding(["msgpack", "json"]) == ("json", "json")
+    assert negotiate_encoding([]) == ("json", None)
+
+
+@pytest.mark.skipif(payload_module.msgpack is None, reason="未安装 msgpack")
+async def test_mixed_encodings_receive_matching_frames():
+    """测试 json 和 msgpack 连接混合时各自收到对应格式的帧"""
+    msgpack = payload_module.msgpack
+    manager = ConnectionManager(queue_size=0)
+    text_client, binary_client = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(text_client, "text")
+    await manager.connect(binary_client, "binary", encoding="msgpack")
+
+    await manager.broadcast({"type": "announcement", "n": 1})
+
+    assert json.loads(text_client.sent[0]) == {"type": "announcement", "n": 1}
+    assert msgpack.unpackb(binary_client.sent[0]) == {"type": "announcement", "n": 1}
+    assert manager.get_encoding(binary_client) == "msgpack"
+
+
+# ==================== 频道订阅测试 ====================
+
+async def test_publish_reaches_only_subscribers():
+    """测试 publish 只投递给频道的订阅者"""
+    manager = ConnectionManager(queue_size=0)
+    subscriber, other = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(subscriber, "alice")
+    await manager.connect(other, "bob")
+
+    assert manager.subscribe(subscriber, "orders.42") is True
+    assert await manager.publish("orders.42", {"status": "paid"}) == 1
+    assert await manager.publish("orders.43", {"status": "paid"}) == 0
+
+    assert [json.loads(text) for text in subscriber.sent] == [{"status": "paid"}]
+    assert other.sent == []
+
+
+async def test_wildcard_subscription_delivers_once():
+    """测试通配符模式匹配，且同时通过多种方式订阅的连接只收到一次"""
+    manager = ConnectionManager(queue_size=0)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "alice")
+    manager.subscribe(websocket, "news.*")
+    manager.subscribe(websocket, "news.sports")
+    manager.subscribe(websocket, "*.sports")
+
+    assert await manager.publish("news.sports", "goal") == 1
+    assert await manager.publish("news.tech.ai", "release") == 1
+    assert await manager.publish("weather", "sunny") == 0
+    assert websocket.sent == ["goal", "release"]
+    assert manager.get_channel_subscribers_count("news.sports") == 1
+
+
+async def test_pattern_cache_invalidated_on_new_pattern():
+    """测试新增模式后频道匹配缓存失效"""
+    manager = ConnectionManager(queue_size=0)
+    early, late = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(early, "early")
+    await manager.connect(late, "late")
+    manager.subscribe(early, "a.*")
+    assert await manager.publish("a.b", "first") == 1
+
+    manager.subscribe(late, "*.b")
+    assert await manager.publish("a.b", "second") == 2
+    manager.unsubscribe(early, "a.*")
+    assert await manager.publish("a.b", "third") == 1
+    assert late.sent == ["second", "third"]
+
+
+async def test_subscriptions_cleaned_up_on_disconnect():
+    """测试取消订阅和断开连接后倒排索引被清理"""
+    manager = ConnectionManager(queue_size=0)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "alice")
+    manager.subscribe(websocket, "orders.42")
+    manager.subscribe(websocket, "news.*")
+
+    assert manager.unsubscribe(websocket, "orders.42") is True
+    assert manager.unsubscribe(websocket, "orders.42") is False
+    assert "orders.42" not in manager.channels
+
+    record = manager.registry.get(websocket)
+    manager.disconnect(websocket)
+    assert manager.patterns == {}
+    assert record.subscriptions is None
+    assert manager.subscribe(websocket, "news.*") is False, "未注册的连接不能订阅"
+
+
+async def test_subscription_limit():
+    """测试每个连接的订阅数量上限"""
+    manager = ConnectionManager(queue_size=0, max_subscriptions=2)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "alice")
+
+    assert manager.subscribe(websocket, "a") is True
+    assert manager.subscribe(websocket, "b") is True
+    assert manager.subscribe(websocket, "a") is True, "重复订阅不占用额度"
+    assert manager.subscribe(websocket, "c") is False
+    assert manager.get_subscriptions(websocket) == {"a", "b"}
+
+
+# ==================== 连接注册表测试 ====================
+
+async def test_registry_counters_and_user_pages():
+    """测试连接数 / 用户数计数、累计计数和按页获取在线用户"""
+    manager = ConnectionManager(queue_size=0)
+    sockets = [FakeWebSocket() for _ in range(5)]
+    for index, websocket in enumerate(sockets):
+        # user0 有两个连接
+        await manager.connect(websocket, f"user{max(index - 1, 0)}")
+
+    assert manager.get_total_connections_count() == 5
+    assert manager.get_connected_users_count() == 4
+    assert manager.get_user_connections_count("user0") == 2
+    assert manager.get_connected_users_page(0, 3) == ["user0", "user1", "user2"]
+    assert manager.get_connected_users_page(3, 3) == ["user3"]
+    assert manager.get_connected_users_page(10, 3) == []
+
+    manager.disconnect(sockets[0])
+    manager.disconnect(sockets[0])
+    assert manager.get_user_connections_count("user0") == 1
+    manager.disconnect(sockets[1])
+    assert not manager.is_user_connected("user0")
+    assert manager.get_connected_users_page(0, 10) == ["user1", "user2", "user3"]
+    assert manager.stats() == {
+        "connections": 3,
+        "users": 3,
+        "channels": 0,
+        "patterns": 0,
+        "connects_total": 5,
+        "disconnects_total": 2,
+    }
+    assert manager.active_connections == {
+        "user1": {sockets[2]},
+        "user2": {sockets[3]},
+        "user3": {sockets[4]},
+    }
+
+
+async def test_idle_queue_has_no_writer_task():
+    """测试出站队列的写协程只在有待发送消息时存在"""
+    manager = ConnectionManager(queue_size=10)
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "user1")
+    queue = manager.registry.get(websocket).queue
+    assert queue._task is None
+
+    await manager.send_personal_message("first", "user1")
+    await manager.send_personal_message("second", "user1")
+    assert queue._task is not None
+    await drain()
+
+    assert websocket.sent == ["first", "second"]
+    assert queue._task is None and len(queue) == 0
+
+    await manager.send_personal_message("third", "user1")
+    await drain()
+    assert websocket.sent[-1] == "third"
+    manager.disconnect(websocket)
@@ -0,0 +1,205 @@
+"""
+WebSocket 消息回放测试模块
+
+测试个人消息序号和断线续传，包括：
+- 进程内回放缓冲区：递增序号、按序号补发、缺口超出缓冲区、过期清除
+- 连接管理器：个人消息带序号、续传时先补发再发送暂存的推送消息
+- /ws/{user_id}?last_seq= 端点只补发缺失的消息
+- 默认配置不启用回放
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.main import app
+from app.websocket import ConnectionManager, InMemoryReplayBuffer, manager
+from app.websocket import replay as replay_module
+
+
+class FakeWebSocket:
+    """记录发送内容的模拟 WebSocket 连接"""
+
+    def __init__(self):
+        self.sent: List[Any] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+# ==================== 回放缓冲区测试 ====================
+
+async def test_sequences_increase_per_user():
+    """测试每个用户的序号独立递增，且不修改原消息"""
+    buffer = InMemoryReplayBuffer(size=10, ttl=60)
+    message = {"type": "notice"}
+
+    first = await buffer.append("alice", message)
+    second = await buffer.append("alice", message)
+    other = await buffer.append("bob", message)
+
+    assert second["seq"] == first["seq"] + 1
+    assert "seq" not in message
+    assert other["seq"] > 0
+    assert len(buffer) == 2
+
+
+async def test_since_returns_only_the_gap():
+    """测试只返回 last_seq 之后的消息，已是最新时返回空列表"""
+    buffer = InMemoryReplayBuffer(size=10, ttl=60)
+    seqs = [(await buffer.append("alice", {"n": index}))["seq"] for index in range(5)]
+
+    missed = await buffer.since("alice", seqs[1])
+    assert [message["n"] for message in missed] == [2, 3, 4]
+    assert await buffer.since("alice", seqs[-1]) == []
+
+
+async def test_since_reports_unrecoverable_gaps():
+    """测试消息已被挤出缓冲区、序号超前或用户没有缓冲区时返回 None"""
+    buffer = InMemoryReplayBuffer(size=3, ttl=60)
+    seqs = [(await buffer.append("alice", {"n": index}))["seq"] for index in range(5)]
+
+    # 缓冲区只剩 n=2..4，客户端停在 n=0 时 n=1 已丢失
+    assert await buffer.since("alice", seqs[0]) is None
+    assert [message["n"] for message in await buffer.since("alice", seqs[1])] == [2, 3, 4]
+    assert await buffer.since("alice", seqs[-1] + 1) is None
+    assert await buffer.since("nobody", 0) is None
+
+
+async def test_expired_buffers_are_dropped(monkeypatch):
+    """测试超过 ttl 没有新消息的缓冲区被清除，重建后序号继续增大"""
+    now = [1000.0]
+    monkeypatch.setattr(replay_module.time, "monotonic", lambda: now[0])
+    buffer = InMemoryReplayBuffer(size=10, ttl=60)
+    old = await buffer.append("alice", {"n": 0})
+
+    now[0] += 61
+    assert await buffer.since("alice", old["seq"]) is None
+    await buffer.append("bob", {"n": 0})
+    assert len(buffer) == 1
+
+    monkeypatch.setattr(replay_module, "initial_sequence", lambda: old["seq"] + 100)
+    new = await buffer.append("alice", {"n": 1})
+    assert new["seq"] > old["seq"]
+
+
+def test_buffer_size_must_be_positive():
+    """测试缓冲区大小必须大于 0"""
+    with pytest.raises(ValueError):
+        InMemoryReplayBuffer(size=0)
+
+
+# ==================== 连接管理器测试 ====================
+
+async def test_personal_messages_are_sequenced_while_offline():
+    """测试用户不在线时个人消息仍然保存，重连后补发"""
+    manager_ = ConnectionManager(queue_size=0, replay=InMemoryReplayBuffer(size=10, ttl=60))
+    websocket = FakeWebSocket()
+    await manager_.connect(websocket, "alice")
+    await manager_.send_personal_message({"n": 0}, "alice")
+    last_seq = websocket.sent[-1]["seq"]
+    manager_.disconnect(websocket)
+
+    assert await manager_.send_personal_message({"n": 1}, "alice") is False
+    assert await manager_.send_personal_message("纯文本消息不带序号", "alice") is False
+
+    reconnected = FakeWebSocket()
+    await manager_.connect(reconnected, "alice", resume=True)
+    assert await manager_.resume(reconnected, last_seq) == 1
+    assert reconnected.sent == [{"n": 1, "seq": last_seq + 1}]
+
+
+async def test_resume_flushes_held_messages_in_order():
+    """测试补发期间推送的消息暂存，补发后按序号顺序发送且不重复"""
+    buffer = InMemoryReplayBuffer(size=10, ttl=60)
+    manager_ = ConnectionManager(queue_size=0, replay=buffer)
+    last_seq = (await buffer.append("alice", {"n": 0}))["seq"]
+    await buffer.append("alice", {"n": 1})
+
+    websocket = FakeWebSocket()
+    await manager_.connect(websocket, "alice", resume=True)
+    # 连接注册后、补发前到达的消息：已写入缓冲区（会被补发），同时暂存在连接上
+    await manager_.send_personal_message({"n": 2}, "alice")
+    await manager_.broadcast({"type": "broadcast"})
+    assert websocket.sent == []
+
+    assert await manager_.resume(websocket, last_seq) == 2
+    await manager_.send_personal_message({"n": 3}, "alice")
+
+    received = [message.get("n", message.get("type")) for message in websocket.sent]
+    assert received == [1, 2, "broadcast", 3]
+    assert manager_._held_connections == 0
+
+
+async def test_resume_without_replay_buffer_fails():
+    """测试未配置回放缓冲区时续传失败，暂存的消息仍然发送"""
+    manager_ = ConnectionManager(queue_size=0)
+    websocket = FakeWebSocket()
+    await manager_.connect(websocket, "alice", resume=True)
+    await manager_.send_personal_message({"n": 0}, "alice")
+
+    assert await manager_.resume(websocket, 0) is None
+    assert websocket.sent == [{"n": 0}]
+
+
+async def test_disconnect_while_holding_releases_counter():
+    """测试续传完成前断开连接不会遗留暂存状态"""
+    manager_ = ConnectionManager(queue_size=0, replay=InMemoryReplayBuffer())
+    websocket = FakeWebSocket()
+    await manager_.connect(websocket, "alice", resume=True)
+    manager_.disconnect(websocket)
+
+    assert manager_._held_connections == 0
+
+
+# ==================== 端点测试 ====================
+
+@pytest.fixture
+def replay_buffer(monkeypatch):
+    """为全局连接管理器启用进程内回放缓冲区（默认配置不回放）"""
+    buffer = InMemoryReplayBuffer(size=10, ttl=60)
+    monkeypatch.setattr(manager, "replay", buffer)
+    return buffer
+
+
+def test_replay_disabled_by_default():
+    """测试默认配置不创建回放缓冲区，个人消息不带序号"""
+    assert replay_module.create_replay_buffer() is None
+
+
+def test_websocket_resume_receives_only_the_gap(replay_buffer):
+    """测试带 last_seq 重连时只收到缺失的消息，之后是续传结果"""
+    user_id = "replay_endpoint_user"
+    seqs = [
+        asyncio.run(replay_buffer.append(user_id, {"type": "notice", "n": index}))["seq"]
+        for index in range(3)
+    ]
+
+    client = TestClient(app)
+    with client.websocket_connect(f"/ws/{user_id}?last_seq={seqs[0]}") as websocket:
+        assert websocket.receive_json()["type"] == "welcome"
+        assert [websocket.receive_json()["n"] for _ in range(2)] == [1, 2]
+        assert websocket.receive_json() == {"type": "resumed", "last_seq": seqs[0], "replayed": 2}
+
+
+def test_websocket_resume_reports_unrecoverable_gap(replay_buffer):
+    """测试缺口无法补齐时回复 resume_failed"""
+    client = TestClient(app)
+    with client.websocket_connect("/ws/replay_unknown_user?last_seq=5") as websocket:
+        assert websocket.receive_json()["type"] == "welcome"
+        assert websocket.receive_json() == {"type": "resume_failed", "last_seq": 5}
@@ -0,0 +1,242 @@
+"""
+WebSocket 消息路由测试模块
+
+测试消息分发、限流和并发处理，包括：
+- 按消息类型分发、Schema 验证、未注册类型、处理异常
+- 子类复制路由并扩展消息类型
+- 令牌桶限流
+- 处理器的入站限流和并发消息处理
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.schemas.websocket_schema import WebSocketMessage
+from app.websocket import MessageRouter, SimpleWebSocketHandler, TokenBucket, WebSocketHandler
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingHandler:
+    """记录发送内容的处理器替身"""
+
+    def __init__(self):
+        self.user_id = "tester"
+        self.sent: List[Any] = []
+
+    async def send_message(self, message: Any) -> None:
+        self.sent.append(message)
+
+    async def send_error(self, error_message: str, error_code: Optional[str] = None) -> None:
+        self.sent.append({"type": "error", "message": error_message, "code": error_code})
+
+
+class FakeWebSocket:
+    """
+    模拟 WebSocket 连接：依次返回预设的客户端消息，稍等片刻后断开
+    （让出站队列中的回复和并发处理中的消息完成）
+
+    Args:
+        messages: 客户端消息
+    """
+
+    def __init__(self, messages: List[str]):
+        self.scope: Dict[str, Any] = {}
+        self.incoming = list(messages)
+        self.sent: List[Any] = []
+
+    async def accept(self, subprotocol: Optional[str] = None) -> None:
+        pass
+
+    async def receive_text(self) -> str:
+        # 让出事件循环，模拟网络等待
+        await asyncio.sleep(0)
+        if not self.incoming:
+            await asyncio.sleep(0.05)
+            raise WebSocketDisconnect(1000)
+        return self.incoming.pop(0)
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class ChatMessage(WebSocketMessage):
+    """测试用聊天消息"""
+
+    room: str
+    text: str
+
+
+# ==================== 路由测试 ====================
+
+async def test_dispatch_validates_schema():
+    """测试按类型分发并用 Schema 验证消息"""
+    router = MessageRouter()
+    received: List[ChatMessage] = []
+
+    @router.route("chat", schema=ChatMessage)
+    async def handle_chat(handler: Any, message: ChatMessage) -> None:
+        received.append(message)
+
+    handler = RecordingHandler()
+    await router.dispatch(handler, json.dumps({"type": "chat", "room": "lobby", "text": "hi"}))
+    await router.dispatch(handler, json.dumps({"type": "chat", "room": "lobby"}))
+
+    assert [message.text for message in received] == ["hi"]
+    assert handler.sent == [
+        {"type": "error", "message": "消息格式错误: text: Field required", "code": "INVALID_MESSAGE"}
+    ]
+
+
+async def test_dispatch_unknown_type_and_handler_error():
+    """测试未注册的消息类型和处理函数异常都回复错误"""
+    router = MessageRouter()
+
+    @router.route("boom")
+    async def handle_boom(handler: Any, message: Dict[str, Any]) -> None:
+        raise RuntimeError("失败")
+
+    handler = RecordingHandler()
+    await router.dispatch(handler, json.dumps({"type": "missing"}))
+    await router.dispatch(handler, "不是 JSON")
+    await router.dispatch(handler, json.dumps({"type": "boom"}))
+
+    assert [message["code"] for message in handler.sent] == [
+        "UNKNOWN_MESSAGE_TYPE",
+        "UNKNOWN_MESSAGE_TYPE",
+        "MESSAGE_PROCESSING_ERROR",
+    ]
+
+
+async def test_fallback_receives_non_object_messages():
+    """测试非 JSON 对象的消息以 text 类型进入 fallback"""
+    router = MessageRouter()
+    seen: List[Any] = []
+
+    @router.fallback()
+    async def handle_default(handler: Any, data: Dict[str, Any], message: str) -> None:
+        seen.append((data, message))
+
+    handler = RecordingHandler()
+    await router.dispatch(handler, "[1, 2]")
+    await router.dispatch(handler, json.dumps({"type": 3}))
+
+    assert seen == [
+        ({"type": "text", "content": "[1, 2]"}, "[1, 2]"),
+        ({"type": 3}, '{"type": 3}'),
+    ]
+
+
+async def test_subclass_extends_copied_router():
+    """测试子类复制路由后追加消息类型，不影响父类"""
+
+    class ChatHandler(SimpleWebSocketHandler):
+        router = SimpleWebSocketHandler.router.copy()
+
+        @router.route("chat", schema=ChatMessage)
+        async def handle_chat(self, message: ChatMessage) -> None:
+            await self.send_message({"type": "chat_ack", "room": message.room})
+
+    assert "chat" in ChatHandler.router.routes
+    assert "ping" in ChatHandler.router.routes
+    assert "chat" not in SimpleWebSocketHandler.router.routes
+
+    websocket = FakeWebSocket([
+        json.dumps({"type": "chat", "room": "lobby", "text": "hi"}),
+        json.dumps({"type": "ping", "timestamp": 7}),
+    ])
+    await ChatHandler("router_user", rate_limit=0).handle_connection(websocket)
+
+    assert websocket.sent[1:] == [
+        {"type": "chat_ack", "room": "lobby"},
+        {"type": "pong", "timestamp": 7},
+    ]
+
+
+def test_handler_without_router_requires_on_message():
+    """测试未设置 router 的处理器仍然要求实现 on_message"""
+    with pytest.raises(NotImplementedError):
+        asyncio.run(WebSocketHandler("user").on_message("{}"))
+
+
+# ==================== 限流测试 ====================
+
+def test_token_bucket_refills_over_time():
+    """测试令牌桶的突发容量和按时间补充"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=3, clock=clock)
+
+    assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.consume() is True
+    assert bucket.consume() is False
+    clock.now += 10
+    assert [bucket.consume() for _ in range(4)] == [True, True, True, False]
+
+
+async def test_handler_rate_limits_flood():
+    """测试超过速率的消息被丢弃，且只回复一次限流错误"""
+    flood = [json.dumps({"type": "ping", "timestamp": index}) for index in range(10)]
+    websocket = FakeWebSocket(flood)
+    handler = SimpleWebSocketHandler("flood_user", rate_limit=0.001, rate_limit_burst=3)
+    await handler.handle_connection(websocket)
+
+    replies = websocket.sent[1:]
+    assert [reply["timestamp"] for reply in replies if reply["type"] == "pong"] == [0, 1, 2]
+    assert [reply.get("code") for reply in replies if reply["type"] == "error"] == ["RATE_LIMITED"]
+
+
+# ==================== 并发处理测试 ====================
+
+class SlowHandler(WebSocketHandler):
+    """每条消息处理耗时固定时间，并记录同时处理的消息数"""
+
+    router = MessageRouter()
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.active = 0
+        self.peak = 0
+        self.done: List[int] = []
+
+    @router.route("work")
+    async def handle_work(self, message: Dict[str, Any]) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.done.append(message["id"])
+
+
+@pytest.mark.parametrize("concurrency, expected_peak", [(1, 1), (3, 3)])
+async def test_bounded_concurrent_processing(concurrency, expected_peak):
+    """测试同一连接同时处理的消息数不超过上限"""
+    messages = [json.dumps({"type": "work", "id": index}) for index in range(8)]
+    websocket = FakeWebSocket(messages)
+    handler = SlowHandler("worker_user", max_concurrency=concurrency, rate_limit=0)
+    await handler.handle_connection(websocket)
+
+    assert handler.peak == expected_peak
+    assert sorted(handler.done) == list(range(8))
+    assert not handler._tasks